@@ -0,0 +1,53 @@
+"""add metric rollups and gauges for the admin dashboard
+
+Revision ID: a3d8e6f29c17
+Revises: f1c6a8d3b274
+Create Date: 2026-10-17 01:26:05.117842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8e6f29c17'
+down_revision: Union[str, Sequence[str], None] = 'f1c6a8d3b274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'metric_rollups',
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.BigInteger(), nullable=False),
+        sa.Column('notes_created', sa.Integer(), nullable=False),
+        sa.Column('tasks_created', sa.Integer(), nullable=False),
+        sa.Column('api_calls', sa.Integer(), nullable=False),
+        sa.Column('audio_seconds', sa.BigInteger(), nullable=False),
+        sa.Column('deposits', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start'),
+    )
+    op.create_table(
+        'metric_gauges',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    # Time-range scans for rolling up hours and for the live tail
+    op.create_index(op.f('ix_tasks_created_at'), 'tasks', ['created_at'], unique=False)
+    op.create_index(op.f('ix_usage_logs_timestamp'), 'usage_logs', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_transactions_created_at'), 'transactions', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transactions_created_at'), table_name='transactions')
+    op.drop_index(op.f('ix_usage_logs_timestamp'), table_name='usage_logs')
+    op.drop_index(op.f('ix_tasks_created_at'), table_name='tasks')
+    op.drop_table('metric_gauges')
+    op.drop_table('metric_rollups')
@@ -0,0 +1,46 @@
+"""add credit reservations ledger
+
+Revision ID: a7d2e9c41b58
+Revises: f3a9c1d2e4b7
+Create Date: 2026-10-16 21:40:12.508713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e9c41b58'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c1d2e4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallets', sa.Column('reserved', sa.Integer(), server_default='0', nullable=False))
+    op.create_table(
+        'credit_reservations',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('wallet_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('reference_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.BigInteger(), nullable=True),
+        sa.Column('expires_at', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_credit_reservations_wallet_id'), 'credit_reservations', ['wallet_id'], unique=False)
+    op.create_index('idx_credit_reservations_status_expires', 'credit_reservations', ['status', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_credit_reservations_status_expires', table_name='credit_reservations')
+    op.drop_index(op.f('ix_credit_reservations_wallet_id'), table_name='credit_reservations')
+    op.drop_table('credit_reservations')
+    op.drop_column('wallets', 'reserved')
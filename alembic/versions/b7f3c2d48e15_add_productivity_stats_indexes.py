@@ -0,0 +1,40 @@
+"""add covering indexes for task statistics and the productivity pulse
+
+Revision ID: b7f3c2d48e15
+Revises: a3d8e6f29c17
+Create Date: 2026-10-17 02:14:37.402916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f3c2d48e15'
+down_revision: Union[str, Sequence[str], None] = 'a3d8e6f29c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_tasks_user_active_stats',
+        'tasks',
+        ['user_id', 'is_deleted', 'is_done', 'priority', 'deadline'],
+        unique=False,
+    )
+    op.create_index(
+        'idx_notes_user_active_status',
+        'notes',
+        ['user_id', 'is_deleted', 'status'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_notes_user_active_status', table_name='notes')
+    op.drop_index('idx_tasks_user_active_stats', table_name='tasks')
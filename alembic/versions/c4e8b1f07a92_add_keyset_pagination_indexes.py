@@ -0,0 +1,40 @@
+"""add keyset pagination indexes for notes and tasks
+
+Revision ID: c4e8b1f07a92
+Revises: a7d2e9c41b58
+Create Date: 2026-10-16 22:31:05.114870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8b1f07a92'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e9c41b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_notes_user_active_timestamp_id',
+        'notes',
+        ['user_id', 'is_deleted', sa.text('timestamp DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'idx_tasks_user_active_deadline_id',
+        'tasks',
+        ['user_id', 'is_deleted', 'deadline', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_tasks_user_active_deadline_id', table_name='tasks')
+    op.drop_index('idx_notes_user_active_timestamp_id', table_name='notes')
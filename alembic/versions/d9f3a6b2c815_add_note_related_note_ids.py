@@ -0,0 +1,28 @@
+"""add precomputed related note ids
+
+Revision ID: d9f3a6b2c815
+Revises: c4e8b1f07a92
+Create Date: 2026-10-16 23:18:44.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3a6b2c815'
+down_revision: Union[str, Sequence[str], None] = 'c4e8b1f07a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('related_note_ids', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'related_note_ids')
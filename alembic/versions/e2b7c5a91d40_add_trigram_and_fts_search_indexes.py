@@ -0,0 +1,63 @@
+"""add trigram and full-text search indexes for notes and tasks
+
+Revision ID: e2b7c5a91d40
+Revises: d9f3a6b2c815
+Create Date: 2026-10-16 23:52:37.640193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c5a91d40'
+down_revision: Union[str, Sequence[str], None] = 'd9f3a6b2c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index(
+        'idx_notes_title_trgm', 'notes', ['title'],
+        unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'idx_tasks_description_trgm', 'tasks', ['description'],
+        unique=False, postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+    # Generated full-text vectors (title weighted above body), 'simple' config
+    # because notes are multilingual. Not mapped on the models; see
+    # app/services/text_search.py.
+    op.execute(
+        """
+        ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(summary, '')), 'B')
+        ) STORED
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index('idx_notes_search_vector', 'notes', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('idx_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_tasks_search_vector', table_name='tasks')
+    op.drop_index('idx_notes_search_vector', table_name='notes')
+    op.drop_column('tasks', 'search_vector')
+    op.drop_column('notes', 'search_vector')
+    op.drop_index('idx_tasks_description_trgm', table_name='tasks')
+    op.drop_index('idx_notes_title_trgm', table_name='notes')
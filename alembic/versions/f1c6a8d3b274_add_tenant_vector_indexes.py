@@ -0,0 +1,43 @@
+"""add tenant_vector_indexes for per-tenant partial HNSW indexes
+
+Revision ID: f1c6a8d3b274
+Revises: e2b7c5a91d40
+Create Date: 2026-10-17 00:41:12.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a8d3b274'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c5a91d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only the bookkeeping table: the per-tenant indexes themselves are built
+    # CONCURRENTLY, outside a migration transaction, by
+    # scripts/db/tenant_vector_indexes.py (or the daily beat job).
+    op.create_table(
+        'tenant_vector_indexes',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('index_name', sa.String(length=63), nullable=False),
+        sa.Column('note_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+        sa.UniqueConstraint('index_name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop the tracked partial indexes too, or they would be orphaned
+    bind = op.get_bind()
+    for (index_name,) in bind.execute(sa.text("SELECT index_name FROM tenant_vector_indexes")):
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.drop_table('tenant_vector_indexes')
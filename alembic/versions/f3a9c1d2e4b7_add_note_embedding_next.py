@@ -0,0 +1,29 @@
+"""add note embedding_next shadow column
+
+Revision ID: f3a9c1d2e4b7
+Revises: eb0754a08322
+Create Date: 2026-10-16 10:12:45.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c1d2e4b7'
+down_revision: Union[str, Sequence[str], None] = 'eb0754a08322'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('embedding_next', Vector(dim=384), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'embedding_next')
@@ -1,6 +1,6 @@
 import os
 import time
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Request, Body, HTTPException, status
 from slowapi.util import get_remote_address
@@ -11,6 +11,7 @@ from app.db.session import get_db
 from app.schemas import note as note_schema
 from app.services.ai_service import AIService
 from app.services.auth_service import get_current_user
+from app.services.vector_search import PROFILES
 from app.utils.json_logger import JLogger
 from app.utils.user_roles import is_admin
 from app.core.limiter import limiter
@@ -23,19 +24,28 @@ async def semantic_search(
     request: Request,
     query: str = Body(None, embed=True),
     limit: int = Body(10, embed=True),
+    profile: Optional[str] = Body(None, embed=True),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
     POST /api/v1/ai/search: Semantic RAG search across user's notes and tasks.
+    `profile` (fast | balanced | accurate) trades latency for recall.
     """
     if not query or not query.strip():
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Validation failed: Search query cannot be empty",
         )
+    if profile is not None and profile not in PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Validation failed: profile must be one of {', '.join(PROFILES)}",
+        )
     ai_service = AIService()
-    results = ai_service.perform_semantic_search(db, current_user.id, query, limit)
+    results = await ai_service.perform_semantic_search_async(
+        db, current_user.id, query, limit, profile=profile
+    )
     # Return just the notes for simplicity (or customize as needed)
     return [r["note"] for r in results]
 
@@ -59,7 +69,7 @@ async def ask_ai_custom(
         )
     ai_service = AIService()
     try:
-        answer = ai_service.answer_question(db, current_user.id, question)
+        answer = await ai_service.answer_question_async(db, current_user.id, question)
         return {"answer": answer}
     except Exception as e:
         JLogger.error("Ask AI failed", error=str(e))
@@ -1,73 +1,63 @@
 import logging
 import time
-import math
-import jwt
-from typing import Optional
 
-from fastapi import Request, Response
+from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from starlette.background import BackgroundTask
 from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.config import location_config
 from app.db import models
 from app.db.session import SessionLocal
 from app.services.billing_service import BillingService
-from app.services.auth_service import SECRET_KEY, ALGORITHM
+from app.services.auth_cache import get_auth_cache
+from app.services.auth_service import resolve_principal
+from app.services.geofence_service import get_geofence_cache
+from app.services.usage_recorder import UsageEvent, get_usage_recorder
 from app.utils.json_logger import JLogger
 
 logger = logging.getLogger("VoiceNote.Usage")
 
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+class UsageTrackingMiddleware:
     """
-    Haversine formula to calculate the distance between two points on Earth in meters.
+    Pure ASGI usage metering: balance pre-check (402) before the request, and
+    one buffered UsageEvent after it. Logs and wallet debits are written in
+    batches by the UsageRecorder, never on the request path.
     """
-    R = 6371000  # radius of Earth in meters
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
 
-    a = (
-        math.sin(delta_phi / 2) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+    SKIP_PATHS = {"/", "/health", "/metrics", "/docs", "/openapi.json"}
 
-
-class UsageTrackingMiddleware(BaseHTTPMiddleware):
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Pass through check for non-HTTP and health/metrics endpoints
+        if scope["type"] != "http" or scope["path"] in self.SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
-        # Pass through check for health/metrics endpoints
-        if request.url.path in ["/", "/health", "/metrics", "/docs", "/openapi.json"]:
-            return await call_next(request)
+        start_time = time.time()
+        # Shares scope["state"] with the route, so the decoded principal is reused
+        request = Request(scope)
 
         # 1. Capture User ID and Geolocation
         user_id = getattr(request.state, "user_id", None)
         if not user_id:
             user_id = request.headers.get("X-User-ID", "anonymous")
 
-        gps_header = request.headers.get("x-gps-coords") or request.headers.get("X-GPS-Coords")
-        
+        gps_header = request.headers.get("x-gps-coords")
+
         corporate_wallet_id = None
-        
-        # Token extraction for early auth
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                user_id = payload.get("sub")
-                request.state.user_id = user_id 
-            except Exception as e:
-                JLogger.debug("Middleware: Token decode failed", error=str(e))
+
+        # Early auth: decoded once here and reused by the auth dependencies
+        principal = resolve_principal(request)
+        issued_at = None
+        if principal.user_id and not principal.dev_bypass and not principal.from_cookie:
+            user_id = principal.user_id
+            issued_at = principal.issued_at
+            request.state.user_id = user_id
+        elif principal.error and principal.error != "missing" and not principal.from_cookie:
+            JLogger.debug("Middleware: Token decode failed", error=principal.error)
 
         # COST ESTIMATION - Only charge for mutations
         cost_map = {
@@ -88,129 +78,82 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
                     estimated_cost = cost
                     break
 
-        db = None
-        try:
-            if user_id != "anonymous" and (gps_header or estimated_cost > 0):
-                def get_user_and_check_billing():
-                    nonlocal corporate_wallet_id
-                    _db = SessionLocal()
-                    try:
-                        user = _db.query(models.User).filter(models.User.id == user_id).first()
-                        if not user:
-                            return None, None
-
-                        # Eagerly load roles/tier to avoid detached session issues later
-                        _ = user.tier 
-                        
-                        if user.org_id and gps_header:
-                            try:
-                                lat_str, lon_str = gps_header.split(",")
-                                user_lat, user_lon = float(lat_str), float(lon_str)
-                                locations = (
-                                    _db.query(models.WorkLocation)
-                                    .filter(models.WorkLocation.org_id == user.org_id)
-                                    .all()
-                                )
-                                for loc in locations:
-                                    dist = calculate_distance(user_lat, user_lon, loc.latitude, loc.longitude)
-                                    effective_radius = max(loc.radius, location_config.DEFAULT_GEOFENCE_RADIUS)
-                                    if dist <= effective_radius:
-                                        org = _db.query(models.Organization).filter(models.Organization.id == user.org_id).first()
-                                        if org: 
-                                            corporate_wallet_id = org.corporate_wallet_id
-                                        break
-                            except Exception:
-                                pass
-
-                        if estimated_cost > 0:
-                            if user.tier == models.SubscriptionTier.PREMIUM and "/api/v1/notes" in request.url.path:
-                                return user, 0 # Free for premium
-
-                            billing = BillingService(_db)
-                            target_wallet = corporate_wallet_id or user_id
-                            if not billing.check_balance(target_wallet, estimated_cost, for_update=True):
-                                return user, -1 # Insufficient balance
-                        
-                        return user, estimated_cost
-                    finally:
-                        _db.close()
-
+        if user_id != "anonymous" and (gps_header or estimated_cost > 0):
+            def get_user_and_check_billing():
+                nonlocal corporate_wallet_id
+                _db = SessionLocal()
                 try:
-                    user, final_cost = await run_in_threadpool(get_user_and_check_billing)
-                    # Note: We don't set request.state.user to the thread-loaded user 
-                    # because relationships (like user.teams) will fail if accessed later.
-                    # Instead, we just use it for middleware-level billing checks.
-                    
-                    if final_cost == -1:
-                        return JSONResponse(
-                            status_code=402,
-                            content={"detail": "Payment Required: balance depleted."},
-                        )
-                    estimated_cost = final_cost if final_cost is not None else estimated_cost
-                except Exception as inner_e:
-                    JLogger.warning(f"Middleware user/billing check failed: {inner_e}")
-                    # Allow request to proceed if billing check fails unexpectedly 
-                    # (it's better to log a free call than crash the app)
-                    pass
-
-            response = await call_next(request)
-        except Exception as e:
-            JLogger.error(f"Middleware critical failure: {str(e)}")
-            # If call_next fails, we MUST propagate it.
-            # But we ensure it's logged as a string to avoid vars() issues.
-            raise e
-        finally:
-            pass
-
-        process_time = time.time() - start_time
-        response.background = BackgroundTask(
-            self.log_usage,
-            request,
-            response,
-            process_time,
-            user_id,
-            estimated_cost,
-            corporate_wallet_id,
-        )
-
-        return response
-
-    def log_usage(
-        self,
-        request: Request,
-        response: Response,
-        duration: float,
-        user_id: str,
-        estimated_cost: int,
-        corporate_wallet_id: Optional[str] = None,
-    ):
-        try:
-            if not request.url.path.startswith("/api/v1"):
-                return
+                    # Cached column snapshot (dict), shared with get_current_user
+                    user = get_auth_cache().load(_db, user_id, issued_at)
+                    if not user:
+                        return None, None
+
+                    if user["org_id"] and gps_header:
+                        try:
+                            lat_str, lon_str = gps_header.split(",")
+                            user_lat, user_lon = float(lat_str), float(lon_str)
+                            # Compiled per org and cached; no queries on a warm cache
+                            geofence = get_geofence_cache().get(_db, user["org_id"])
+                            if geofence is not None and geofence.contains(user_lat, user_lon):
+                                corporate_wallet_id = geofence.corporate_wallet_id
+                        except Exception:
+                            pass
+
+                    if estimated_cost > 0:
+                        if user["tier"] == models.SubscriptionTier.PREMIUM and "/api/v1/notes" in request.url.path:
+                            return user, 0 # Free for premium
+
+                        billing = BillingService(_db)
+                        target_wallet = corporate_wallet_id or user_id
+                        # Lock-free read; buffered charges never take a wallet below zero
+                        if not billing.check_balance(target_wallet, estimated_cost):
+                            return user, -1 # Insufficient balance
+
+                    return user, estimated_cost
+                finally:
+                    _db.close()
 
-            db = SessionLocal()
             try:
-                if response.status_code < 400 and estimated_cost > 0 and user_id != "anonymous":
-                    billing = BillingService(db)
-                    billing.charge_usage(
-                        user_id,
-                        estimated_cost,
-                        f"API Call: {request.url.path}",
-                        override_wallet_id=corporate_wallet_id,
+                user, final_cost = await run_in_threadpool(get_user_and_check_billing)
+                # Note: `user` is a column snapshot, not an ORM instance, so it is
+                # only used for middleware-level billing checks.
+
+                if final_cost == -1:
+                    response = JSONResponse(
+                        status_code=402,
+                        content={"detail": "Payment Required: balance depleted."},
                     )
+                    await response(scope, receive, send)
+                    return
+                estimated_cost = final_cost if final_cost is not None else estimated_cost
+            except Exception as inner_e:
+                JLogger.warning(f"Middleware user/billing check failed: {inner_e}")
+                # Allow request to proceed if billing check fails unexpectedly
+                # (it's better to log a free call than crash the app)
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            JLogger.error(f"Middleware critical failure: {str(e)}")
+            # The error must propagate; it is logged as a string to avoid vars() issues
+            raise
 
-                log_entry = models.UsageLog(
+        if request.url.path.startswith("/api/v1"):
+            get_usage_recorder().record(
+                UsageEvent(
                     user_id=user_id if user_id != "anonymous" else None,
                     endpoint=request.url.path,
-                    duration_seconds=int(duration),
-                    status=response.status_code,
+                    status=status_code,
+                    duration_seconds=int(time.time() - start_time),
+                    cost=estimated_cost,
+                    corporate_wallet_id=corporate_wallet_id,
                 )
-                db.add(log_entry)
-                db.commit()
-            except Exception as e:
-                JLogger.warning(f"Usage logging internal error: {e}")
-            finally:
-                db.close()
-        except Exception as outer_e:
-            import logging
-            logging.error(f"Usage logging critical failure: {outer_e}")
+            )
@@ -12,6 +12,7 @@ from fastapi import (
     HTTPException,
     Query,
     Request,
+    Response,
     UploadFile,
     status,
 )
@@ -24,6 +25,7 @@ from app.schemas import note as note_schema
 from app.services.auth_service import get_current_user
 from app.services.note_service import NoteService
 from app.utils.billing_utils import check_credit_balance, requires_tier
+from app.utils.pagination import set_next_cursor
 from app.utils.security import verify_device_signature
 from app.services.deletion_service import DeletionService
 from app.services.ai_service import AIService
@@ -138,13 +140,17 @@ def bulk_move_notes(
 @limiter.limit("60/minute")
 def list_notes(
     request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """GET /: Returns accessible notes for the user."""
-    return NoteService.list_notes(db, current_user, skip, limit)
+    notes = NoteService.list_notes(db, current_user, skip, limit, cursor=cursor)
+    set_next_cursor(response, notes, limit, "timestamp", "id")
+    return notes
 @router.get("/{note_id}", response_model=note_schema.NoteResponse)
 def get_note(
     note_id: str,
@@ -200,7 +206,7 @@ async def ask_ai(
     NoteService.verify_note_access(db, current_user, note_id)
     
     ai_service = AIService()
-    answer = ai_service.answer_question(db, current_user.id, question, note_id=note_id)
+    answer = await ai_service.answer_question_async(db, current_user.id, question, note_id=note_id)
     return {"answer": answer}
 
 
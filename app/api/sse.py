@@ -15,6 +15,8 @@ async def sse_events(
     """
     Server-Sent Events endpoint for real-time team and user notifications.
     Clients (Kotlin app) should connect here to receive live updates.
+    With EVENT_COALESCE_WINDOW_MS > 0, bursts arrive as one EVENT_BATCH
+    message whose "events" list holds the individual events in order.
     """
     # Collect all team IDs the user belongs to
     team_ids = [team.id for team in current_user.teams]
@@ -12,10 +12,12 @@ from fastapi import (
     HTTPException,
     Query,
     Request,
+    Response,
     UploadFile,
     status,
 )
 from app.core.limiter import limiter
+from sqlalchemy import func, or_, tuple_
 from sqlalchemy.orm import Session, joinedload
 
 from app.db import models
@@ -24,7 +26,9 @@ from app.schemas import task as task_schema
 from app.services.auth_service import get_current_user
 from app.services.deletion_service import DeletionService
 from app.services.task_service import TaskService
+from app.services.text_search import like_pattern, prefix_tsquery, task_search_vector, tsquery, uses_postgres
 from app.utils.json_logger import JLogger
+from app.utils.pagination import decode_cursor, set_next_cursor
 from app.utils.security import verify_note_ownership, verify_task_ownership
 from app.services.broadcaster import broadcaster
 from app.worker.task import broadcast_team_update, process_task_image_pipeline  # Sync helper
@@ -143,6 +147,7 @@ def create_task(
 
 @router.get("", response_model=List[task_schema.TaskResponse])
 def list_tasks(
+    response: Response,
     user_id: Optional[str] = Query(None, description="Filter by User ID (Admin Only)"),
     note_id: Optional[str] = Query(None, description="Filter by Note ID"),
     email: Optional[str] = Query(None, description="Filter by Assigned Contact Email"),
@@ -150,6 +155,7 @@ def list_tasks(
     priority: Optional[models.Priority] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -158,17 +164,23 @@ def list_tasks(
     - Admins: See all tasks or filter by user_id.
     - Regular Users: See only their own tasks.
     - Filtering: Support for note_id, contact email, and contact phone.
+    - Ordered by deadline (tasks without one last), then id. Pass the
+      X-Next-Cursor header of a page as `cursor` to get the next one;
+      `offset` is ignored when a cursor is given.
     """
     # Query for tasks owned by user OR belonging to user's teams
     team_ids = [t.id for t in current_user.teams] + [t.id for t in current_user.owned_teams]
-    
+
+    # Without teams the filter matches idx_tasks_user_active_deadline_id exactly
+    visible = models.Task.user_id == current_user.id
+    if team_ids:
+        visible = visible | models.Task.team_id.in_(team_ids)
+
     query = (
         db.query(models.Task)
         .options(joinedload(models.Task.note))
-        .filter(
-            models.Task.is_deleted == False,
-            (models.Task.user_id == current_user.id) | (models.Task.team_id.in_(team_ids))
-        )
+        .filter(models.Task.is_deleted == False, visible)
+        .order_by(models.Task.deadline.asc().nulls_last(), models.Task.id.asc())
     )
 
     if note_id:
@@ -183,7 +195,24 @@ def list_tasks(
     if priority:
         query = query.filter(models.Task.priority == priority)
 
-    return query.limit(limit).offset(offset).all()
+    if cursor:
+        deadline, task_id = decode_cursor(cursor, 2)
+        if deadline is None:
+            # Already into the tasks without a deadline
+            query = query.filter(models.Task.deadline.is_(None), models.Task.id > task_id)
+        else:
+            query = query.filter(
+                or_(
+                    tuple_(models.Task.deadline, models.Task.id) > tuple_(deadline, task_id),
+                    models.Task.deadline.is_(None),
+                )
+            )
+    else:
+        query = query.offset(offset)
+
+    tasks = query.limit(limit).all()
+    set_next_cursor(response, tasks, limit, "deadline", "id")
+    return tasks
 
 
 @router.get("/due-today", response_model=List[task_schema.TaskResponse])
@@ -294,26 +323,31 @@ def search_tasks(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    """GET /search: Full-text search tasks by description or assigned entities."""
+    """
+    GET /search: Full-text search tasks by description or assigned entities.
+    On PostgreSQL, word-prefix matches on title/description are ranked by
+    ts_rank; plain substring matches on the description are kept too.
+    """
     if not query_text or len(query_text.strip()) < 1:
         raise HTTPException(status_code=400, detail="Search query cannot be empty")
 
-    # Search in description (case-insensitive)
-    search_pattern = f"%{query_text}%"
+    # Substring match on description (case-insensitive, trigram-indexed on PostgreSQL)
+    matches = models.Task.description.ilike(like_pattern(query_text.strip()), escape="\\")
 
-    tasks = (
-        db.query(models.Task)
-        .filter(
-            models.Task.user_id == current_user.id,
-            models.Task.is_deleted == False,
-            models.Task.description.ilike(search_pattern),
-        )
-        .limit(limit)
-        .offset(offset)
-        .all()
+    query = db.query(models.Task).filter(
+        models.Task.user_id == current_user.id,
+        models.Task.is_deleted == False,
     )
+    terms = prefix_tsquery(query_text)
+    if uses_postgres(db) and terms:
+        ts = tsquery(terms)
+        query = query.filter(or_(task_search_vector.op("@@")(ts), matches)).order_by(
+            func.ts_rank(task_search_vector, ts).desc(), models.Task.id
+        )
+    else:
+        query = query.filter(matches).order_by(models.Task.id)
 
-    return tasks
+    return query.limit(limit).offset(offset).all()
 
 
 @router.get("/stats", tags=["Analytics"], response_model=task_schema.TaskStatistics)
@@ -1,20 +1,33 @@
+import heapq
 import logging
 import os
+import subprocess
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
 
 try:
-    from pydub import AudioSegment, effects
+    from pydub import AudioSegment
 except ImportError:
     AudioSegment = None
-    effects = None
     print("Warning: pydub not available in audio.py, audio processing will fail.")
 
 
+from app.core.config import ai_config
 from app.utils.audio_quality_analyzer import AudioQualityAnalyzer
 from app.utils.json_logger import JLogger
 
 logger = logging.getLogger(__name__)
 
-from scipy.signal import butter, lfilter
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import butter, lfilter, lfilter_zi
+
+TARGET_SAMPLE_RATE = 16000  # Optimal for STT
+WAV_EXTENSIONS = (".wav", ".wave")
+STREAM_CONTEXT_SEC = 0.5  # Overlap on each side of a streamed denoise block
+STREAM_NOISE_WINDOW_SEC = 0.5  # Granularity of the noise profile search
+STREAM_NOISE_WINDOWS = 4  # Quietest windows kept for the noise profile
+TRIM_FRAME = 400  # Frame size for streaming silence trim (divides the noise window)
 
 
 def highpass(audio, sr, cutoff=80):
@@ -23,76 +36,469 @@ def highpass(audio, sr, cutoff=80):
     return lfilter(b, a, audio)
 
 
-def preprocess_audio_pipeline(input_path: str):
+class StreamingHighpass:
+    """`highpass` for block-by-block input; filter state is carried across blocks."""
+
+    def __init__(self, sr: int, cutoff: int = 80):
+        self.b, self.a = butter(2, cutoff / (sr / 2), btype="high")
+        self.zi = np.zeros(len(lfilter_zi(self.b, self.a)))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        out, self.zi = lfilter(self.b, self.a, block, zi=self.zi)
+        return out.astype(np.float32, copy=False)
+
+
+def decode_audio(input_path: str, sr: int = TARGET_SAMPLE_RATE) -> Tuple[np.ndarray, int]:
     """
-    Advanced enhancement for distant speakers:
-    Decode -> High-Pass Filter -> Noise Reduction -> Dynamic Compression -> Normalization
+    Decode an audio file exactly once into a mono float32 buffer at `sr`.
+    WAV goes through librosa/soundfile; compressed containers (m4a, 3gp, aac...)
+    are decoded by ffmpeg via pydub straight into memory, without a temp WAV.
+    """
+    import librosa
+
+    ext = os.path.splitext(input_path)[1].lower()
+    if ext in WAV_EXTENSIONS:
+        y, sr = librosa.load(input_path, sr=sr, mono=True)
+        return y.astype(np.float32, copy=False), sr
+
+    try:
+        JLogger.info(f"Decoding {ext} in memory for processing: {input_path}")
+        segment = AudioSegment.from_file(input_path).set_channels(1).set_frame_rate(sr)
+    except Exception as e:
+        JLogger.error(f"Failed to decode {ext} file: {e}")
+        raise e
+
+    full_scale = float(1 << (8 * segment.sample_width - 1))
+    y = np.array(segment.get_array_of_samples(), dtype=np.float32) / full_scale
+    return y, sr
+
+
+def dbfs(y: np.ndarray) -> float:
+    """RMS level relative to full scale (same definition as pydub's `dBFS`)."""
+    if y.size == 0:
+        return float("-inf")
+    rms = float(np.sqrt(np.mean(np.square(y, dtype=np.float64))))
+    return 20 * np.log10(rms) if rms > 0 else float("-inf")
+
+
+class DynamicRangeCompressor:
+    """
+    Vectorised, streamable equivalent of pydub's `effects.compress_dynamic_range`.
+
+    Gain reduction is computed on 1 ms frames from the RMS over the trailing
+    attack window, held for the release time and smoothed with a one-pole
+    attack filter. Everything is causal, so feeding a signal block by block
+    gives the same result as processing it in one go.
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        threshold: float = -20.0,
+        ratio: float = 4.0,
+        attack: float = 5.0,
+        release: float = 50.0,
+    ):
+        self.hop = max(1, sr // 1000)
+        self.attack_frames = max(1, int(attack))
+        self.release_half = max(0, int(release) // 2)
+        self.thresh_rms = 10 ** (threshold / 20)
+        self.slope = 1.0 - 1.0 / ratio
+        self.alpha = 1.0 - np.exp(-1.0 / self.attack_frames)
+
+        # Carried across blocks
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._power_hist = np.zeros(0)
+        self._target_hist = np.zeros(0)
+        self._zi = np.zeros(1)
+
+    def process(self, y: np.ndarray, final: bool = False) -> np.ndarray:
+        """Compress the next block. Samples short of a full frame are held back until `final`."""
+        y = np.concatenate((self._pending, y.astype(np.float32, copy=False)))
+        n_valid = len(y)
+        n_frames = -(-n_valid // self.hop) if final else n_valid // self.hop
+        if final and n_frames * self.hop > n_valid:
+            y = np.concatenate((y, np.zeros(n_frames * self.hop - n_valid, dtype=np.float32)))
+        self._pending = y[n_frames * self.hop :] if not final else np.zeros(0, dtype=np.float32)
+        if n_frames == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        frames = y[: n_frames * self.hop]
+        power = np.mean(np.square(frames.reshape(n_frames, self.hop)), axis=1)
+
+        # Trailing RMS over the attack window
+        hist = np.concatenate((self._power_hist, power))
+        csum = np.concatenate(([0.0], np.cumsum(hist, dtype=np.float64)))
+        idx = np.arange(len(self._power_hist), len(hist))
+        lo = np.maximum(idx + 1 - self.attack_frames, 0)
+        rms = np.sqrt((csum[idx + 1] - csum[lo]) / (idx + 1 - lo))
+        self._power_hist = hist[len(hist) - (self.attack_frames - 1) :] if self.attack_frames > 1 else hist[:0]
+
+        over_db = 20 * np.log10(np.maximum(rms, 1e-10) / self.thresh_rms)
+        target_db = np.clip(over_db, 0.0, None) * self.slope
+
+        # Hold each reduction for the release time, then ease in over the attack time
+        size = 2 * self.release_half + 1
+        targets = np.concatenate((self._target_hist, target_db))
+        held_db = maximum_filter1d(
+            targets, size=size, origin=self.release_half, mode="constant", cval=0.0
+        )[len(self._target_hist) :]
+        self._target_hist = targets[len(targets) - (size - 1) :] if size > 1 else targets[:0]
+        attenuation_db, self._zi = lfilter(
+            [self.alpha], [1.0, self.alpha - 1.0], held_db, zi=self._zi
+        )
+
+        gain = np.power(10.0, -attenuation_db / 20.0).astype(np.float32)
+        out = frames * np.repeat(gain, self.hop)
+        return out[: n_valid] if final else out
+
+
+def compress_dynamic_range(
+    y: np.ndarray,
+    sr: int,
+    threshold: float = -20.0,
+    ratio: float = 4.0,
+    attack: float = 5.0,
+    release: float = 50.0,
+) -> np.ndarray:
+    """One-shot dynamic range compression of a whole buffer."""
+    if y.size == 0:
+        return y
+    compressor = DynamicRangeCompressor(sr, threshold, ratio, attack, release)
+    return compressor.process(y, final=True)
+
+
+def normalize(y: np.ndarray, headroom: float = 0.1) -> np.ndarray:
+    """Peak-normalise so the loudest sample sits `headroom` dB below full scale."""
+    peak = float(np.max(np.abs(y))) if y.size else 0.0
+    if peak == 0:
+        return y
+    return y * np.float32(10 ** (-headroom / 20) / peak)
+
+
+def apply_gain(y: np.ndarray, gain_db: float) -> np.ndarray:
+    """Apply a fixed gain, saturating at full scale like 16-bit PCM would."""
+    return np.clip(y * np.float32(10 ** (gain_db / 20)), -1.0, 1.0)
+
+
+def enhance_buffer(y: np.ndarray, sr: int) -> np.ndarray:
+    """
+    Advanced enhancement for distant speakers on an in-memory buffer:
+    High-Pass Filter -> Noise Reduction -> Trim -> Dynamic Compression -> Normalization
     """
     import librosa
     import noisereduce as nr
-    import soundfile as sf
 
-    # 0. TRANSCODE TO WAV IF NEEDED (e.g. m4a, 3gp, aac)
-    base_path, ext = os.path.splitext(input_path)
-    if ext.lower() not in [".wav", ".wave"]:
-        try:
-            temp_wav_input = f"{base_path}_converted.wav"
-            JLogger.info(f"Transcoding {ext} to WAV for processing: {input_path}")
-            audio = AudioSegment.from_file(input_path)
-            audio.export(temp_wav_input, format="wav")
-            input_path = temp_wav_input  # Use the converted file
-        except Exception as e:
-            JLogger.error(f"Failed to transcode {ext} file: {e}")
-            raise e
-
-    # 1. Load Audio at 16kHz (Optimal for STT)
-    y, sr = librosa.load(input_path, sr=16000, mono=True)
-
-    # 2. Rumble removal (HPF 80Hz)
+    # 1. Rumble removal (HPF 80Hz)
     # Essential for cleaning up background noise and low-end hum
-    y_hpf = highpass(y, sr, cutoff=80)
+    y = highpass(y, sr, cutoff=80).astype(np.float32, copy=False)
 
-    # 3. Spectral Noise Reduction
+    # 2. Spectral Noise Reduction
     # Crucial for distant speakers: removes 'hiss' without distorting voice
-    y_denoised = nr.reduce_noise(y=y_hpf, sr=sr, prop_decrease=0.8, n_fft=2048)
+    y = nr.reduce_noise(y=y, sr=sr, prop_decrease=0.8, n_fft=2048).astype(
+        np.float32, copy=False
+    )
 
-    # 4. Silence Removal (VAD)
+    # 3. Silence Removal (VAD)
     # Trimming helps the STT focus on speech only
-    y_trimmed, _ = librosa.effects.trim(y_denoised, top_db=20)
-
-    # 5. Save intermediate for Pydub's dynamic processing
-    # Robust extension handling
-    base_path, ext = os.path.splitext(input_path)
-    temp_wav = f"{base_path}_temp.wav"
-    sf.write(temp_wav, y_trimmed, sr)
+    y, _ = librosa.effects.trim(y, top_db=20)
 
-    # 6. Dynamic Range Compression & Normalization
+    # 4. Dynamic Range Compression
     # 'Magic' for distant voices: brings quiet sounds closer to loudest for clarity
-    audio_segment = AudioSegment.from_wav(temp_wav)
-
-    # Dynamic Compression
-    compressed_audio = effects.compress_dynamic_range(
-        audio_segment,
+    y = compress_dynamic_range(
+        y,
+        sr,
         threshold=-24.0,  # Target quiet sounds
         ratio=4.0,  # Compression intensity
         attack=5.0,  # Reaction in ms
         release=50.0,  # Recovery in ms
     )
 
-    # 7. Final Peak Normalization to -0.1 dB
+    # 5. Final Peak Normalization to -0.1 dB
     # Stretch top signals to max safe volume
-    final_audio = effects.normalize(compressed_audio, headroom=0.1)
+    y = normalize(y, headroom=0.1)
+
+    # 6. Quality Check: Gain Boost if still too quiet
+    if dbfs(y) < -15:
+        y = apply_gain(y, 10)  # Boost by 10dB for distant speakers
+
+    return y
+
+
+def probe_duration(input_path: str) -> float:
+    """Duration in seconds from the container header, without decoding."""
+    import soundfile as sf
+
+    try:
+        return float(sf.info(input_path).duration)
+    except Exception:
+        from pydub.utils import mediainfo
+
+        return float(mediainfo(input_path).get("duration", 0) or 0)
+
+
+def _transcode_to_wav(input_path: str, sr: int = TARGET_SAMPLE_RATE) -> str:
+    """Transcode to mono WAV on disk with ffmpeg (pydub would hold the whole decode in RAM)."""
+    base_path, ext = os.path.splitext(input_path)
+    wav_path = f"{base_path}_converted.wav"
+    converter = getattr(AudioSegment, "converter", None) or "ffmpeg"
+    JLogger.info(f"Transcoding {ext} to WAV for streaming: {input_path}")
+    try:
+        subprocess.run(
+            [converter, "-y", "-v", "error", "-i", input_path, "-ac", "1", "-ar", str(sr), wav_path],
+            check=True,
+            capture_output=True,
+        )
+    except Exception as e:
+        JLogger.error(f"Failed to transcode {ext} file: {e}")
+        raise e
+    return wav_path
+
+
+def iter_audio_blocks(
+    wav_path: str, sr: int = TARGET_SAMPLE_RATE, block_seconds: float = 30
+) -> Iterator[np.ndarray]:
+    """Yield consecutive mono float32 blocks at `sr`, resampling as a stream if needed."""
+    import soundfile as sf
+    import soxr
 
-    # 8. Quality Check: Gain Boost if still too quiet
-    if final_audio.dBFS < -15:
-        final_audio = final_audio + 10  # Boost by 10dB for distant speakers
+    with sf.SoundFile(wav_path) as f:
+        resampler = (
+            soxr.ResampleStream(f.samplerate, sr, 1, dtype="float32")
+            if f.samplerate != sr
+            else None
+        )
+        blocksize = max(1, int(block_seconds * f.samplerate))
+        for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            mono = block.mean(axis=1)
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono)
+            if len(mono):
+                yield mono
+        if resampler is not None:
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                yield tail
 
+
+def _scan_stream(
+    wav_path: str, sr: int, block_seconds: float, top_db: float = 20
+) -> Tuple[np.ndarray, int, int]:
+    """
+    First streaming pass: estimate a noise profile from the quietest windows
+    and find the non-silent range for trimming.
+
+    Returns:
+        (noise_clip, trim_start, trim_end) with trim bounds in samples at `sr`.
+    """
+    hpf = StreamingHighpass(sr)
+    window = int(STREAM_NOISE_WINDOW_SEC * sr)
+    quietest = []  # max-heap (negated RMS) of the quietest windows
+    frame_rms = []
+    carry = np.zeros(0, dtype=np.float32)
+    counter = 0
+
+    for block in iter_audio_blocks(wav_path, sr, block_seconds):
+        y = np.concatenate((carry, hpf.process(block)))
+        n_windows = len(y) // window
+        for i in range(n_windows):
+            chunk = y[i * window : (i + 1) * window]
+            rms = float(np.sqrt(np.mean(np.square(chunk))))
+            counter += 1
+            item = (-rms, counter, chunk.copy())
+            if len(quietest) < STREAM_NOISE_WINDOWS:
+                heapq.heappush(quietest, item)
+            elif rms < -quietest[0][0]:
+                heapq.heapreplace(quietest, item)
+        consumed = n_windows * window
+        frames = y[:consumed].reshape(-1, TRIM_FRAME) if consumed else y[:0].reshape(0, TRIM_FRAME)
+        frame_rms.append(np.sqrt(np.mean(np.square(frames), axis=1)))
+        carry = y[consumed:]
+
+    if len(carry):
+        padded = np.concatenate((carry, np.zeros(-len(carry) % TRIM_FRAME, dtype=np.float32)))
+        frame_rms.append(np.sqrt(np.mean(np.square(padded.reshape(-1, TRIM_FRAME)), axis=1)))
+        if not quietest:
+            quietest.append((0.0, 0, carry))
+
+    rms = np.concatenate(frame_rms) if frame_rms else np.zeros(0)
+    noise_clip = (
+        np.concatenate([chunk for _, _, chunk in sorted(quietest, key=lambda q: q[1])])
+        if quietest
+        else np.zeros(0, dtype=np.float32)
+    )
+    if rms.size == 0 or rms.max() <= 0:
+        return noise_clip, 0, 0
+
+    loud = np.flatnonzero(20 * np.log10(np.maximum(rms, 1e-10) / rms.max()) > -top_db)
+    return noise_clip, int(loud[0] * TRIM_FRAME), int((loud[-1] + 1) * TRIM_FRAME)
+
+
+class _StreamingDenoiser:
+    """
+    Block-wise spectral gating with a fixed noise profile.
+
+    Each block is denoised together with STREAM_CONTEXT_SEC of raw signal on
+    either side, and only the centre is emitted, so block edges don't click.
+    """
+
+    def __init__(self, sr: int, noise_clip: np.ndarray):
+        self.sr = sr
+        self.noise_clip = noise_clip
+        self.context = int(STREAM_CONTEXT_SEC * sr)
+        self._left = np.zeros(0, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def _denoise(self, y: np.ndarray) -> np.ndarray:
+        import noisereduce as nr
+
+        if len(y) < 2048 or len(self.noise_clip) < 2048:
+            return y
+        return nr.reduce_noise(
+            y=y,
+            sr=self.sr,
+            y_noise=self.noise_clip,
+            stationary=True,
+            prop_decrease=0.8,
+            n_fft=2048,
+        ).astype(np.float32, copy=False)
+
+    def process(self, block: np.ndarray, final: bool = False) -> np.ndarray:
+        work = np.concatenate((self._left, self._pending, block))
+        start = len(self._left)
+        end = len(work) if final else len(work) - self.context
+        if end <= start:
+            self._pending = work[start:]
+            return np.zeros(0, dtype=np.float32)
+
+        out = self._denoise(work)[start:end]
+        self._left = work[max(0, end - self.context) : end]
+        self._pending = work[end:]
+        return out
+
+
+def preprocess_audio_streaming(
+    input_path: str, block_seconds: Optional[float] = None
+) -> str:
+    """
+    Bounded-memory variant of `preprocess_audio_pipeline` for long recordings.
+
+    Only a couple of blocks are ever held in RAM, regardless of duration:
+      1. scan: stream HPF'd blocks to pick a noise profile and the trim range
+      2. enhance: HPF (stateful) -> denoise per block -> trim -> compress,
+         written incrementally to a float WAV
+      3. finalize: peak-normalise (+ gain boost) into the 16-bit output
+
+    The quality audit needs the whole signal and is skipped in this mode.
+    """
+    import soundfile as sf
+
+    sr = TARGET_SAMPLE_RATE
+    block_seconds = block_seconds or ai_config.STREAMING_BLOCK_SEC
+    base_path, ext = os.path.splitext(input_path)
     output_path = f"{base_path}_refined.wav"
-    final_audio.export(output_path, format="wav")
+    part_path = f"{base_path}_refined.part.wav"
+
+    wav_path = input_path
+    if ext.lower() not in WAV_EXTENSIONS:
+        wav_path = _transcode_to_wav(input_path, sr)
 
-    # 9. Quality Audit
+    try:
+        # 1. Noise profile + trim bounds
+        noise_clip, trim_start, trim_end = _scan_stream(wav_path, sr, block_seconds)
+
+        # 2. Enhance block by block
+        hpf = StreamingHighpass(sr)
+        denoiser = _StreamingDenoiser(sr, noise_clip)
+        compressor = DynamicRangeCompressor(
+            sr, threshold=-24.0, ratio=4.0, attack=5.0, release=50.0
+        )
+        position = 0
+        peak = 0.0
+        sum_sq = 0.0
+        n_out = 0
+
+        with sf.SoundFile(part_path, "w", samplerate=sr, channels=1, subtype="FLOAT") as part:
+
+            def emit(y: np.ndarray, final: bool = False):
+                nonlocal position, peak, sum_sq, n_out
+                lo = min(max(trim_start - position, 0), len(y))
+                hi = min(max(trim_end - position, 0), len(y))
+                position += len(y)
+                compressed = compressor.process(y[lo:hi], final=final)
+                if len(compressed):
+                    part.write(compressed)
+                    peak = max(peak, float(np.max(np.abs(compressed))))
+                    sum_sq += float(np.sum(np.square(compressed, dtype=np.float64)))
+                    n_out += len(compressed)
+
+            for block in iter_audio_blocks(wav_path, sr, block_seconds):
+                emit(denoiser.process(hpf.process(block)))
+            emit(denoiser.process(np.zeros(0, dtype=np.float32), final=True), final=True)
+
+        # 3. Normalize to -0.1 dB peak, boost by 10dB if still too quiet
+        gain = 10 ** (-0.1 / 20) / peak if peak > 0 else 1.0
+        rms = np.sqrt(sum_sq / n_out) * gain if n_out else 0.0
+        boost_db = 10 if (rms <= 0 or 20 * np.log10(rms) < -15) else 0
+
+        with sf.SoundFile(output_path, "w", samplerate=sr, channels=1, subtype="PCM_16") as out:
+            for block in sf.blocks(part_path, blocksize=int(block_seconds * sr), dtype="float32"):
+                y = block * np.float32(gain)
+                if boost_db:
+                    y = apply_gain(y, boost_db)
+                out.write(y)
+    finally:
+        for temp_file in (part_path, wav_path if wav_path != input_path else None):
+            if temp_file and os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+
+    JLogger.info(
+        "Streaming preprocessing complete",
+        input=input_path,
+        output=output_path,
+        duration_seconds=n_out / sr,
+    )
+    return output_path
+
+
+def preprocess_audio_pipeline(input_path: str, streaming: Optional[bool] = None):
+    """
+    Advanced enhancement for distant speakers:
+    Decode -> High-Pass Filter -> Noise Reduction -> Dynamic Compression -> Normalization
+
+    The file is decoded once into a float32 buffer; every stage (including the
+    quality audit) runs on that buffer and only the refined WAV is written.
+    Recordings longer than STREAMING_PREPROCESS_THRESHOLD_SEC (or when
+    `streaming=True`) go through `preprocess_audio_streaming` instead.
+    """
+    import soundfile as sf
+
+    if streaming is None:
+        try:
+            streaming = (
+                probe_duration(input_path) > ai_config.STREAMING_PREPROCESS_THRESHOLD_SEC
+            )
+        except Exception:
+            streaming = False
+    if streaming:
+        return preprocess_audio_streaming(input_path)
+
+    # 1. Decode once at 16kHz mono
+    y, sr = decode_audio(input_path, sr=TARGET_SAMPLE_RATE)
+
+    # 2. Enhance in memory
+    y = enhance_buffer(y, sr)
+
+    base_path, _ = os.path.splitext(input_path)
+    output_path = f"{base_path}_refined.wav"
+    sf.write(output_path, y, sr, subtype="PCM_16")
+
+    # 3. Quality Audit on the same buffer
     analyzer = AudioQualityAnalyzer()
-    quality_report = analyzer.analyze_audio_quality(output_path)
+    quality_report = analyzer.analyze_audio_buffer(y, sr, audio_path=output_path)
 
     JLogger.info(
         "Preprocessing complete",
@@ -102,12 +508,4 @@ def preprocess_audio_pipeline(input_path: str):
         quality_category=quality_report.get("quality_category"),
     )
 
-    # Cleanup temp files
-    for temp_file in [temp_wav, locals().get("temp_wav_input")]:
-        if temp_file and os.path.exists(temp_file) and temp_file != output_path:
-            try:
-                os.remove(temp_file)
-            except OSError:
-                pass
-
     return output_path
@@ -18,13 +18,40 @@ class AISettings(BaseSettings):
     LLM_MODEL: str = "llama-3.3-70b-versatile"
     LLM_FAST_MODEL: str = "llama-3.1-8b-instant"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_VERSION: int = 1  # Bump with EMBEDDING_MODEL; notes below it get re-embedded
+    RELATED_NOTES_CANDIDATES: int = 10  # Precomputed neighbours kept per note (views show 3)
+    VECTOR_SEARCH_PROFILE: str = "balanced"  # fast | balanced | accurate (app/services/vector_search.py)
+    TENANT_INDEX_MIN_NOTES: int = 20000  # Embedded notes before a user gets a partial HNSW index
+    EMBEDDING_CACHE_BYTES: int = 64 * 1024 * 1024  # Content-hash vector cache budget
+    EMBEDDING_BATCH_SIZE: int = 64  # Max texts per model.encode call
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0  # How long to gather concurrent requests into a batch
     TEMPERATURE: float = 0.3
     MAX_TOKENS: int = 4096
     TOP_P: float = 0.9
+    LLM_CACHE_ENABLED: bool = True  # Reuse completions for identical prompts (retries, re-triggers)
+    LLM_CACHE_TTL_SEC: int = 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1024  # In-process LRU size in front of Redis
+    AUTH_CACHE_ENABLED: bool = True  # Reuse the authenticated user across requests with the same token
+    AUTH_CACHE_TTL_SEC: int = 60  # Upper bound on staleness for changes made outside the ORM
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_USE_REDIS: bool = True  # Share entries and invalidations across API/worker processes
+    GEOFENCE_CACHE_TTL_SEC: int = 300  # Compiled org geofences; changes via the ORM invalidate sooner
+    GEOFENCE_CACHE_MAX_ENTRIES: int = 5000
+    STATS_CACHE_TTL_SEC: int = 30  # Task statistics / productivity pulse; ORM writes invalidate locally
+    STATS_CACHE_MAX_ENTRIES: int = 10000
+    WEEKLY_REPORT_CHUNK_SIZE: int = 500  # Users per weekly report task (two grouped queries each)
+    WEEKLY_REPORT_WAVE_CHUNKS: int = 20  # Chunks run in parallel per chord wave
+    PUSH_BATCH_SIZE: int = 500  # Messages per FCM batch send (FCM maximum: 500)
 
     # STT Models
     GROQ_WHISPER_MODEL: str = "whisper-large-v3-turbo"
     DEEPGRAM_MODEL: str = "nova-3"
+    CHUNKED_STT_THRESHOLD_SEC: int = 600  # Longer audio is split on silence and transcribed in parallel
+    STT_CHUNK_SEC: int = 300  # Target chunk length for chunked STT
+    STT_CHUNK_CONCURRENCY: int = 4  # Max chunks in flight per note
+    STT_HEDGE_ENABLED: bool = True  # Start the fallback engine when the primary runs slow
+    STT_HEDGE_PERCENTILE: float = 95.0  # Primary latency percentile that triggers the hedge
+    STT_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging kicks in
 
     # Validation
     MAX_TRANSCRIPT_LENGTH: int = 100000
@@ -32,7 +59,19 @@ class AISettings(BaseSettings):
     SHORT_AUDIO_THRESHOLD_SEC: int = 45  # Audio below this goes to 'short' queue
     MAX_AUDIO_SIZE_MB: int = 100
     MAX_AUDIO_DURATION_SEC: int = 3600  # 1 Hour limit
+    STREAMING_PREPROCESS_THRESHOLD_SEC: int = 600  # Longer audio is preprocessed block by block
+    STREAMING_BLOCK_SEC: int = 30  # Block size for streaming preprocessing
     REDIS_URL: str = Field(default="redis://localhost:6379/1", validation_alias="REDIS_URL")
+    SSE_CLIENT_QUEUE_SIZE: int = 256  # Buffered events per SSE client before the oldest is dropped
+    SSE_SLOW_CLIENT_MAX_DROPS: int = 1000  # Dropped events after which a slow SSE client is disconnected
+    # Opt-in: merge status events per channel over this window; bursts arrive as EVENT_BATCH (app/worker/events.py)
+    EVENT_COALESCE_WINDOW_MS: int = 0
+    EVENT_ENCODING: str = "json"  # Redis wire format for real-time events: "json" or "msgpack"
+    USAGE_FLUSH_INTERVAL_MS: int = 500  # Buffered usage logs/charges are written at least this often
+    USAGE_FLUSH_MAX_EVENTS: int = 500  # ...or as soon as this many are queued
+    METRIC_ROLLUP_LAG_SEC: int = 300  # An hour is rolled up this long after it ends (late writes)
+    USAGE_BUFFER_CAPACITY: int = 100_000  # Ring buffer size per API process; oldest events drop beyond it
+    CREDIT_RESERVATION_TTL_SEC: int = 900  # Unreleased credit holds are expired by the reconciler after this
 
     # --- STORAGE SETTINGS (NEW) ---
     MINIO_ENDPOINT: str = Field(default="minio:9000", validation_alias="MINIO_ENDPOINT")
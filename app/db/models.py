@@ -4,6 +4,7 @@ import uuid
 
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
+    DDL,
     JSON,
     BigInteger,
     Boolean,
@@ -16,6 +17,7 @@ from sqlalchemy import (
     Table,
     Text,
     Float,
+    event,
 )
 from sqlalchemy.dialects.postgresql import JSONB  # Specific for PostgreSQL performance
 from sqlalchemy.orm import relationship
@@ -258,6 +260,14 @@ class Note(Base):
         Index("idx_notes_user_timestamp", "user_id", "timestamp"),
         Index("idx_notes_team_timestamp", "team_id", "timestamp"),
         Index("ix_notes_tags", "tags", postgresql_using="gin"),
+        # Substring autocomplete (pg_trgm). The FTS `search_vector` column and its
+        # index exist only on PostgreSQL; see app/services/text_search.py
+        Index(
+            "idx_notes_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
     )
 
     id = Column(String, primary_key=True)
@@ -303,7 +313,9 @@ class Note(Base):
     image_uris = Column(JSONB, default=lambda: [])  # Local device image URIs
     links = Column(JSONB, default=lambda: [])
     embedding = Column(Vector(384))  # Dimension for all-MiniLM-L6-v2 Embeddings
-    embedding_version = Column(Integer, default=1)  # Cache versioning
+    embedding_version = Column(Integer, default=1)  # EMBEDDING_VERSION the vector was built with
+    embedding_next = Column(Vector(384), nullable=True)  # Shadow vector during a model migration
+    related_note_ids = Column(JSON, nullable=True)  # [[note_id, distance], ...] nearest first; None = not computed
     languages = Column(JSONB, default=lambda: [])  # New: Langs detected or hinted
     stt_model = Column(String, default="nova")  # New: nova, whisper, both
     tags = Column(JSONB, default=list)  # New: Dynamic AI-generated categories
@@ -348,11 +360,50 @@ Index(
     postgresql_ops={"embedding": "vector_cosine_ops"},
 )
 
+# Keyset pagination of note listings: seek on (timestamp, id) newest first
+Index(
+    "idx_notes_user_active_timestamp_id",
+    Note.user_id,
+    Note.is_deleted,
+    Note.timestamp.desc(),
+    Note.id.desc(),
+)
+
+# Productivity pulse: note counts by status, answered from the index alone
+Index("idx_notes_user_active_status", Note.user_id, Note.is_deleted, Note.status)
+
+
+class TenantVectorIndex(Base):
+    """
+    A partial HNSW index over one large tenant's note embeddings
+    (`... WHERE user_id = '<user_id>'`). Built and dropped outside the ORM
+    by app/services/tenant_vector_index_service.py; this row tracks it.
+    """
+
+    __tablename__ = "tenant_vector_indexes"
+
+    # No FK: the index outlives a deleted user until the next sync drops it
+    user_id = Column(String, primary_key=True)
+    index_name = Column(String(63), nullable=False, unique=True)
+    note_count = Column(Integer, nullable=False)  # Embedded notes when built
+    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
+
 
 class Task(Base):
     __tablename__ = "tasks"
     __table_args__ = (
         Index("idx_tasks_note_priority", "note_id", "priority"),
+        # Keyset pagination of task listings: seek on (deadline, id)
+        Index("idx_tasks_user_active_deadline_id", "user_id", "is_deleted", "deadline", "id"),
+        # Task statistics: one FILTER aggregate answered from the index alone
+        Index("idx_tasks_user_active_stats", "user_id", "is_deleted", "is_done", "priority", "deadline"),
+        # Substring task search (pg_trgm); `search_vector` is PostgreSQL-only (see app/services/text_search.py)
+        Index(
+            "idx_tasks_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
     )
 
     id = Column(String, primary_key=True)
@@ -376,7 +427,7 @@ class Task(Base):
     deleted_by = Column(String, nullable=True)  # User ID who performed deletion
     deletion_reason = Column(Text, nullable=True)  # Reason for deletion
     can_restore = Column(Boolean, default=True)  # Whether item can be restored
-    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
+    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000), index=True)
     updated_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
 
     # Notification tracking
@@ -533,6 +584,9 @@ class Wallet(Base):
     balance = Column(
         Integer, default=100
     )  # 100 free credits on signup — matches BillingService.get_or_create_wallet()
+    reserved = Column(
+        Integer, default=0, server_default="0", nullable=False
+    )  # Sum of HELD CreditReservations; spendable = balance - reserved
     currency = Column(String(3), default="USD")
     is_frozen = Column(Boolean, default=False)  # If payment fails
 
@@ -554,6 +608,30 @@ User.wallet = relationship(
 User.plan = relationship("ServicePlan", backref="users")
 
 
+class CreditReservation(Base):
+    """
+    Credits held against a wallet while an operation is in flight.
+    HELD rows are counted in Wallet.reserved until they are committed,
+    released, or expired by the reconciler.
+    """
+
+    __tablename__ = "credit_reservations"
+    __table_args__ = (
+        Index("idx_credit_reservations_status_expires", "status", "expires_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    wallet_id = Column(
+        String, ForeignKey("wallets.user_id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    user_id = Column(String, nullable=True)  # Who reserved (may differ for corporate wallets)
+    amount = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="HELD")  # 'HELD', 'COMMITTED', 'RELEASED', 'EXPIRED'
+    reference_id = Column(String, nullable=True)
+    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
+    expires_at = Column(BigInteger, nullable=False)
+
+
 class Transaction(Base):
     """
     Ledger for all credit movements (Deposits, Usage, Refunds).
@@ -575,7 +653,7 @@ class Transaction(Base):
         String
     )  # e.g. "Transcription: 5 mins" or "Stripe Payment #123"
     reference_id = Column(String, nullable=True)  # ID of Note/Task/StripeCharge
-    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
+    created_at = Column(BigInteger, default=lambda: int(time.time() * 1000), index=True)
 
 
 class UsageLog(Base):
@@ -599,7 +677,35 @@ class UsageLog(Base):
 
     cost_estimated = Column(Integer, default=0)  # In credits/cents
     status = Column(Integer, default=200)  # HTTP Status
-    timestamp = Column(BigInteger, default=lambda: int(time.time() * 1000))
+    timestamp = Column(BigInteger, default=lambda: int(time.time() * 1000), index=True)
+
+
+class MetricRollup(Base):
+    """
+    Platform activity per UTC hour or day, appended by
+    app/services/rollup_service.py. Buckets of one granularity are
+    contiguous; the newest bucket's end is that granularity's watermark.
+    """
+
+    __tablename__ = "metric_rollups"
+
+    granularity = Column(String(8), primary_key=True)  # 'hour' | 'day'
+    bucket_start = Column(BigInteger, primary_key=True)  # UTC epoch ms
+    notes_created = Column(Integer, nullable=False, default=0)
+    tasks_created = Column(Integer, nullable=False, default=0)
+    api_calls = Column(Integer, nullable=False, default=0)
+    audio_seconds = Column(BigInteger, nullable=False, default=0)
+    deposits = Column(BigInteger, nullable=False, default=0)  # Credits deposited
+
+
+class MetricGauge(Base):
+    """Point-in-time platform totals (users, content, balances), refreshed with the rollups."""
+
+    __tablename__ = "metric_gauges"
+
+    name = Column(String(64), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(BigInteger, default=lambda: int(time.time() * 1000))
 
 
 class AdminActionLog(Base):
@@ -686,3 +792,26 @@ class UserIntegration(Base):
 
     user = relationship("User", back_populates="integrations")
 
+
+
+# --- Full-text search (PostgreSQL only) ---
+# Generated tsvector columns for ranked keyword search. They are not mapped
+# (SQLite test runs cannot store them) and are queried through
+# app/services/text_search.py. Created by migration e2b7c5a91d40, and
+# here for databases built with metadata.create_all().
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+for _table, _body in ((Note.__table__, "summary"), (Task.__table__, "description")):
+    event.listen(
+        _table,
+        "after_create",
+        DDL(
+            f"ALTER TABLE {_table.name} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({_body}, '')), 'B')) STORED; "
+            f"CREATE INDEX idx_{_table.name}_search_vector ON {_table.name} USING gin (search_vector)"
+        ).execute_if(dialect="postgresql"),
+    )
@@ -40,6 +40,7 @@ from app.api import (
 from app.api.middleware.usage import UsageTrackingMiddleware  # NEW
 from app.api.middleware.body_cache import RequestBodyCacheMiddleware  # NEW
 from app.db.session import get_db
+from app.services.usage_recorder import get_usage_recorder
 from app.utils.json_logger import JLogger
 
 
@@ -70,6 +71,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: Clean up resources if needed
     JLogger.info("Application shutting down...")
+    # Write buffered usage logs and wallet debits before the process exits
+    get_usage_recorder().close()
 
 app = FastAPI(
     title="VoiceNote AI API",
@@ -101,6 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor (app/utils/pagination.py)
 )
 
 @app.exception_handler(VoiceNoteError)
@@ -381,7 +385,6 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 
 Instrumentator().instrument(app).expose(app)
-app.add_middleware(UsageTrackingMiddleware)  # NEW: Usage Metering
 
 
 
@@ -4,7 +4,7 @@ Handles usage analytics, growth trends, and revenue reporting
 """
 
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
 from sqlalchemy import and_, func
@@ -19,6 +19,7 @@ from app.db.models import (
     User,
     Wallet,
 )
+from app.services.rollup_service import DAY_MS, RollupService
 from app.utils.json_logger import JLogger
 
 
@@ -37,40 +38,21 @@ class AdminAnalyticsService:
         group_by: str = "day"
     ) -> Dict:
         """
-        Get usage analytics for a date range
+        Get usage analytics for a date range, from the rollups plus a live
+        tail (see app/services/rollup_service.py)
         
         Args:
             start_date: Start timestamp (ms)
-            end_date: End timestamp (ms)
-            group_by: Grouping (day, week, month)
+            end_date: End timestamp (ms), inclusive
+            group_by: Grouping (day, week, month), by UTC date
         """
-        # Get usage logs in date range
-        usage_logs = db.query(UsageLog).filter(
-            and_(
-                UsageLog.timestamp >= start_date,
-                UsageLog.timestamp <= end_date
-            )
-        ).all()
+        days = RollupService.aggregate(db, start_date, end_date + 1, bucket_ms=DAY_MS)
         
         # Calculate totals
-        total_audio_minutes = sum((log.duration_seconds or 0) / 60 for log in usage_logs)
-        total_api_calls = len(usage_logs)
-        
-        # Get notes created in range
-        notes_created = db.query(Note).filter(
-            and_(
-                Note.timestamp >= start_date,
-                Note.timestamp <= end_date
-            )
-        ).count()
-        
-        # Get tasks created in range
-        tasks_created = db.query(Task).filter(
-            and_(
-                Task.created_at >= start_date,
-                Task.created_at <= end_date
-            )
-        ).count()
+        total_audio_minutes = sum(day["audio_seconds"] for day in days.values()) / 60
+        total_api_calls = sum(day["api_calls"] for day in days.values())
+        notes_created = sum(day["notes_created"] for day in days.values())
+        tasks_created = sum(day["tasks_created"] for day in days.values())
         
         # Get active users in range
         active_users = db.query(User).filter(
@@ -80,19 +62,20 @@ class AdminAnalyticsService:
             )
         ).count()
         
-        # Group by time period
+        # Group by time period (periods without API calls are omitted)
+        period_format = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}.get(group_by, "%Y-%m-%d")
         usage_by_period = {}
-        if group_by == "day":
-            # Group by day
-            for log in usage_logs:
-                day = datetime.fromtimestamp(log.timestamp / 1000).strftime("%Y-%m-%d")
-                if day not in usage_by_period:
-                    usage_by_period[day] = {
-                        "audio_minutes": 0,
-                        "api_calls": 0
-                    }
-                usage_by_period[day]["audio_minutes"] += (log.duration_seconds or 0) / 60
-                usage_by_period[day]["api_calls"] += 1
+        for day_start, day in sorted(days.items()):
+            if not day["api_calls"]:
+                continue
+            period = datetime.fromtimestamp(day_start / 1000, timezone.utc).strftime(period_format)
+            if period not in usage_by_period:
+                usage_by_period[period] = {
+                    "audio_minutes": 0,
+                    "api_calls": 0
+                }
+            usage_by_period[period]["audio_minutes"] += day["audio_seconds"] / 60
+            usage_by_period[period]["api_calls"] += day["api_calls"]
         
         return {
             "total_audio_minutes": round(total_audio_minutes, 2),
@@ -1,18 +1,27 @@
+import asyncio
 import os
+import tempfile
 import time
 import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
-from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from app.core.config import ai_config
 from app.db import models
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
+from app.services import vector_search
+from app.services.embedding_service import get_embedding_service
+from app.services.llm_cache import LLMResponseCache, get_llm_cache
 from app.schemas.note import NoteAIOutput
 from app.utils.ai_service_utils import (
     AIServiceError,
+    SilentAudioError,
     get_request_tracker,
+    get_stt_latency_tracker,
     retry_with_backoff,
     validate_json_response,
     validate_transcript,
@@ -21,28 +30,11 @@ from app.utils.json_logger import JLogger
 
 
 
-@lru_cache(maxsize=100)
-def _get_embedding_cached(text: str) -> List[float]:
-    """Module-level cached method for embedding generation to avoid method-level memory leaks."""
-    from sentence_transformers import SentenceTransformer
-    
-    # Simple singleton pattern for the model
-    if not hasattr(_get_embedding_cached, "_model"):
-        try:
-            JLogger.info("Loading local embedding model: all-MiniLM-L6-v2")
-            _get_embedding_cached._model = SentenceTransformer("all-MiniLM-L6-v2")
-        except Exception as e:
-            JLogger.error("Failed to load local embedding model", error=str(e))
-            return []
-            
-    embedding = _get_embedding_cached._model.encode(text)
-    return embedding.tolist()
-
-
 class AIService:
-    _local_embedding_model = None  # Class-level singleton
     _groq_client = None
     _dg_client = None
+    # One AsyncGroq client (and its connection pool) per event loop
+    _async_groq_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
 
     def __init__(self):
         # AI API Keys from environment
@@ -68,6 +60,20 @@ class AIService:
             AIService._dg_client = DeepgramClient(api_key=self.dg_api_key)
         return AIService._dg_client
 
+    @property
+    def async_groq_client(self):
+        """Shared AsyncGroq client for the running event loop (pooled connections)."""
+        if not self.groq_api_key:
+            return None
+        loop = asyncio.get_running_loop()
+        client = AIService._async_groq_clients.get(loop)
+        if client is None:
+            from groq import AsyncGroq
+
+            client = AsyncGroq(api_key=self.groq_api_key)
+            AIService._async_groq_clients[loop] = client
+        return client
+
     def _get_diarization_pipeline(self):
         """Lazy load diarization pipeline for speaker detection."""
         if (
@@ -87,18 +93,8 @@ class AIService:
         return self._diarization_pipeline
 
     def _get_local_embedding_model(self):
-        """Lazy load the sentence transformer model."""
-        if AIService._local_embedding_model is None:
-            try:
-                JLogger.info("Loading local embedding model: all-MiniLM-L6-v2")
-                from sentence_transformers import SentenceTransformer
-
-                AIService._local_embedding_model = SentenceTransformer(
-                    "all-MiniLM-L6-v2"
-                )
-            except Exception as e:
-                JLogger.error("Failed to load local embedding model", error=str(e))
-        return AIService._local_embedding_model
+        """Lazy load the sentence transformer model (shared per process)."""
+        return get_embedding_service().get_model()
 
     def _get_dynamic_settings(self):
         """Fetches settings from DB with a simple cache."""
@@ -145,22 +141,79 @@ class AIService:
                 "deepgram_model": ai_config.DEEPGRAM_MODEL,
             }
 
-    def generate_embedding_sync(self, text: str) -> List[float]:
+    def generate_embedding_sync(self, text: str) -> np.ndarray:
         """
-        Synchronous wrapper that uses LRU cache.
+        Synchronous embedding via the shared, batched and cached engine.
+        Returns a read-only float32 vector (zeros for blank text).
         """
-        if not text or not text.strip():
-            return [0.0] * 384
+        return get_embedding_service().embed(text)
+
+    def generate_embeddings_sync(self, texts: List[str]) -> np.ndarray:
+        """Embeds many texts in batches; returns a (len(texts), 384) float32 array."""
+        return get_embedding_service().embed_many(texts)
 
-        emb = _get_embedding_cached(text)
-        return emb if emb else [0.0] * 384
+    async def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Awaitable `generate_embeddings_sync`: all texts in one model call, off the event loop."""
+        return await asyncio.to_thread(get_embedding_service().embed_many, texts)
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generates 384-dimensional vector embeddings for semantic search.
-        Using local SentenceTransformer (Free).
+        Using local SentenceTransformer (Free). Encoding runs on the embedding
+        batcher thread, so concurrent awaits share one model call.
+        """
+        return await get_embedding_service().embed_async(text)
+
+    def _run_with_hedge(
+        self, runners: Dict, primary: str, fallback: str, size_bytes: int
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Runs the `primary` STT engine, falling back to `fallback` on failure.
+
+        With STT_HEDGE_ENABLED, the fallback is also started once the primary
+        call outlives the STT_HEDGE_PERCENTILE of its recent latency, and the
+        first non-empty transcript wins.
+
+        Returns: (engine_name, transcript) - transcript is None if both failed.
         """
-        return self.generate_embedding_sync(text)
+        delay = None
+        if ai_config.STT_HEDGE_ENABLED:
+            delay = get_stt_latency_tracker().hedge_delay(
+                primary,
+                size_bytes,
+                percentile=ai_config.STT_HEDGE_PERCENTILE,
+                min_samples=ai_config.STT_HEDGE_MIN_SAMPLES,
+            )
+        if delay is None:
+            transcript = runners[primary]()
+            if transcript:
+                return primary, transcript
+            transcript = runners[fallback]()
+            return fallback, transcript or None
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {pool.submit(runners[primary]): primary}
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                JLogger.info(
+                    "Hedging slow STT request",
+                    primary=primary,
+                    fallback=fallback,
+                    after_sec=round(delay, 2),
+                )
+                futures[pool.submit(runners[fallback])] = fallback
+            for future in as_completed(futures):
+                transcript = future.result()
+                if transcript:
+                    return futures[future], transcript
+            if len(futures) == 1:
+                transcript = runners[fallback]()
+                return fallback, transcript or None
+            return fallback, None
+        finally:
+            # Don't block on the losing request; it finishes in the background
+            pool.shutdown(wait=False)
 
     def transcribe_with_failover_sync(
         self,
@@ -202,48 +255,53 @@ class AIService:
         if languages:
             groq_params["language"] = languages[0]
 
+        # Read once; both engines (and a hedged retry) share this buffer
+        with open(audio_path, "rb") as file:
+            audio_bytes = file.read()
+        latency_tracker = get_stt_latency_tracker()
+
         def run_dg():
             if not self.dg_client:
                 return None
             try:
-                with open(audio_path, "rb") as file:
-                    buffer_data = file.read()
-                    payload = {"buffer": buffer_data}
-                    options = {
-                        "model": settings["deepgram_model"],
-                        "smart_format": True,
-                        "diarize": diarize,
-                    }
-                    if languages and len(languages) == 1:
-                        options["language"] = languages[0]
-                    else:
-                        options["detect_language"] = True
-
-                    resp = self.dg_client.listen.v1.media.transcribe_file(payload, options)
-
-                    # Formatted transcript with speaker labels
-                    if diarize and hasattr(resp.results, 'channels'):
-                        words = resp.results.channels[0].alternatives[0].words
-                        if words and hasattr(words[0], 'speaker'):
-                            transcript_parts = []
-                            current_speaker = None
-                            current_sentence = []
-
-                            for word in words:
-                                if word.speaker != current_speaker:
-                                    if current_sentence:
-                                        transcript_parts.append(f"Speaker {current_speaker}: {' '.join(current_sentence)}")
-                                    current_speaker = word.speaker
-                                    current_sentence = [word.punctuated_word or word.word]
-                                else:
-                                    current_sentence.append(word.punctuated_word or word.word)
-
-                            if current_sentence:
-                                transcript_parts.append(f"Speaker {current_speaker}: {' '.join(current_sentence)}")
-                            
-                            return "\n".join(transcript_parts)
-
-                    return resp.results.channels[0].alternatives[0].transcript
+                started = time.time()
+                payload = {"buffer": audio_bytes}
+                options = {
+                    "model": settings["deepgram_model"],
+                    "smart_format": True,
+                    "diarize": diarize,
+                }
+                if languages and len(languages) == 1:
+                    options["language"] = languages[0]
+                else:
+                    options["detect_language"] = True
+
+                resp = self.dg_client.listen.v1.media.transcribe_file(payload, options)
+                latency_tracker.record("deepgram", time.time() - started, len(audio_bytes))
+
+                # Formatted transcript with speaker labels
+                if diarize and hasattr(resp.results, 'channels'):
+                    words = resp.results.channels[0].alternatives[0].words
+                    if words and hasattr(words[0], 'speaker'):
+                        transcript_parts = []
+                        current_speaker = None
+                        current_sentence = []
+
+                        for word in words:
+                            if word.speaker != current_speaker:
+                                if current_sentence:
+                                    transcript_parts.append(f"Speaker {current_speaker}: {' '.join(current_sentence)}")
+                                current_speaker = word.speaker
+                                current_sentence = [word.punctuated_word or word.word]
+                            else:
+                                current_sentence.append(word.punctuated_word or word.word)
+
+                        if current_sentence:
+                            transcript_parts.append(f"Speaker {current_speaker}: {' '.join(current_sentence)}")
+                        
+                        return "\n".join(transcript_parts)
+
+                return resp.results.channels[0].alternatives[0].transcript
             except Exception as e:
                 JLogger.error("Deepgram transcription failed", error=str(e))
                 return None
@@ -252,19 +310,37 @@ class AIService:
             if not self.groq_client:
                 return None
             try:
-                with open(audio_path, "rb") as file:
-                    return self.groq_client.audio.transcriptions.create(
-                        file=(os.path.basename(audio_path), file.read()), **groq_params
-                    )
+                started = time.time()
+                transcript = self.groq_client.audio.transcriptions.create(
+                    file=(os.path.basename(audio_path), audio_bytes), **groq_params
+                )
+                latency_tracker.record("groq", time.time() - started, len(audio_bytes))
+                return transcript
             except Exception as e:
                 JLogger.error("Groq transcription failed", error=str(e))
                 return None
 
+        # None means an engine failed; an empty transcript means it heard no speech
+        empty_engines = set()
+
+        def tracked(name, runner):
+            def run():
+                transcript = runner()
+                if transcript is not None and not str(transcript).strip():
+                    empty_engines.add(name)
+                return transcript
+
+            return run
+
+        run_dg, run_groq = tracked("deepgram", run_dg), tracked("groq", run_groq)
+
         # Execute based on preference
         if stt_model == "both":
-            # Run both sequentially in worker context
-            dg_t = run_dg() if self.dg_client else None
-            groq_t = run_groq() if self.groq_client else None
+            # Run both concurrently; tail latency is the slower engine, not the sum
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                dg_future = pool.submit(run_dg)
+                groq_future = pool.submit(run_groq)
+                dg_t, groq_t = dg_future.result(), groq_future.result()
 
             if dg_t:
                 results["deepgram"] = dg_t
@@ -273,30 +349,18 @@ class AIService:
 
             primary_transcript = dg_t or groq_t or ""
             engine_used = "both"
-        elif stt_model == "whisper":
-            groq_t = run_groq()
-            if groq_t:
-                primary_transcript = groq_t
-                engine_used = "groq"
-                results["groq"] = groq_t
-            else:  # Fallback to DG
-                dg_t = run_dg()
-                primary_transcript = dg_t or ""
-                engine_used = "deepgram" if dg_t else "failed"
-                if dg_t:
-                    results["deepgram"] = dg_t
-        else:  # Default: Nova
-            dg_t = run_dg()
-            if dg_t:
-                primary_transcript = dg_t
-                engine_used = "deepgram"
-                results["deepgram"] = dg_t
-            else:  # Fallback to Groq
-                groq_t = run_groq()
-                primary_transcript = groq_t or ""
-                engine_used = "groq" if groq_t else "failed"
-                if groq_t:
-                    results["groq"] = groq_t
+        else:
+            runners = {"deepgram": run_dg, "groq": run_groq}
+            # Default: Nova first, Whisper as fallback
+            order = ("groq", "deepgram") if stt_model == "whisper" else ("deepgram", "groq")
+            engine_used, primary_transcript = self._run_with_hedge(
+                runners, *order, size_bytes=len(audio_bytes)
+            )
+            if primary_transcript:
+                results[engine_used] = primary_transcript
+            else:
+                primary_transcript = ""
+                engine_used = "failed"
 
         JLogger.info("STT pipeline execution complete", engine=engine_used)
         if not primary_transcript:
@@ -306,10 +370,8 @@ class AIService:
             if not self.groq_client:
                 error_details.append("Groq client missing")
 
-            # Check if results had keys but empty values (silence)
-            is_silence = any(v == "" for v in results.values())
-            if is_silence:
-                raise AIServiceError(
+            if empty_engines:
+                raise SilentAudioError(
                     "STT silent: The audio contains no detectable speech."
                 )
 
@@ -320,6 +382,83 @@ class AIService:
 
         return primary_transcript, engine_used, used_langs, results
 
+    def transcribe_chunked_sync(
+        self,
+        audio_path: str,
+        languages: Optional[List[str]] = None,
+        stt_model: str = "nova",
+        diarize: bool = True,
+        chunk_seconds: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> Tuple[str, str, List[str], Dict[str, str]]:
+        """
+        Long-audio STT: split on silence, transcribe chunks concurrently and
+        stitch them back in order with [HH:MM:SS] offsets.
+        Same return shape as `transcribe_with_failover_sync`.
+
+        Speaker labels are kept as returned per chunk (diarization is not
+        reconciled across chunks).
+        """
+        from app.services.audio_service import AudioService
+
+        if not os.path.exists(audio_path):
+            raise AIServiceError(f"Audio file not found: {audio_path}")
+
+        chunk_seconds = chunk_seconds or ai_config.STT_CHUNK_SEC
+        max_workers = max_workers or ai_config.STT_CHUNK_CONCURRENCY
+
+        with tempfile.TemporaryDirectory(prefix="stt_chunks_") as chunk_dir:
+            chunks = AudioService.chunk_audio_on_silence(
+                audio_path, chunk_dir, chunk_duration_sec=chunk_seconds
+            )
+            if len(chunks) <= 1:
+                return self.transcribe_with_failover_sync(
+                    audio_path, languages=languages, stt_model=stt_model, diarize=diarize
+                )
+
+            # Warm the settings cache once instead of racing it from every thread
+            self._get_dynamic_settings()
+
+            def run_chunk(chunk_path: str):
+                try:
+                    return self.transcribe_with_failover_sync(
+                        chunk_path, languages=languages, stt_model=stt_model, diarize=diarize
+                    )
+                except SilentAudioError as e:
+                    # A silent chunk is not a failure of the whole note; a chunk
+                    # whose engines failed is, or the transcript would have a gap
+                    JLogger.warning("Chunk transcription empty", chunk=chunk_path, error=str(e))
+                    return None
+
+            JLogger.info(
+                "Chunked STT fan-out",
+                chunks=len(chunks),
+                max_workers=min(max_workers, len(chunks)),
+            )
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                results = list(pool.map(run_chunk, [path for path, _ in chunks]))
+
+        offsets = [offset for _, offset in chunks]
+        done = [r for r in results if r]
+        if not done:
+            raise SilentAudioError("STT silent: The audio contains no detectable speech.")
+
+        primary_transcript = AudioService.merge_transcripts(
+            [r[0] if r else "" for r in results], offsets
+        )
+        all_transcripts = {}
+        for engine_key in sorted({k for r in done for k in r[3]}):
+            all_transcripts[engine_key] = AudioService.merge_transcripts(
+                [r[3].get(engine_key, "") if r else "" for r in results], offsets
+            )
+
+        engines = {r[1] for r in done}
+        engine_used = engines.pop() if len(engines) == 1 else "mixed"
+        used_langs = done[0][2]
+
+        JLogger.info("Chunked STT complete", engine=engine_used, chunks=len(chunks))
+        return primary_transcript, engine_used, used_langs, all_transcripts
+
     def run_full_analysis_sync(
         self,
         audio_path: str,
@@ -353,46 +492,164 @@ class AIService:
         stt_model: str = "nova",
     ) -> Tuple[str, str, List[str], Dict[str, str]]:
         """
-        Async wrapper for transcription with model selection.
+        Async transcription with model selection. The hedged/failover STT path
+        reads the file and juggles engine threads, so it runs off the event loop.
         """
-        return self.transcribe_with_failover_sync(
-            audio_path, languages=languages, stt_model=stt_model
+        return await asyncio.to_thread(
+            self.transcribe_with_failover_sync,
+            audio_path,
+            languages=languages,
+            stt_model=stt_model,
         )
 
-    def llm_brain_sync(
+    def _completion_cache_key(
         self,
-        transcript: str,
-        user_role: str = "GENERIC",
-        user_instruction: str = "",
-        note_created_at: Optional[int] = None,
-        user_timezone: str = "UTC",
-        **kwargs,
-    ) -> NoteAIOutput:
-        """Synchronous structured extraction for Celery worker with timezone-aware priority."""
-        # Validation
-        transcript = validate_transcript(transcript)
+        model: str,
+        temperature: float,
+        system_prompt: str,
+        user_content: str,
+        cache_system_prompt: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        LLM response cache key, or None when caching is disabled.
+        `cache_system_prompt` replaces the system prompt in the key when the
+        prompt embeds volatile values (e.g. the current time).
+        """
+        if not ai_config.LLM_CACHE_ENABLED:
+            return None
+        return LLMResponseCache.make_key(
+            model,
+            temperature,
+            cache_system_prompt if cache_system_prompt is not None else system_prompt,
+            user_content,
+        )
 
-        if not self.groq_client:
-            return NoteAIOutput(
-                title="Untitled Note",
-                summary="AI analysis unavailable (No API key)",
-                priority="MEDIUM",
-                transcript=transcript,
-                tasks=[],
-            )
+    @staticmethod
+    def _store_completion(key: Optional[str], content, require_json: bool = True) -> None:
+        if key is None or not isinstance(content, str) or not content.strip():
+            return
+        try:
+            # Only cache well-formed JSON so a bad completion is retried for real
+            if require_json:
+                validate_json_response(content)
+            get_llm_cache().set(key, content)
+        except AIServiceError:
+            pass
+
+    def _cached_completion(
+        self,
+        caller: str,
+        system_prompt: str,
+        user_content: str,
+        model: str,
+        temperature: float,
+        cache_system_prompt: Optional[str] = None,
+        bypass_cache: bool = False,
+        require_json: bool = True,
+        **create_kwargs,
+    ) -> str:
+        """
+        Returns the completion text for a system/user prompt pair, served from the
+        LLM response cache when an identical prompt was answered recently.
+        `bypass_cache` skips the lookup but still refreshes the cached entry.
+        Plain-text completions are cached only with `require_json=False`.
+        """
+        key = self._completion_cache_key(
+            model, temperature, system_prompt, user_content, cache_system_prompt
+        )
+        if key is not None and not bypass_cache:
+            cached = get_llm_cache().get(key, caller=caller)
+            if cached is not None:
+                JLogger.debug("LLM cache hit", caller=caller, model=model)
+                return cached
+
+        response = self.groq_client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content},
+            ],
+            model=model,
+            temperature=temperature,
+            **create_kwargs,
+        )
+        content = response.choices[0].message.content
+        self._store_completion(key, content, require_json)
+        return content
+
+    async def _cached_completion_async(
+        self,
+        caller: str,
+        system_prompt: str,
+        user_content: str,
+        model: str,
+        temperature: float,
+        cache_system_prompt: Optional[str] = None,
+        bypass_cache: bool = False,
+        require_json: bool = True,
+        **create_kwargs,
+    ) -> str:
+        """Async `_cached_completion` on the pooled AsyncGroq client."""
+        key = self._completion_cache_key(
+            model, temperature, system_prompt, user_content, cache_system_prompt
+        )
+        if key is not None and not bypass_cache:
+            # The cache may round-trip to Redis; keep that off the event loop
+            cached = await asyncio.to_thread(get_llm_cache().get, key, caller)
+            if cached is not None:
+                JLogger.debug("LLM cache hit", caller=caller, model=model)
+                return cached
+
+        response = await self.async_groq_client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content},
+            ],
+            model=model,
+            temperature=temperature,
+            **create_kwargs,
+        )
+        content = response.choices[0].message.content
+        await asyncio.to_thread(self._store_completion, key, content, require_json)
+        return content
+
+    @staticmethod
+    def _unavailable_output(transcript: str) -> NoteAIOutput:
+        return NoteAIOutput(
+            title="Untitled Note",
+            summary="AI analysis unavailable (No API key)",
+            priority="MEDIUM",
+            transcript=transcript,
+            tasks=[],
+        )
+
+    @staticmethod
+    def _extraction_prompts(
+        transcript: str,
+        user_role: str,
+        user_instruction: str,
+        note_created_at: Optional[int],
+        user_timezone: str,
+        jargons: List[str],
+    ) -> Tuple[str, str, str]:
+        """
+        Builds the extraction prompts.
 
+        Returns: (system_prompt, cache_system_prompt, user_content)
+        """
         system_prompt = ai_config.EXTRACTION_SYSTEM_PROMPT
         if user_role:
             system_prompt = f"{system_prompt}\n\nYou are acting as a {user_role}."
 
         # Inject Domain Terminology (Jargons)
-        jargons = kwargs.get("jargons", [])
         if jargons:
             system_prompt += (
                 f"\n\nCRITICAL CONTEXT: The following industry-specific terms or 'jargons' are relevant to this user. "
                 f"Use them correctly if they appear phonetically or contextually:\n{', '.join(jargons)}"
             )
 
+        # The temporal block below quotes the wall clock; key the cache on the note time instead
+        cache_system_prompt = system_prompt
+
         # NEW: Add temporal context for intelligent priority assignment
         if note_created_at:
             try:
@@ -416,66 +673,92 @@ TEMPORAL CONTEXT (CRITICAL FOR PRIORITY ASSIGNMENT):
 Use this temporal context to intelligently assign task priorities based on urgency and deadlines.
 """
                 system_prompt += temporal_context
+                cache_system_prompt += f"\n\nTEMPORAL CONTEXT: {note_time.isoformat()} ({user_timezone})"
             except Exception as e:
                 JLogger.warning(f"Failed to add temporal context: {e}")
 
         user_content = f"Instruction: {user_instruction or 'Analyze the transcript.'}\n\n<transcript>\n{transcript}\n</transcript>"
+        return system_prompt, cache_system_prompt, user_content
+
+    @staticmethod
+    def _parse_extraction(content: str, transcript: str) -> NoteAIOutput:
+        data = validate_json_response(content)
+
+        # Additional structural validation
+        title = data.get("title", "Untitled Note")[:100]
+        summary = data.get("summary", "No summary generated.")
+        priority = data.get("priority", "MEDIUM").upper()
+        if priority not in ["HIGH", "MEDIUM", "LOW"]:
+            priority = "MEDIUM"
+
+        tasks = []
+        for t in data.get("tasks", []):
+            # Robust extraction for title and description
+            task_title = t.get("title") or t.get("description", "Task")[:100]
+            task_description = t.get("description") or t.get(
+                "title", "No description provided."
+            )
+            tasks.append(
+                {
+                    "title": task_title,
+                    "description": task_description,
+                    "priority": t.get("priority", "MEDIUM").upper(),
+                    "deadline": t.get("deadline") or t.get("due_date"),
+                    "actions": t.get("actions", {}),
+                    "assigned_entities": t.get("assigned_entities", []),
+                }
+            )
+
+        tags = data.get("tags") or []
+        if isinstance(tags, str):
+            tags = [t.strip() for t in tags.split(",") if t.strip()]
+
+        return NoteAIOutput(
+            title=title,
+            summary=summary,
+            priority=priority,
+            transcript=transcript,
+            tasks=tasks,
+            tags=tags,
+            assigned_entities=data.get("assigned_entities") or [],
+            business_leads=data.get("business_leads") or [],
+        )
+
+    def llm_brain_sync(
+        self,
+        transcript: str,
+        user_role: str = "GENERIC",
+        user_instruction: str = "",
+        note_created_at: Optional[int] = None,
+        user_timezone: str = "UTC",
+        **kwargs,
+    ) -> NoteAIOutput:
+        """Synchronous structured extraction for Celery worker with timezone-aware priority."""
+        # Validation
+        transcript = validate_transcript(transcript)
+
+        if not self.groq_client:
+            return self._unavailable_output(transcript)
+
+        system_prompt, cache_system_prompt, user_content = self._extraction_prompts(
+            transcript, user_role, user_instruction, note_created_at, user_timezone,
+            kwargs.get("jargons", []),
+        )
         settings = self._get_dynamic_settings()
 
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content},
-                ],
+            content = self._cached_completion(
+                "llm_brain",
+                system_prompt,
+                user_content,
                 model=settings["llm_model"],
-                response_format={"type": "json_object"},
                 temperature=settings["temperature"],
+                cache_system_prompt=cache_system_prompt,
+                bypass_cache=kwargs.get("bypass_cache", False),
+                response_format={"type": "json_object"},
                 max_tokens=settings["max_tokens"],
             )
-
-            content = response.choices[0].message.content
-            data = validate_json_response(content)
-
-            # Additional structural validation
-            title = data.get("title", "Untitled Note")[:100]
-            summary = data.get("summary", "No summary generated.")
-            priority = data.get("priority", "MEDIUM").upper()
-            if priority not in ["HIGH", "MEDIUM", "LOW"]:
-                priority = "MEDIUM"
-
-            tasks = []
-            for t in data.get("tasks", []):
-                # Robust extraction for title and description
-                task_title = t.get("title") or t.get("description", "Task")[:100]
-                task_description = t.get("description") or t.get(
-                    "title", "No description provided."
-                )
-                tasks.append(
-                    {
-                        "title": task_title,
-                        "description": task_description,
-                        "priority": t.get("priority", "MEDIUM").upper(),
-                        "deadline": t.get("deadline") or t.get("due_date"),
-                        "actions": t.get("actions", {}),
-                        "assigned_entities": t.get("assigned_entities", []),
-                    }
-                )
-
-            tags = data.get("tags") or []
-            if isinstance(tags, str):
-                tags = [t.strip() for t in tags.split(",") if t.strip()]
-
-            return NoteAIOutput(
-                title=title,
-                summary=summary,
-                priority=priority,
-                transcript=transcript,
-                tasks=tasks,
-                tags=tags,
-                assigned_entities=data.get("assigned_entities") or [],
-                business_leads=data.get("business_leads") or [],
-            )
+            return self._parse_extraction(content, transcript)
         except Exception as e:
             JLogger.error("LLM brain process failed", user_role=user_role, error=str(e))
             raise
@@ -491,14 +774,34 @@ Use this temporal context to intelligently assign task priorities based on urgen
         **kwargs,
     ) -> NoteAIOutput:
         """Structured extraction using Llama 3.1 on Groq with robust validation."""
-        return self.llm_brain_sync(
-            transcript,
-            user_role,
-            user_instruction,
-            note_created_at,
-            user_timezone,
-            **kwargs,
+        transcript = validate_transcript(transcript)
+
+        if not self.async_groq_client:
+            return self._unavailable_output(transcript)
+
+        system_prompt, cache_system_prompt, user_content = self._extraction_prompts(
+            transcript, user_role, user_instruction, note_created_at, user_timezone,
+            kwargs.get("jargons", []),
         )
+        # Settings may hit the database
+        settings = await asyncio.to_thread(self._get_dynamic_settings)
+
+        try:
+            content = await self._cached_completion_async(
+                "llm_brain",
+                system_prompt,
+                user_content,
+                model=settings["llm_model"],
+                temperature=settings["temperature"],
+                cache_system_prompt=cache_system_prompt,
+                bypass_cache=kwargs.get("bypass_cache", False),
+                response_format={"type": "json_object"},
+                max_tokens=settings["max_tokens"],
+            )
+            return self._parse_extraction(content, transcript)
+        except Exception as e:
+            JLogger.error("LLM brain process failed", user_role=user_role, error=str(e))
+            raise
 
     async def run_full_analysis(
         self, audio_path: str, user_role: str = "GENERIC", **kwargs
@@ -507,7 +810,7 @@ Use this temporal context to intelligently assign task priorities based on urgen
         Orchestrates complete audio -> transcript -> AI analysis pipeline.
         """
         # 1. Transcribe
-        transcript, engine = await self.transcribe_with_failover(audio_path)
+        transcript, *_ = await self.transcribe_with_failover(audio_path)
 
         # 2. Analyze
         ai_output = await self.llm_brain(transcript, user_role, **kwargs)
@@ -567,7 +870,7 @@ Use this temporal context to intelligently assign task priorities based on urgen
         """
         Detect contradictions or conflicts using LLM with centralized prompt.
         """
-        if not existing_notes or not self.groq_client:
+        if not existing_notes or not self.async_groq_client:
             return []
 
         # Optimization: Don't pass too many notes to preserve context window
@@ -581,7 +884,7 @@ Use this temporal context to intelligently assign task priorities based on urgen
         )
 
         try:
-            response = self.groq_client.chat.completions.create(
+            response = await self.async_groq_client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
                 model=ai_config.LLM_FAST_MODEL,  # Use faster/cheaper model for conflict detection
                 response_format={"type": "json_object"},
@@ -592,15 +895,8 @@ Use this temporal context to intelligently assign task priorities based on urgen
             JLogger.error("LLM conflict detection failed", error=str(e))
             return []
 
-    def semantic_analysis_sync(
-        self, transcript: str, user_role: str = "GENERIC", **kwargs
-    ) -> dict:
-        """Synchronous version for Celery worker."""
-        settings = self._get_dynamic_settings()
-
-        jargons = kwargs.get("jargons", [])
-        personal_instruction = kwargs.get("personal_instruction", "")
-
+    @staticmethod
+    def _semantic_prompt(user_role: str, jargons: List[str], personal_instruction: str) -> str:
         # Role-Specific Prompt Engineering (Phase 3 Requirement)
         role_specialization = ""
         if user_role == "DEVELOPER":
@@ -620,7 +916,7 @@ Use this temporal context to intelligently assign task priorities based on urgen
                 "and identify repetitive behavioral loops or resistance markers."
             )
 
-        system_prompt = f"""
+        return f"""
         Role: SEMANTIC_ANALYST (Expert in psychology, linguistics, and logical reasoning)
         Background: You are analyzing a voice note from a {user_role}.
 
@@ -639,28 +935,41 @@ Use this temporal context to intelligently assign task priorities based on urgen
         - actionable_hidden_tasks: list of strings (non-obvious things to do)
         """
 
+    @staticmethod
+    def _parse_semantic(content: str):
+        data = validate_json_response(content)
+        # Match schema expected by background task
+        return type(
+            "Analysis",
+            (),
+            {
+                "sentiment": data.get("sentiment"),
+                "tone": data.get("emotional_tone"),
+                "hidden_patterns": data.get("logical_patterns"),
+                "suggested_questions": data.get("suggested_questions"),
+            },
+        )
+
+    def semantic_analysis_sync(
+        self, transcript: str, user_role: str = "GENERIC", **kwargs
+    ) -> dict:
+        """Synchronous version for Celery worker."""
+        settings = self._get_dynamic_settings()
+        system_prompt = self._semantic_prompt(
+            user_role, kwargs.get("jargons", []), kwargs.get("personal_instruction", "")
+        )
+
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": transcript},
-                ],
+            content = self._cached_completion(
+                "semantic_analysis",
+                system_prompt,
+                transcript,
                 model=settings["llm_model"],
-                response_format={"type": "json_object"},
                 temperature=0.5,
+                bypass_cache=kwargs.get("bypass_cache", False),
+                response_format={"type": "json_object"},
             )
-            data = validate_json_response(response.choices[0].message.content)
-            # Match schema expected by background task
-            return type(
-                "Analysis",
-                (),
-                {
-                    "sentiment": data.get("sentiment"),
-                    "tone": data.get("emotional_tone"),
-                    "hidden_patterns": data.get("logical_patterns"),
-                    "suggested_questions": data.get("suggested_questions"),
-                },
-            )
+            return self._parse_semantic(content)
         except Exception as e:
             JLogger.error("Semantic analysis failed", user_role=user_role, error=str(e))
             raise
@@ -669,16 +978,30 @@ Use this temporal context to intelligently assign task priorities based on urgen
         self, transcript: str, user_role: str = "GENERIC", **kwargs
     ) -> dict:
         """Deep semantic analysis: emotional tone, patterns, logical consistency."""
-        return self.semantic_analysis_sync(transcript, user_role, **kwargs)
+        settings = await asyncio.to_thread(self._get_dynamic_settings)
+        system_prompt = self._semantic_prompt(
+            user_role, kwargs.get("jargons", []), kwargs.get("personal_instruction", "")
+        )
 
-    def perform_semantic_search(
-        self, db: Session, user_id: str, query: str, limit: int = 5, is_admin: bool = False
+        try:
+            content = await self._cached_completion_async(
+                "semantic_analysis",
+                system_prompt,
+                transcript,
+                model=settings["llm_model"],
+                temperature=0.5,
+                bypass_cache=kwargs.get("bypass_cache", False),
+                response_format={"type": "json_object"},
+            )
+            return self._parse_semantic(content)
+        except Exception as e:
+            JLogger.error("Semantic analysis failed", user_role=user_role, error=str(e))
+            raise
+
+    def _semantic_search_results(
+        self, db: Session, user_id: str, query_vector, limit: int, is_admin: bool,
+        profile: Optional[str] = None
     ) -> List[dict]:
-        """
-        Consolidated semantic search logic.
-        """
-        query_vector = self.generate_embedding_sync(query)
-        
         # Filtering logic
         query_obj = db.query(models.Note).filter(
             models.Note.is_deleted == False, 
@@ -688,31 +1011,39 @@ Use this temporal context to intelligently assign task priorities based on urgen
         if not is_admin:
             query_obj = query_obj.filter(models.Note.user_id == user_id)
             
-        distance_label = models.Note.embedding.cosine_distance(query_vector).label("distance")
-        results = (
-            query_obj.add_columns(distance_label)
-            .order_by(distance_label)
-            .limit(limit)
-            .all()
-        )
+        results = vector_search.nearest(query_obj, query_vector, limit, profile=profile)
         
         search_results = []
         for note, distance in results:
             search_results.append({
                 "note": note,
-                "score": 1.0 - (distance or 0.0)
+                "score": 1.0 - float(distance)
             })
             
         return sorted(search_results, key=lambda x: x["score"], reverse=True)
 
-    def answer_question(
-        self, db: Session, user_id: str, question: str, note_id: Optional[str] = None
-    ) -> str:
+    def perform_semantic_search(
+        self, db: Session, user_id: str, query: str, limit: int = 5, is_admin: bool = False,
+        profile: Optional[str] = None
+    ) -> List[dict]:
         """
-        Unified Q&A logic with RAG support.
-        If note_id is provided, it focuses on that note.
-        Otherwise, it uses RAG across all notes.
+        Consolidated semantic search logic.
+        `profile` trades recall for latency (see app/services/vector_search.py).
         """
+        query_vector = self.generate_embedding_sync(query)
+        return self._semantic_search_results(db, user_id, query_vector, limit, is_admin, profile)
+
+    async def perform_semantic_search_async(
+        self, db: Session, user_id: str, query: str, limit: int = 5, is_admin: bool = False,
+        profile: Optional[str] = None
+    ) -> List[dict]:
+        """`perform_semantic_search` for async endpoints; the embedding is awaited."""
+        query_vector = await self.generate_embedding(query)
+        return self._semantic_search_results(db, user_id, query_vector, limit, is_admin, profile)
+
+    def _answer_context(
+        self, db: Session, user_id: str, question: str, note_id: Optional[str] = None
+    ) -> str:
         from app.services.rag_service import RAGService
         
         if note_id:
@@ -724,25 +1055,58 @@ Use this temporal context to intelligently assign task priorities based on urgen
             ).first()
             if not note:
                 raise AIServiceError("Note not found or access denied")
-            context = f"Note Title: {note.title}\nTranscript: {note.transcript}"
-        else:
-            # Global RAG focus
-            context = RAGService.get_context_for_transcript(db, user_id, question)
+            return f"Note Title: {note.title}\nTranscript: {note.transcript}"
+        # Global RAG focus
+        return RAGService.get_context_for_transcript(db, user_id, question)
+
+    @staticmethod
+    def _answer_system_prompt(context: str) -> str:
+        return f"You are a helpful AI assistant. Use the following context to answer the user's question:\n\n{context}"
+
+    def answer_question(
+        self, db: Session, user_id: str, question: str, note_id: Optional[str] = None
+    ) -> str:
+        """
+        Unified Q&A logic with RAG support.
+        If note_id is provided, it focuses on that note.
+        Otherwise, it uses RAG across all notes.
+        """
+        context = self._answer_context(db, user_id, question, note_id)
             
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a helpful AI assistant. Use the following context to answer the user's question:\n\n{context}",
-                    },
-                    {"role": "user", "content": question},
-                ],
+            # Keyed on the retrieved context too, so edited notes get a fresh answer
+            return self._cached_completion(
+                "answer_question",
+                self._answer_system_prompt(context),
+                question,
+                model="llama-3.3-70b-versatile",
+                temperature=0.3,
+                require_json=False,
+                max_tokens=800,
+            )
+        except Exception as e:
+            JLogger.error("Answer generation failed", user_id=user_id, error=str(e))
+            raise AIServiceError(f"AI service error: {str(e)}")
+
+    async def answer_question_async(
+        self, db: Session, user_id: str, question: str, note_id: Optional[str] = None
+    ) -> str:
+        """
+        `answer_question` for async endpoints: context retrieval (DB + embedding)
+        runs in a worker thread and the answer comes from the pooled AsyncGroq client.
+        """
+        context = await asyncio.to_thread(self._answer_context, db, user_id, question, note_id)
+
+        try:
+            return await self._cached_completion_async(
+                "answer_question",
+                self._answer_system_prompt(context),
+                question,
                 model="llama-3.3-70b-versatile",
                 temperature=0.3,
+                require_json=False,
                 max_tokens=800,
             )
-            return response.choices[0].message.content
         except Exception as e:
             JLogger.error("Answer generation failed", user_id=user_id, error=str(e))
             raise AIServiceError(f"AI service error: {str(e)}")
@@ -1,11 +1,19 @@
 import time
+from datetime import datetime
 from typing import Dict, Any, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.db import models
 from app.services.ai_service import AIService
+from app.services.stats_cache import get_stats_cache
+from app.services.text_search import uses_postgres
 from app.utils.json_logger import JLogger
 
+DAY_MS = 24 * 60 * 60 * 1000
+HEATMAP_WEEKS = 12
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
 class AnalyticsService:
     @staticmethod
     def get_team_metrics(db: Session, team_id: str) -> Dict[str, Any]:
@@ -103,27 +111,87 @@ class AnalyticsService:
         }
 
 
-    @staticmethod
-    def get_productivity_pulse(db: Session, user_id: str, force_refresh: bool = False) -> Dict[str, Any]:
+    @classmethod
+    def get_productivity_pulse(cls, db: Session, user_id: str, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Calculate personal productivity metrics for the mobile dashboard.
         """
-        # 1. Note Metrics
+        return get_stats_cache().get_or_compute(
+            "productivity_pulse", user_id, lambda: cls._compute_productivity_pulse(db, user_id), force_refresh
+        )
+
+    @staticmethod
+    def _user_zone(db: Session, user_id: str) -> ZoneInfo:
+        name = db.query(models.User.timezone).filter(models.User.id == user_id).scalar()
+        try:
+            return ZoneInfo(name or "UTC")
+        except (ValueError, ZoneInfoNotFoundError):
+            return ZoneInfo("UTC")
+
+    @classmethod
+    def get_activity_heatmap(cls, db: Session, user_id: str, weeks: int = HEATMAP_WEEKS) -> List[Dict[str, Any]]:
+        """
+        Notes per weekday in the user's timezone over the last `weeks` weeks,
+        as intensities relative to the busiest weekday.
+        """
+        zone = cls._user_zone(db, user_id)
+        since = int(time.time() * 1000) - weeks * 7 * DAY_MS
+        if uses_postgres(db):
+            day = func.date_trunc(
+                "day", func.timezone(zone.key, func.to_timestamp(models.Note.timestamp / 1000.0))
+            )
+        else:
+            # SQLite (tests): the zone's current offset, days since the epoch
+            offset = int(datetime.now(zone).utcoffset().total_seconds() * 1000)
+            day = (models.Note.timestamp + offset) // DAY_MS
+        rows = (
+            db.query(day.label("day"), func.count().label("notes"))
+            .filter(
+                models.Note.user_id == user_id,
+                models.Note.is_deleted == False,
+                models.Note.timestamp >= since,
+            )
+            .group_by(day)
+            .all()
+        )
+
+        counts = [0] * 7
+        for row in rows:
+            # 1970-01-01 was a Thursday (Monday = 0)
+            weekday = row.day.weekday() if isinstance(row.day, datetime) else (int(row.day) + 3) % 7
+            counts[weekday] += int(row.notes or 0)
+        busiest = max(counts) or 1
+        return [
+            {"day": name, "intensity": round(count / busiest, 2)}
+            for name, count in zip(WEEKDAYS, counts)
+        ]
+
+    @classmethod
+    def _compute_productivity_pulse(cls, db: Session, user_id: str) -> Dict[str, Any]:
+        # 1. Note Metrics (one aggregate over idx_notes_user_active_status)
         notes_query = db.query(models.Note).filter(
             models.Note.user_id == user_id,
             models.Note.is_deleted == False
         )
-        total_notes = notes_query.count()
-        processed_notes = notes_query.filter(models.Note.status == models.NoteStatus.DONE).count()
+        note_counts = notes_query.with_entities(
+            func.count().label("total"),
+            func.count().filter(models.Note.status == models.NoteStatus.DONE).label("processed"),
+        ).one()
+        total_notes = int(note_counts.total or 0)
+        processed_notes = int(note_counts.processed or 0)
         recent_notes = notes_query.order_by(models.Note.timestamp.desc()).limit(5).all()
         
-        # 2. Task Metrics
+        # 2. Task Metrics (one aggregate over idx_tasks_user_active_stats)
         tasks_query = db.query(models.Task).filter(
             models.Task.user_id == user_id,
             models.Task.is_deleted == False
         )
-        total_tasks = tasks_query.count()
-        completed_tasks = tasks_query.filter(models.Task.is_done == True).count()
+        task_counts = tasks_query.with_entities(
+            func.count().label("total"),
+            func.count().filter(models.Task.is_done == True).label("completed"),
+        ).one()
+        total_tasks = int(task_counts.total or 0)
+        completed_tasks = int(task_counts.completed or 0)
         
         # 3. Calculation logic for ROI and Velocity
         total_words = 0
@@ -140,15 +208,8 @@ class AnalyticsService:
         velocity_val = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         productivity_velocity = f"{int(velocity_val)}%"
 
-        # 4. Generate Heatmap (Simplified mapping to days)
-        # For MVP, we'll just mock it or do a simple group by DOW
-        heatmap = [
-            {"day": "Mon", "intensity": 0.4},
-            {"day": "Tue", "intensity": 0.8},
-            {"day": "Wed", "intensity": 0.6},
-            {"day": "Thu", "intensity": 0.9},
-            {"day": "Fri", "intensity": 0.3},
-        ]
+        # 4. Activity Heatmap
+        heatmap = cls.get_activity_heatmap(db, user_id)
 
         # 5. AI Insights (Derived from high-prio tasks or summary)
         ai_insights = []
@@ -1,9 +1,10 @@
 import os
 import shutil
 import time
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import librosa
+import numpy as np
 import soundfile as sf
 from app.utils.json_logger import JLogger
 
@@ -90,8 +91,118 @@ class AudioService:
         return chunks
 
     @staticmethod
-    def merge_transcripts(transcripts: List[str]) -> str:
-        """Merges multiple transcripts into one."""
+    def find_silence_split_points(
+        audio_path: str,
+        chunk_duration_sec: float,
+        search_window_sec: float = 30.0,
+        top_db: float = 30.0,
+        frame_sec: float = 0.02,
+    ) -> List[int]:
+        """
+        Finds sample offsets to split on, one near every `chunk_duration_sec`,
+        snapped to the closest silent frame within `search_window_sec`
+        (or the quietest frame if there is no silence there).
+
+        The file is scanned block by block, so memory stays flat for long audio.
+        """
+        with sf.SoundFile(audio_path) as f:
+            sr = f.samplerate
+            total = f.frames
+            frame = max(1, int(frame_sec * sr))
+            rms_parts = []
+            for block in f.blocks(blocksize=frame * 1000, dtype="float32", always_2d=True):
+                mono = block.mean(axis=1)
+                mono = np.concatenate((mono, np.zeros(-len(mono) % frame, dtype=np.float32)))
+                rms_parts.append(np.sqrt(np.mean(np.square(mono.reshape(-1, frame)), axis=1)))
+
+        if not rms_parts or total <= chunk_duration_sec * sr:
+            return []
+
+        rms = np.concatenate(rms_parts)
+        rms_db = 20 * np.log10(np.maximum(rms, 1e-10) / max(rms.max(), 1e-10))
+        silent = rms_db < -top_db
+
+        chunk_frames = int(chunk_duration_sec * sr / frame)
+        window = int(search_window_sec * sr / frame)
+        points = []
+        previous = 0
+        for target in range(chunk_frames, len(rms), chunk_frames):
+            lo = max(previous + 1, target - window)
+            hi = min(len(rms), target + window)
+            if lo >= hi:
+                continue
+            candidates = np.flatnonzero(silent[lo:hi])
+            if len(candidates):
+                best = lo + candidates[np.argmin(np.abs(lo + candidates - target))]
+            else:
+                best = lo + int(np.argmin(rms[lo:hi]))
+            points.append(int(best * frame))
+            previous = best
+        return [p for p in points if 0 < p < total]
+
+    @staticmethod
+    def chunk_audio_on_silence(
+        audio_path: str,
+        output_dir: str,
+        chunk_duration_sec: float = 300.0,
+        search_window_sec: float = 30.0,
+    ) -> List[Tuple[str, float]]:
+        """
+        Splits audio into roughly `chunk_duration_sec` pieces, cutting on silence
+        so words are not split across chunks.
+
+        Returns:
+            List[Tuple[str, float]]: (chunk path, start offset in seconds), in order
+        """
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        chunks = []
+        try:
+            points = AudioService.find_silence_split_points(
+                audio_path, chunk_duration_sec, search_window_sec
+            )
+            info = sf.info(audio_path)
+            bounds = [0] + points + [info.frames]
+            for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+                chunk_y, sr = sf.read(audio_path, start=start, stop=stop, dtype="float32")
+                chunk_path = os.path.join(output_dir, f"chunk_{i}.wav")
+                sf.write(chunk_path, chunk_y, sr)
+                chunks.append((chunk_path, start / sr))
+
+            JLogger.info(f"Chunked {audio_path} on silence into {len(chunks)} parts")
+        except Exception as e:
+            # A partial chunk list would silently drop the tail of the recording;
+            # none makes the caller transcribe the whole file instead
+            JLogger.error(f"Failed to chunk audio on silence: {e}")
+            for chunk_path, _ in chunks:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+            return []
+
+        return chunks
+
+    @staticmethod
+    def format_offset(seconds: float) -> str:
+        """Formats an offset as HH:MM:SS."""
+        seconds = int(seconds)
+        return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+    @staticmethod
+    def merge_transcripts(
+        transcripts: List[str], offsets: Optional[List[float]] = None
+    ) -> str:
+        """
+        Merges multiple transcripts into one.
+        When chunk `offsets` (seconds) are given, each part is prefixed with its
+        [HH:MM:SS] start time; empty parts are dropped.
+        """
         if not transcripts:
             return ""
-        return "\n\n".join(transcripts)
+        if offsets is None:
+            return "\n\n".join(transcripts)
+        return "\n\n".join(
+            f"[{AudioService.format_offset(offset)}] {text}"
+            for text, offset in zip(transcripts, offsets)
+            if text
+        )
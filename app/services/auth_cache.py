@@ -0,0 +1,310 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.config import ai_config
+from app.db import models
+from app.utils.json_logger import JLogger
+
+_USER_COLUMNS = [attr.key for attr in inspect(models.User).column_attrs]
+_USER_ENUMS = {
+    attr.key: attr.columns[0].type.enum_class
+    for attr in inspect(models.User).column_attrs
+    if getattr(attr.columns[0].type, "enum_class", None) is not None
+}
+
+
+def snapshot_user(user: models.User) -> str:
+    """Serializes the User's column values (enums by name) for the cache."""
+    data = {}
+    for key in _USER_COLUMNS:
+        value = getattr(user, key)
+        data[key] = value.name if isinstance(value, Enum) else value
+    return json.dumps(data)
+
+
+def attach_user(db: Session, snapshot: Dict[str, Any]) -> models.User:
+    """
+    Rebuilds a persistent User in `db` from a cached snapshot without a SELECT.
+    Relationships still lazy-load through `db` as usual.
+    """
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+class AuthUserCache:
+    """
+    Cache of authenticated users keyed by (sub, iat): an in-process TTL LRU in
+    front of an optional Redis hash per user.
+
+    Entries are dropped whenever a User row is updated or deleted through the
+    ORM: locally at flush, and in every API/worker process after commit via the
+    INVALIDATION_CHANNEL pub/sub channel. The TTL bounds staleness for changes
+    made outside the ORM or while Redis is unreachable.
+    """
+
+    KEY_PREFIX = "authcache:v1:user:"
+    INVALIDATION_CHANNEL = "auth:invalidate"
+    REDIS_RETRY_SEC = 30.0
+
+    def __init__(
+        self,
+        ttl_sec: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        redis_client=None,
+        use_redis: Optional[bool] = None,
+    ):
+        self.ttl_sec = ttl_sec or ai_config.AUTH_CACHE_TTL_SEC
+        self.max_entries = max_entries or ai_config.AUTH_CACHE_MAX_ENTRIES
+        self.use_redis = ai_config.AUTH_CACHE_USE_REDIS if use_redis is None else use_redis
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._redis_down_until = 0.0
+        self._listener: Optional[threading.Thread] = None
+        self._listener_pid: Optional[int] = None
+        self.counters = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    def _get_redis(self):
+        if not self.use_redis:
+            return None
+        if self._redis is None and time.time() >= self._redis_down_until:
+            try:
+                import redis
+
+                self._redis = redis.from_url(ai_config.REDIS_URL, socket_timeout=0.5)
+            except Exception as e:
+                self._redis_unavailable(e)
+        if time.time() < self._redis_down_until:
+            return None
+        return self._redis
+
+    def _redis_unavailable(self, error: Exception):
+        self._redis_down_until = time.time() + self.REDIS_RETRY_SEC
+        JLogger.warning("Auth cache: Redis unavailable, using in-process cache only", error=str(error))
+
+    @staticmethod
+    def _decode(raw: str) -> Dict[str, Any]:
+        data = json.loads(raw)
+        for key, enum_class in _USER_ENUMS.items():
+            if data.get(key) is not None:
+                data[key] = enum_class[data[key]]
+        return data
+
+    def _remember(self, key: Tuple[str, Any], value: str, expires_at: float):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id: str, issued_at: Any = None) -> Optional[Dict[str, Any]]:
+        """Returns a fresh copy of the cached user snapshot, or None."""
+        if not ai_config.AUTH_CACHE_ENABLED:
+            return None
+        self._ensure_listener()
+        key = (user_id, issued_at)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+        if entry is not None:
+            return self._decode(entry[1])
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = client.hget(self.KEY_PREFIX + user_id, str(issued_at))
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8")
+                if isinstance(raw, str):
+                    self._remember(key, raw, now + self.ttl_sec)
+                    with self._lock:
+                        self.counters["redis_hits"] += 1
+                    return self._decode(raw)
+            except Exception as e:
+                self._redis_unavailable(e)
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def set(self, user_id: str, issued_at: Any, user: models.User):
+        if not ai_config.AUTH_CACHE_ENABLED:
+            return
+        raw = snapshot_user(user)
+        self._remember((user_id, issued_at), raw, time.time() + self.ttl_sec)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.hset(self.KEY_PREFIX + user_id, str(issued_at), raw)
+                client.expire(self.KEY_PREFIX + user_id, self.ttl_sec)
+            except Exception as e:
+                self._redis_unavailable(e)
+
+    def load(self, db: Session, user_id: str, issued_at: Any = None) -> Optional[Dict[str, Any]]:
+        """Cached snapshot for the user, reading (and caching) the row on a miss."""
+        snapshot = self.get(user_id, issued_at)
+        if snapshot is not None:
+            return snapshot
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if user is None:
+            return None
+        self.set(user_id, issued_at, user)
+        return self._decode(snapshot_user(user))
+
+    def get_user(self, db: Session, user_id: str, issued_at: Any = None) -> Optional[models.User]:
+        """Like `load`, but returns a User attached to `db`."""
+        snapshot = self.get(user_id, issued_at)
+        if snapshot is not None:
+            return attach_user(db, snapshot)
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if user is not None:
+            self.set(user_id, issued_at, user)
+        return user
+
+    def invalidate_local(self, user_ids: Iterable[str]):
+        user_ids = set(user_ids)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in user_ids]:
+                del self._entries[key]
+            self.counters["invalidations"] += len(user_ids)
+
+    def invalidate(self, user_ids: Iterable[str]):
+        """Drops the users everywhere: locally, in Redis, and in other processes."""
+        user_ids = list(user_ids)
+        self.invalidate_local(user_ids)
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(*[self.KEY_PREFIX + user_id for user_id in user_ids])
+            for user_id in user_ids:
+                client.publish(self.INVALIDATION_CHANNEL, user_id)
+        except Exception as e:
+            self._redis_unavailable(e)
+
+    def _ensure_listener(self):
+        # Re-spawn after fork (Celery prefork / multi-worker API servers)
+        if not self.use_redis:
+            return
+        pid = os.getpid()
+        if self._listener is not None and self._listener_pid == pid and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is not None and self._listener_pid == pid and self._listener.is_alive():
+                return
+            if self._listener_pid is not None and self._listener_pid != pid:
+                self._entries.clear()
+            self._listener = threading.Thread(target=self._listen, name="auth-cache-invalidation", daemon=True)
+            self._listener_pid = pid
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                import redis
+
+                # Dedicated connection without a read timeout: it idles between messages
+                pubsub = redis.from_url(ai_config.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected was missed
+                with self._lock:
+                    self._entries.clear()
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    user_id = message.get("data")
+                    if isinstance(user_id, bytes):
+                        user_id = user_id.decode("utf-8")
+                    self.invalidate_local([user_id])
+            except Exception as e:
+                JLogger.warning("Auth cache: invalidation listener disconnected", error=str(e))
+            time.sleep(self.REDIS_RETRY_SEC)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.counters["memory_hits"] + self.counters["redis_hits"]
+            misses = self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                **self.counters,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+
+
+_auth_cache: Optional[AuthUserCache] = None
+_auth_cache_lock = threading.Lock()
+
+
+def get_auth_cache() -> AuthUserCache:
+    """Get the process-wide authenticated user cache."""
+    global _auth_cache
+    if _auth_cache is None:
+        with _auth_cache_lock:
+            if _auth_cache is None:
+                _auth_cache = AuthUserCache()
+    return _auth_cache
+
+
+_PENDING_INVALIDATIONS = "auth_cache_invalidations"
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    get_auth_cache().invalidate_local([target.id])
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).add(target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _user_bulk_changed(orm_execute_state):
+    # Query-level update()/delete() skip the mapper events above, so resolve
+    # the affected ids from the statement's WHERE clause before it runs
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if not any(mapper.class_ is models.User for mapper in orm_execute_state.all_mappers):
+        return
+    ids_query = select(models.User.id)
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        ids_query = ids_query.where(whereclause)
+    session = orm_execute_state.session
+    user_ids = set(session.execute(ids_query).scalars())
+    if user_ids:
+        get_auth_cache().invalidate_local(user_ids)
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_changes(session):
+    # Again after commit: a concurrent request may have re-cached the old row
+    user_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if user_ids:
+        get_auth_cache().invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
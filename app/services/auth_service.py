@@ -1,8 +1,9 @@
 import os
 import time
 import secrets
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
-from typing import Optional
+from typing import Any, Optional
 
 import jwt
 import bcrypt
@@ -12,6 +13,7 @@ from sqlalchemy.orm import Session
 
 from app.db import models
 from app.db.session import get_db
+from app.services.auth_cache import get_auth_cache
 from app.utils.json_logger import JLogger
 
 # Configuration
@@ -38,7 +40,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.now(UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "iat": datetime.now(UTC), "type": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     if isinstance(encoded_jwt, bytes):
         return encoded_jwt.decode('utf-8')
@@ -189,6 +191,74 @@ def mock_send_verification_email(email: str, link: str):
     JLogger.info("Sent verification email", email=email, link=link)
 
 
+@dataclass
+class Principal:
+    """The caller's identity, decoded from the request token once per request."""
+
+    token: Optional[str] = None
+    user_id: Optional[str] = None
+    issued_at: Any = None
+    dev_bypass: bool = False
+    from_cookie: bool = False
+    error: Optional[str] = None  # "missing" | "expired" | "invalid" | "claims"
+
+
+def decode_principal(token: Optional[str], from_cookie: bool = False) -> Principal:
+    if not token:
+        return Principal(error="missing")
+
+    from app.utils.security import is_dev_bypass
+
+    # Development bypass tokens (dev_user-id format)
+    if is_dev_bypass(token):
+        return Principal(token, token.replace("dev_", ""), dev_bypass=True, from_cookie=from_cookie)
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        return Principal(token, from_cookie=from_cookie, error="expired")
+    except jwt.InvalidTokenError:
+        return Principal(token, from_cookie=from_cookie, error="invalid")
+    except Exception:
+        return Principal(token, from_cookie=from_cookie, error="claims")
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        return Principal(token, from_cookie=from_cookie, error="claims")
+    # Tokens minted before `iat` was added are keyed by their expiry instead
+    issued_at = payload.get("iat", payload.get("exp"))
+    return Principal(token, str(user_id), issued_at, from_cookie=from_cookie)
+
+
+def resolve_principal(
+    request: Request, credentials: Optional[HTTPAuthorizationCredentials] = None
+) -> Principal:
+    """
+    Decodes the request's token (Bearer credentials, Authorization header, then
+    the access_token cookie) and memoizes the result on request.state, so the
+    usage middleware and auth dependencies share a single decode.
+    """
+    principal = getattr(request.state, "principal", None)
+    if isinstance(principal, Principal):
+        return principal
+
+    token = credentials.credentials if credentials else None
+    if not token:
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+
+    from_cookie = False
+    if not token:
+        # Support token in Cookies (for Dashboard security hardening)
+        token = request.cookies.get("access_token")
+        from_cookie = bool(token)
+
+    principal = decode_principal(token, from_cookie=from_cookie)
+    request.state.principal = principal
+    return principal
+
+
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -198,7 +268,7 @@ async def get_current_user(
     Dependency to get the currently authenticated user from JWT.
     Validates:
     1. JWT integrity and expiration.
-    2. User existence in DB.
+    2. User existence in DB (served from the auth cache when warm).
     3. Biometric token consistency for mobile users (non-admins).
     """
     # Fast-path: Check if middleware already fetched the user
@@ -212,58 +282,35 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    # Extract token from HTTPBearer credentials
-    token = None
-    if credentials:
-        token = credentials.credentials
-
-    # Support token in header if not found (for manual testing)
-    if not token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-
-    # Support token in Cookies (for Dashboard security hardening)
-    if not token:
-        token = request.cookies.get("access_token")
-
-    if not token:
+    principal = resolve_principal(request, credentials)
+    if principal.error == "missing":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication token missing",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if principal.error == "expired":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if principal.error == "invalid":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if principal.error:
+        raise credentials_exception
 
-    from app.utils.security import is_dev_bypass
-
-    # Support development bypass tokens (dev_user-id format)
-    if is_dev_bypass(token):
-        user_id = token.replace("dev_", "")
+    user_id = principal.user_id
+    if principal.dev_bypass:
         JLogger.info("Using development bypass token", user_id=user_id)
-    else:
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                raise credentials_exception
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        except jwt.InvalidTokenError:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        except Exception:
-            raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = get_auth_cache().get_user(db, user_id, principal.issued_at)
     if user is None:
-        if is_dev_bypass(token) and os.getenv("ENVIRONMENT") != "production":
+        if principal.dev_bypass and os.getenv("ENVIRONMENT") != "production":
             # Auto-create dev user (Non-production only)
             user = models.User(
                 id=user_id,
@@ -318,15 +365,11 @@ async def get_current_user_ws(token: str, db: Session = Depends(get_db)):
         detail="Could not validate WebSocket credentials",
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except Exception:
+    principal = decode_principal(token)
+    if principal.error or principal.dev_bypass:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = get_auth_cache().get_user(db, principal.user_id, principal.issued_at)
     if user is None or user.is_deleted:
         raise credentials_exception
 
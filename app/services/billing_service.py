@@ -4,10 +4,11 @@ import uuid
 from typing import Optional
 
 import stripe
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from app.core.config import ai_config
-from app.db.models import Transaction, User, Wallet, UsageLog
+from app.db.models import CreditReservation, Transaction, User, Wallet, UsageLog
 
 logger = logging.getLogger("VoiceNote.Billing")
 
@@ -19,7 +20,7 @@ class BillingService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_or_create_wallet(self, user_id: str, for_update: bool = False) -> Wallet:
+    def get_or_create_wallet(self, user_id: str, for_update: bool = False, commit: bool = True) -> Wallet:
         query = self.db.query(Wallet).filter(Wallet.user_id == user_id)
         if for_update:
             query = query.with_for_update()
@@ -30,20 +31,176 @@ class BillingService:
                 user_id=user_id, balance=100
             )  # Give 100 free credits on signup
             self.db.add(wallet)
-            self.db.commit()
-            self.db.refresh(wallet)
+            if commit:
+                self.db.commit()
+                self.db.refresh(wallet)
+            else:
+                self.db.flush()
         return wallet
 
     def check_balance(self, user_id: str, estimated_cost: int, for_update: bool = False) -> bool:
         """
-        Returns True if user has enough credits.
+        Returns True if user has enough spendable credits (balance minus
+        credits reserved by in-flight operations).
         If for_update=True, locks the row.
         """
         wallet = self.get_or_create_wallet(user_id, for_update=for_update)
         if wallet.is_frozen:
             return False
 
-        return wallet.balance >= estimated_cost
+        return wallet.balance - (wallet.reserved or 0) >= estimated_cost
+
+    # --- Credit reservations ---
+    # A reservation holds credits with one conditional UPDATE and a short
+    # transaction, so concurrent requests never wait on a wallet row lock:
+    # reserve() -> commit_reservation() / release_reservation(), and the
+    # periodic reconcile_reservations() expires holds that were never settled.
+
+    def reserve_credits(
+        self,
+        wallet_id: str,
+        amount: int,
+        user_id: Optional[str] = None,
+        ref_id: Optional[str] = None,
+        ttl_sec: Optional[int] = None,
+    ) -> Optional[CreditReservation]:
+        """
+        Holds `amount` credits if the wallet's spendable balance covers them.
+        Commits immediately. Returns None if funds are insufficient or the
+        wallet is frozen.
+        """
+        hold = (
+            update(Wallet)
+            .where(
+                Wallet.user_id == wallet_id,
+                Wallet.is_frozen.isnot(True),
+                Wallet.balance - Wallet.reserved >= amount,
+            )
+            .values(reserved=Wallet.reserved + amount)
+        )
+        held = self.db.execute(hold).rowcount
+        if not held and self.db.get(Wallet, wallet_id) is None:
+            self.get_or_create_wallet(wallet_id)
+            held = self.db.execute(hold).rowcount
+        if not held:
+            self.db.rollback()
+            return None
+
+        now = int(time.time() * 1000)
+        reservation = CreditReservation(
+            wallet_id=wallet_id,
+            user_id=user_id,
+            amount=amount,
+            reference_id=ref_id,
+            created_at=now,
+            expires_at=now + (ttl_sec or ai_config.CREDIT_RESERVATION_TTL_SEC) * 1000,
+        )
+        self.db.add(reservation)
+        self.db.commit()
+        return reservation
+
+    def _settle(self, reservation_id: str, status: str) -> Optional[CreditReservation]:
+        # HELD -> status exactly once, even if release, commit and the
+        # reconciler race for the same reservation
+        settled = self.db.execute(
+            update(CreditReservation)
+            .where(CreditReservation.id == reservation_id, CreditReservation.status == "HELD")
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not settled:
+            return None
+        reservation = self.db.get(CreditReservation, reservation_id, populate_existing=True)
+        self.db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == reservation.wallet_id)
+            .values(reserved=Wallet.reserved - reservation.amount)
+        )
+        return reservation
+
+    def release_reservation(self, reservation_id: str, status: str = "RELEASED") -> bool:
+        """Returns the held credits to the wallet. False if already settled."""
+        reservation = self._settle(reservation_id, status)
+        if reservation is None:
+            self.db.rollback()
+            return False
+        self.db.commit()
+        return True
+
+    def commit_reservation(
+        self,
+        reservation_id: str,
+        cost: Optional[int] = None,
+        description: str = "",
+        audio_duration: float = 0.0,
+    ) -> bool:
+        """
+        Turns a hold into a charge of `cost` (default: the held amount) in one
+        transaction. False if the reservation was already settled or the
+        charge cannot be covered.
+        """
+        reservation = self._settle(reservation_id, "COMMITTED")
+        if reservation is None:
+            self.db.rollback()
+            return False
+        override = reservation.wallet_id if reservation.wallet_id != reservation.user_id else None
+        charged = self.charge_usage(
+            reservation.user_id or reservation.wallet_id,
+            cost=reservation.amount if cost is None else cost,
+            description=description,
+            ref_id=reservation.reference_id,
+            audio_duration=audio_duration,
+            override_wallet_id=override,
+            commit=False,
+        )
+        if not charged:
+            self.db.rollback()
+            return False
+        self.db.commit()
+        return True
+
+    def reconcile_reservations(self, batch_size: int = 500) -> dict:
+        """
+        Expires HELD reservations past their deadline, then repairs wallets
+        whose `reserved` counter drifted from the sum of their HELD rows.
+        """
+        now = int(time.time() * 1000)
+        expired = 0
+        while True:
+            ids = self.db.scalars(
+                select(CreditReservation.id)
+                .where(CreditReservation.status == "HELD", CreditReservation.expires_at < now)
+                .limit(batch_size)
+            ).all()
+            for reservation_id in ids:
+                if self._settle(reservation_id, "EXPIRED") is not None:
+                    expired += 1
+            self.db.commit()
+            if len(ids) < batch_size:
+                break
+
+        held = (
+            select(func.coalesce(func.sum(CreditReservation.amount), 0))
+            .where(CreditReservation.wallet_id == Wallet.user_id, CreditReservation.status == "HELD")
+            .scalar_subquery()
+        )
+        drifted = self.db.scalars(select(Wallet.user_id).where(Wallet.reserved != held)).all()
+        for wallet_id in drifted:
+            # Lock the wallet so no reserve() is half-way through while we recount
+            wallet = self.db.query(Wallet).filter(Wallet.user_id == wallet_id).with_for_update().first()
+            actual = self.db.scalar(
+                select(func.coalesce(func.sum(CreditReservation.amount), 0)).where(
+                    CreditReservation.wallet_id == wallet_id, CreditReservation.status == "HELD"
+                )
+            )
+            if wallet is not None and wallet.reserved != actual:
+                logger.warning(
+                    f"Repairing reserved credits for wallet {wallet_id}: {wallet.reserved} -> {actual}"
+                )
+                wallet.reserved = actual
+            self.db.commit()
+
+        return {"expired": expired, "repaired": len(drifted)}
 
     def charge_usage(
         self,
@@ -53,10 +210,13 @@ class BillingService:
         ref_id: Optional[str] = None,
         audio_duration: float = 0.0,
         override_wallet_id: Optional[str] = None,
+        commit: bool = True,
     ) -> bool:
         """
         Deducts credits from wallet, updates user usage stats, and logs granular usage.
         Supports charging a corporate wallet if override_wallet_id is provided.
+        With commit=False the changes are only flushed, so the caller can commit
+        them together with its own writes.
         """
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -78,29 +238,26 @@ class BillingService:
         if not final_cost:
             final_cost = 0
 
-        # Atomic Update: Decrease balance only if sufficient funds
-        # We use SELECT ... FOR UPDATE to prevent race conditions on PostgreSQL
-        wallet = self.db.query(Wallet).filter(
-            Wallet.user_id == target_wallet_id
-        ).with_for_update().first()
-
-        if not wallet:
+        # Atomic Update: one conditional UPDATE decreases the balance only if
+        # it covers the cost, so concurrent charges never read-modify-write
+        debit = (
+            update(Wallet)
+            .where(Wallet.user_id == target_wallet_id, Wallet.balance >= final_cost)
+            .values(balance=Wallet.balance - final_cost)
+            .returning(Wallet.balance)
+        )
+        current_balance = self.db.execute(debit).scalar()
+        if current_balance is None and self.db.get(Wallet, target_wallet_id) is None:
             # Create wallet if missing and try again
-            wallet = self.get_or_create_wallet(target_wallet_id)
-            # Re-fetch with lock
-            wallet = self.db.query(Wallet).filter(
-                Wallet.user_id == target_wallet_id
-            ).with_for_update().first()
+            self.get_or_create_wallet(target_wallet_id, commit=commit)
+            current_balance = self.db.execute(debit).scalar()
 
-        if wallet.balance < final_cost:
+        if current_balance is None:
             logger.warning(
-                f"Insufficient funds for wallet {target_wallet_id} (charged for user {user_id}): Needs {final_cost}, has {wallet.balance}"
+                f"Insufficient funds for wallet {target_wallet_id} (charged for user {user_id}): Needs {final_cost}"
             )
             return False
 
-        wallet.balance -= final_cost
-        current_balance = wallet.balance
-
         # Update User Usage Stats (Cache) - always attributed to the person who did it
         if not user.usage_stats:
             user.usage_stats = {
@@ -140,6 +297,10 @@ class BillingService:
         )
         self.db.add(usage)
 
+        if not commit:
+            self.db.flush()
+            return True
+
         try:
             self.db.commit()
             return True
@@ -2,11 +2,203 @@ import asyncio
 import json
 import uuid
 import time
+from collections import deque
 import redis.asyncio as redis
-from typing import Any, List, AsyncGenerator
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set
 from app.core.config import ai_config
+from app.utils.event_codec import decode_event, encode_event
 from app.utils.json_logger import JLogger
 
+
+class HubClient:
+    """One SSE connection's view of the hub: a bounded queue of raw events."""
+
+    def __init__(self, channels: List[str], queue_size: int):
+        self.channels = channels
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+
+class PubSubHub:
+    """
+    Per-process Redis pub/sub multiplexer for SSE clients.
+
+    All clients share one pub/sub connection and one reader task. Channels
+    are reference counted: a channel is SUBSCRIBEd when its first local
+    client arrives and UNSUBSCRIBEd when the last one leaves. Each message
+    is demultiplexed into the bounded queue of every client on its channel.
+    A full queue drops its oldest event; a client that keeps falling behind
+    is disconnected so it reconnects and resyncs instead of buffering forever.
+    """
+
+    LAG_WINDOW = 1000
+
+    def __init__(self, redis_client, queue_size: int = None, max_drops: int = None):
+        self.redis = redis_client
+        self.queue_size = queue_size or ai_config.SSE_CLIENT_QUEUE_SIZE
+        self.max_drops = max_drops or ai_config.SSE_SLOW_CLIENT_MAX_DROPS
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._channels: Dict[str, Set[HubClient]] = {}
+        self._lock = asyncio.Lock()
+        self._lag_ms: Deque[float] = deque(maxlen=self.LAG_WINDOW)
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    async def register(self, channels: List[str]) -> HubClient:
+        client = HubClient(channels, self.queue_size)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub()
+            new_channels = [c for c in channels if c not in self._channels]
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(client)
+            if new_channels:
+                await self._pubsub.subscribe(*new_channels)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+        return client
+
+    async def unregister(self, client: HubClient):
+        client.closed = True
+        async with self._lock:
+            idle = []
+            for channel in client.channels:
+                listeners = self._channels.get(channel)
+                if listeners is None:
+                    continue
+                listeners.discard(client)
+                if not listeners:
+                    del self._channels[channel]
+                    idle.append(channel)
+            try:
+                if idle and self._pubsub is not None:
+                    await self._pubsub.unsubscribe(*idle)
+            except Exception as e:
+                JLogger.warning("SSE hub unsubscribe failed", channels=idle, error=str(e))
+
+            if not self._channels:
+                await self._shutdown()
+
+    async def _shutdown(self):
+        reader, pubsub = self._reader, self._pubsub
+        self._reader = self._pubsub = None
+        if reader is not None and reader is not asyncio.current_task():
+            reader.cancel()
+        if pubsub is not None:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def _read_loop(self):
+        while True:
+            pubsub = self._pubsub
+            if pubsub is None:
+                return
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except (redis.ConnectionError, redis.TimeoutError):
+                JLogger.warning("SSE hub lost Redis connection, resubscribing...")
+                await asyncio.sleep(2)
+                await self._resubscribe()
+                continue
+            except Exception as e:
+                JLogger.error("SSE hub read error", error=str(e))
+                await asyncio.sleep(1)
+                continue
+
+            if message and message.get("type") == "message":
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                try:
+                    # Decoded once per message, not once per client
+                    data = decode_event(message["data"])
+                except Exception as e:
+                    JLogger.warning("SSE hub dropped undecodable event", channel=channel, error=str(e))
+                    continue
+                self.dispatch(channel, data)
+
+    async def _resubscribe(self):
+        async with self._lock:
+            if not self._channels:
+                return
+            try:
+                if self._pubsub is not None:
+                    await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = self.redis.pubsub()
+            try:
+                await self._pubsub.subscribe(*self._channels)
+            except Exception as e:
+                JLogger.error("SSE hub resubscribe failed", error=str(e))
+
+    def dispatch(self, channel: str, data: str):
+        """Fans one message out to every local client on `channel`."""
+        self.received += 1
+        received_at = time.monotonic()
+        for client in tuple(self._channels.get(channel, ())):
+            if client.closed:
+                continue
+            try:
+                client.queue.put_nowait((data, received_at))
+                continue
+            except asyncio.QueueFull:
+                pass
+
+            # Slow consumer: make room by dropping its oldest event
+            try:
+                client.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            client.queue.put_nowait((data, received_at))
+            client.dropped += 1
+            self.dropped += 1
+            if client.dropped >= self.max_drops:
+                self._evict(client)
+
+    def _evict(self, client: HubClient):
+        client.closed = True
+        self.evicted += 1
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        client.queue.put_nowait(None)
+        JLogger.warning(
+            "SSE client evicted for falling behind", channels=client.channels, dropped=client.dropped
+        )
+
+    def record_delivery(self, received_at: float):
+        self.delivered += 1
+        self._lag_ms.append((time.monotonic() - received_at) * 1000)
+
+    def stats(self) -> Dict:
+        """Fan-out counters and queueing lag (Redis receipt -> client write)."""
+        lags = sorted(self._lag_ms)
+        clients = {client for listeners in self._channels.values() for client in listeners}
+
+        def pct(p):
+            return round(lags[min(len(lags) - 1, int(p / 100 * len(lags)))], 2) if lags else 0.0
+
+        return {
+            "clients": len(clients),
+            "channels": len(self._channels),
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "lag_ms_p50": pct(50),
+            "lag_ms_p95": pct(95),
+            "lag_ms_max": round(lags[-1], 2) if lags else 0.0,
+        }
+
+
 class Broadcaster:
     """
     Service responsible for real-time event distribution across multiple 
@@ -19,13 +211,17 @@ class Broadcaster:
             socket_timeout=5,
             retry_on_timeout=True
         )
+        # Events may be published as JSON text or msgpack bytes, so the hub's
+        # connection must not decode responses itself
+        self.hub = PubSubHub(redis.from_url(redis_url, socket_timeout=5, retry_on_timeout=True))
 
     async def subscribe(self, team_ids: List[str], user_id: str = None) -> AsyncGenerator[str, None]:
         """
         Creates a generator that yields events for the specified team_ids and user_id.
         Includes a heartbeat to keep connections alive through proxies.
+        Events arrive through the process-wide hub, so SSE clients do not
+        each hold their own Redis connection.
         """
-        pubsub = self.redis.pubsub()
         channels = [f"team:{tid}" for tid in team_ids]
         if user_id:
             channels.append(f"user:{user_id}")
@@ -33,35 +229,26 @@ class Broadcaster:
         if not channels:
             return
 
+        client = await self.hub.register(channels)
+        JLogger.info("Broadcaster subscription active", channels=channels, user_id=user_id)
         try:
-            await pubsub.subscribe(*channels)
-            JLogger.info("Broadcaster subscription active", channels=channels, user_id=user_id)
-            
             while True:
                 try:
                     # Wait for a message with a timeout to allow for heartbeats
-                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=20.0)
-                    
-                    if message:
-                        if message["type"] == "message":
-                            yield message["data"]
-                    else:
-                        # Send heartbeat if no message received within timeout
-                        yield json.dumps({"type": "HEARTBEAT", "timestamp": int(time.time() * 1000)})
-                        
-                except (redis.ConnectionError, redis.TimeoutError):
-                    JLogger.warning("Redis connection lost, attempting to reconnect...")
-                    await asyncio.sleep(2)
-                    await pubsub.subscribe(*channels)
-                except Exception as e:
-                    JLogger.error("Broadcaster stream error", error=str(e))
+                    item = await asyncio.wait_for(client.queue.get(), timeout=20.0)
+                except asyncio.TimeoutError:
+                    # Send heartbeat if no message received within timeout
+                    yield json.dumps({"type": "HEARTBEAT", "timestamp": int(time.time() * 1000)})
+                    continue
+
+                if item is None:
+                    # Evicted as a slow consumer; the client reconnects and resyncs
                     break
+                data, received_at = item
+                self.hub.record_delivery(received_at)
+                yield data
         finally:
-            try:
-                await pubsub.unsubscribe(*channels)
-                await pubsub.close()
-            except Exception:
-                pass
+            await self.hub.unregister(client)
 
     async def push_team_event(self, team_id: str, event_type: str, data: Any, trigger_id: str = None):
         """
@@ -75,7 +262,7 @@ class Broadcaster:
         }
         channel = f"team:{team_id}"
         try:
-            await self.redis.publish(channel, json.dumps(message))
+            await self.redis.publish(channel, encode_event(message))
         except Exception as e:
             JLogger.error("Failed to push team event", team_id=team_id, event=event_type, error=str(e))
 
@@ -91,7 +278,7 @@ class Broadcaster:
         }
         channel = f"user:{user_id}"
         try:
-            await self.redis.publish(channel, json.dumps(message))
+            await self.redis.publish(channel, encode_event(message))
         except Exception as e:
             JLogger.error("Failed to push user event", user_id=user_id, event=event_type, error=str(e))
 
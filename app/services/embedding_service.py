@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import ai_config
+from app.utils.ai_service_utils import AIServiceError
+from app.utils.json_logger import JLogger
+
+EMBEDDING_DIM = 384
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of embedding vectors, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def put(self, key: bytes, vector: np.ndarray) -> np.ndarray:
+        """
+        Stores a read-only copy of `vector` and returns it. Copying keeps a row
+        of an encoded batch from pinning the whole batch buffer in the cache.
+        """
+        cost = vector.nbytes + len(key)
+        if cost > self.max_bytes:
+            return vector
+        vector = vector.copy()
+        vector.flags.writeable = False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous.nbytes + len(key)
+            self._entries[key] = vector
+            self.size_bytes += cost
+            while self.size_bytes > self.max_bytes:
+                old_key, old_vector = self._entries.popitem(last=False)
+                self.size_bytes -= old_vector.nbytes + len(old_key)
+        return vector
+
+
+class EmbeddingService:
+    """
+    Process-wide local embedding engine.
+
+    Loads the SentenceTransformer once, caches vectors by content hash and
+    coalesces concurrent single-text requests into one `model.encode(batch)`.
+    Vectors are read-only float32 arrays shared with the cache.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        cache_bytes: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+    ):
+        self.model_name = model_name or ai_config.EMBEDDING_MODEL
+        self.cache = EmbeddingCache(cache_bytes or ai_config.EMBEDDING_CACHE_BYTES)
+        self.batch_size = batch_size or ai_config.EMBEDDING_BATCH_SIZE
+        self.batch_wait = (
+            batch_wait_ms if batch_wait_ms is not None else ai_config.EMBEDDING_BATCH_WAIT_MS
+        ) / 1000
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+        self._batcher_pid: Optional[int] = None
+        self._batcher_lock = threading.Lock()
+
+    def get_model(self):
+        """Lazy load the sentence transformer model (once per process)."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        JLogger.info(f"Loading local embedding model: {self.model_name}")
+                        from sentence_transformers import SentenceTransformer
+
+                        self._model = SentenceTransformer(self.model_name)
+                    except Exception as e:
+                        JLogger.error("Failed to load local embedding model", error=str(e))
+        return self._model
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Encodes `texts` in one call; None if the model is unavailable."""
+        model = self.get_model()
+        if model is None:
+            return None
+        vectors = model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        vectors.flags.writeable = False
+        return vectors
+
+    def _submit(self, text: str) -> Future:
+        """Queues `text` for the batcher thread; resolved immediately on a cache hit."""
+        future: Future = Future()
+        if not text or not text.strip():
+            future.set_result(np.zeros(EMBEDDING_DIM, dtype=np.float32))
+            return future
+
+        key = self._key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        self._ensure_batcher()
+        self._queue.put((text, key, future))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embeds one text, batched with any concurrent callers."""
+        return self._submit(text).result()
+
+    async def embed_async(self, text: str) -> np.ndarray:
+        """
+        Awaitable `embed`: encoding runs on the batcher thread, so the event
+        loop is free while the model works.
+        """
+        return await asyncio.wrap_future(self._submit(text))
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds a list of texts directly in `batch_size` chunks (bulk jobs).
+
+        Returns:
+            np.ndarray: (len(texts), EMBEDDING_DIM) float32; blank texts are zero rows
+
+        Raises:
+            AIServiceError: if the model is unavailable, rather than returning
+                zero rows that a bulk job would persist as real vectors
+        """
+        out = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        pending = {}  # key -> (text, row indices)
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            key = self._key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                out[i] = cached
+            else:
+                pending.setdefault(key, (text, []))[1].append(i)
+
+        keys = list(pending)
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start : start + self.batch_size]
+            vectors = self._encode([pending[k][0] for k in batch])
+            if vectors is None:
+                raise AIServiceError(f"Embedding model unavailable: {self.model_name}")
+            for key, vector in zip(batch, vectors):
+                self.cache.put(key, vector)
+                out[pending[key][1]] = vector
+        return out
+
+    def _ensure_batcher(self):
+        # Re-spawn after fork: threads do not survive into Celery prefork children
+        pid = os.getpid()
+        if self._batcher is not None and self._batcher_pid == pid and self._batcher.is_alive():
+            return
+        with self._batcher_lock:
+            if self._batcher is not None and self._batcher_pid == pid and self._batcher.is_alive():
+                return
+            if self._batcher_pid != pid:
+                self._queue = queue.Queue()
+            self._batcher = threading.Thread(
+                target=self._run_batcher, name="embedding-batcher", daemon=True
+            )
+            self._batcher_pid = pid
+            self._batcher.start()
+
+    def _run_batcher(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # Drop requests cancelled while queued (e.g. a disconnected async caller);
+        # the rest can no longer be cancelled once marked running
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        # Identical texts queued together are encoded once
+        unique = {}
+        for text, key, future in batch:
+            unique.setdefault(key, (text, []))[1].append(future)
+        try:
+            vectors = self._encode([text for text, _ in unique.values()])
+        except Exception as e:
+            JLogger.error("Embedding batch failed", size=len(unique), error=str(e))
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (key, (_, futures)), vector in zip(
+            unique.items(), vectors if vectors is not None else [None] * len(unique)
+        ):
+            if vector is None:
+                vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            else:
+                vector = self.cache.put(key, vector)
+            for future in futures:
+                future.set_result(vector)
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide embedding service."""
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
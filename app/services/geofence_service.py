@@ -0,0 +1,261 @@
+"""
+Cached per-organization geofences for usage tracking.
+
+Each organization's work locations are compiled once into an OrgGeofence:
+NumPy arrays of centres and effective radii plus a uniform lat/lon grid.
+Every location is registered in the grid cells its bounding box overlaps,
+so a lookup only tests the few candidates in the point's own cell, with one
+vectorized haversine call.
+
+Compiled geofences live in an in-process TTL LRU. They are dropped when a
+WorkLocation or Organization row changes through the ORM: locally at flush,
+and in every API process after commit via the INVALIDATION_CHANNEL pub/sub
+channel.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import ai_config, location_config
+from app.db import models
+from app.utils.json_logger import JLogger
+
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE = 111320.0
+MIN_CELL_DEG = 0.01  # ~1.1 km; keeps the grid small for tightly packed sites
+
+
+class OrgGeofence:
+    """Compiled work locations of one organization."""
+
+    def __init__(
+        self,
+        corporate_wallet_id: Optional[str],
+        locations: List[Tuple[float, float, float]],
+    ):
+        self.corporate_wallet_id = corporate_wallet_id
+        self.size = len(locations)
+        lat = np.array([loc[0] for loc in locations], dtype=np.float64)
+        lon = np.array([loc[1] for loc in locations], dtype=np.float64)
+        self.radius = np.array([loc[2] for loc in locations], dtype=np.float64)
+        self.lat_rad = np.radians(lat)
+        self.lon_rad = np.radians(lon)
+
+        # Bounding box half-spans in degrees (longitude widens towards the poles)
+        lat_span = self.radius / METERS_PER_DEGREE
+        lon_span = self.radius / (METERS_PER_DEGREE * np.maximum(np.cos(self.lat_rad), 1e-6))
+        self.cell_deg = float(
+            min(max(MIN_CELL_DEG, lat_span.max(initial=0), lon_span.max(initial=0)), 180.0)
+        )
+
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        for i in range(self.size):
+            lat_lo, lat_hi = self._cell(lat[i] - lat_span[i]), self._cell(lat[i] + lat_span[i])
+            lon_lo, lon_hi = self._cell(lon[i] - lon_span[i]), self._cell(lon[i] + lon_span[i])
+            for cy in range(lat_lo, lat_hi + 1):
+                for cx in range(lon_lo, lon_hi + 1):
+                    self.grid.setdefault((cy, cx), []).append(i)
+        self.grid = {cell: np.array(ids) for cell, ids in self.grid.items()}
+
+    def _cell(self, degrees: float) -> int:
+        return int(math.floor(degrees / self.cell_deg))
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """True if (lat, lon) lies within any location's effective radius."""
+        candidates = self.grid.get((self._cell(lat), self._cell(lon)))
+        if candidates is None:
+            return False
+        phi = math.radians(lat)
+        lam = math.radians(lon)
+        phi2 = self.lat_rad[candidates]
+        a = (
+            np.sin((phi2 - phi) / 2) ** 2
+            + math.cos(phi) * np.cos(phi2) * np.sin((self.lon_rad[candidates] - lam) / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return bool((distance <= self.radius[candidates]).any())
+
+
+def build_geofence(db: Session, org_id: str) -> Optional[OrgGeofence]:
+    """Loads and compiles an organization's work locations (None if the org is gone)."""
+    org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
+    if org is None:
+        return None
+    rows = (
+        db.query(models.WorkLocation.latitude, models.WorkLocation.longitude, models.WorkLocation.radius)
+        .filter(models.WorkLocation.org_id == org_id)
+        .all()
+    )
+    min_radius = location_config.DEFAULT_GEOFENCE_RADIUS
+    locations = [
+        (lat, lon, max(radius or 0, min_radius))
+        for lat, lon, radius in rows
+        if lat is not None and lon is not None
+    ]
+    return OrgGeofence(org.corporate_wallet_id, locations)
+
+
+class GeofenceCache:
+    """
+    In-process TTL LRU of compiled geofences keyed by org id. Misses are
+    cached too (org without locations), so such orgs cost no queries either.
+    """
+
+    INVALIDATION_CHANNEL = "geofence:invalidate"
+    REDIS_RETRY_SEC = 30.0
+
+    def __init__(self, ttl_sec: Optional[int] = None, max_entries: Optional[int] = None, use_redis: bool = True):
+        self.ttl_sec = ttl_sec or ai_config.GEOFENCE_CACHE_TTL_SEC
+        self.max_entries = max_entries or ai_config.GEOFENCE_CACHE_MAX_ENTRIES
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Optional[OrgGeofence]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._listener_pid: Optional[int] = None
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, db: Session, org_id: str) -> Optional[OrgGeofence]:
+        self._ensure_listener()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(org_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(org_id)
+                self.counters["hits"] += 1
+                return entry[1]
+            self.counters["misses"] += 1
+
+        geofence = build_geofence(db, org_id)
+        with self._lock:
+            self._entries.pop(org_id, None)
+            self._entries[org_id] = (now + self.ttl_sec, geofence)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return geofence
+
+    def invalidate_local(self, org_ids: Iterable[str]):
+        with self._lock:
+            for org_id in org_ids:
+                if self._entries.pop(org_id, None) is not None:
+                    self.counters["invalidations"] += 1
+
+    def invalidate(self, org_ids: Iterable[str]):
+        """Drops the orgs locally and in every other API process."""
+        org_ids = list(org_ids)
+        self.invalidate_local(org_ids)
+        if not self.use_redis:
+            return
+        try:
+            if self._redis is None:
+                import redis
+
+                self._redis = redis.from_url(ai_config.REDIS_URL, socket_timeout=0.5)
+            for org_id in org_ids:
+                self._redis.publish(self.INVALIDATION_CHANNEL, org_id)
+        except Exception as e:
+            JLogger.warning("Geofence cache: invalidation publish failed", error=str(e))
+
+    def _ensure_listener(self):
+        # Re-spawn after fork (multi-worker API servers)
+        if not self.use_redis:
+            return
+        pid = os.getpid()
+        if self._listener is not None and self._listener_pid == pid and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is not None and self._listener_pid == pid and self._listener.is_alive():
+                return
+            if self._listener_pid is not None and self._listener_pid != pid:
+                self._entries.clear()
+            self._listener = threading.Thread(target=self._listen, name="geofence-invalidation", daemon=True)
+            self._listener_pid = pid
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                import redis
+
+                pubsub = redis.from_url(ai_config.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected was missed
+                with self._lock:
+                    self._entries.clear()
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    org_id = message.get("data")
+                    if isinstance(org_id, bytes):
+                        org_id = org_id.decode("utf-8")
+                    self.invalidate_local([org_id])
+            except Exception as e:
+                JLogger.warning("Geofence cache: invalidation listener disconnected", error=str(e))
+            time.sleep(self.REDIS_RETRY_SEC)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self.counters:
+                self.counters[name] = 0
+
+
+_geofence_cache: Optional[GeofenceCache] = None
+_geofence_cache_lock = threading.Lock()
+
+
+def get_geofence_cache() -> GeofenceCache:
+    """Get the process-wide geofence cache."""
+    global _geofence_cache
+    if _geofence_cache is None:
+        with _geofence_cache_lock:
+            if _geofence_cache is None:
+                _geofence_cache = GeofenceCache()
+    return _geofence_cache
+
+
+_PENDING_INVALIDATIONS = "geofence_invalidations"
+
+
+def _mark_changed(target_org_ids: Iterable[Optional[str]], session: Optional[Session]):
+    org_ids = {org_id for org_id in target_org_ids if org_id}
+    if not org_ids:
+        return
+    get_geofence_cache().invalidate_local(org_ids)
+    if session is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(org_ids)
+
+
+@event.listens_for(models.WorkLocation, "after_insert")
+@event.listens_for(models.WorkLocation, "after_update")
+@event.listens_for(models.WorkLocation, "after_delete")
+def _location_changed(mapper, connection, target):
+    # A location moved to another org changes both
+    previous = inspect(target).attrs.org_id.history.deleted or ()
+    _mark_changed([target.org_id, *previous], object_session(target))
+
+
+@event.listens_for(models.Organization, "after_update")
+@event.listens_for(models.Organization, "after_delete")
+def _organization_changed(mapper, connection, target):
+    _mark_changed([target.id], object_session(target))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_geofence_changes(session):
+    org_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if org_ids:
+        get_geofence_cache().invalidate(org_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_geofence_changes(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import ai_config
+from app.utils.json_logger import JLogger
+
+
+class LLMResponseCache:
+    """
+    Two-level cache of raw LLM completions: an in-process LRU in front of Redis.
+
+    Keys hash the model, temperature, system prompt and user content, with
+    whitespace normalized so cosmetic prompt differences still share an entry.
+    Redis is best-effort: when it is unreachable the cache degrades to the
+    in-process layer instead of failing the LLM call.
+    """
+
+    KEY_PREFIX = "llmcache:v1:"
+    METRICS_PREFIX = "metrics:llm_cache:"
+    REDIS_RETRY_SEC = 30.0
+
+    def __init__(
+        self,
+        ttl_sec: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        redis_client=None,
+    ):
+        self.ttl_sec = ttl_sec or ai_config.LLM_CACHE_TTL_SEC
+        self.max_entries = max_entries or ai_config.LLM_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._redis_down_until = 0.0
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> str:
+        return " ".join((text or "").split())
+
+    @classmethod
+    def make_key(cls, model: str, temperature: float, system_prompt: str, user_content: str) -> str:
+        raw = "\0".join(
+            [model, f"{float(temperature):.3f}", cls.normalize(system_prompt), cls.normalize(user_content)]
+        )
+        return cls.KEY_PREFIX + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_redis(self):
+        if self._redis is None and time.time() >= self._redis_down_until:
+            try:
+                import redis
+
+                self._redis = redis.from_url(ai_config.REDIS_URL, socket_timeout=0.5)
+            except Exception as e:
+                self._redis_unavailable(e)
+        if time.time() < self._redis_down_until:
+            return None
+        return self._redis
+
+    def _redis_unavailable(self, error: Exception):
+        self._redis_down_until = time.time() + self.REDIS_RETRY_SEC
+        JLogger.warning("LLM cache: Redis unavailable, using in-process cache only", error=str(error))
+
+    def _count(self, caller: str, outcome: str):
+        with self._lock:
+            per_caller = self.counters.setdefault(caller, {"memory_hits": 0, "redis_hits": 0, "misses": 0})
+            per_caller[outcome] += 1
+        client = self._get_redis()
+        if client is not None:
+            try:
+                # Shared across API and worker processes for the metrics dashboard
+                client.incr(f"{self.METRICS_PREFIX}{'misses' if outcome == 'misses' else 'hits'}")
+            except Exception:
+                pass
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, caller: str = "llm") -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            self._count(caller, "memory_hits")
+            return entry[1]
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = client.get(key)
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8")
+                if isinstance(raw, str):
+                    # Redis owns the TTL; keep the local copy no longer than a full TTL
+                    self._remember(key, raw, now + self.ttl_sec)
+                    self._count(caller, "redis_hits")
+                    return raw
+            except Exception as e:
+                self._redis_unavailable(e)
+
+        self._count(caller, "misses")
+        return None
+
+    def set(self, key: str, value: str):
+        self._remember(key, value, time.time() + self.ttl_sec)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.set(key, value, ex=self.ttl_sec)
+            except Exception as e:
+                self._redis_unavailable(e)
+
+    def clear(self):
+        """Drops the in-process layer and counters (Redis entries expire on their own)."""
+        with self._lock:
+            self._entries.clear()
+            self.counters.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = sum(c["memory_hits"] + c["redis_hits"] for c in self.counters.values())
+            misses = sum(c["misses"] for c in self.counters.values())
+            return {
+                "entries": len(self._entries),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "by_caller": {k: dict(v) for k, v in self.counters.items()},
+            }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache."""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -4,15 +4,17 @@ Collects and aggregates real-time system metrics
 """
 
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict
 
 import redis
-from sqlalchemy import func, text
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.config import ai_config
-from app.db.models import Folder, Note, Task, Team, Transaction, User, Wallet
+from app.db.models import User
+from app.services.broadcaster import broadcaster
+from app.services.rollup_service import DAY_MS, RollupService
 from app.services.system_health_service import SystemHealthService
 from app.utils.json_logger import JLogger
 from app.worker.task import celery_app
@@ -56,6 +58,12 @@ class MetricsService:
             reserved = inspect.reserved()
             queue_length = sum(len(tasks) for tasks in reserved.values()) if reserved else 0
             
+            # LLM response cache effectiveness (counted by API and workers)
+            llm_cache_hits = int(r.get("metrics:llm_cache:hits") or 0)
+            llm_cache_misses = int(r.get("metrics:llm_cache:misses") or 0)
+            llm_cache_lookups = llm_cache_hits + llm_cache_misses
+            llm_cache_hit_rate = (llm_cache_hits / llm_cache_lookups * 100) if llm_cache_lookups else 0
+
             # Get Redis memory
             redis_info = r.info()
             redis_memory = round(redis_info["used_memory"] / 1024 / 1024, 2)
@@ -82,6 +90,8 @@ class MetricsService:
                 "avg_response_time_ms": round(avg_response_time, 2),
                 "celery_queue_length": queue_length,
                 "redis_memory_mb": redis_memory,
+                "llm_cache_hit_rate_percent": round(llm_cache_hit_rate, 2),
+                "sse_hub": broadcaster.hub.stats(),
                 "database_connections": db_connections,
                 "timestamp": int(time.time() * 1000)
             }
@@ -94,73 +104,46 @@ class MetricsService:
 
     @staticmethod
     def get_dashboard_overview(db: Session) -> Dict:
-        """Get dashboard overview metrics"""
+        """
+        Get dashboard overview metrics. Totals come from the gauges and
+        activity from the rollups (see app/services/rollup_service.py), so a
+        refresh costs a handful of small queries however large the tables are.
+        """
         try:
-            # User metrics
-            total_users = db.query(User).filter(User.is_deleted == False).count()
-            active_users = db.query(User).filter(
-                User.is_deleted == False,
-                User.last_login >= int((time.time() - 30 * 24 * 60 * 60) * 1000)
-            ).count()
-            
-            # Get new users this month
-            month_start = int(datetime.now().replace(day=1, hour=0, minute=0, second=0).timestamp() * 1000)
-            new_users = db.query(User).filter(
-                User.last_login >= month_start
-            ).count()
-            
-            deleted_users = db.query(User).filter(User.is_deleted == True).count()
-            admin_count = db.query(User).filter(User.is_admin == True).count()
-            
-            # Content metrics
-            total_notes = db.query(Note).filter(Note.is_deleted == False).count()
-            total_tasks = db.query(Task).filter(Task.is_deleted == False).count()
-            total_teams = db.query(Team).count()
-            total_folders = db.query(Folder).count()
-            
-            # Activity today
-            today_start = int(datetime.now().replace(hour=0, minute=0, second=0).timestamp() * 1000)
-            notes_today = db.query(Note).filter(Note.timestamp >= today_start).count()
-            tasks_today = db.query(Task).filter(Task.created_at >= today_start).count()
-            
-            # New users (last 24h) - using last_login as proxy
-            yesterday = int((time.time() - 86400) * 1000)
-            new_users = db.query(User).filter(
-                User.last_login >= yesterday
-            ).count()
-            
-            # Active users last 24h
-            day_ago = int((time.time() - 24 * 60 * 60) * 1000)
-            active_24h = db.query(User).filter(User.last_login >= day_ago).count()
+            gauges = RollupService.gauges(db)
+            
+            # Activity this month, by UTC day (rollups plus the un-rolled tail)
+            now = int(time.time() * 1000)
+            month_start = int(
+                datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp() * 1000
+            )
+            today_start = now // DAY_MS * DAY_MS
+            days = RollupService.aggregate(db, month_start, now + 1, bucket_ms=DAY_MS)
+            today = days.get(today_start) or {}
+            revenue_this_month = sum(day["deposits"] for day in days.values())
             
             # System health
             health = SystemHealthService.get_overall_health()
             
-            # Revenue
-            total_balance = db.query(func.sum(Wallet.balance)).scalar() or 0
-            revenue_this_month = db.query(func.sum(Transaction.amount)).filter(
-                Transaction.created_at >= month_start,
-                Transaction.type == "DEPOSIT"
-            ).scalar() or 0
-            
             return {
                 "users": {
-                    "total": total_users,
-                    "active": active_users,
-                    "new_this_month": new_users,
-                    "deleted": deleted_users,
-                    "admins": admin_count
+                    "total": gauges["users_total"],
+                    "active": gauges["users_active_30d"],
+                    # Last-login proxy, as there is no signup timestamp
+                    "new_this_month": gauges["users_active_24h"],
+                    "deleted": gauges["users_deleted"],
+                    "admins": gauges["users_admins"]
                 },
                 "content": {
-                    "total_notes": total_notes,
-                    "total_tasks": total_tasks,
-                    "total_teams": total_teams,
-                    "total_folders": total_folders
+                    "total_notes": gauges["notes_total"],
+                    "total_tasks": gauges["tasks_total"],
+                    "total_teams": gauges["teams_total"],
+                    "total_folders": gauges["folders_total"]
                 },
                 "activity": {
-                    "notes_today": notes_today,
-                    "tasks_today": tasks_today,
-                    "active_users_24h": active_24h
+                    "notes_today": today.get("notes_created", 0),
+                    "tasks_today": today.get("tasks_created", 0),
+                    "active_users_24h": gauges["users_active_24h"]
                 },
                 "system": {
                     "database_status": health["components"]["database"]["status"],
@@ -168,8 +151,8 @@ class MetricsService:
                     "celery_workers": health["components"]["celery"].get("active_workers", 0)
                 },
                 "revenue": {
-                    "total_balance": int(total_balance),
-                    "revenue_this_month": int(revenue_this_month)
+                    "total_balance": gauges["wallet_balance_total"],
+                    "revenue_this_month": revenue_this_month
                 }
             }
         except Exception as e:
@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, Tuple, Dict, Any
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
+from sqlalchemy import case, func, or_, tuple_
 from fastapi import HTTPException
 
 from app.db import models
@@ -14,8 +14,17 @@ from app.utils.json_logger import JLogger
 from app.services.storage_service import StorageService
 from app.services.analytics_service import AnalyticsService
 from app.utils.security import verify_note_ownership
-from app.worker.task import generate_note_embeddings_task, analyze_note_semantics_task, note_process_pipeline
+from app.worker.task import (
+    analyze_note_semantics_task,
+    generate_note_embeddings_task,
+    note_process_pipeline,
+    refresh_related_notes_task,
+)
+from app.services.related_notes_service import RELATED_SHOWN, RelatedNotesService
+from app.services.text_search import like_pattern, uses_postgres
+from app.services import vector_search
 from app.utils.encryption import EncryptionService
+from app.utils.pagination import decode_cursor
 from app.core.config import ai_config
 
 class NoteService:
@@ -174,36 +183,42 @@ class NoteService:
         db: Session, 
         user: models.User, 
         skip: int = 0, 
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
     ) -> List[models.Note]:
         """
-        Retrieve paginated notes accessible to the user.
+        Retrieve paginated notes accessible to the user, newest first.
+        With a `cursor` (from a previous page) the page starts right after
+        that (timestamp, id) and `skip` is ignored.
         """
-        # Use subqueries to avoid N+1 lazy loads on user.teams/user.owned_teams
+        # One query for both team sets, instead of lazy loads on user.teams/user.owned_teams
         from app.db.models import team_members
-        member_team_ids = db.query(team_members.c.team_id).filter(
-            team_members.c.user_id == user.id
-        ).subquery()
-        owned_team_ids = db.query(models.Team.id).filter(
-            models.Team.owner_id == user.id
-        ).subquery()
+        team_ids = [
+            team_id
+            for (team_id,) in db.query(team_members.c.team_id)
+            .filter(team_members.c.user_id == user.id)
+            .union(db.query(models.Team.id).filter(models.Team.owner_id == user.id))
+        ]
 
-        notes = (
+        # Without teams the filter matches idx_notes_user_active_timestamp_id exactly
+        visible = models.Note.user_id == user.id
+        if team_ids:
+            visible = or_(visible, models.Note.team_id.in_(team_ids))
+
+        query = (
             db.query(models.Note)
             .options(joinedload(models.Note.tasks))
-            .filter(
-                models.Note.is_deleted == False,
-                or_(
-                    models.Note.user_id == user.id,
-                    models.Note.team_id.in_(member_team_ids),
-                    models.Note.team_id.in_(owned_team_ids)
-                )
-            )
-            .order_by(models.Note.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .filter(models.Note.is_deleted == False, visible)
+            .order_by(models.Note.timestamp.desc(), models.Note.id.desc())
         )
+        if cursor:
+            timestamp, note_id = decode_cursor(cursor, 2)
+            query = query.filter(
+                tuple_(models.Note.timestamp, models.Note.id) < tuple_(timestamp, note_id)
+            )
+        else:
+            query = query.offset(skip)
+        notes = query.limit(limit).all()
         
         # Decrypt for display
         for n in notes:
@@ -218,24 +233,25 @@ class NoteService:
         """
         note = cls.verify_note_access(db, user, note_id)
         
-        # Semantic linking
-        if note.embedding is not None:
-            team_ids = [t.id for t in user.teams] + [t.id for t in user.owned_teams]
-            related = (
-                db.query(models.Note)
-                .filter(
-                    models.Note.id != note_id,
-                    models.Note.is_deleted == False,
-                    or_(
-                        models.Note.user_id == user.id,
-                        models.Note.team_id.in_(team_ids)
-                    )
+        # Semantic linking: precomputed neighbours, no ANN query on a warm note
+        team_ids = [t.id for t in user.teams] + [t.id for t in user.owned_teams]
+        related, fresh = RelatedNotesService.cached(db, note, user.id, team_ids)
+        if not fresh:
+            refresh_related_notes_task.delay(note_id)
+        if related is not None:
+            note.related_notes = related
+        elif note.embedding is not None:
+            # Not computed yet; the refresh above stores it for later views
+            query = db.query(models.Note).filter(
+                models.Note.id != note_id,
+                models.Note.is_deleted == False,
+                or_(
+                    models.Note.user_id == user.id,
+                    models.Note.team_id.in_(team_ids)
                 )
-                .order_by(models.Note.embedding.cosine_distance(note.embedding))
-                .limit(3)
-                .all()
             )
-            note.related_notes = related
+            rows = vector_search.nearest(query, note.embedding, RELATED_SHOWN)
+            note.related_notes = [row.Note for row in rows]
         else:
             note.related_notes = []
             
@@ -476,18 +492,30 @@ class NoteService:
     def search_autocomplete(cls, db: Session, user: models.User, query_str: str) -> List[str]:
         """
         Suggests terms for search based on note titles.
+        Titles starting with the query rank first, then (on PostgreSQL) by
+        trigram similarity; matching is served by idx_notes_title_trgm.
         """
+        query_str = query_str.strip()
         team_ids = [t.id for t in user.teams] + [t.id for t in user.owned_teams]
+        prefix_first = case(
+            (models.Note.title.ilike(like_pattern(query_str, prefix_only=True), escape="\\"), 0),
+            else_=1,
+        )
+        if uses_postgres(db):
+            closeness = func.similarity(models.Note.title, query_str).desc()
+        else:
+            closeness = func.length(models.Note.title)
         titles = (
             db.query(models.Note.title)
             .filter(
                 models.Note.is_deleted == False,
-                models.Note.title.ilike(f"%{query_str}%"),
+                models.Note.title.ilike(like_pattern(query_str), escape="\\"),
                 or_(
                     models.Note.user_id == user.id,
                     models.Note.team_id.in_(team_ids)
                 )
             )
+            .order_by(prefix_first, closeness)
             .limit(10)
             .all()
         )
@@ -81,6 +81,40 @@ class NotificationService:
             JLogger.error("Failed to send multicast push notification", error=str(e))
             raise e
 
+    @staticmethod
+    def send_each(messages: list):
+        """
+        Sends distinct messages ({token, title, body, data}) in one FCM batch
+        request (at most 500).
+        """
+        if not NotificationService._initialized:
+            NotificationService.initialize()
+
+        if not NotificationService._initialized:
+            JLogger.info("Mocking Push Notification batch (Service not init)", count=len(messages))
+            return {"success_count": len(messages), "failure_count": 0}
+
+        try:
+            response = messaging.send_each(
+                [
+                    messaging.Message(
+                        token=m["token"],
+                        notification=messaging.Notification(title=m["title"], body=m["body"]),
+                        data=m.get("data") or {},
+                    )
+                    for m in messages
+                ]
+            )
+            JLogger.info(
+                "Push notification batch sent",
+                success_count=response.success_count,
+                failure_count=response.failure_count,
+            )
+            return response
+        except Exception as e:
+            JLogger.error("Failed to send push notification batch", error=str(e))
+            raise e
+
     @staticmethod
     def send_to_token(token: str, title: str, body: str, data: dict = None):
         if not NotificationService._initialized:
@@ -2,6 +2,7 @@ import logging
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.db.models import Note
+from app.services import vector_search
 from app.services.ai_service import AIService
 
 logger = logging.getLogger("VoiceNote.RAG")
@@ -14,21 +15,22 @@ class RAGService:
         embedding: List[float], 
         exclude_note_id: Optional[str] = None,
         limit: int = 5,
-        threshold: float = 0.15  # Distance < 0.15 => Similarity > 0.85
+        threshold: float = 0.15,  # Distance < 0.15 => Similarity > 0.85
+        profile: Optional[str] = None
     ) -> List[Note]:
         """
         Find notes similar to the given embedding using vector cosine distance.
         """
         query = db.query(Note).filter(
             Note.user_id == user_id,
-            Note.is_deleted == False,
-            Note.embedding.cosine_distance(embedding) < threshold
+            Note.is_deleted == False
         )
         
         if exclude_note_id:
             query = query.filter(Note.id != exclude_note_id)
             
-        return query.order_by(Note.embedding.cosine_distance(embedding)).limit(limit).all()
+        rows = vector_search.nearest(query, embedding, limit, profile=profile, max_distance=threshold)
+        return [row.Note for row in rows]
 
     @staticmethod
     def format_context_for_llm(notes: List[Note]) -> str:
@@ -54,7 +56,8 @@ class RAGService:
         db: Session, 
         user_id: str, 
         transcript: str, 
-        exclude_note_id: Optional[str] = None
+        exclude_note_id: Optional[str] = None,
+        profile: Optional[str] = None
     ) -> str:
         """
         Higher-level helper to get context directly from a transcript.
@@ -65,5 +68,7 @@ class RAGService:
         except Exception as e:
             logger.warning(f"Failed to generate embedding for RAG context: {e}")
             return ""
-        similar_notes = cls.find_similar_notes(db, user_id, embedding, exclude_note_id=exclude_note_id)
+        similar_notes = cls.find_similar_notes(
+            db, user_id, embedding, exclude_note_id=exclude_note_id, profile=profile
+        )
         return cls.format_context_for_llm(similar_notes)
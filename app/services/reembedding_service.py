@@ -0,0 +1,229 @@
+import json
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import ai_config
+from app.db.models import Note
+from app.db.session import SessionLocal
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.utils.json_logger import JLogger
+
+
+def note_embedding_text(title: Optional[str], summary: Optional[str]) -> str:
+    """Text a note is embedded from (title + summary)."""
+    return f"{title or ''}\n{summary or ''}"
+
+
+class ReembeddingService:
+    """
+    Resumable bulk re-embedding of notes below a target `embedding_version`.
+
+    Notes are streamed in id order through a server-side cursor, encoded in
+    batches and written back with one executemany UPDATE per batch. A
+    checkpoint (last note id) is saved after every committed window so an
+    interrupted run picks up where it stopped.
+
+    When `model_name` differs from the live EMBEDDING_MODEL, vectors go to the
+    `embedding_next` shadow column and search keeps using `embedding` until
+    `finalize()` swaps them in. Re-embedding with the live model writes
+    `embedding` directly (and also fills notes that have no vector yet).
+    """
+
+    CHECKPOINT_KEY = "reembed:checkpoint:v{version}:{model}"
+
+    def __init__(
+        self,
+        target_version: Optional[int] = None,
+        model_name: Optional[str] = None,
+        batch_size: int = 256,
+        window_size: int = 5_000,
+        checkpoint_store=None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.target_version = target_version or ai_config.EMBEDDING_VERSION
+        self.model_name = model_name or ai_config.EMBEDDING_MODEL
+        self.batch_size = batch_size
+        self.window_size = window_size
+        self.session_factory = session_factory
+        self.in_place = self.model_name == ai_config.EMBEDDING_MODEL
+        self.column = "embedding" if self.in_place else "embedding_next"
+        self.engine = (
+            get_embedding_service()
+            if self.in_place
+            else EmbeddingService(model_name=self.model_name, batch_size=batch_size)
+        )
+        if checkpoint_store is None:
+            import redis
+
+            checkpoint_store = redis.from_url(ai_config.REDIS_URL)
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_key = self.CHECKPOINT_KEY.format(
+            version=self.target_version, model=self.model_name
+        )
+
+    def _pending_filter(self):
+        stale = or_(Note.embedding_version.is_(None), Note.embedding_version < self.target_version)
+        if self.in_place:
+            return or_(stale, Note.embedding.is_(None))
+        return stale
+
+    def load_checkpoint(self) -> Dict:
+        raw = self.checkpoint_store.get(self.checkpoint_key)
+        if not raw:
+            return {"last_id": None, "processed": 0}
+        return json.loads(raw)
+
+    def save_checkpoint(self, state: Dict):
+        self.checkpoint_store.set(self.checkpoint_key, json.dumps(state))
+
+    def reset_checkpoint(self):
+        self.checkpoint_store.delete(self.checkpoint_key)
+
+    def count_pending(self, after_id: Optional[str] = None) -> int:
+        with self.session_factory() as db:
+            query = db.query(Note.id).filter(self._pending_filter())
+            if after_id:
+                query = query.filter(Note.id > after_id)
+            return query.count()
+
+    def _process_window(self, db: Session, last_id: Optional[str]):
+        """
+        Re-embeds up to `window_size` notes after `last_id` in one transaction.
+        An encoding failure propagates before commit, so the window's notes keep
+        their old vectors and version.
+        """
+        stmt = (
+            select(Note.id, Note.title, Note.summary)
+            .where(self._pending_filter())
+            .order_by(Note.id)
+            .limit(self.window_size)
+        )
+        if last_id:
+            stmt = stmt.where(Note.id > last_id)
+
+        # yield_per streams through a server-side cursor on PostgreSQL
+        result = db.execute(stmt.execution_options(yield_per=self.batch_size))
+        processed = 0
+        for rows in result.partitions():
+            vectors = self.engine.embed_many(
+                [note_embedding_text(r.title, r.summary) for r in rows]
+            )
+            db.execute(
+                update(Note),
+                [
+                    {
+                        "id": r.id,
+                        self.column: vector,
+                        "embedding_version": self.target_version,
+                        # Neighbour distances change with the vectors; rebuilt on next view
+                        **({"related_note_ids": None} if self.in_place else {}),
+                    }
+                    for r, vector in zip(rows, vectors)
+                ],
+            )
+            processed += len(rows)
+            last_id = rows[-1].id
+        return processed, last_id
+
+    def run(self, max_seconds: Optional[float] = None) -> Dict:
+        """
+        Re-embeds pending notes until none remain or `max_seconds` elapses.
+
+        Returns:
+            Dict: progress report (processed, remaining, notes_per_sec, eta_sec, complete)
+        """
+        state = self.load_checkpoint()
+        remaining = self.count_pending(state["last_id"])
+        started = time.time()
+        processed_now = 0
+        complete = False
+
+        JLogger.info(
+            "Re-embedding started",
+            target_version=self.target_version,
+            model=self.model_name,
+            column=self.column,
+            pending=remaining,
+            resume_after=state["last_id"],
+        )
+
+        while True:
+            with self.session_factory() as db:
+                processed, last_id = self._process_window(db, state["last_id"])
+                db.commit()
+            processed_now += processed
+
+            if processed < self.window_size:
+                # End of a sweep; notes re-stamped behind the cursor need another pass
+                last_id = None
+                remaining = self.count_pending()
+                complete = remaining == 0
+            else:
+                remaining = max(remaining - processed, 0)
+
+            state = {"last_id": last_id, "processed": state["processed"] + processed}
+            self.save_checkpoint(state)
+
+            report = self._report(state, processed_now, remaining, started, complete)
+            JLogger.info("Re-embedding progress", **report)
+            if complete or (max_seconds is not None and time.time() - started >= max_seconds):
+                break
+
+        if complete:
+            JLogger.info("Re-embedding complete", **report)
+        return report
+
+    @staticmethod
+    def _report(state, processed_now, remaining, started, complete) -> Dict:
+        elapsed = max(time.time() - started, 1e-6)
+        rate = processed_now / elapsed
+        return {
+            "processed": state["processed"],
+            "processed_this_run": processed_now,
+            "remaining": remaining,
+            "elapsed_sec": round(elapsed, 1),
+            "notes_per_sec": round(rate, 1),
+            "eta_sec": 0 if complete else (round(remaining / rate) if rate else None),
+            "complete": complete,
+        }
+
+    def finalize(self, batch_size: int = 1000) -> int:
+        """
+        Swaps `embedding_next` into `embedding` once no notes are pending.
+        Switch EMBEDDING_MODEL / EMBEDDING_VERSION to the new model alongside.
+
+        Returns:
+            int: number of notes swapped
+        """
+        if self.in_place:
+            return 0
+        pending = self.count_pending()
+        if pending:
+            raise RuntimeError(f"Cannot finalize: {pending} notes still below version {self.target_version}")
+
+        swapped = 0
+        with self.session_factory() as db:
+            while True:
+                ids = db.scalars(
+                    select(Note.id)
+                    .where(Note.embedding_next.is_not(None))
+                    .order_by(Note.id)
+                    .limit(batch_size)
+                ).all()
+                if not ids:
+                    break
+                db.execute(
+                    update(Note)
+                    .where(Note.id.in_(ids))
+                    .values(embedding=Note.embedding_next, embedding_next=None, related_note_ids=None)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                swapped += len(ids)
+
+        self.reset_checkpoint()
+        JLogger.info("Re-embedding finalized", swapped=swapped, version=self.target_version)
+        return swapped
@@ -0,0 +1,117 @@
+"""
+Precomputed related notes for the note detail view.
+
+A note's nearest neighbours only change when its own embedding changes or
+when a nearby note appears, so they are computed once, when the embedding is
+written, and stored on the note as `related_note_ids`:
+[[note_id, cosine_distance], ...], nearest first, RELATED_NOTES_CANDIDATES
+long. Views read the cached ids with a primary-key lookup instead of an ANN
+query.
+
+Invalidation is incremental:
+- When a note gets a new embedding, it is merged into each neighbour's list
+  by distance (no ANN query for the neighbours).
+- Deleted or no longer visible neighbours are filtered out at read time. The
+  candidate list is longer than what a view shows, so a few deletions never
+  empty it; once it runs short, the caller refreshes it in the background.
+- Re-embedding the corpus clears the lists (`related_note_ids = None`), and
+  they are rebuilt lazily.
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import ai_config
+from app.db import models
+from app.services import vector_search
+
+RELATED_SHOWN = 3  # Related notes returned by GET /notes/{id}
+
+
+class RelatedNotesService:
+    @staticmethod
+    def _same_scope(note, other) -> bool:
+        # A note relates to notes of its owner and of its own team
+        return other.user_id == note.user_id or (
+            note.team_id is not None and other.team_id == note.team_id
+        )
+
+    @staticmethod
+    def nearest(
+        db: Session,
+        note_id: str,
+        embedding,
+        user_id: str,
+        team_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[List]:
+        """One ANN query: the closest notes in the owner's scope, as [id, distance] pairs."""
+        scope = models.Note.user_id == user_id
+        if team_id:
+            scope = or_(scope, models.Note.team_id == team_id)
+        query = db.query(models.Note.id).filter(
+            scope, models.Note.id != note_id, models.Note.is_deleted == False
+        )
+        rows = vector_search.nearest(query, embedding, limit or ai_config.RELATED_NOTES_CANDIDATES)
+        return [[row.id, float(row.distance)] for row in rows]
+
+    @classmethod
+    def store(cls, db: Session, note: models.Note, neighbours: List[List]):
+        """
+        Saves `note`'s neighbours and merges `note` into each neighbour's
+        cached list. The caller commits.
+        """
+        note.related_note_ids = neighbours
+        if not neighbours:
+            return
+        limit = ai_config.RELATED_NOTES_CANDIDATES
+        distances = {note_id: distance for note_id, distance in neighbours}
+        for other in db.query(models.Note).filter(models.Note.id.in_(list(distances))):
+            # Lists not built yet are computed on first view anyway
+            if other.related_note_ids is None or not cls._same_scope(other, note):
+                continue
+            entries = [entry for entry in other.related_note_ids if entry[0] != note.id]
+            entries.append([note.id, distances[other.id]])
+            entries.sort(key=lambda entry: entry[1])
+            other.related_note_ids = entries[:limit]
+
+    @classmethod
+    def refresh(cls, db: Session, note: models.Note) -> List[List]:
+        """Recomputes `note`'s neighbours from its current embedding. The caller commits."""
+        if note.embedding is None or note.is_deleted:
+            note.related_note_ids = []
+            return []
+        neighbours = cls.nearest(db, note.id, note.embedding, note.user_id, note.team_id)
+        cls.store(db, note, neighbours)
+        return neighbours
+
+    @staticmethod
+    def cached(
+        db: Session, note: models.Note, user_id: str, team_ids: List[str]
+    ) -> Tuple[Optional[List[models.Note]], bool]:
+        """
+        Returns (related notes the viewer may see, fresh). Related is None if
+        nothing is cached yet. `fresh` is False when the list should be
+        recomputed in the background.
+        """
+        entries = note.related_note_ids
+        if entries is None:
+            return None, note.embedding is None
+        ids = [entry[0] for entry in entries]
+        if not ids:
+            return [], True
+        by_id = {
+            n.id: n
+            for n in db.query(models.Note).filter(
+                models.Note.id.in_(ids), models.Note.is_deleted == False
+            )
+        }
+        alive = [by_id[note_id] for note_id in ids if note_id in by_id]
+        related = [
+            n for n in alive if n.user_id == user_id or (n.team_id is not None and n.team_id in team_ids)
+        ][:RELATED_SHOWN]
+        # Deleted neighbours used up the spare candidates
+        fresh = len(alive) >= RELATED_SHOWN or len(ids) < ai_config.RELATED_NOTES_CANDIDATES
+        return related, fresh
@@ -0,0 +1,284 @@
+"""
+Incremental rollups for the admin dashboard and usage analytics.
+
+Activity (notes and tasks created, API calls, audio seconds, deposits) is
+summed per UTC hour into `metric_rollups` by a beat job. Closed days are
+then summed from their hours. Each granularity's buckets are contiguous, so
+its watermark is simply the end of its newest bucket: a run rolls
+[watermark, last closed hour) and nothing else. An hour counts as closed
+METRIC_ROLLUP_LAG_SEC after it ends, which gives buffered writes time to
+land.
+
+Reads (`aggregate`) split the requested range into day rollups, hour
+rollups for what days do not cover, and live queries for the rest (the
+un-rolled tail since the watermark, and any range before the rollups
+begin). The live queries are index range scans over minutes, not months.
+
+Point-in-time totals (users, notes, balances) cannot be rolled up by time.
+They are recomputed by the same job, one aggregate query per table, into
+`metric_gauges`.
+
+History before the first run is filled by `backfill`
+(scripts/db/backfill_rollups.py).
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import ai_config
+from app.db.models import (
+    Folder,
+    MetricGauge,
+    MetricRollup,
+    Note,
+    Task,
+    Team,
+    Transaction,
+    UsageLog,
+    User,
+    Wallet,
+)
+
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+MAX_SPAN_MS = 7 * DAY_MS  # Hours rolled per transaction
+
+METRICS = ("notes_created", "tasks_created", "api_calls", "audio_seconds", "deposits")
+
+# (timestamp column, {metric: aggregate}, filters), one live query each
+_SOURCES = (
+    (Note.timestamp, {"notes_created": func.count(Note.id)}, ()),
+    (Task.created_at, {"tasks_created": func.count(Task.id)}, ()),
+    (
+        UsageLog.timestamp,
+        {"api_calls": func.count(UsageLog.id), "audio_seconds": func.sum(UsageLog.duration_seconds)},
+        (),
+    ),
+    (Transaction.created_at, {"deposits": func.sum(Transaction.amount)}, (Transaction.type == "DEPOSIT",)),
+)
+
+
+def _floor(ms: int, size: int) -> int:
+    return ms // size * size
+
+
+def _ceil(ms: int, size: int) -> int:
+    return -(-ms // size) * size
+
+
+def _zeros() -> Dict[str, int]:
+    return dict.fromkeys(METRICS, 0)
+
+
+def _merge(into: Dict, part: Dict):
+    for key, values in part.items():
+        for name, value in values.items():
+            into[key][name] += int(value or 0)
+
+
+class RollupService:
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def coverage(db: Session) -> Dict[str, Tuple[int, int]]:
+        """{granularity: (first bucket start, watermark)} for what is rolled up."""
+        rows = (
+            db.query(
+                MetricRollup.granularity,
+                func.min(MetricRollup.bucket_start),
+                func.max(MetricRollup.bucket_start),
+            )
+            .group_by(MetricRollup.granularity)
+            .all()
+        )
+        sizes = {"hour": HOUR_MS, "day": DAY_MS}
+        return {g: (lo, hi + sizes[g]) for g, lo, hi in rows if g in sizes}
+
+    @staticmethod
+    def _segments(coverage: Dict, start: int, end: int) -> List[Tuple[Optional[str], int, int]]:
+        """Splits [start, end) into (granularity, from, to) pieces; None means live."""
+        pieces, segments = [(start, end)], []
+        for granularity, size in (("day", DAY_MS), ("hour", HOUR_MS)):
+            if granularity not in coverage:
+                continue
+            lo, hi = coverage[granularity]
+            rest = []
+            for s, e in pieces:
+                a, b = max(_ceil(s, size), lo), min(_floor(e, size), hi)
+                if a >= b:
+                    rest.append((s, e))
+                    continue
+                segments.append((granularity, a, b))
+                rest += [(x, y) for x, y in ((s, a), (b, e)) if x < y]
+            pieces = rest
+        return segments + [(None, s, e) for s, e in pieces]
+
+    @staticmethod
+    def _live(db: Session, start: int, end: int, bucket_ms: Optional[int] = None) -> Dict:
+        out = defaultdict(_zeros)
+        for column, aggregates, filters in _SOURCES:
+            keys = [(column // bucket_ms * bucket_ms).label("bucket")] if bucket_ms else []
+            query = db.query(*keys, *(agg.label(name) for name, agg in aggregates.items())).filter(
+                column >= start, column < end, *filters
+            )
+            if bucket_ms:
+                query = query.group_by(keys[0])
+            for row in query:
+                _merge(out, {row.bucket if bucket_ms else None: {n: row._mapping[n] for n in aggregates}})
+        return out
+
+    @staticmethod
+    def _rolled(db: Session, granularity: str, start: int, end: int, bucket_ms: Optional[int] = None) -> Dict:
+        keys = [(MetricRollup.bucket_start // bucket_ms * bucket_ms).label("bucket")] if bucket_ms else []
+        query = db.query(
+            *keys, *(func.sum(getattr(MetricRollup, name)).label(name) for name in METRICS)
+        ).filter(
+            MetricRollup.granularity == granularity,
+            MetricRollup.bucket_start >= start,
+            MetricRollup.bucket_start < end,
+        )
+        if bucket_ms:
+            query = query.group_by(keys[0])
+        out = defaultdict(_zeros)
+        for row in query:
+            _merge(out, {row.bucket if bucket_ms else None: {n: row._mapping[n] for n in METRICS}})
+        return out
+
+    @classmethod
+    def aggregate(
+        cls, db: Session, start: int, end: int, bucket_ms: Optional[int] = None
+    ) -> Dict[Optional[int], Dict[str, int]]:
+        """
+        Metric sums over [start, end) ms, per UTC `bucket_ms` bucket (keyed by
+        bucket start; a multiple of an hour) or in total (key None).
+        """
+        out = defaultdict(_zeros)
+        if bucket_ms is None:
+            out[None]  # Totals are always present
+        for granularity, s, e in cls._segments(cls.coverage(db), start, end):
+            if granularity is None:
+                _merge(out, cls._live(db, s, e, bucket_ms))
+            else:
+                _merge(out, cls._rolled(db, granularity, s, e, bucket_ms))
+        return out
+
+    @classmethod
+    def gauges(cls, db: Session) -> Dict[str, int]:
+        values = {row.name: row.value for row in db.query(MetricGauge)}
+        # Before the first job run
+        return values or cls.refresh_gauges(db)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh_gauges(db: Session, now: Optional[int] = None) -> Dict[str, int]:
+        now = now or int(time.time() * 1000)
+        users = db.query(
+            func.count(User.id).filter(User.is_deleted == False),
+            func.count(User.id).filter(User.is_deleted == False, User.last_login >= now - 30 * DAY_MS),
+            func.count(User.id).filter(User.last_login >= now - DAY_MS),
+            func.count(User.id).filter(User.is_deleted == True),
+            func.count(User.id).filter(User.is_admin == True),
+        ).one()
+        values = dict(
+            zip(("users_total", "users_active_30d", "users_active_24h", "users_deleted", "users_admins"), users)
+        )
+        values["notes_total"] = db.query(func.count(Note.id)).filter(Note.is_deleted == False).scalar()
+        values["tasks_total"] = db.query(func.count(Task.id)).filter(Task.is_deleted == False).scalar()
+        values["teams_total"] = db.query(func.count(Team.id)).scalar()
+        values["folders_total"] = db.query(func.count(Folder.id)).scalar()
+        values["wallet_balance_total"] = db.query(func.sum(Wallet.balance)).scalar()
+        values = {name: int(value or 0) for name, value in values.items()}
+        for name, value in values.items():
+            db.merge(MetricGauge(name=name, value=value, updated_at=now))
+        db.commit()
+        return values
+
+    @classmethod
+    def _roll_hours(cls, db: Session, start: int, end: int) -> int:
+        """Appends hour rows for [start, end) (hour aligned), committing per chunk."""
+        count = 0
+        for chunk in range(start, end, MAX_SPAN_MS):
+            chunk_end = min(chunk + MAX_SPAN_MS, end)
+            sums = cls._live(db, chunk, chunk_end, HOUR_MS)
+            db.add_all(
+                MetricRollup(granularity="hour", bucket_start=bucket, **sums.get(bucket, _zeros()))
+                for bucket in range(chunk, chunk_end, HOUR_MS)
+            )
+            db.commit()
+            count += (chunk_end - chunk) // HOUR_MS
+        return count
+
+    @classmethod
+    def _roll_days(cls, db: Session) -> int:
+        """Appends day rows for every whole day the hour rollups cover."""
+        coverage = cls.coverage(db)
+        if "hour" not in coverage:
+            return 0
+        first, last = _ceil(coverage["hour"][0], DAY_MS), _floor(coverage["hour"][1], DAY_MS)
+        ranges: Iterable = [(first, last)]
+        if "day" in coverage:
+            ranges = [(first, coverage["day"][0]), (coverage["day"][1], last)]
+        count = 0
+        for start, end in ranges:
+            if start >= end:
+                continue
+            sums = cls._rolled(db, "hour", start, end, DAY_MS)
+            db.add_all(
+                MetricRollup(granularity="day", bucket_start=bucket, **sums.get(bucket, _zeros()))
+                for bucket in range(start, end, DAY_MS)
+            )
+            count += (end - start) // DAY_MS
+        db.commit()
+        return count
+
+    @staticmethod
+    def _closed(now: Optional[int] = None) -> int:
+        now = now or int(time.time() * 1000)
+        return _floor(now - ai_config.METRIC_ROLLUP_LAG_SEC * 1000, HOUR_MS)
+
+    @classmethod
+    def run(cls, db: Session, now: Optional[int] = None) -> Dict[str, int]:
+        """One beat run: roll closed hours and days past the watermarks, refresh gauges."""
+        closed = cls._closed(now)
+        coverage = cls.coverage(db)
+        # First run: start at today's UTC midnight; older history is backfilled
+        start = coverage["hour"][1] if "hour" in coverage else _floor(closed, DAY_MS)
+        # Catch up a long outage over several runs
+        hours = cls._roll_hours(db, start, min(closed, start + MAX_SPAN_MS))
+        days = cls._roll_days(db)
+        cls.refresh_gauges(db, now)
+        return {"hours": hours, "days": days}
+
+    @classmethod
+    def backfill(
+        cls, db: Session, since: int, rebuild: bool = False, now: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Rolls everything from `since` (floored to a UTC day) to the last
+        closed hour. With `rebuild`, existing rollups from `since` on are
+        recomputed (e.g. after rows were imported with past timestamps).
+        """
+        since, closed = _floor(since, DAY_MS), cls._closed(now)
+        if rebuild:
+            db.query(MetricRollup).filter(MetricRollup.bucket_start >= since).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        coverage = cls.coverage(db)
+        if "hour" in coverage:
+            lo, hi = coverage["hour"]
+            ranges = [(since, lo), (hi, closed)]
+        else:
+            ranges = [(since, closed)]
+        hours = sum(cls._roll_hours(db, start, end) for start, end in ranges if start < end)
+        days = cls._roll_days(db)
+        return {"hours": hours, "days": days}
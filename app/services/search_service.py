@@ -1,17 +1,21 @@
 import logging
 import os
-import asyncio
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Sequence
 
 import httpx
+import numpy as np
+from sqlalchemy import func, or_, select, union_all
 from sqlalchemy.orm import Session
 
 from app.core.config import ai_config
 from app.db import models
 from app.services.ai_service import AIService
+from app.services.text_search import like_pattern, note_search_vector, prefix_tsquery, tsquery, uses_postgres
 
 logger = logging.getLogger(__name__)
 
+RRF_K = 60  # Reciprocal Rank Fusion constant
+
 
 class SearchService:
     def __init__(self, ai_service: AIService):
@@ -59,74 +63,135 @@ class SearchService:
         threshold: float = 1.0,
     ) -> List[Dict[str, Any]]:
         """
-        ADVANCED RAG: Perform Multi-Query semantic search with Parallel Execution and RRF Ranking.
+        ADVANCED RAG: Hybrid multi-query search with Reciprocal Rank Fusion.
+
+        The query variations are embedded in one model call. Their vector
+        rankings and a keyword ranking are fused in a single SQL statement.
+        `threshold` is the maximum L2 distance between (normalized) vectors.
         """
         # 1. Generate query variations
         variations = await self._generate_query_variations(query)
-        
-        # 2. Parallel Search Execution (using asyncio for concurrency)
-        tasks = []
-        for var in variations:
-            tasks.append(self._single_semantic_search(db, user_id, var, limit * 2, threshold))
-        
-        # Gather all search results in parallel
-        all_results_lists = await asyncio.gather(*tasks)
-        
-        # 3. Reciprocal Rank Fusion (RRF) & Deduplication
-        # Map of note_id -> {note_obj, rrf_score}
-        fused_results = {}
-        k = 60 # RRF constant
-        
-        for results_list in all_results_lists:
-            for rank, note in enumerate(results_list, start=1):
-                if note.id not in fused_results:
-                    fused_results[note.id] = {"note": note, "score": 0.0}
-                # RRF Formula: 1 / (k + rank)
-                fused_results[note.id]["score"] += 1.0 / (k + rank)
-        
-        # 4. Sort by fused score and format
-        sorted_ids = sorted(fused_results.keys(), key=lambda x: fused_results[x]["score"], reverse=True)
-        
-        formatted_results = []
-        for note_id in sorted_ids[offset : offset + limit]:
-            item = fused_results[note_id]
-            note = item["note"]
-            formatted_results.append({
-                "id": note.id,
-                "title": note.title,
-                "summary": note.summary,
-                "transcript": note.transcript_groq or note.transcript_deepgram or "",
-                "timestamp": note.timestamp,
-                "similarity_score": round(item["score"] * 10, 3) # Scaled for UI visibility
-            })
-
-        return formatted_results
-
-    async def _single_semantic_search(self, db: Session, user_id: str, query: str, limit: int, threshold: float):
-        """Helper for a single vector search."""
+
+        # 2. One encode for all variations
         try:
-            query_embedding = await self.ai_service.generate_embedding(query)
-            
-            # Fetch user with team relations
-            user = db.query(models.User).filter(models.User.id == user_id).first()
-            team_ids = []
-            if user:
-                team_ids = [t.id for t in user.teams] + [t.id for t in user.owned_teams]
+            embeddings = await self.ai_service.generate_embeddings(variations)
+        except Exception as e:
+            # Keyword ranking alone still answers
+            logger.error(f"Failed to embed query variations: {e}")
+            embeddings = []
+
+        # 3. One round trip: every ranked list and their fusion run in the database
+        statement = self._hybrid_search_statement(db, user_id, query, embeddings, limit, offset, threshold)
+        if statement is None:
+            return []
+        rows = db.execute(statement).all()
 
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "summary": row.summary,
+                "transcript": row.transcript_groq or row.transcript_deepgram or "",
+                "timestamp": row.timestamp,
+                "similarity_score": round(row.score * 10, 3),  # Scaled for UI visibility
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _hybrid_search_statement(
+        db: Session,
+        user_id: str,
+        query: str,
+        embeddings: Sequence[np.ndarray],
+        limit: int,
+        offset: int,
+        threshold: float,
+    ):
+        """
+        Builds the hybrid search as one SELECT.
+
+        Each ranked list (one per query vector, plus keyword matches) is a
+        subquery that numbers its rows with ROW_NUMBER(). The lists are
+        combined with UNION ALL, scored with SUM(1 / (RRF_K + rank)) per note,
+        and joined back to notes for the page. None if there is nothing to rank.
+        """
+        Note = models.Note
+        team_ids = select(models.team_members.c.team_id).where(
+            models.team_members.c.user_id == user_id
+        ).union(select(models.Team.id).where(models.Team.owner_id == user_id))
+        visible = (
+            Note.is_deleted == False,
+            or_(Note.user_id == user_id, Note.team_id.in_(team_ids)),
+        )
+        depth = (offset + limit) * 2  # Candidates taken from each list
+
+        def ranked(order_by, *conditions):
             return (
-                db.query(models.Note)
-                .filter(
-                    models.Note.is_deleted == False,
-                    (models.Note.user_id == user_id) | (models.Note.team_id.in_(team_ids)),
-                    models.Note.embedding.l2_distance(query_embedding) <= threshold,
+                select(
+                    Note.id.label("note_id"),
+                    func.row_number().over(order_by=order_by).label("rank"),
                 )
-                .order_by(models.Note.embedding.l2_distance(query_embedding))
-                .limit(limit)
-                .all()
+                .where(*visible, *conditions)
+                .order_by(order_by)
+                .limit(depth)
             )
-        except Exception as e:
-            logger.error(f"Single search failed for query '{query}': {e}")
-            return []
+
+        lists = []
+        # For unit vectors, L2 distance d corresponds to cosine distance d^2 / 2;
+        # cosine_distance is what idx_notes_embedding (vector_cosine_ops) serves
+        max_distance = threshold ** 2 / 2
+        for vector in embeddings:
+            if not np.any(vector):
+                continue  # Blank variation
+            distance = Note.embedding.cosine_distance(vector)
+            lists.append(ranked(distance, Note.embedding.isnot(None), distance <= max_distance))
+
+        if uses_postgres(db):
+            terms = prefix_tsquery(query, any_word=True)
+            if terms:
+                ts = tsquery(terms)
+                lists.append(
+                    ranked(func.ts_rank(note_search_vector, ts).desc(), note_search_vector.op("@@")(ts))
+                )
+        else:
+            # SQLite (tests): no tsvector, rank substring matches by recency
+            pattern = like_pattern(query.strip())
+            lists.append(
+                ranked(
+                    Note.timestamp.desc(),
+                    or_(Note.title.ilike(pattern, escape="\\"), Note.summary.ilike(pattern, escape="\\")),
+                )
+            )
+
+        if not lists:
+            # No usable vector and no words to match (e.g. "?")
+            return None
+
+        candidates = union_all(*(ranked_list.subquery().select() for ranked_list in lists)).subquery()
+        fused = (
+            select(
+                candidates.c.note_id,
+                func.sum(1.0 / (RRF_K + candidates.c.rank)).label("score"),
+            )
+            .group_by(candidates.c.note_id)
+            .subquery()
+        )
+        return (
+            select(
+                Note.id,
+                Note.title,
+                Note.summary,
+                Note.transcript_groq,
+                Note.transcript_deepgram,
+                Note.timestamp,
+                fused.c.score,
+            )
+            .join(fused, fused.c.note_id == Note.id)
+            .order_by(fused.c.score.desc(), Note.id)
+            .offset(offset)
+            .limit(limit)
+        )
 
     async def search_web(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,126 @@
+"""
+Short-lived per-user cache for dashboard statistics.
+
+Task statistics and the productivity pulse are aggregate queries over a
+user's whole history, and dashboards poll them. Results are kept in an
+in-process TTL LRU keyed by (kind, user id). Owners of Tasks and Notes
+written through the session, including query-level update()/delete(), are
+collected at flush and their entries dropped once the transaction commits,
+so a user sees their own change on the next read from the same process.
+Other processes may serve a result up to STATS_CACHE_TTL_SEC old.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import ai_config
+from app.db import models
+
+
+class StatsCache:
+    def __init__(self, ttl_sec: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_sec = ttl_sec or ai_config.STATS_CACHE_TTL_SEC
+        self.max_entries = max_entries or ai_config.STATS_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get_or_compute(self, kind: str, user_id: str, compute: Callable[[], Any], force_refresh: bool = False) -> Any:
+        key = (kind, user_id)
+        now = time.time()
+        if not force_refresh:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                self.counters["misses"] += 1
+
+        value = compute()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl_sec, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, user_ids: Iterable[str]):
+        user_ids = set(user_ids)
+        with self._lock:
+            for key in [k for k in self._entries if k[1] in user_ids]:
+                del self._entries[key]
+                self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self.counters:
+                self.counters[name] = 0
+
+
+_stats_cache: Optional[StatsCache] = None
+_stats_cache_lock = threading.Lock()
+
+
+def get_stats_cache() -> StatsCache:
+    """Get the process-wide statistics cache."""
+    global _stats_cache
+    if _stats_cache is None:
+        with _stats_cache_lock:
+            if _stats_cache is None:
+                _stats_cache = StatsCache()
+    return _stats_cache
+
+
+_PENDING_INVALIDATIONS = "stats_cache_invalidations"
+
+
+@event.listens_for(models.Task, "after_insert")
+@event.listens_for(models.Task, "after_update")
+@event.listens_for(models.Task, "after_delete")
+@event.listens_for(models.Note, "after_insert")
+@event.listens_for(models.Note, "after_update")
+@event.listens_for(models.Note, "after_delete")
+def _owner_changed(mapper, connection, target):
+    # A row moved to another user changes both
+    previous = inspect(target).attrs.user_id.history.deleted or ()
+    user_ids = {user_id for user_id in (target.user_id, *previous) if user_id}
+    session = object_session(target)
+    if user_ids and session is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _owner_bulk_changed(orm_execute_state):
+    # Query-level update()/delete() skip the mapper events above
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    owned = [m.class_ for m in orm_execute_state.all_mappers if m.class_ in (models.Task, models.Note)]
+    if not owned:
+        return
+    owners = select(owned[0].user_id).distinct()
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        owners = owners.where(whereclause)
+    session = orm_execute_state.session
+    user_ids = {user_id for user_id in session.execute(owners).scalars() if user_id}
+    if user_ids:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_owner_changes(session):
+    user_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if user_ids:
+        get_stats_cache().invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_owner_changes(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
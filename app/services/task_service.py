@@ -1,9 +1,11 @@
 import time
 from typing import Any, Dict
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.db import models
+from app.services.stats_cache import get_stats_cache
 
 
 class TaskService:
@@ -43,63 +45,54 @@ class TaskService:
         self.db.refresh(new_task)
         return new_task
 
-    def get_task_statistics(self, user_id: str) -> Dict[str, Any]:
+    def get_task_statistics(self, user_id: str, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Calculate and return task statistics for a specific user.
         Modularized from the API layer for reusability.
         """
-        all_tasks = (
-            self.db.query(models.Task)
-            .filter(models.Task.user_id == user_id, models.Task.is_deleted == False)
-            .all()
+        return get_stats_cache().get_or_compute(
+            "task_statistics", user_id, lambda: self._compute_task_statistics(user_id), force_refresh
         )
 
+    def _compute_task_statistics(self, user_id: str) -> Dict[str, Any]:
+        # One aggregate pass over idx_tasks_user_active_stats, not one row per task
         current_time = int(time.time() * 1000)
-        total_tasks = len(all_tasks)
-        completed_tasks = len([t for t in all_tasks if t.is_done])
-        pending_tasks = total_tasks - completed_tasks
-
-        high_priority = len(
-            [t for t in all_tasks if t.priority == models.Priority.HIGH]
-        )
-        medium_priority = len(
-            [t for t in all_tasks if t.priority == models.Priority.MEDIUM]
-        )
-        low_priority = len([t for t in all_tasks if t.priority == models.Priority.LOW])
-
-        overdue_tasks = len(
-            [
-                t
-                for t in all_tasks
-                if not t.is_done and t.deadline and t.deadline < current_time
-            ]
-        )
-
         # Today calculation is now handled more precisely via timezone in the API,
         # but for stats we use a generic 24h window or pass parameters.
         # Keeping consistent with the existing generic logic for now.
         today_start = (current_time // (24 * 60 * 60 * 1000)) * (24 * 60 * 60 * 1000)
         today_end = today_start + (24 * 60 * 60 * 1000)
-        due_today = len(
-            [
-                t
-                for t in all_tasks
-                if not t.is_done
-                and t.deadline
-                and today_start <= t.deadline < today_end
-            ]
+
+        Task = models.Task
+        is_open = Task.is_done.isnot(True)
+        row = (
+            self.db.query(
+                func.count().label("total"),
+                func.count().filter(Task.is_done == True).label("completed"),
+                func.count().filter(Task.priority == models.Priority.HIGH).label("high"),
+                func.count().filter(Task.priority == models.Priority.MEDIUM).label("medium"),
+                func.count().filter(Task.priority == models.Priority.LOW).label("low"),
+                func.count().filter(is_open, Task.deadline < current_time).label("overdue"),
+                func.count()
+                .filter(is_open, Task.deadline >= today_start, Task.deadline < today_end)
+                .label("due_today"),
+            )
+            .filter(Task.user_id == user_id, Task.is_deleted == False)
+            .one()
         )
+        total_tasks = int(row.total or 0)
+        completed_tasks = int(row.completed or 0)
 
         return {
             "total_tasks": total_tasks,
             "completed_tasks": completed_tasks,
-            "pending_tasks": pending_tasks,
+            "pending_tasks": total_tasks - completed_tasks,
             "by_priority": {
-                "high": high_priority,
-                "medium": medium_priority,
-                "low": low_priority,
+                "high": int(row.high or 0),
+                "medium": int(row.medium or 0),
+                "low": int(row.low or 0),
             },
-            "by_status": {"overdue": overdue_tasks, "due_today": due_today},
+            "by_status": {"overdue": int(row.overdue or 0), "due_today": int(row.due_today or 0)},
             "completion_rate": round(
                 (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2
             ),
@@ -0,0 +1,130 @@
+"""
+Per-tenant partial HNSW indexes for large note owners.
+
+The global `idx_notes_embedding` graph is shared by every user, so a
+user-scoped ANN query walks a graph made mostly of other tenants' vectors
+and discards them in the filter (see app/services/vector_search.py). Users
+with at least TENANT_INDEX_MIN_NOTES embedded notes get their own partial
+index, `... USING hnsw (embedding) WHERE user_id = '<id>'`. PostgreSQL picks
+it for any query filtering on that user_id (psycopg2 inlines parameters, so
+the planner sees the literal). Every candidate the index yields already
+belongs to the tenant. Smaller tenants and team-scoped queries keep using
+the global index.
+
+Hash partitioning of `notes` by user_id was not used. A partitioned table's
+primary key has to include the partition key, which would break every
+foreign key to notes.id.
+
+`sync` reconciles indexes with note counts, from the daily beat job or
+scripts/db/tenant_vector_indexes.py:
+- Missing indexes are built with CREATE INDEX CONCURRENTLY, so writes to
+  `notes` continue during the build.
+- An index is dropped once its tenant falls below half the threshold, so a
+  tenant near the threshold does not flap.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, literal, text
+from sqlalchemy.orm import Session
+
+from app.core.config import ai_config
+from app.db import models
+from app.services.text_search import uses_postgres
+from app.utils.json_logger import JLogger
+
+INDEX_PREFIX = "idx_notes_embedding_u_"
+
+
+class TenantVectorIndexService:
+    def __init__(self, db: Session, min_notes: Optional[int] = None):
+        self.db = db
+        self.min_notes = min_notes or ai_config.TENANT_INDEX_MIN_NOTES
+
+    @staticmethod
+    def index_name(user_id: str) -> str:
+        # User ids are arbitrary strings; identifiers are capped at 63 bytes
+        return INDEX_PREFIX + hashlib.sha1(user_id.encode()).hexdigest()[:20]
+
+    def plan(self) -> Dict[str, List]:
+        """
+        {"create": [(user_id, note_count), ...], "drop": [TenantVectorIndex, ...]}
+        from one grouped count over embedded, live notes.
+        """
+        keep_at = self.min_notes // 2
+        count = func.count(models.Note.id)
+        counts = dict(
+            self.db.query(models.Note.user_id, count)
+            .filter(models.Note.embedding.isnot(None), models.Note.is_deleted == False)
+            .group_by(models.Note.user_id)
+            .having(count >= keep_at)
+            .all()
+        )
+        tracked = {row.user_id: row for row in self.db.query(models.TenantVectorIndex)}
+        return {
+            "create": sorted(
+                (user_id, n)
+                for user_id, n in counts.items()
+                if n >= self.min_notes and user_id not in tracked
+            ),
+            "drop": [row for user_id, row in tracked.items() if counts.get(user_id, 0) < keep_at],
+        }
+
+    def _execute_ddl(self, statement: str):
+        # CONCURRENTLY cannot run inside a transaction block, and waits for
+        # open transactions (including this session's) to finish
+        self.db.commit()
+        engine = self.db.get_bind()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(statement))
+
+    def create_index(self, user_id: str, note_count: int):
+        name = self.index_name(user_id)
+        predicate = literal(user_id).compile(
+            dialect=self.db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+        # Untracked, so any index under this name is a leftover of a build
+        # that was killed mid-way (INVALID)
+        self._execute_ddl(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        try:
+            self._execute_ddl(
+                f"CREATE INDEX CONCURRENTLY {name} ON notes "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64) "
+                f"WHERE user_id = {predicate}"
+            )
+        except Exception:
+            # A failed concurrent build leaves an INVALID index behind
+            self._execute_ddl(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            raise
+        self.db.merge(
+            models.TenantVectorIndex(user_id=user_id, index_name=name, note_count=note_count)
+        )
+        self.db.commit()
+
+    def drop_index(self, row: models.TenantVectorIndex):
+        name = row.index_name
+        self._execute_ddl(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        self.db.delete(row)
+        self.db.commit()
+
+    def sync(self, dry_run: bool = False) -> Dict:
+        """Builds missing and drops obsolete tenant indexes, one at a time."""
+        plan = self.plan()
+        result = {
+            "create": [user_id for user_id, _ in plan["create"]],
+            "drop": [row.user_id for row in plan["drop"]],
+            "failed": [],
+        }
+        if dry_run or not uses_postgres(self.db):
+            return result
+        for user_id, note_count in plan["create"]:
+            try:
+                self.create_index(user_id, note_count)
+                JLogger.info("Built tenant vector index", user_id=user_id, notes=note_count)
+            except Exception as e:
+                JLogger.error("Tenant vector index build failed", user_id=user_id, error=str(e))
+                result["failed"].append(user_id)
+        for row in plan["drop"]:
+            self.drop_index(row)
+        return result
@@ -0,0 +1,47 @@
+"""
+Indexed text matching for autocomplete and keyword search.
+
+On PostgreSQL, notes and tasks carry a generated `search_vector` tsvector
+column (GIN-indexed), and their title/description columns have pg_trgm GIN
+indexes (migration e2b7c5a91d40, or create_all via app/db/models.py).
+Queries here use them for ranked prefix full-text matching and for substring
+matching, so no query has to scan the table. `search_vector` is not mapped
+on the models: SQLite (test runs) cannot store it, so SQLite uses plain
+ILIKE matching instead.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+# 'simple' config: notes are multilingual, so no language-specific stemming
+TS_CONFIG = "simple"
+
+note_search_vector = literal_column("notes.search_vector")
+task_search_vector = literal_column("tasks.search_vector")
+
+
+def uses_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def like_pattern(text: str, prefix_only: bool = False) -> str:
+    """ILIKE pattern matching `text` literally (escape character: backslash)."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def prefix_tsquery(text: str, any_word: bool = False) -> Optional[str]:
+    """
+    "proj upd" -> "proj:* & upd:*": every word, matched as a prefix, so
+    partially typed words still hit ("proj:* | upd:*" with any_word, for
+    recall-oriented ranking). Returns None if `text` has no words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    return (" | " if any_word else " & ").join(f"{word}:*" for word in words) or None
+
+
+def tsquery(text: str):
+    return func.to_tsquery(TS_CONFIG, text)
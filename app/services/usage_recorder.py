@@ -0,0 +1,284 @@
+"""
+Buffered usage metering for the API.
+
+Requests only append a UsageEvent to an in-memory ring buffer. A background
+writer drains it every USAGE_FLUSH_INTERVAL_MS (or as soon as
+USAGE_FLUSH_MAX_EVENTS are queued) and persists the batch in one
+transaction: a multi-row INSERT into usage_logs, and one debit plus one
+USAGE Transaction per wallet, with all wallets in the batch locked by a
+single ordered SELECT ... FOR UPDATE.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.core.config import ai_config
+from app.db.models import Transaction, UsageLog, User, Wallet
+from app.db.session import SessionLocal
+from app.services.billing_service import BillingService
+from app.utils.json_logger import JLogger
+
+
+@dataclass
+class UsageEvent:
+    """One metered API call, as captured by UsageTrackingMiddleware."""
+
+    user_id: Optional[str]
+    endpoint: str
+    status: int
+    duration_seconds: int = 0
+    cost: int = 0
+    corporate_wallet_id: Optional[str] = None
+    timestamp: int = field(default_factory=lambda: int(time.time() * 1000))
+    attempts: int = 0
+
+    @property
+    def wallet_id(self) -> Optional[str]:
+        return self.corporate_wallet_id or self.user_id
+
+
+class UsageRecorder:
+    """
+    Per-process ring buffer of usage events with a batching background writer.
+
+    When the buffer is full the oldest events are dropped (and counted), so a
+    database outage cannot grow API memory without bound. A failed batch is
+    re-queued and retried up to MAX_ATTEMPTS times. `close()` stops the writer
+    and flushes whatever is left; it runs on application shutdown and at exit.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        flush_interval_ms: Optional[float] = None,
+        flush_max_events: Optional[int] = None,
+        capacity: Optional[int] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.flush_interval = (
+            flush_interval_ms if flush_interval_ms is not None else ai_config.USAGE_FLUSH_INTERVAL_MS
+        ) / 1000
+        self.flush_max_events = flush_max_events or ai_config.USAGE_FLUSH_MAX_EVENTS
+        self.session_factory = session_factory
+        self._buffer: deque = deque(maxlen=capacity or ai_config.USAGE_BUFFER_CAPACITY)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._closed = False
+        self.counters = {"recorded": 0, "written": 0, "dropped": 0, "flushes": 0, "failed_flushes": 0}
+
+    def record(self, event: UsageEvent):
+        """Queues `event`; never touches the database on the caller's thread."""
+        with self._cond:
+            if self._writer_pid is not None and self._writer_pid != os.getpid():
+                # Forked child: the parent's buffered events are the parent's to write
+                self._buffer.clear()
+            if len(self._buffer) == self._buffer.maxlen:
+                self.counters["dropped"] += 1
+            self._buffer.append(event)
+            self.counters["recorded"] += 1
+            if self._closed:
+                events = self._take()
+            else:
+                events = None
+                self._ensure_writer()
+                if len(self._buffer) >= self.flush_max_events:
+                    self._cond.notify()
+        if events:
+            # Late events after shutdown started are written inline
+            self._flush_events(events)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _take(self) -> List[UsageEvent]:
+        events = list(self._buffer)
+        self._buffer.clear()
+        return events
+
+    def _ensure_writer(self):
+        # Called with the lock held; re-spawn after fork (multi-worker API servers)
+        pid = os.getpid()
+        if self._writer is not None and self._writer_pid == pid and self._writer.is_alive():
+            return
+        self._writer = threading.Thread(target=self._run, name="usage-writer", daemon=True)
+        self._writer_pid = pid
+        self._writer.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.flush_max_events:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+                events = self._take()
+            if events:
+                self._flush_events(events)
+
+    def flush(self) -> int:
+        """Writes everything buffered now. Returns the number of events written."""
+        with self._cond:
+            events = self._take()
+        return self._flush_events(events) if events else 0
+
+    def close(self):
+        """Stops the writer and flushes the remaining events (shutdown hook)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None and writer.is_alive() and writer is not threading.current_thread():
+            writer.join(timeout=5)
+        # Retry within the shutdown itself: there is no later cycle to catch up in
+        for _ in range(self.MAX_ATTEMPTS):
+            self.flush()
+            if not self._buffer:
+                break
+
+    def _flush_events(self, events: List[UsageEvent]) -> int:
+        # One batch at a time, so two flushes never lock the same wallets
+        with self._flush_lock:
+            try:
+                with self.session_factory() as db:
+                    self._write(db, events)
+                    db.commit()
+            except Exception as e:
+                retry = [event for event in events if event.attempts + 1 < self.MAX_ATTEMPTS]
+                for event in retry:
+                    event.attempts += 1
+                with self._cond:
+                    self.counters["failed_flushes"] += 1
+                    self.counters["dropped"] += len(events) - len(retry)
+                    self._buffer.extendleft(reversed(retry))
+                JLogger.error(
+                    "Usage flush failed",
+                    events=len(events),
+                    requeued=len(retry),
+                    error=str(e),
+                )
+                return 0
+
+        with self._cond:
+            self.counters["flushes"] += 1
+            self.counters["written"] += len(events)
+        return len(events)
+
+    def _write(self, db: Session, events: List[UsageEvent]):
+        user_ids = {e.user_id for e in events if e.user_id}
+        users = (
+            {u.id: u for u in db.query(User).filter(User.id.in_(user_ids))} if user_ids else {}
+        )
+
+        # Billing: charges grouped per wallet, in arrival order within a wallet
+        by_wallet: "OrderedDict[str, List[UsageEvent]]" = OrderedDict()
+        for event in events:
+            if event.cost > 0 and event.status < 400 and event.user_id in users:
+                by_wallet.setdefault(event.wallet_id, []).append(event)
+
+        charged: Dict[int, int] = {}
+        if by_wallet:
+            wallet_ids = sorted(by_wallet)
+            # Sorted lock order keeps concurrent flushes from deadlocking
+            wallets = {
+                w.user_id: w
+                for w in db.query(Wallet)
+                .filter(Wallet.user_id.in_(wallet_ids))
+                .order_by(Wallet.user_id)
+                .with_for_update()
+            }
+            billing = BillingService(db)
+            for wallet_id in wallet_ids:
+                wallet = wallets.get(wallet_id) or billing.get_or_create_wallet(
+                    wallet_id, commit=False
+                )
+                total = 0
+                calls = 0
+                for event in by_wallet[wallet_id]:
+                    # Same rule as charge_usage: never take a wallet below zero
+                    if wallet.balance - total >= event.cost:
+                        total += event.cost
+                        calls += 1
+                        charged[id(event)] = event.cost
+                    else:
+                        JLogger.warning(
+                            "Insufficient funds for buffered usage charge",
+                            wallet_id=wallet_id,
+                            user_id=event.user_id,
+                            cost=event.cost,
+                        )
+                if not total:
+                    continue
+                wallet.balance -= total
+                corporate = by_wallet[wallet_id][0].corporate_wallet_id is not None
+                db.add(
+                    Transaction(
+                        wallet_id=wallet_id,
+                        amount=-total,
+                        balance_after=wallet.balance,
+                        type="USAGE",
+                        description=(
+                            f"API usage: {calls} calls "
+                            f"(Charged to {'Corporate' if corporate else 'Personal'})"
+                        ),
+                    )
+                )
+
+        # Usage stats are attributed to the person who made the calls
+        last_usage: Dict[str, int] = {}
+        for event in events:
+            if charged.get(id(event)):
+                last_usage[event.user_id] = max(last_usage.get(event.user_id, 0), event.timestamp)
+        for user_id, timestamp in last_usage.items():
+            user = users[user_id]
+            stats = dict(user.usage_stats or {})
+            stats["last_usage_at"] = timestamp
+            user.usage_stats = stats
+            flag_modified(user, "usage_stats")
+
+        db.flush()
+        db.execute(
+            insert(UsageLog),
+            [
+                {
+                    "user_id": e.user_id if e.user_id in users else None,
+                    "endpoint": e.endpoint,
+                    "duration_seconds": e.duration_seconds,
+                    "cost_estimated": charged.get(id(e), 0),
+                    "status": e.status,
+                    "timestamp": e.timestamp,
+                }
+                for e in events
+            ],
+        )
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {"buffered": len(self._buffer), **self.counters}
+
+
+_usage_recorder: Optional[UsageRecorder] = None
+_usage_recorder_lock = threading.Lock()
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """Get the process-wide usage recorder."""
+    global _usage_recorder
+    if _usage_recorder is None:
+        with _usage_recorder_lock:
+            if _usage_recorder is None:
+                _usage_recorder = UsageRecorder()
+                # Backstop for processes that exit without the app's shutdown hook
+                atexit.register(_usage_recorder.close)
+    return _usage_recorder
@@ -0,0 +1,156 @@
+"""
+Tuned pgvector (HNSW) nearest-neighbour queries over notes.
+
+An HNSW index scan yields at most `hnsw.ef_search` candidates (pgvector
+default: 40), and WHERE filters (`user_id`, `is_deleted`, ...) are applied
+to those candidates afterwards. On a table dominated by other users' notes,
+a user-scoped query can therefore return fewer rows than asked for, or
+none. Every ANN query goes through `nearest`, which runs under a
+SearchProfile:
+- `ef_search` is applied with SET LOCAL (transaction scoped) before the
+  query: more candidates means better recall and higher latency;
+- when the filtered result comes back short, and the scope holds more
+  embedded notes than were returned (one count over the scope), the query
+  is re-run with a doubled `ef_search`, up to `max_ef_search`. A user with
+  fewer notes than asked for is short on every scan and gets just the one.
+
+`measure_recall` replays sample queries under each profile and scores them
+against exact (brute-force) results with RAGEvaluator.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import ai_config
+from app.db import models
+from app.services.rag_evaluator import RAGEvaluationResult, RAGEvaluator
+from app.services.text_search import uses_postgres
+
+
+@dataclass(frozen=True)
+class SearchProfile:
+    name: str
+    ef_search: int  # Candidates per index scan on the first attempt
+    max_ef_search: int  # Over-fetch ceiling for short, heavily filtered results
+
+
+PROFILES = {
+    # Pipeline-internal lookups (linking, conflicts): a few good hits suffice
+    "fast": SearchProfile("fast", ef_search=40, max_ef_search=160),
+    "balanced": SearchProfile("balanced", ef_search=100, max_ef_search=400),
+    # pgvector caps ef_search at 1000
+    "accurate": SearchProfile("accurate", ef_search=200, max_ef_search=1000),
+}
+
+
+def get_profile(profile: Union[str, SearchProfile, None] = None) -> SearchProfile:
+    if isinstance(profile, SearchProfile):
+        return profile
+    name = profile or ai_config.VECTOR_SEARCH_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown vector search profile: {name}")
+    return PROFILES[name]
+
+
+def set_ef_search(db: Session, ef_search: int):
+    """Applies to the rest of the current transaction; a no-op off PostgreSQL."""
+    if uses_postgres(db):
+        # SET does not take bind parameters
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+
+def nearest(
+    query: Query,
+    embedding,
+    limit: int,
+    profile: Union[str, SearchProfile, None] = None,
+    max_distance: Optional[float] = None,
+) -> List:
+    """
+    Runs `query` (a filtered query over notes) ordered by cosine distance to
+    `embedding` and returns up to `limit` rows, each with a trailing
+    `distance` column. `max_distance` drops farther rows; it is applied after
+    the ANN scan, so it never triggers a re-run.
+    """
+    profile = get_profile(profile)
+    scope = query.filter(models.Note.embedding.isnot(None))
+    distance = models.Note.embedding.cosine_distance(embedding).label("distance")
+    query = scope.add_columns(distance).order_by(distance).limit(limit)
+    db = query.session
+    ef_search = profile.ef_search
+    available = None
+    while True:
+        set_ef_search(db, ef_search)
+        rows = query.all()
+        if len(rows) >= limit or ef_search >= profile.max_ef_search or not uses_postgres(db):
+            break
+        if available is None:
+            # Only worth widening if the filters discarded candidates
+            available = scope.with_entities(func.count()).order_by(None).scalar()
+        if len(rows) >= available:
+            break
+        ef_search = min(ef_search * 2, profile.max_ef_search)
+    if max_distance is not None:
+        rows = [row for row in rows if float(row.distance) < max_distance]
+    return rows
+
+
+def _exact_nearest(query: Query, embedding, limit: int) -> List:
+    # With index scans off, PostgreSQL computes every distance (exact top-k)
+    db = query.session
+    if uses_postgres(db):
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+    try:
+        distance = models.Note.embedding.cosine_distance(embedding)
+        return (
+            query.filter(models.Note.embedding.isnot(None))
+            .order_by(distance)
+            .limit(limit)
+            .all()
+        )
+    finally:
+        if uses_postgres(db):
+            db.execute(text("SET LOCAL enable_indexscan = on"))
+
+
+def measure_recall(
+    db: Session,
+    samples: Sequence[Tuple[str, Sequence[float]]],
+    k: int = 5,
+    profiles: Optional[Sequence[str]] = None,
+) -> Dict[str, RAGEvaluationResult]:
+    """
+    Scores each profile on `samples` ([(user_id, query embedding), ...]),
+    the user-scoped search every caller runs, against exact top-`k` results.
+    recall_at_k[k] (k of 1, 3, 5 or 10) is the fraction of true neighbours
+    found.
+    """
+
+    def scoped(user_id):
+        return db.query(models.Note.id).filter(
+            models.Note.user_id == user_id, models.Note.is_deleted == False
+        )
+
+    ground_truth = [
+        [row.id for row in _exact_nearest(scoped(user_id), embedding, k)]
+        for user_id, embedding in samples
+    ]
+    results = {}
+    for name in profiles or PROFILES:
+        retrieved, times = [], []
+        for user_id, embedding in samples:
+            started = time.perf_counter()
+            rows = nearest(scoped(user_id), embedding, k, profile=name)
+            times.append(time.perf_counter() - started)
+            retrieved.append([row.id for row in rows])
+        results[name] = RAGEvaluator.evaluate_rag_system(
+            queries=[user_id for user_id, _ in samples],
+            retrieved_results=retrieved,
+            ground_truth=ground_truth,
+            retrieval_times=times,
+        )
+    return results
@@ -3,23 +3,25 @@ import json
 import logging
 from typing import Any, Dict, List
 
-import redis.asyncio as redis
 from fastapi import WebSocket
 
+from app.services.broadcaster import broadcaster
+
 logger = logging.getLogger(__name__)
 
 
 class ConnectionManager:
     """
     Manages active WebSocket connections per User ID.
-    Integrates with Redis Pub/Sub to support multi-process broadcasts (Celery -> API).
+    Worker broadcasts arrive through the process-wide pub/sub hub on the same
+    user:{user_id} channel the SSE stream uses (Celery -> API).
     """
 
     def __init__(self):
         # user_id -> List[WebSocket]
         self.active_connections: Dict[str, List[WebSocket]] = {}
-        self.redis_url = __import__("os").getenv("REDIS_URL", "redis://redis:6379/0")
-        self.pubsub_task = None
+        # user_id -> task relaying that user's hub queue to their sockets
+        self._forwarders: Dict[str, asyncio.Task] = {}
 
     async def connect(self, user_id: str, websocket: WebSocket):
         await websocket.accept()
@@ -27,14 +29,9 @@ class ConnectionManager:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
 
-        # Start background listener if first connection
-        if not self.pubsub_task:
-            self.pubsub_task = asyncio.create_task(self._listen_to_redis())
-
-        # Subscribe to user-specific channel in Redis
-        # (Managed inside _listen_to_redis via a set of subscribed channels or dynamic pattern)
-        # Simplified: We listen to user_updates_* pattern or handle it in the loop.
-        # Let's use user_updates_{user_id} channel.
+        # One hub subscription per user, shared by all of their sockets
+        if user_id not in self._forwarders:
+            self._forwarders[user_id] = asyncio.create_task(self._forward(user_id))
 
         logger.info(
             f"WebSocket: User {user_id} connected. Active connections: {len(self.active_connections[user_id])}"
@@ -46,29 +43,36 @@ class ConnectionManager:
                 self.active_connections[user_id].remove(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
+                forwarder = self._forwarders.pop(user_id, None)
+                if forwarder:
+                    forwarder.cancel()
         logger.info(f"WebSocket: User {user_id} disconnected.")
 
-    async def _listen_to_redis(self):
-        """Background task to listen for broadcasts from workers using pattern matching."""
-        r = redis.from_url(self.redis_url)
-        pubsub = r.pubsub()
-        # Listen to all user-specific updates
-        await pubsub.psubscribe("user_updates_*")
-
-        logger.info("WebSocket: Redis Pattern Pub/Sub listener started.")
-        try:
-            async for message in pubsub.listen():
-                if message["type"] == "pmessage":
-                    # Extract user_id from channel name: user_updates_{user_id}
-                    channel = message["channel"].decode("utf-8")
-                    user_id = channel.replace("user_updates_", "")
-
-                    if user_id in self.active_connections:
-                        await self.send_personal_message(message["data"], user_id)
-        except Exception as e:
-            logger.error(f"WebSocket: Redis Pub/Sub error: {e}")
-        finally:
-            await pubsub.punsubscribe("user_updates_*")
+    async def _forward(self, user_id: str):
+        """Relays events for user:{user_id} from the hub to the user's sockets."""
+        hub = broadcaster.hub
+        while user_id in self.active_connections:
+            client = await hub.register([f"user:{user_id}"])
+            try:
+                while True:
+                    item = await client.queue.get()
+                    if item is None:
+                        # Evicted as a slow consumer; resubscribe with a fresh queue
+                        logger.warning(f"WebSocket: User {user_id} fell behind, events were dropped")
+                        break
+                    data, received_at = item
+                    hub.record_delivery(received_at)
+                    await self.send_personal_message(data, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket: relay error for {user_id}: {e}")
+                # Let the next connect() start a fresh relay
+                if self._forwarders.get(user_id) is asyncio.current_task():
+                    del self._forwarders[user_id]
+                return
+            finally:
+                await hub.unregister(client)
 
     async def send_personal_message(self, message: str, user_id: str):
         if user_id in self.active_connections:
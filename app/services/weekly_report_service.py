@@ -0,0 +1,205 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import ai_config
+from app.db.models import Note, Priority, Task, User
+from app.utils.json_logger import JLogger
+
+WEEK_MS = 7 * 24 * 60 * 60 * 1000
+
+
+class WeeklyReportService:
+    """
+    Chunked, resumable fan-out of the weekly productivity report.
+
+    Active users are walked in id order (keyset, ids only) and cut into
+    chunks of WEEKLY_REPORT_CHUNK_SIZE. A wave of WEEKLY_REPORT_WAVE_CHUNKS
+    chunks runs in parallel as a Celery chord. Each chunk reads its users'
+    numbers with two grouped queries and queues its pushes in batches. The
+    chord callback moves the checkpoint (last user id of the wave) and starts
+    the next wave, so no task runs long and an interrupted run resumes by
+    re-running the dispatcher for the same week.
+
+    A chunk takes a short lease in Redis while it runs and is marked sent
+    only once all its pushes are queued, so a redelivered or re-dispatched
+    chunk does not notify its users twice, and one whose worker died is free
+    again when the lease expires. Chunks that failed (or found another
+    delivery still holding the lease) are re-dispatched after the last wave,
+    up to MAX_RETRY_PASSES times. The checkpoint is only changed inside a
+    WATCH/MULTI transaction.
+    """
+
+    CHECKPOINT_KEY = "weekly_report:checkpoint:{week}"
+    CHUNK_KEY = "weekly_report:chunk:{week}:{after_id}"
+    SENT_KEY = "weekly_report:sent:{week}:{after_id}"
+    KEY_TTL_SEC = 8 * 24 * 3600  # Outlives the week
+    CLAIM_TTL_SEC = 15 * 60  # Longer than a chunk takes to run
+    MAX_RETRY_PASSES = 2
+
+    def __init__(
+        self,
+        week: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        wave_chunks: Optional[int] = None,
+        checkpoint_store=None,
+    ):
+        self.week = week or datetime.now(timezone.utc).strftime("%G-W%V")
+        self.chunk_size = chunk_size or ai_config.WEEKLY_REPORT_CHUNK_SIZE
+        self.wave_chunks = wave_chunks or ai_config.WEEKLY_REPORT_WAVE_CHUNKS
+        if checkpoint_store is None:
+            import redis
+
+            checkpoint_store = redis.from_url(ai_config.REDIS_URL)
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_key = self.CHECKPOINT_KEY.format(week=self.week)
+
+    @staticmethod
+    def _parse_checkpoint(raw) -> Dict:
+        if not raw:
+            # The report window is fixed when the run starts
+            return {
+                "since": int(time.time() * 1000) - WEEK_MS,
+                "last_id": None,
+                "users": 0,
+                "notified": 0,
+                "failed_chunks": [],
+                "retry_passes": 0,
+                "complete": False,
+            }
+        return json.loads(raw)
+
+    def load_checkpoint(self) -> Dict:
+        return self._parse_checkpoint(self.checkpoint_store.get(self.checkpoint_key))
+
+    def save_checkpoint(self, state: Dict):
+        self.checkpoint_store.set(self.checkpoint_key, json.dumps(state), ex=self.KEY_TTL_SEC)
+
+    def update_checkpoint(self, change: Callable[[Dict], None]) -> Dict:
+        """Applies `change` to the checkpoint atomically, retrying if another writer got there first."""
+
+        def apply(pipe) -> Dict:
+            state = self._parse_checkpoint(pipe.get(self.checkpoint_key))
+            change(state)
+            pipe.multi()
+            pipe.set(self.checkpoint_key, json.dumps(state), ex=self.KEY_TTL_SEC)
+            return state
+
+        return self.checkpoint_store.transaction(apply, self.checkpoint_key, value_from_callable=True)
+
+    def next_wave(self, db: Session, after_id: Optional[str]) -> List[Tuple[Optional[str], str]]:
+        """Chunk bounds (after_id, last_id] of the next wave, from one keyset read of ids."""
+        stmt = (
+            select(User.id)
+            .where(User.is_deleted.is_(False))
+            .order_by(User.id)
+            .limit(self.chunk_size * self.wave_chunks)
+        )
+        if after_id is not None:
+            stmt = stmt.where(User.id > after_id)
+        ids = db.scalars(stmt).all()
+        return [
+            (after_id if start == 0 else ids[start - 1], ids[min(start + self.chunk_size, len(ids)) - 1])
+            for start in range(0, len(ids), self.chunk_size)
+        ]
+
+    def chunk_sent(self, after_id: Optional[str]) -> bool:
+        return bool(self.checkpoint_store.exists(self.SENT_KEY.format(week=self.week, after_id=after_id or "")))
+
+    def claim_chunk(self, after_id: Optional[str]) -> bool:
+        key = self.CHUNK_KEY.format(week=self.week, after_id=after_id or "")
+        return bool(self.checkpoint_store.set(key, 1, nx=True, ex=self.CLAIM_TTL_SEC))
+
+    def mark_chunk_sent(self, after_id: Optional[str]):
+        self.checkpoint_store.set(self.SENT_KEY.format(week=self.week, after_id=after_id or ""), 1, ex=self.KEY_TTL_SEC)
+        self.release_chunk(after_id)
+
+    def release_chunk(self, after_id: Optional[str]):
+        self.checkpoint_store.delete(self.CHUNK_KEY.format(week=self.week, after_id=after_id or ""))
+
+    @staticmethod
+    def build_reports(db: Session, after_id: Optional[str], last_id: str, since: int) -> Tuple[int, List[Dict]]:
+        """
+        (users in the chunk, push messages) for active users with ids in
+        (after_id, last_id]. Notes and tasks are counted for the whole chunk
+        with one grouped query each.
+        """
+        in_chunk = [User.id <= last_id, User.is_deleted.is_(False)]
+        if after_id is not None:
+            in_chunk.append(User.id > after_id)
+        users = db.query(User.id, User.name, User.authorized_devices).filter(*in_chunk).all()
+        if not users:
+            return 0, []
+        user_ids = [user.id for user in users]
+
+        notes = dict(
+            db.query(Note.user_id, func.count())
+            .filter(Note.user_id.in_(user_ids), Note.is_deleted == False, Note.timestamp >= since)
+            .group_by(Note.user_id)
+            .all()
+        )
+        tasks = {
+            row.user_id: row
+            for row in db.query(
+                Task.user_id,
+                # No completion timestamp: a done task touched this week counts
+                func.count().filter(Task.is_done == True, Task.updated_at >= since).label("completed"),
+                func.count().filter(Task.is_done.isnot(True), Task.priority == Priority.HIGH).label("urgent"),
+            )
+            .filter(Task.user_id.in_(user_ids), Task.is_deleted == False)
+            .group_by(Task.user_id)
+            .all()
+        }
+
+        messages = []
+        for user in users:
+            devices = user.authorized_devices or []
+            token = devices[0].get("biometric_token") if devices else None
+            if not token:
+                continue
+            note_count = int(notes.get(user.id, 0))
+            completed = int(tasks[user.id].completed) if user.id in tasks else 0
+            urgent = int(tasks[user.id].urgent) if user.id in tasks else 0
+            body = f"Hello {user.name or 'User'}! {note_count} notes recorded and {completed} tasks completed this week."
+            if urgent:
+                body += f" {urgent} high priority tasks are still open."
+            messages.append(
+                {
+                    "token": token,
+                    "title": "📈 Your Weekly Pulse is Ready!",
+                    "body": body,
+                    # FCM data values must be strings
+                    "data": {
+                        "type": "WEEKLY_REPORT",
+                        "notes": str(note_count),
+                        "tasks_completed": str(completed),
+                        "high_priority_open": str(urgent),
+                    },
+                }
+            )
+        return len(users), messages
+
+    def record_wave(self, results: List[Dict], last_id: str) -> Dict:
+        """Adds a finished wave's chunk results to the checkpoint and moves it past `last_id`."""
+
+        def add(state: Dict):
+            for result in results:
+                state["users"] += result.get("users", 0)
+                state["notified"] += result.get("notified", 0)
+                if result.get("failed"):
+                    state["failed_chunks"].append(result["bounds"])
+            state["last_id"] = last_id
+
+        state = self.update_checkpoint(add)
+        JLogger.info(
+            "Weekly report wave done",
+            week=self.week,
+            last_id=last_id,
+            users=state["users"],
+            notified=state["notified"],
+        )
+        return state
@@ -4,11 +4,15 @@ Phase 2 - AI Service Utilities
 Provides timeout handling, retry logic, and request tracking for AI Service.
 """
 
+import asyncio
+import inspect
 import json
 import logging
+import threading
 import time
+from collections import deque
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,14 @@ class RetryExhaustedError(AIServiceError):
     """All retries exhausted."""
 
 
+class InvalidInputError(AIServiceError):
+    """Input rejected before any AI call; retrying cannot succeed."""
+
+
+class SilentAudioError(AIServiceError):
+    """The STT engines answered, but heard no speech."""
+
+
 def retry_with_backoff(
     max_attempts: int = DEFAULT_RETRIES,
     initial_backoff: float = 1.0,
@@ -39,18 +51,50 @@ def retry_with_backoff(
 ):
     """
     Decorator for retry logic with exponential backoff.
+    Coroutine functions get an async wrapper that awaits between attempts
+    instead of blocking the event loop.
 
     Args:
         max_attempts: Maximum number of attempts
         initial_backoff: Initial backoff time in seconds
         backoff_multiplier: Multiplier for exponential backoff
         exceptions: Tuple of exceptions to catch and retry
+            (InvalidInputError is always re-raised immediately)
 
     Returns:
         Decorated function with retry logic
     """
 
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                last_exception = None
+
+                for attempt in range(1, max_attempts + 1):
+                    try:
+                        logger.info(f"Attempt {attempt}/{max_attempts} for {func.__name__}")
+                        return await func(*args, **kwargs)
+                    except InvalidInputError:
+                        raise
+                    except exceptions as e:
+                        last_exception = e
+                        logger.warning(f"Attempt {attempt} failed: {str(e)}")
+
+                        if attempt < max_attempts:
+                            wait_time = initial_backoff * (backoff_multiplier ** (attempt - 1))
+                            logger.info(f"Retrying in {wait_time}s...")
+                            await asyncio.sleep(wait_time)
+                        else:
+                            logger.error(f"All {max_attempts} attempts exhausted")
+
+                raise RetryExhaustedError(
+                    f"All {max_attempts} attempts exhausted. Last failure: {str(last_exception)}"
+                )
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             backoff = initial_backoff
@@ -60,6 +104,8 @@ def retry_with_backoff(
                 try:
                     logger.info(f"Attempt {attempt}/{max_attempts} for {func.__name__}")
                     return func(*args, **kwargs)
+                except InvalidInputError:
+                    raise
                 except exceptions as e:
                     last_exception = e
                     logger.warning(f"Attempt {attempt} failed: {str(e)}")
@@ -117,15 +163,15 @@ def validate_transcript(transcript: str) -> str:
         Validated transcript
 
     Raises:
-        AIServiceError: If transcript is invalid
+        InvalidInputError: If transcript is invalid
     """
     if not transcript or len(transcript.strip()) == 0:
-        raise AIServiceError("Transcript cannot be empty")
+        raise InvalidInputError("Transcript cannot be empty")
 
     transcript = transcript.strip()
 
     if len(transcript) > MAX_TRANSCRIPT_LENGTH:
-        raise AIServiceError(
+        raise InvalidInputError(
             f"Transcript too long: {len(transcript)} > {MAX_TRANSCRIPT_LENGTH} characters"
         )
 
@@ -340,6 +386,56 @@ class RateLimiter:
         return max(0.0, wait_time)
 
 
+class LatencyTracker:
+    """
+    Rolling per-engine latency samples, normalised by payload size.
+
+    Used to decide when a slow primary call is worth hedging with a second
+    engine: the hedge fires once the call runs past the chosen percentile
+    of recent seconds-per-MB for that engine.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, engine: str, latency: float, size_bytes: int):
+        """Record a successful call's latency for `engine`."""
+        per_mb = latency / max(size_bytes / 1_000_000, 0.01)
+        with self._lock:
+            self.samples.setdefault(engine, deque(maxlen=self.window)).append(per_mb)
+
+    def hedge_delay(
+        self,
+        engine: str,
+        size_bytes: int,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+    ) -> Optional[float]:
+        """
+        Seconds to wait on `engine` before hedging a payload of `size_bytes`.
+
+        Returns:
+            The delay, or None while there are too few samples to judge.
+        """
+        with self._lock:
+            samples = sorted(self.samples.get(engine, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index] * max(size_bytes / 1_000_000, 0.01)
+
+
+# Global STT latency tracker
+_stt_latency_tracker = LatencyTracker()
+
+
+def get_stt_latency_tracker() -> LatencyTracker:
+    """Get the global STT latency tracker."""
+    return _stt_latency_tracker
+
+
 # Test the utilities
 if __name__ == "__main__":
     # Test transcript validation
@@ -40,7 +40,29 @@ class AudioQualityAnalyzer:
             JLogger.debug("Calling librosa.load", path=audio_path)
             y, sr = librosa.load(audio_path, sr=None)
             JLogger.debug("Audio loaded successfully", sample_rate=sr, length=len(y))
+        except Exception as e:
+            JLogger.error(
+                "Error loading audio for quality analysis",
+                audio_path=audio_path,
+                error=str(e),
+            )
+            return {"error": str(e)}
 
+        return self.analyze_audio_buffer(y, sr, audio_path=audio_path)
+
+    def analyze_audio_buffer(
+        self, y: np.ndarray, sr: int, audio_path: str = None
+    ) -> Dict[str, Any]:
+        """
+        Quality analysis on an already-decoded mono buffer.
+
+        Used by the preprocessing pipeline so the refined audio is not
+        re-read from disk just to be scored.
+
+        Returns:
+            dict: Audio quality metrics
+        """
+        try:
             metrics = {}
 
             # 1. Loudness (RMS)
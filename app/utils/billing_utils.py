@@ -1,8 +1,7 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
 from app.db import models
-from app.db.session import get_db
+from app.db.session import SessionLocal
 from app.services.auth_service import get_current_user
 from app.services.billing_service import BillingService
 from app.utils.json_logger import JLogger
@@ -52,25 +51,39 @@ def requires_tier(minimum_tier: models.SubscriptionTier):
 def check_credit_balance(estimated_cost: int):
     """
     Dependency that ensures a user has enough credits for an operation.
-    Uses FOR UPDATE lock to prevent race conditions where concurrent
-    requests both pass the balance check before either deducts.
+    Reserves the estimated cost for the duration of the request, so
+    concurrent requests cannot all pass the check against the same credits.
+    The hold is a conditional UPDATE in its own short transaction (no row
+    lock held across the request) and is released when the request ends.
     """
 
-    async def balance_dependency(
-        db: Session = Depends(get_db),
+    def balance_dependency(
         current_user: models.User = Depends(get_current_user),
     ):
-        billing_service = BillingService(db)
-        if not billing_service.check_balance(current_user.id, estimated_cost, for_update=True):
+        user_id = current_user.id
+        with SessionLocal() as ledger:
+            reservation = BillingService(ledger).reserve_credits(
+                user_id, estimated_cost, user_id=user_id
+            )
+            reservation_id = reservation.id if reservation else None
+        if reservation_id is None:
             JLogger.warning(
                 "Access denied: Insufficient credits",
-                user_id=current_user.id,
+                user_id=user_id,
                 cost=estimated_cost,
             )
             raise HTTPException(
                 status_code=status.HTTP_402_PAYMENT_REQUIRED,
                 detail=f"Insufficient credits. This operation costs {estimated_cost} credits.",
             )
-        return current_user
+        try:
+            yield current_user
+        finally:
+            try:
+                with SessionLocal() as ledger:
+                    BillingService(ledger).release_reservation(reservation_id)
+            except Exception as e:
+                # The reconciler expires it after CREDIT_RESERVATION_TTL_SEC
+                JLogger.error("Failed to release credit reservation", reservation_id=reservation_id, error=str(e))
 
     return balance_dependency
@@ -0,0 +1,32 @@
+"""
+Wire format for real-time events published on Redis.
+
+Publishers encode with EVENT_ENCODING ("json" or "msgpack"); subscribers
+accept either, so the setting can be flipped without a coordinated deploy.
+Clients (SSE / WebSocket) always receive JSON text.
+"""
+
+import json
+from typing import Any, Dict, Union
+
+from app.core.config import ai_config
+
+
+def encode_event(payload: Dict[str, Any]) -> Union[str, bytes]:
+    if ai_config.EVENT_ENCODING == "msgpack":
+        import msgpack
+
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload)
+
+
+def decode_event(data: Union[str, bytes]) -> str:
+    """Returns the event as JSON text, whichever encoding it was published in."""
+    if isinstance(data, str):
+        return data
+    # JSON events always start with "{"; msgpack maps never do
+    if data[:1] == b"{":
+        return data.decode("utf-8")
+    import msgpack
+
+    return json.dumps(msgpack.unpackb(data, raw=False))
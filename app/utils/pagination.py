@@ -0,0 +1,47 @@
+"""
+Opaque keyset (cursor) pagination for list endpoints.
+
+A cursor encodes the sort key of the last row a client has seen, e.g.
+(timestamp, id). The next page seeks past it through a composite index
+instead of counting OFFSET rows, so page N costs the same as page 1.
+List endpoints keep returning a plain JSON array and put the cursor for
+the following page in the NEXT_CURSOR_HEADER response header (absent on
+the last page).
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Returns the `size` sort-key values in `cursor`; 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(values, list) and len(values) == size:
+            return values
+    except (ValueError, UnicodeError):
+        pass
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int, *fields: str) -> Optional[str]:
+    """
+    Sets the next-page cursor header from the last item when the page is
+    full, and returns it.
+    """
+    if len(items) < limit or not items:
+        return None
+    cursor = encode_cursor(*(getattr(items[-1], name) for name in fields))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
@@ -42,26 +42,19 @@ async def verify_device_signature(request: Request, db: Session = Depends(get_db
     if env in ("testing", "development") and not request.headers.get("X-Force-Signature-Check"):
         return True
 
-    # 1. Check for Admin or Dev Bypass (Token-based)
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
+    # 1. Check for Admin or Dev Bypass (Bearer token, decoded once per request)
+    from app.services.auth_cache import get_auth_cache
+    from app.services.auth_service import resolve_principal
 
-        if is_dev_bypass(token):
+    principal = resolve_principal(request)
+    if principal.user_id and not principal.from_cookie:
+        if principal.dev_bypass:
             return True
 
-        try:
-            import jwt
-            from app.services.auth_service import ALGORITHM, SECRET_KEY
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = payload.get("sub")
-            if user_id:
-                from app.db import models
-                user = db.query(models.User).filter(models.User.id == user_id).first()
-                if user and user.is_admin:
-                    return True
-        except (jwt.InvalidTokenError, jwt.ExpiredSignatureError, KeyError):
-            pass  # Invalid token for bypass check, proceed to signature check
+        user = get_auth_cache().load(db, principal.user_id, principal.issued_at)
+        if user and user["is_admin"]:
+            return True
+    # Otherwise (no or invalid token) proceed to signature check
 
     signature = request.headers.get("X-Device-Signature")
     timestamp = request.headers.get("X-Device-Timestamp")  # Unix timestamp in seconds
@@ -55,6 +55,7 @@ celery_app.conf.update(
         "app.worker.task.note_process_pipeline": {"queue": "long"},
         "app.worker.task.analyze_note_semantics_task": {"queue": "short"},
         "app.worker.task.generate_note_embeddings_task": {"queue": "short"},
+        "reembed_notes_task": {"queue": "long"},
     },
     imports=["app.worker.task"],  # Explicit import
 )
@@ -88,4 +89,16 @@ celery_app.conf.beat_schedule = {
         "task": "cleanup_expired_tokens_task",
         "schedule": crontab(hour=4, minute=0),
     },
+    "reconcile-credit-reservations-every-minute": {
+        "task": "reconcile_credit_reservations_task",
+        "schedule": crontab(minute="*"),
+    },
+    "roll-up-dashboard-metrics-every-5-minutes": {
+        "task": "rollup_metrics_task",
+        "schedule": crontab(minute="*/5"),
+    },
+    "sync-tenant-vector-indexes-daily": {
+        "task": "sync_tenant_vector_indexes_task",
+        "schedule": crontab(hour=2, minute=30),
+    },
 }
@@ -0,0 +1,137 @@
+"""
+Coalescing publisher for real-time status events.
+
+A note run emits a burst of NOTE_STATUS / PIPELINE_STEP / TASK_CREATED
+events within a few seconds. Instead of one Redis publish (and one client
+wake-up) per event, events are buffered per channel for a short window:
+a newer event for the same (type, note, task) replaces the older one, and
+whatever is left goes out as a single message - the event itself when one
+remains, otherwise an EVENT_BATCH envelope listing them in order:
+
+    {
+        "type": "EVENT_BATCH",
+        "events": [{"type": "NOTE_STATUS", "data": {...}, "timestamp": ...}, ...],
+        "timestamp": 1700000000000
+    }
+
+Each entry in "events" is an ordinary event, exactly as it would have been
+sent on its own. Clients must unpack the envelope, so coalescing is off
+unless EVENT_COALESCE_WINDOW_MS is set above 0.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.json_logger import JLogger
+
+COALESCED_EVENTS = {"NOTE_STATUS", "PIPELINE_STEP", "TASK_CREATED"}
+TERMINAL_STATUSES = {"DONE", "FAILED"}
+
+
+def coalesce_key(payload: Dict[str, Any]) -> Tuple:
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        data = {}
+    return (payload.get("type"), data.get("note_id"), data.get("task_id"))
+
+
+class EventCoalescer:
+    """
+    Per-process, per-channel event buffer flushed by a background thread.
+
+    Events outside COALESCED_EVENTS, and terminal NOTE_STATUS events, are
+    sent at once together with anything already pending on the channel, so
+    ordering per channel is preserved.
+    """
+
+    def __init__(self, publish: Callable[[str, Dict[str, Any]], None], window_ms: float):
+        self.publish = publish
+        self.window = window_ms / 1000
+        self._pending: Dict[str, "OrderedDict[Tuple, Dict[str, Any]]"] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+
+    def add(self, channel: str, payload: Dict[str, Any]):
+        event_type = payload.get("type")
+        data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+        immediate = (
+            self.window <= 0
+            or event_type not in COALESCED_EVENTS
+            or data.get("status") in TERMINAL_STATUSES
+        )
+
+        with self._cond:
+            if self._flusher_pid is not None and self._flusher_pid != os.getpid():
+                # Forked child: events buffered by the parent are the parent's to send
+                self._pending.clear()
+                self._deadlines.clear()
+            pending = self._pending.setdefault(channel, OrderedDict())
+            key = coalesce_key(payload)
+            pending.pop(key, None)
+            pending[key] = payload
+            if immediate:
+                events = self._take(channel)
+            else:
+                self._deadlines.setdefault(channel, time.monotonic() + self.window)
+                events = None
+                self._ensure_flusher()
+                self._cond.notify()
+
+        if events:
+            self._send(channel, events)
+
+    def _take(self, channel: str) -> List[Dict[str, Any]]:
+        self._deadlines.pop(channel, None)
+        return list(self._pending.pop(channel, {}).values())
+
+    def _send(self, channel: str, events: List[Dict[str, Any]]):
+        if len(events) == 1:
+            message = events[0]
+        else:
+            message = {
+                "type": "EVENT_BATCH",
+                "events": events,
+                "timestamp": int(time.time() * 1000),
+            }
+        try:
+            self.publish(channel, message)
+        except Exception as e:
+            JLogger.warning("Failed to publish coalesced events", channel=channel, error=str(e))
+
+    def flush(self, channel: Optional[str] = None):
+        """Sends pending events now (one channel, or all)."""
+        with self._cond:
+            channels = [channel] if channel else list(self._pending)
+            batches = [(c, self._take(c)) for c in channels]
+        for c, events in batches:
+            if events:
+                self._send(c, events)
+
+    def _ensure_flusher(self):
+        # Called with the lock held; re-spawn after fork (Celery prefork children)
+        pid = os.getpid()
+        if self._flusher is not None and self._flusher_pid == pid and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._run, name="event-coalescer", daemon=True)
+        self._flusher_pid = pid
+        self._flusher.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._deadlines:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = [c for c, deadline in self._deadlines.items() if deadline <= now]
+                if not due:
+                    self._cond.wait(min(self._deadlines.values()) - now)
+                    continue
+                batches = [(c, self._take(c)) for c in due]
+            for channel, events in batches:
+                if events:
+                    self._send(channel, events)
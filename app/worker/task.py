@@ -1,4 +1,4 @@
-import json
+import atexit
 import os
 import tempfile
 import time
@@ -15,17 +15,30 @@ except ImportError:
     print("Warning: pydub not available, audio processing will fail.")
 
 
+from celery import chord
 from celery.signals import worker_ready
+from sqlalchemy.orm import joinedload
 
-from app.core.audio import preprocess_audio_pipeline
+from app.core.audio import preprocess_audio_pipeline, probe_duration
+from app.core.config import ai_config
 from app.db.models import Note, NoteStatus, Priority, Task, User
 from app.db.session import SessionLocal
+from app.services import auth_cache  # noqa: F401  (User writes here invalidate API auth caches)
+from app.services import vector_search
 from app.services.ai_service import AIService
 from app.services.billing_service import BillingService
 from app.services.image_service import ImageService
+from app.services.reembedding_service import ReembeddingService, note_embedding_text
+from app.services.related_notes_service import RelatedNotesService
+from app.services.rollup_service import RollupService
+from app.services.tenant_vector_index_service import TenantVectorIndexService
+from app.services.weekly_report_service import WeeklyReportService
 from app.utils.ai_service_utils import AIServiceError
+from app.utils.event_codec import encode_event
 from app.utils.json_logger import JLogger
 from app.worker.celery_app import celery_app
+from app.worker.events import EventCoalescer
+from app.worker.pipeline import StageGraph
 
 # Redis sync client for workers
 try:
@@ -44,6 +57,15 @@ except Exception:
     redis_client = None
 
 
+def _publish_event(channel: str, payload: dict):
+    redis_client.publish(channel, encode_event(payload))
+
+
+# Bursts of status events per channel go out as one message (see app.worker.events)
+_event_coalescer = EventCoalescer(_publish_event, ai_config.EVENT_COALESCE_WINDOW_MS)
+atexit.register(_event_coalescer.flush)
+
+
 def broadcast_team_update(team_id: str, event_type: str, data: Any, trigger_id: str = None):
     """Publish a real-time update for a team via Redis (SSE compatible)."""
     payload = {
@@ -53,14 +75,14 @@ def broadcast_team_update(team_id: str, event_type: str, data: Any, trigger_id:
         "timestamp": int(time.time() * 1000),
     }
     if redis_client:
-        try:
-            redis_client.publish(f"team:{team_id}", json.dumps(payload))
-        except Exception as e:
-            JLogger.warning("Failed to publish team update to Redis", error=str(e))
+        _event_coalescer.add(f"team:{team_id}", payload)
 
 
 def broadcast_user_update(user_id: str, event_type: str, data: Any, trigger_id: str = None):
-    """Publish a real-time update for a specific user via Redis (SSE compatible)."""
+    """
+    Publish a real-time update for a specific user via Redis.
+    SSE streams and WebSocket connections both listen on user:{user_id}.
+    """
     payload = {
         "type": event_type,
         "data": data,
@@ -68,13 +90,7 @@ def broadcast_user_update(user_id: str, event_type: str, data: Any, trigger_id:
         "timestamp": int(time.time() * 1000),
     }
     if redis_client:
-        try:
-            # SSE Broadcaster listens on user:{user_id}
-            redis_client.publish(f"user:{user_id}", json.dumps(payload))
-            # Legacy WS manager listens on user_updates_{user_id}
-            redis_client.publish(f"user_updates_{user_id}", json.dumps(payload))
-        except Exception as e:
-            JLogger.warning("Failed to publish user update to Redis", error=str(e))
+        _event_coalescer.add(f"user:{user_id}", payload)
 
 
 def broadcast_ws_update(user_id: str, event_type: str, data: Any):
@@ -82,6 +98,100 @@ def broadcast_ws_update(user_id: str, event_type: str, data: Any):
     broadcast_user_update(user_id, event_type, data)
 
 
+def _draft_task(t_data: Any, note_summary: str) -> dict:
+    """Normalizes one LLM-extracted task and hydrates its smart actions (no DB access)."""
+    from app.services.action_suggestion_service import ActionSuggestionService
+
+    # Helper to normalize access
+    is_dict = isinstance(t_data, dict)
+    raw_title = t_data.get("title") if is_dict else getattr(t_data, "title", None)
+    raw_desc = t_data.get("description") if is_dict else getattr(t_data, "description", None)
+    raw_prio = t_data.get("priority") if is_dict else getattr(t_data, "priority", "MEDIUM")
+    raw_deadline = t_data.get("deadline") if is_dict else getattr(t_data, "deadline", None)
+    if not raw_deadline and is_dict: 
+        raw_deadline = t_data.get("due_date")
+
+    final_title = raw_title or (raw_desc if raw_desc else "Task")[:100]
+    final_desc = raw_desc or raw_title or "No description provided."
+
+    actions_metadata = t_data.get("actions", {}) if is_dict else getattr(t_data, "actions", {})
+    suggested_actions = {}
+
+    if "google_search" in actions_metadata:
+        suggested_actions["google_search"] = ActionSuggestionService.generate_google_search(
+            actions_metadata["google_search"]["query"]
+        )
+    if "email" in actions_metadata:
+        email_data = actions_metadata["email"]
+        suggested_actions["email"] = ActionSuggestionService.generate_email_draft(
+            to=email_data.get("to", ""),
+            name=email_data.get("name", ""),
+            subject=email_data.get("subject", ""),
+            body=email_data.get("body", ""),
+        )
+    if "whatsapp" in actions_metadata:
+        wa_data = actions_metadata["whatsapp"]
+        suggested_actions["whatsapp"] = ActionSuggestionService.generate_whatsapp_message(
+            phone=wa_data.get("phone", ""),
+            name=wa_data.get("name", ""),
+            message=wa_data.get("message", ""),
+        )
+    if "call" in actions_metadata:
+        call_data = actions_metadata["call"]
+        suggested_actions["call"] = ActionSuggestionService.generate_call_link(
+            phone=call_data.get("phone", ""),
+            name=call_data.get("name", ""),
+        )
+    if "map" in actions_metadata:
+        map_data = actions_metadata["map"]
+        suggested_actions["map"] = ActionSuggestionService.generate_map_link(
+            location=map_data.get("location", ""),
+            query=map_data.get("query", ""),
+        )
+    if "ai_prompt" in actions_metadata:
+        ai_data = actions_metadata["ai_prompt"]
+        suggested_actions["ai_prompt"] = ActionSuggestionService.generate_ai_prompt(
+            model=ai_data.get("model", "chatgpt"),
+            task_description=final_desc,
+            context=note_summary or "",
+            custom_prompt=ai_data.get("prompt"),
+        )
+
+    return {
+        "title": final_title,
+        "description": final_desc,
+        "deadline": raw_deadline,
+        "priority": getattr(Priority, raw_prio, Priority.MEDIUM),
+        "assigned_entities": t_data.get("assigned_entities", []) if is_dict else getattr(t_data, "assigned_entities", []),
+        "suggested_actions": suggested_actions,
+    }
+
+
+def _dedupe_task_drafts(db, note_id: str, drafts: List[dict]) -> List[dict]:
+    """
+    Drops drafts that already exist on the note, using one IN query:
+    a live task with the same title, or any task with the same title and deadline.
+    """
+    if not drafts:
+        return []
+    existing = (
+        db.query(Task.title, Task.deadline, Task.is_deleted)
+        .filter(Task.note_id == note_id, Task.title.in_({d["title"] for d in drafts}))
+        .all()
+    )
+    live_titles = {row.title for row in existing if not row.is_deleted}
+    seen = {(row.title, row.deadline) for row in existing}
+
+    fresh = []
+    for draft in drafts:
+        if draft["title"] in live_titles or (draft["title"], draft["deadline"]) in seen:
+            JLogger.info(f"Worker: Skipping duplicate task '{draft['title']}'", note_id=note_id)
+            continue
+        live_titles.add(draft["title"])
+        fresh.append(draft)
+    return fresh
+
+
 @celery_app.task(name="ping_task")
 def ping_task(message: str):
     """Simple task for testing Celery connectivity."""
@@ -120,8 +230,17 @@ def note_process_pipeline(
             )
             db.commit()
 
+            # Load the note and its owner once for the whole run
+            note = (
+                db.query(Note)
+                .options(joinedload(Note.user))
+                .filter(Note.id == note_id)
+                .first()
+            )
+            user = note.user if note else None
+            note_team_id = note.team_id if note else None
+
             # Notify UI immediately
-            note = db.query(Note).filter(Note.id == note_id).first()
             if note and note.user_id:
                 note_owner_id = note.user_id
                 broadcast_user_update(
@@ -194,7 +313,6 @@ def note_process_pipeline(
                     note_id=note_id,
                     path=actual_local_path,
                 )
-                note = db.query(Note).filter(Note.id == note_id).first()
                 if note and note.raw_audio_url:
                     # If it's a URL (http), try to download it
                     if note.raw_audio_url.startswith("http"):
@@ -227,133 +345,192 @@ def note_process_pipeline(
                         f"Local file {actual_local_path} missing or empty and no recovery URL for {note_id}"
                     )
 
-            processed_path = preprocess_audio_pipeline(actual_local_path)
-            temp_files_to_clean.append(processed_path)
+            # 3-6. Stage DAG: stages start once their inputs are ready, so the
+            # duration probe overlaps STT, and embedding + semantic linking
+            # overlap task drafting
+            from app.services.audio_service import AudioService
+            from app.services.rag_service import RAGService
 
-            # 3. Update audio_url with processed path (as a local URL)
-            audio_url = f"/{processed_path}"
+            note_user_id = note.user_id
+            note_created_at = note.timestamp
 
-            # 4. Transcribe Audio
-            JLogger.info("Worker: Transcribing audio", note_id=note_id)
-            transcript, engine, detected_langs, all_transcripts = ai_service.transcribe_with_failover_sync(
-                processed_path, languages=languages, stt_model=stt_model
-            )
+            # User profile for personalization and timezone context
+            profile = {
+                "system_prompt": user.system_prompt if user else "",
+                "jargons": user.jargons if user else [],
+                "timezone": user.timezone if user else "UTC",
+            }
 
-            # 5. RAG: Fetch Historical Context
-            JLogger.info("Worker: Fetching historical context...", note_id=note_id)
-            from app.services.rag_service import RAGService
-            context_notes = RAGService.get_context_for_transcript(
-                db, note.user_id, transcript, exclude_note_id=note_id
-            )
+            def probe_billing_duration():
+                # Header probe instead of decoding the whole upload again
+                try:
+                    return probe_duration(actual_local_path)
+                except Exception as e:
+                    JLogger.warning("Worker: Duration probe failed", note_id=note_id, error=str(e))
+                    return None
+
+            def preprocess():
+                processed = preprocess_audio_pipeline(actual_local_path)
+                temp_files_to_clean.append(processed)
+                return processed
+
+            def transcribe(preprocess):
+                # Long recordings are split on silence and fanned out
+                JLogger.info("Worker: Transcribing audio", note_id=note_id)
+                stt = ai_service.transcribe_with_failover_sync
+                if AudioService.should_chunk(
+                    preprocess, max_duration_minutes=ai_config.CHUNKED_STT_THRESHOLD_SEC / 60
+                ):
+                    stt = ai_service.transcribe_chunked_sync
+                return stt(preprocess, languages=languages, stt_model=stt_model)
+
+            def rag_context(transcribe):
+                JLogger.info("Worker: Fetching historical context...", note_id=note_id)
+                with SessionLocal() as stage_db:
+                    return RAGService.get_context_for_transcript(
+                        stage_db, note_user_id, transcribe[0], exclude_note_id=note_id
+                    )
 
-            # 6. AI Analysis with Context
-            JLogger.info("Worker: Running LLM analysis with context", note_id=note_id)
-            # Fetch user profile for personalization and timezone context
-            note = db.query(Note).filter(Note.id == note_id).first() # Re-fetch in case it was updated
-            user = note.user if note else None
-            user_instr = user.system_prompt if user else ""
-            user_jargons = user.jargons if user else []
-            user_timezone = user.timezone if user else "UTC"
-
-            analysis = ai_service.llm_brain_sync(
-                transcript,
-                user_role,
-                user_instruction=user_instr,
-                jargons=user_jargons,
-                note_created_at=note.timestamp,
-                user_timezone=user_timezone,
-                context_notes=context_notes,
-            )
-            analysis.metadata = {
-                "engine": engine,
-                "languages": detected_langs,
-                "all_transcripts": all_transcripts,
-            }
-            JLogger.info(
-                "Worker: AI analysis complete",
-                note_id=note_id,
-                tasks_found=len(analysis.tasks),
-            )
-            broadcast_ws_update(
-                note_owner_id,
-                "PIPELINE_STEP",
-                {
-                    "note_id": note_id,
-                    "step": "TASK_EXTRACTION",
-                    "message": f"Found {len(analysis.tasks)} actionable tasks. Extracting details...",
-                },
-            )
+            def analyze(transcribe):
+                transcript, engine, detected_langs, all_transcripts = transcribe
+                JLogger.info("Worker: Running LLM analysis", note_id=note_id)
+                analysis = ai_service.llm_brain_sync(
+                    transcript,
+                    user_role,
+                    user_instruction=profile["system_prompt"],
+                    jargons=profile["jargons"],
+                    note_created_at=note_created_at,
+                    user_timezone=profile["timezone"],
+                )
+                analysis.metadata = {
+                    "engine": engine,
+                    "languages": detected_langs,
+                    "all_transcripts": all_transcripts,
+                }
+                JLogger.info(
+                    "Worker: AI analysis complete",
+                    note_id=note_id,
+                    tasks_found=len(analysis.tasks),
+                )
+                broadcast_ws_update(
+                    note_owner_id,
+                    "PIPELINE_STEP",
+                    {
+                        "note_id": note_id,
+                        "step": "TASK_EXTRACTION",
+                        "message": f"Found {len(analysis.tasks)} actionable tasks. Extracting details...",
+                    },
+                )
+                return analysis
+
+            def embed(analysis):
+                # Generate Vector Embedding for Semantic Search
+                broadcast_ws_update(
+                    note_owner_id,
+                    "PIPELINE_STEP",
+                    {
+                        "note_id": note_id,
+                        "step": "VECTORIZING",
+                        "message": "Generating semantic vectors for intelligent search...",
+                    },
+                )
+                return ai_service.generate_embedding_sync(analysis.summary)
 
-            # 5. Generate Vector Embedding for Semantic Search
+            def link_related(embedding):
+                # Semantic Linking (Similarity > 0.85 => Distance < 0.15)
+                try:
+                    with SessionLocal() as stage_db:
+                        related_notes = vector_search.nearest(
+                            stage_db.query(Note.id, Note.title).filter(
+                                Note.user_id == note_user_id,
+                                Note.id != note_id,
+                                Note.is_deleted == False
+                            ),
+                            embedding,
+                            5,
+                            profile="fast",
+                            max_distance=0.15,
+                        )
+                    related_links = [
+                        {"id": r.id, "title": r.title, "type": "semantic_similarity"}
+                        for r in related_notes
+                    ]
+                    JLogger.info(f"Found {len(related_links)} related notes for linking", note_id=note_id)
+                    return related_links
+                except Exception as e:
+                    JLogger.warning(f"Semantic linking failed: {e}", note_id=note_id)
+                    return []
+
+            def find_neighbours(embedding):
+                # Precomputed related notes for GET /notes/{id}
+                try:
+                    with SessionLocal() as stage_db:
+                        return RelatedNotesService.nearest(
+                            stage_db, note_id, embedding, note_user_id, note_team_id
+                        )
+                except Exception as e:
+                    JLogger.warning(f"Related notes precompute failed: {e}", note_id=note_id)
+                    return None  # Computed lazily on first view
+
+            def draft_tasks(analysis):
+                return [_draft_task(t_data, analysis.summary) for t_data in analysis.tasks]
+
+            graph = StageGraph(name="note_pipeline")
+            graph.add("duration", probe_billing_duration)
+            graph.add("preprocess", preprocess)
+            graph.add("transcribe", transcribe, deps=["preprocess"])
+            # The extraction prompt does not use the RAG context, so it overlaps the LLM call
+            graph.add("rag_context", rag_context, deps=["transcribe"])
+            graph.add("analysis", analyze, deps=["transcribe"])
+            graph.add("embedding", embed, deps=["analysis"])
+            graph.add("related", link_related, deps=["embedding"])
+            graph.add("neighbours", find_neighbours, deps=["embedding"])
+            graph.add("task_drafts", draft_tasks, deps=["analysis"])
+            stage = graph.run()
+
+            analysis = stage["analysis"]
+            embedding = stage["embedding"]
+            related_links = stage["related"]
+            audio_url = f"/{stage['preprocess']}"
+
+            # 7. Dedupe extracted tasks against existing rows in one IN query
+            # (GHOST TASK PREVENTION)
+            with graph.timed("dedupe_tasks"):
+                new_drafts = _dedupe_task_drafts(db, note_id, stage["task_drafts"])
+
+            # 8. PROACTIVE CONFLICT DETECTION (LLM call, before the write
+            # transaction so no row locks are held while waiting on it)
             broadcast_ws_update(
                 note_owner_id,
                 "PIPELINE_STEP",
                 {
                     "note_id": note_id,
-                    "step": "VECTORIZING",
-                    "message": "Generating semantic vectors for intelligent search...",
+                    "step": "FINALIZING",
+                    "message": "Checking for calendar conflicts and finalizing tasks...",
                 },
             )
-            embedding = ai_service.generate_embedding_sync(analysis.summary)
-
-            # NEW: Semantic Linking (Similarity > 0.85 => Distance < 0.15)
-            # Find related notes to link automatically
-            related_links = []
-            try:
-                related_notes = (
-                    db.query(Note.id, Note.title)
-                    .filter(
-                        Note.user_id == note.user_id,
-                        Note.id != note_id,
-                        Note.embedding.cosine_distance(embedding) < 0.15,
-                        Note.is_deleted == False
+            all_conflicts = []
+            with graph.timed("conflicts"):
+                # Runs whenever analysis found tasks, even if they all deduplicate
+                if user and stage["task_drafts"]:
+                    # Only Note-based Factual Conflicts remain
+                    similar_notes = vector_search.nearest(
+                        db.query(Note.title, Note.summary).filter(
+                            Note.user_id == user.id, Note.id != note_id, Note.is_deleted.is_(False)
+                        ),
+                        embedding,
+                        5,
+                        profile="fast",
                     )
-                    .limit(5)
-                    .all()
-                )
-                related_links = [
-                    {"id": r.id, "title": r.title, "type": "semantic_similarity"} 
-                    for r in related_notes
-                ]
-                JLogger.info(f"Found {len(related_links)} related notes for linking", note_id=note_id)
-            except Exception as e:
-                JLogger.warning(f"Semantic linking failed: {e}", note_id=note_id)
 
-            # 6. Update Database with AI Results
-            note = db.query(Note).filter(Note.id == note_id).first()
-            note.title = analysis.title
-            note.summary = analysis.summary
-
-            # Save transcripts from meta
-            transcripts = analysis.metadata.get("all_transcripts", {})
-            if "deepgram" in transcripts:
-                note.transcript_deepgram = transcripts["deepgram"]
-            if "groq" in transcripts:
-                note.transcript_groq = transcripts["groq"]
-
-            # Handle fallback for primary if not in dict
-            if stt_model == "whisper" and not note.transcript_groq:
-                note.transcript_groq = analysis.transcript
-            elif stt_model == "nova" and not note.transcript_deepgram:
-                note.transcript_deepgram = analysis.transcript
-
-            note.audio_url = audio_url
-            note.embedding = embedding
-            note.tags = analysis.tags
-            
-            # Save related links in semantic_analysis (or merge with existing)
-            current_analysis = note.semantic_analysis or {}
-            current_analysis["related_notes"] = related_links
-            current_analysis["business_leads"] = getattr(analysis, "business_leads", [])
-            note.semantic_analysis = current_analysis
-            
-            # Save processing duration
-            duration_ms = int((time.time() - start_time) * 1000)
-            note.processing_time_ms = duration_ms
-            JLogger.info(f"Worker: Processing duration: {duration_ms}ms", note_id=note_id)
+                    note_conflicts = ai_service.detect_conflicts_sync(
+                        analysis.summary,
+                        [f"Title: {n.title}\nSummary: {n.summary}" for n in similar_notes],
+                        context_type="previous_notes",
+                    )
+                    all_conflicts = [{"type": "FACTUAL", **c} for c in note_conflicts]
 
-            note.embedding_version = 1
-            note.status = NoteStatus.DONE
+            # 9. Persist note, tasks, billing/usage stats and conflicts in one transaction
             broadcast_ws_update(
                 note_owner_id,
                 "PIPELINE_STEP",
@@ -363,187 +540,122 @@ def note_process_pipeline(
                     "message": "Saving note insights and generated tasks...",
                 },
             )
+            with graph.timed("save"):
+                note.title = analysis.title
+                note.summary = analysis.summary
+
+                # Save transcripts from meta
+                transcripts = analysis.metadata.get("all_transcripts", {})
+                if "deepgram" in transcripts:
+                    note.transcript_deepgram = transcripts["deepgram"]
+                if "groq" in transcripts:
+                    note.transcript_groq = transcripts["groq"]
+
+                # Handle fallback for primary if not in dict
+                if stt_model == "whisper" and not note.transcript_groq:
+                    note.transcript_groq = analysis.transcript
+                elif stt_model == "nova" and not note.transcript_deepgram:
+                    note.transcript_deepgram = analysis.transcript
+
+                note.audio_url = audio_url
+                note.embedding = embedding
+                note.tags = analysis.tags
+                if stage["neighbours"] is not None:
+                    RelatedNotesService.store(db, note, stage["neighbours"])
+                else:
+                    note.related_note_ids = None
+
+                # Save related links in semantic_analysis (or merge with existing)
+                current_analysis = dict(note.semantic_analysis or {})
+                current_analysis["related_notes"] = related_links
+                current_analysis["business_leads"] = getattr(analysis, "business_leads", [])
+                note.semantic_analysis = current_analysis
+
+                note.embedding_version = ai_config.EMBEDDING_VERSION
+                note.status = NoteStatus.DONE
+                if all_conflicts:
+                    # Persist conflicts for UI display
+                    note.conflicts = all_conflicts
+
+                new_tasks = [
+                    Task(id=str(uuid.uuid4()), user_id=note.user_id, note_id=note_id, **draft)
+                    for draft in new_drafts
+                ]
+                db.add_all(new_tasks)
 
-            # 7. Monetization Logic
-            try:
-                raw_audio = AudioSegment.from_file(local_file_path)
-                duration_seconds = raw_audio.duration_seconds
-
-                billing = BillingService(db)
-                billing.charge_usage(
-                    user_id=note.user_id,
-                    description=f"AI Transcription & Analysis ({duration_seconds:.1f}s)",
-                    ref_id=note_id,
-                    audio_duration=duration_seconds,
-                )
-
-                # Update user cache stats
-                user = db.query(User).filter(User.id == note.user_id).first()
-                if user:
-                    from sqlalchemy.orm.attributes import flag_modified
-                    if not user.usage_stats:
-                        user.usage_stats = {
-                            "total_audio_minutes": 0.0,
-                            "total_notes": 0,
-                            "total_tasks": 0,
-                            "last_usage_at": None,
-                        }
-                    user.usage_stats["total_notes"] = user.usage_stats.get("total_notes", 0) + 1
-                    user.usage_stats["total_tasks"] = user.usage_stats.get("total_tasks", 0) + len(analysis.tasks)
-                    flag_modified(user, "usage_stats")
-                    db.commit()
-            except Exception as e:
-                JLogger.critical("CRITICAL: Failed to process charging logic for completed note",
-                                note_id=note_id, user_id=note.user_id, error=str(e))
-
-            # 8. Map & Save Tasks with Smart Actions
-            from app.services.action_suggestion_service import ActionSuggestionService
-            extracted_tasks = []
-            for t_data in analysis.tasks:
-                # Helper to normalize access
-                is_dict = isinstance(t_data, dict)
-                raw_title = t_data.get("title") if is_dict else getattr(t_data, "title", None)
-                raw_desc = t_data.get("description") if is_dict else getattr(t_data, "description", None)
-                raw_prio = t_data.get("priority") if is_dict else getattr(t_data, "priority", "MEDIUM")
-                raw_deadline = t_data.get("deadline") if is_dict else getattr(t_data, "deadline", None)
-                if not raw_deadline and is_dict: 
-                    raw_deadline = t_data.get("due_date")
-
-                final_title = raw_title or (raw_desc if raw_desc else "Task")[:100]
-                final_desc = raw_desc or raw_title or "No description provided."
-
-                # GHOST TASK PREVENTION: Check for duplicates
-                existing_task = db.query(Task).filter(
-                    Task.note_id == note_id,
-                    Task.title == final_title,
-                    Task.deadline == raw_deadline
-                ).first()
-
-                if existing_task:
-                    JLogger.info(f"Worker: Skipping duplicate task '{final_title}'", note_id=note_id)
-                    continue
-
-                actions_metadata = t_data.get("actions", {}) if is_dict else getattr(t_data, "actions", {})
-                suggested_actions = {}
-
-                if "google_search" in actions_metadata:
-                    suggested_actions["google_search"] = ActionSuggestionService.generate_google_search(
-                        actions_metadata["google_search"]["query"]
-                    )
-                if "email" in actions_metadata:
-                    email_data = actions_metadata["email"]
-                    suggested_actions["email"] = ActionSuggestionService.generate_email_draft(
-                        to=email_data.get("to", ""),
-                        name=email_data.get("name", ""),
-                        subject=email_data.get("subject", ""),
-                        body=email_data.get("body", ""),
-                    )
-                if "whatsapp" in actions_metadata:
-                    wa_data = actions_metadata["whatsapp"]
-                    suggested_actions["whatsapp"] = ActionSuggestionService.generate_whatsapp_message(
-                        phone=wa_data.get("phone", ""),
-                        name=wa_data.get("name", ""),
-                        message=wa_data.get("message", ""),
-                    )
-                if "call" in actions_metadata:
-                    call_data = actions_metadata["call"]
-                    suggested_actions["call"] = ActionSuggestionService.generate_call_link(
-                        phone=call_data.get("phone", ""),
-                        name=call_data.get("name", ""),
-                    )
-                if "map" in actions_metadata:
-                    map_data = actions_metadata["map"]
-                    suggested_actions["map"] = ActionSuggestionService.generate_map_link(
-                        location=map_data.get("location", ""),
-                        query=map_data.get("query", ""),
-                    )
-                if "ai_prompt" in actions_metadata:
-                    ai_data = actions_metadata["ai_prompt"]
-                    suggested_actions["ai_prompt"] = ActionSuggestionService.generate_ai_prompt(
-                        model=ai_data.get("model", "chatgpt"),
-                        task_description=final_desc,
-                        context=note.summary or "",
-                        custom_prompt=ai_data.get("prompt"),
-                    )
-
-                from app.services.task_service import TaskService
-                task_service = TaskService(db)
-                new_task = task_service.create_task_with_deduplication(
-                    user_id=note.user_id,
-                    title=final_title,
-                    description=final_desc,
-                    note_id=note_id,
-                    deadline=raw_deadline,
-                    priority=getattr(
-                        Priority,
-                        raw_prio,
-                        Priority.MEDIUM,
-                    ),
-                    assigned_entities=t_data.get("assigned_entities", []) if is_dict else getattr(t_data, "assigned_entities", []),
-                    suggested_actions=suggested_actions
-                )
-
-                if note.team_id:
-                    broadcast_team_update(
-                        note.team_id,
-                        "TASK_CREATED",
-                        {
-                            "task_id": new_task.id,
-                            "note_id": note_id,
-                            "title": new_task.title,
-                            "priority": new_task.priority.value,
-                        },
-                    )
-
-                extracted_tasks.append(
+                # Monetization Logic: a billing failure rolls back only its savepoint
+                try:
+                    duration_seconds = stage["duration"]
+                    if duration_seconds is None:
+                        raise ValueError("Audio duration could not be probed")
+
+                    with db.begin_nested():
+                        BillingService(db).charge_usage(
+                            user_id=note.user_id,
+                            description=f"AI Transcription & Analysis ({duration_seconds:.1f}s)",
+                            ref_id=note_id,
+                            audio_duration=duration_seconds,
+                            commit=False,
+                        )
+                        # Update user cache stats
+                        if user:
+                            from sqlalchemy.orm.attributes import flag_modified
+                            if not user.usage_stats:
+                                user.usage_stats = {
+                                    "total_audio_minutes": 0.0,
+                                    "total_notes": 0,
+                                    "total_tasks": 0,
+                                    "last_usage_at": None,
+                                }
+                            user.usage_stats["total_notes"] = user.usage_stats.get("total_notes", 0) + 1
+                            user.usage_stats["total_tasks"] = user.usage_stats.get("total_tasks", 0) + len(analysis.tasks)
+                            flag_modified(user, "usage_stats")
+                except Exception as e:
+                    JLogger.critical("CRITICAL: Failed to process charging logic for completed note",
+                                    note_id=note_id, user_id=note.user_id, error=str(e))
+
+                # Save processing duration and where it went
+                duration_ms = int((time.time() - start_time) * 1000)
+                note.processing_time_ms = duration_ms
+                note.semantic_analysis = {
+                    **note.semantic_analysis,
+                    "pipeline_timings_ms": dict(graph.timings),
+                }
+                # Captured before commit expires the instances
+                task_events = [
                     {
-                        "title": new_task.title,
-                        "description": new_task.description,
-                        "deadline": new_task.deadline,
+                        "task_id": t.id,
+                        "note_id": note_id,
+                        "title": t.title,
+                        "priority": t.priority.value,
                     }
-                )
-            db.commit()
+                    for t in new_tasks
+                ]
+                device_token = "mock_token"
+                if user and user.authorized_devices:
+                    device_token = user.authorized_devices[0].get("biometric_token", "mock_token")
+                db.commit()
 
-            # 9. PROACTIVE CONFLICT DETECTION
-            broadcast_ws_update(
-                note_owner_id,
-                "PIPELINE_STEP",
-                {
-                    "note_id": note_id,
-                    "step": "FINALIZING",
-                    "message": "Checking for calendar conflicts and finalizing tasks...",
-                },
+            JLogger.info(
+                f"Worker: Processing duration: {duration_ms}ms",
+                note_id=note_id,
+                tasks_created=len(task_events),
+                stages=graph.timings,
             )
-            all_conflicts = []
-            user = db.query(Note).filter(Note.id == note_id).first().user
-            if user and extracted_tasks:
-                # Only Note-based Factual Conflicts remain
-                similar_notes = db.query(Note).filter(
-                    Note.user_id == user.id, Note.id != note_id, Note.is_deleted.is_(False)
-                ).order_by(Note.embedding.cosine_distance(embedding)).limit(5).all()
-                
-                note_conflicts = ai_service.detect_conflicts_sync(
-                    analysis.summary,
-                    [f"Title: {n.title}\nSummary: {n.summary}" for n in similar_notes],
-                    context_type="previous_notes",
-                )
-
-                all_conflicts = [{"type": "FACTUAL", **c} for c in note_conflicts]
-                
-                # Persist conflicts for UI display
-                note.conflicts = all_conflicts
 
-                for conflict in all_conflicts:
-                    device_token = "mock_token"
-                    if user.authorized_devices:
-                        device_token = user.authorized_devices[0].get("biometric_token", "mock_token")
-                    msg_prefix = "⚠️ Factual"
-                    send_push_notification.delay(
-                        device_token,
-                        title=f"{msg_prefix} Conflict Alert!",
-                        body=f"{conflict['explanation']} (Fact: {conflict['fact']} vs {conflict['conflict']})",
-                        data={"type": "CONFLICT", "conflict": conflict},
-                    )
+            # 10. Notify only after the rows are committed
+            if note_team_id:
+                for event in task_events:
+                    broadcast_team_update(note_team_id, "TASK_CREATED", event)
+
+            for conflict in all_conflicts:
+                msg_prefix = "⚠️ Factual"
+                send_push_notification.delay(
+                    device_token,
+                    title=f"{msg_prefix} Conflict Alert!",
+                    body=f"{conflict['explanation']} (Fact: {conflict['fact']} vs {conflict['conflict']})",
+                    data={"type": "CONFLICT", "conflict": conflict},
+                )
 
             JLogger.info("Worker: Note processing pipeline finished successfully", note_id=note_id)
 
@@ -953,11 +1065,18 @@ def generate_note_embeddings_task(self, note_id: str):
                 return {"error": "Note not found"}
 
             # Combine title and summary for better semantic representation
-            text_to_embed = f"{note.title}\n{note.summary}"
+            text_to_embed = note_embedding_text(note.title, note.summary)
             embedding = ai_service.generate_embedding_sync(text_to_embed)
 
             note.embedding = embedding
-            note.embedding_version += 1
+            # Built with the live model; a running re-embed migration picks it up again
+            note.embedding_version = ai_config.EMBEDDING_VERSION
+            try:
+                with db.begin_nested():
+                    RelatedNotesService.refresh(db, note)
+            except Exception as e:
+                JLogger.warning("Worker: Related notes refresh failed", note_id=note_id, error=str(e))
+                note.related_note_ids = None  # Computed lazily on first view
             db.commit()
 
             return {"status": "success", "version": note.embedding_version}
@@ -971,57 +1090,141 @@ def generate_note_embeddings_task(self, note_id: str):
 
 
 
-@celery_app.task(name="generate_productivity_report_task")
-def generate_productivity_report_task():
-    """Scheduled task to generate weekly reports for all active users."""
-    from app.db.models import User
-    from app.services.analytics_service import AnalyticsService
-
-    analytics = AnalyticsService()
+@celery_app.task(name="refresh_related_notes_task")
+def refresh_related_notes_task(note_id: str):
+    """Recomputes a note's precomputed related notes (queued lazily by note views)."""
     with SessionLocal() as db:
         try:
-            # 1. Get all active users
-            users = db.query(User).filter(User.is_deleted.is_(False)).all()
+            note = db.query(Note).filter(Note.id == note_id).first()
+            if not note:
+                return {"status": "skipped", "reason": "not_found"}
+            neighbours = RelatedNotesService.refresh(db, note)
+            db.commit()
+            return {"status": "success", "related": len(neighbours)}
+        except Exception as e:
+            db.rollback()
+            JLogger.error("Worker: Related notes refresh failed", note_id=note_id, error=str(e))
+            return {"error": str(e)}
 
-            for user in users:
-                try:
-                    # 2. Get productivity pulse for the week
-                    pulse = analytics.get_productivity_pulse(db, user.id)
 
-                    # 3. Format a summary message
-                    report_body = f"Hello {user.name or 'User'}! Here is your weekly productivity pulse:\n\n"
-                    report_body += (
-                        f"📊 Active Notes: {pulse.get('total_notes_this_week', 0)}\n"
-                    )
-                    report_body += (
-                        f"✅ Tasks Completed: {pulse.get('tasks_completed', 0)}\n"
-                    )
-                    report_body += (
-                        f"💡 Insight: {pulse.get('suggestion', 'Keep up the great work!')}"
-                    )
+REEMBED_SLICE_SEC = 480  # Stays under the 600s task_time_limit
 
-                    # 4. Trigger pushing notification (Real-world: Email or Push)
-                    device_token = None
-                    if user.authorized_devices:
-                        device_token = user.authorized_devices[0].get("biometric_token")
-
-                    if device_token:
-                        send_push_notification.delay(
-                            device_token,
-                            title="📈 Your Weekly Pulse is Ready!",
-                            body="Tap to see your productivity summary for the last 7 days.",
-                            data={"type": "WEEKLY_REPORT", "pulse": pulse},
-                        )
-                except Exception as e:
-                    JLogger.error(
-                        f"Failed to generate report for user {user.id}", error=str(e)
-                    )
-                    continue
 
-            return {"status": "success", "users_processed": len(users)}
-        except Exception as e:
-            JLogger.error("Weekly report task failed", error=str(e))
-            raise
+@celery_app.task(name="reembed_notes_task", bind=True)
+def reembed_notes_task(
+    self,
+    target_version: Optional[int] = None,
+    model_name: Optional[str] = None,
+    batch_size: int = 256,
+):
+    """
+    Bulk re-embeds notes below `target_version`, resuming from the last checkpoint.
+    Works in slices under the task time limit and re-queues itself until done.
+    """
+    service = ReembeddingService(
+        target_version=target_version, model_name=model_name, batch_size=batch_size
+    )
+    report = service.run(max_seconds=REEMBED_SLICE_SEC)
+    if not report["complete"]:
+        self.apply_async(
+            kwargs={
+                "target_version": service.target_version,
+                "model_name": service.model_name,
+                "batch_size": batch_size,
+            }
+        )
+    return report
+
+
+@celery_app.task(name="send_push_batch")
+def send_push_batch(messages: List[dict]):
+    """Sends up to PUSH_BATCH_SIZE distinct push messages in one FCM batch request."""
+    from app.services.notification_service import NotificationService
+
+    try:
+        NotificationService.initialize()
+        NotificationService.send_each(messages)
+    except Exception as e:
+        JLogger.error("Push notification batch failed in worker", count=len(messages), error=str(e))
+
+
+@celery_app.task(name="generate_productivity_report_task")
+def generate_productivity_report_task(week: Optional[str] = None):
+    """
+    Scheduled task that starts (or resumes) the weekly report for all active
+    users. Each call dispatches one wave of user chunks as a chord; the chord
+    callback re-invokes this task for the next wave. See WeeklyReportService.
+    """
+    service = WeeklyReportService(week=week)
+    state = service.load_checkpoint()
+    if state["complete"]:
+        return state
+
+    with SessionLocal() as db:
+        bounds = service.next_wave(db, state["last_id"])
+    # Past the last wave, the checkpoint stays where it is
+    wave_last_id = bounds[-1][1] if bounds else state["last_id"]
+    if not bounds and state["failed_chunks"] and state.get("retry_passes", 0) < service.MAX_RETRY_PASSES:
+        bounds = [tuple(chunk) for chunk in state["failed_chunks"]]
+
+        def start_retry_pass(checkpoint):
+            checkpoint["failed_chunks"] = []
+            checkpoint["retry_passes"] = checkpoint.get("retry_passes", 0) + 1
+
+        state = service.update_checkpoint(start_retry_pass)
+    elif not bounds:
+        state = service.update_checkpoint(lambda checkpoint: checkpoint.update(complete=True))
+        JLogger.info(
+            "Weekly report complete",
+            week=service.week,
+            users=state["users"],
+            notified=state["notified"],
+            failed_chunks=len(state["failed_chunks"]),
+        )
+        return state
+    else:
+        # Persist the report window before the first wave runs
+        service.save_checkpoint(state)
+
+    chord(
+        [
+            weekly_report_chunk_task.s(service.week, after_id, last_id, state["since"])
+            for after_id, last_id in bounds
+        ]
+    )(weekly_report_wave_done_task.s(service.week, wave_last_id))
+    return {"week": service.week, "chunks": len(bounds), "after_id": state["last_id"]}
+
+
+@celery_app.task(name="weekly_report_chunk_task")
+def weekly_report_chunk_task(week: str, after_id: Optional[str], last_id: str, since: int):
+    """Builds and queues the weekly reports of the active users with ids in (after_id, last_id]."""
+    service = WeeklyReportService(week=week)
+    if service.chunk_sent(after_id):
+        # Already sent by an earlier delivery of this chunk
+        return {"users": 0, "notified": 0}
+    if not service.claim_chunk(after_id):
+        # Another delivery holds the lease; retried after the last wave in case it died
+        return {"failed": True, "bounds": [after_id, last_id]}
+    try:
+        with SessionLocal() as db:
+            users, messages = service.build_reports(db, after_id, last_id, since)
+        batch = ai_config.PUSH_BATCH_SIZE
+        for start in range(0, len(messages), batch):
+            send_push_batch.delay(messages[start:start + batch])
+        service.mark_chunk_sent(after_id)
+        return {"users": users, "notified": len(messages)}
+    except Exception as e:
+        # Reported in the checkpoint; the rest of the run continues
+        JLogger.error("Weekly report chunk failed", week=week, after_id=after_id, last_id=last_id, error=str(e))
+        service.release_chunk(after_id)
+        return {"failed": True, "bounds": [after_id, last_id]}
+
+
+@celery_app.task(name="weekly_report_wave_done_task")
+def weekly_report_wave_done_task(results: List[dict], week: str, last_id: str):
+    """Chord callback: checkpoints a finished wave and dispatches the next one."""
+    WeeklyReportService(week=week).record_wave(results, last_id)
+    generate_productivity_report_task.delay(week=week)
 
 
 @celery_app.task(name="sync_external_service_task")
@@ -1078,6 +1281,64 @@ def cleanup_expired_tokens_task():
             return {"error": str(e)}
 
 
+@celery_app.task(name="reconcile_credit_reservations_task")
+def reconcile_credit_reservations_task():
+    """
+    Periodic task that expires credit holds nobody released (e.g. an API
+    process died mid-request) and repairs drifted wallet reserved counters.
+    """
+    with SessionLocal() as db:
+        try:
+            result = BillingService(db).reconcile_reservations()
+            JLogger.info("Reconciled credit reservations", **result)
+            return {"status": "success", **result}
+        except Exception as e:
+            JLogger.error("Failed to reconcile credit reservations", error=str(e))
+            db.rollback()
+            return {"error": str(e)}
+
+
+@celery_app.task(name="rollup_metrics_task")
+def rollup_metrics_task():
+    """
+    Periodic task that rolls closed hours and days past the rollup watermarks
+    and refreshes the dashboard gauges.
+    """
+    with SessionLocal() as db:
+        try:
+            result = RollupService.run(db)
+            JLogger.info("Rolled up dashboard metrics", **result)
+            return {"status": "success", **result}
+        except Exception as e:
+            JLogger.error("Failed to roll up dashboard metrics", error=str(e))
+            db.rollback()
+            return {"error": str(e)}
+
+
+# Each index is one CREATE INDEX statement, which cannot be sliced under the
+# global 600s task_time_limit
+@celery_app.task(name="sync_tenant_vector_indexes_task", time_limit=4 * 3600)
+def sync_tenant_vector_indexes_task():
+    """
+    Daily task that gives tenants who crossed TENANT_INDEX_MIN_NOTES their own
+    partial HNSW index and drops the indexes of tenants who shrank.
+    """
+    with SessionLocal() as db:
+        try:
+            result = TenantVectorIndexService(db).sync()
+            JLogger.info(
+                "Synced tenant vector indexes",
+                created=len(result["create"]) - len(result["failed"]),
+                dropped=len(result["drop"]),
+                failed=len(result["failed"]),
+            )
+            return {"status": "success", **result}
+        except Exception as e:
+            JLogger.error("Failed to sync tenant vector indexes", error=str(e))
+            db.rollback()
+            return {"error": str(e)}
+
+
 @worker_ready.connect
 def warmup_worker(sender, **kwargs):
     """Warm up AI models on worker startup."""
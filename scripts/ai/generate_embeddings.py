@@ -1,8 +1,22 @@
 #!/usr/bin/env python3
-"""Generate embeddings for all seeded notes"""
+"""
+Bulk (re-)generate note embeddings.
+
+Streams notes whose embedding_version is below the target, encodes them in
+batches and writes them back in bulk. Progress is checkpointed in Redis, so
+re-running the command resumes an interrupted job.
+
+Same model (default): fills missing vectors and refreshes stale ones in place.
+
+Model migration:
+    1. generate_embeddings.py --model <new> --target-version <N>
+       (vectors go to notes.embedding_next; search keeps using notes.embedding)
+    2. generate_embeddings.py --model <new> --target-version <N> --finalize
+       then deploy EMBEDDING_MODEL=<new>, EMBEDDING_VERSION=<N>
+"""
+import argparse
 import sys
 import os
-import time
 from dotenv import load_dotenv
 
 # Load env before imports that might use env vars
@@ -10,57 +24,35 @@ load_dotenv()
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.db.session import SessionLocal
-from app.db import models
-from app.services.ai_service import AIService
-import asyncio
+from app.services.reembedding_service import ReembeddingService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-version", type=int, default=None, help="Defaults to EMBEDDING_VERSION")
+    parser.add_argument("--model", default=None, help="Defaults to EMBEDDING_MODEL")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--reset", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--finalize", action="store_true", help="Swap migrated vectors into place")
+    args = parser.parse_args()
+
+    service = ReembeddingService(
+        target_version=args.target_version, model_name=args.model, batch_size=args.batch_size
+    )
+    if args.reset:
+        service.reset_checkpoint()
+
+    if args.finalize:
+        swapped = service.finalize()
+        print(f"✅ Finalized: {swapped} notes now use {service.model_name} (v{service.target_version})")
+        return
 
-async def generate_embeddings():
-    db = SessionLocal()
-    ai_service = AIService()
-    
-    try:
-        # Get all notes, not just ones without embeddings, to ensure complete coverage for search tests
-        # But prioritize those without embeddings
-        notes = db.query(models.Note).filter(
-            models.Note.is_deleted == False
-        ).all()
-        
-        print(f"Found {len(notes)} notes total. Checking embeddings...")
-        
-        updated_count = 0
-        skipped_count = 0
-        
-        for i, note in enumerate(notes, 1):
-            try:
-                if note.embedding is not None:
-                    skipped_count += 1
-                    continue
+    report = service.run()
+    print(
+        f"\n✅ Embedding generation complete! {report['processed']} notes at "
+        f"v{service.target_version} ({report['notes_per_sec']} notes/s)"
+    )
 
-                # Create embedding from transcript or summary
-                content = note.title + "\n" + (note.summary or "") + "\n" + (note.transcript_deepgram or note.transcript_groq or note.transcript_android or "")
-                
-                if content.strip():
-                    # Add small delay to avoid rate limits
-                    await asyncio.sleep(0.5) 
-                    
-                    embedding = await ai_service.generate_embedding(content[:8000]) # Truncate if too long
-                    note.embedding = embedding
-                    db.commit()
-                    updated_count += 1
-                    print(f"[{i}/{len(notes)}] Generated embedding for: {note.title[:50]} ({updated_count} new)")
-                else:
-                    print(f"[{i}/{len(notes)}] Skipped (no content): {note.id}")
-            except Exception as e:
-                print(f"[{i}/{len(notes)}] Error for {note.id}: {e}")
-                db.rollback()
-                # Wait longer on error in case of rate limit
-                await asyncio.sleep(2)
-        
-        print(f"\n✅ Embedding generation complete! Updated {updated_count}, Skipped {skipped_count} existing.")
-        
-    finally:
-        db.close()
 
 if __name__ == "__main__":
-    asyncio.run(generate_embeddings())
+    main()
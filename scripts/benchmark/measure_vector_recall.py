@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Measure recall and latency of each vector search profile.
+
+Samples notes with embeddings, replays each note's vector as a user-scoped
+query under every profile (fast / balanced / accurate) and compares the
+results with exact brute-force neighbours. Use it to choose
+VECTOR_SEARCH_PROFILE, and re-run it as the notes table grows.
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Load env before imports that might use env vars
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import func
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.vector_search import measure_recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=100, help="Query notes to replay")
+    parser.add_argument("--k", type=int, default=5, choices=[1, 3, 5, 10])
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        samples = (
+            db.query(models.Note.user_id, models.Note.embedding)
+            .filter(models.Note.embedding.isnot(None), models.Note.is_deleted == False)
+            .order_by(func.random())
+            .limit(args.samples)
+            .all()
+        )
+        if not samples:
+            print("No embedded notes to sample")
+            return
+        results = measure_recall(db, [(s.user_id, s.embedding) for s in samples], k=args.k)
+        db.rollback()
+
+    print(f"{'profile':<10} {'recall@' + str(args.k):>10} {'avg ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<10} {result.recall_at_k[args.k]:>10.3f} {result.retrieval_latency_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Filtered-ANN benchmark: one global HNSW index vs per-tenant partial indexes.
+
+Builds a synthetic multi-tenant table (bench_tenant_notes, dropped at the
+end) with many small tenants and a few large ones. Each tenant's vectors are
+clustered around its own topics. For the large tenants, it replays
+user-scoped top-k queries and reports latency and recall@k against exact
+results in two layouts:
+  1. global     - only the shared HNSW index (idx_notes_embedding today)
+  2. per-tenant - plus a partial HNSW index per large tenant, as built by
+                  app/services/tenant_vector_index_service.py
+
+Requires PostgreSQL with pgvector (DATABASE_URL).
+
+    tenant_ann_benchmark.py --small-tenants 500 --small-notes 200 \\
+        --large-tenants 3 --large-notes 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load env before imports that might use env vars
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, Integer, MetaData, String, Table, literal, select, text
+
+from app.db.session import sync_engine
+from app.services.rag_evaluator import RAGEvaluator
+
+HNSW = "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+
+
+def tenant_vectors(rng, n, dim, topics=8):
+    centroids = rng.normal(size=(topics, dim))
+    points = centroids[rng.integers(topics, size=n)] + rng.normal(scale=0.6, size=(n, dim))
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def load(conn, table, user_id, vectors, chunk=2000):
+    for start in range(0, len(vectors), chunk):
+        conn.execute(
+            table.insert(),
+            [{"user_id": user_id, "embedding": v.tolist()} for v in vectors[start:start + chunk]],
+        )
+
+
+def measure(conn, table, queries, k, ef_search):
+    latencies, recalls = [], []
+    for user_id, vector in queries:
+        stmt = (
+            select(table.c.id)
+            .where(table.c.user_id == user_id)
+            .order_by(table.c.embedding.cosine_distance(vector.tolist()))
+            .limit(k)
+        )
+        conn.execute(text("SET enable_indexscan = off"))
+        exact = [row.id for row in conn.execute(stmt)]
+        conn.execute(text("RESET enable_indexscan"))
+        conn.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+        started = time.perf_counter()
+        found = [row.id for row in conn.execute(stmt)]
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(RAGEvaluator.recall_at_k(found, exact, k))
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": float(np.mean(recalls)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-tenants", type=int, default=500)
+    parser.add_argument("--small-notes", type=int, default=200)
+    parser.add_argument("--large-tenants", type=int, default=3)
+    parser.add_argument("--large-notes", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50, help="Per large tenant")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, default=40, help="pgvector default: 40")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    table = Table(
+        "bench_tenant_notes",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String, nullable=False),
+        Column("embedding", Vector(args.dim)),
+    )
+    large = [f"large_{i}" for i in range(args.large_tenants)]
+    queries = []
+
+    with sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+        try:
+            print("Loading synthetic tenants...")
+            for i in range(args.small_tenants):
+                load(conn, table, f"small_{i}", tenant_vectors(rng, args.small_notes, args.dim))
+            for user_id in large:
+                vectors = tenant_vectors(rng, args.large_notes + args.queries, args.dim)
+                load(conn, table, user_id, vectors[args.queries:])
+                queries += [(user_id, v) for v in vectors[:args.queries]]
+            total = args.small_tenants * args.small_notes + args.large_tenants * args.large_notes
+
+            print(f"Building global HNSW index over {total} vectors...")
+            conn.execute(text(f"CREATE INDEX bench_tenant_notes_embedding ON bench_tenant_notes {HNSW}"))
+            conn.execute(text("ANALYZE bench_tenant_notes"))
+            results = {"global": measure(conn, table, queries, args.k, args.ef_search)}
+
+            print("Building per-tenant partial indexes...")
+            for i, user_id in enumerate(large):
+                predicate = literal(user_id).compile(
+                    dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+                )
+                conn.execute(
+                    text(f"CREATE INDEX bench_tenant_notes_u{i} ON bench_tenant_notes {HNSW} WHERE user_id = {predicate}")
+                )
+            conn.execute(text("ANALYZE bench_tenant_notes"))
+            results["per-tenant"] = measure(conn, table, queries, args.k, args.ef_search)
+        finally:
+            table.drop(conn, checkfirst=True)
+
+    share = args.large_notes / total
+    print(f"\nLarge tenant = {share:.1%} of {total} vectors, k={args.k}, ef_search={args.ef_search}")
+    print(f"{'layout':<12} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(args.k):>10}")
+    for layout, r in results.items():
+        print(f"{layout:<12} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['recall']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Backfill the dashboard metric rollups.
+
+The beat job only rolls hours from its first run onwards; this fills the
+history before that (hour and day buckets), in week-sized transactions.
+Re-running is safe: only buckets that are missing are computed.
+
+    backfill_rollups.py --days 365
+    backfill_rollups.py --days 7 --rebuild   # recompute the last week
+"""
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# Load env before imports that might use env vars
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.services.rollup_service import DAY_MS, RollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90, help="How far back to roll up")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recompute existing buckets in the range (e.g. after imports)"
+    )
+    args = parser.parse_args()
+
+    since = int(time.time() * 1000) - args.days * DAY_MS
+    with SessionLocal() as db:
+        result = RollupService.backfill(db, since, rebuild=args.rebuild)
+        RollupService.refresh_gauges(db)
+
+    print(f"✅ Rolled up {result['hours']} hours and {result['days']} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,13 @@
 -- Enable required extensions
 CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Set search path
 SET search_path TO public;
 
 -- Verify extensions are loaded
-SELECT extname FROM pg_extension WHERE extname IN ('vector', 'uuid-ossp');
+SELECT extname FROM pg_extension WHERE extname IN ('vector', 'uuid-ossp', 'pg_trgm');
 
 -- ============================================================
 -- API KEYS TABLE - For failover key rotation (Requirement #4)
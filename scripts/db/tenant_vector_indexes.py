@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Build (or drop) per-tenant partial HNSW indexes on notes.embedding.
+
+Users with at least --min-notes embedded notes get their own index; the
+indexes of users who fell below half of it are dropped. Builds run with
+CREATE INDEX CONCURRENTLY, one tenant at a time, so the API keeps writing
+notes meanwhile. Re-running only does the remaining work; an interrupted or
+failed build is cleaned up and retried on the next run.
+
+    tenant_vector_indexes.py --dry-run     # show what would change
+    tenant_vector_indexes.py               # apply
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Load env before imports that might use env vars
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.services.tenant_vector_index_service import TenantVectorIndexService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-notes", type=int, default=None, help="Defaults to TENANT_INDEX_MIN_NOTES")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        result = TenantVectorIndexService(db, min_notes=args.min_notes).sync(dry_run=args.dry_run)
+
+    verb = "Would" if args.dry_run else "Did"
+    print(f"{verb} build {len(result['create'])} and drop {len(result['drop'])} tenant indexes")
+    for user_id in result["failed"]:
+        print(f"❌ Build failed for {user_id}; re-run to retry")
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -88,6 +88,19 @@ class TestBulkOperationsEndpoints:
         )
         assert response.status_code == 400
 
+    def test_bulk_delete_users_revokes_cached_auth(self, admin_token, test_user):
+        """A bulk soft-deleted user is rejected right away, not after the auth cache TTL"""
+        user_headers = {"Authorization": f"Bearer {create_access_token(data={'sub': test_user.id})}"}
+        assert client.get("/api/v1/users/me", headers=user_headers).status_code == 200
+
+        response = client.post(
+            f"/api/v1/admin/bulk/delete?item_type=users&ids={test_user.id}&reason=Test bulk delete",
+            headers=admin_token
+        )
+        assert response.status_code == 200
+
+        assert client.get("/api/v1/users/me", headers=user_headers).status_code == 401
+
     def test_bulk_restore(self, admin_token, db, test_note):
         """POST /api/v1/admin/bulk/restore"""
         # First soft delete
@@ -0,0 +1,115 @@
+"""
+Tests for the async-native AI client layer (AsyncGroq, awaited embeddings, async retries).
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.embedding_service import EMBEDDING_DIM, EmbeddingService
+from app.utils.ai_service_utils import RetryExhaustedError, retry_with_backoff
+
+SETTINGS = {"llm_model": "test-model", "temperature": 0.3, "max_tokens": 100}
+
+
+def _completion(payload):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = json.dumps(payload)
+    return response
+
+
+@pytest.fixture
+def async_groq():
+    client = MagicMock()
+
+    async def create(**kwargs):
+        await asyncio.sleep(0.2)
+        return _completion({"title": "Async", "summary": kwargs["messages"][1]["content"][-40:], "tasks": []})
+
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    with patch.object(AIService, "async_groq_client", new_callable=PropertyMock, return_value=client), \
+         patch.object(AIService, "_get_dynamic_settings", return_value=SETTINGS):
+        yield client
+
+
+async def test_async_retry_does_not_block_event_loop():
+    attempts = 0
+
+    @retry_with_backoff(max_attempts=3, initial_backoff=0.05)
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise ValueError("transient")
+        return "ok"
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while attempts < 3:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    result, _ = await asyncio.gather(flaky(), ticker())
+    assert result == "ok"
+    assert ticks > 3
+
+
+async def test_async_retry_exhausts():
+    @retry_with_backoff(max_attempts=2, initial_backoff=0.01)
+    async def always_fails():
+        raise ValueError("down")
+
+    with pytest.raises(RetryExhaustedError, match="All 2 attempts exhausted"):
+        await always_fails()
+
+
+async def test_concurrent_llm_calls_overlap(async_groq):
+    service = AIService()
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(service.llm_brain(f"Transcript number {i}") for i in range(5))
+    )
+    elapsed = time.perf_counter() - started
+
+    assert [r.title for r in results] == ["Async"] * 5
+    assert async_groq.chat.completions.create.await_count == 5
+    # Five 0.2s round trips in flight together, not back to back
+    assert elapsed < 0.6
+
+
+async def test_async_llm_call_uses_response_cache(async_groq):
+    service = AIService()
+    await service.semantic_analysis("Same transcript")
+    await service.semantic_analysis("Same transcript")
+    assert async_groq.chat.completions.create.await_count == 1
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        time.sleep(0.05)
+        return np.ones((len(texts), EMBEDDING_DIM))
+
+
+async def test_awaited_embeddings_are_batched_off_the_loop():
+    service = EmbeddingService(model_name="async-test", batch_size=8, batch_wait_ms=20)
+    service._model = FakeModel()
+
+    vectors = await asyncio.gather(*(service.embed_async(f"query {i}") for i in range(6)))
+
+    assert all(v.shape == (EMBEDDING_DIM,) for v in vectors)
+    assert len(service._model.calls) < 6
+    # Cache hits and blank text resolve without touching the model
+    assert (await service.embed_async("query 0")) is vectors[0]
+    assert not (await service.embed_async("  ")).any()
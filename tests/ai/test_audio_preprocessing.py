@@ -0,0 +1,160 @@
+"""
+Tests for the single-pass in-memory audio preprocessing engine.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.core.audio import (
+    DynamicRangeCompressor,
+    StreamingHighpass,
+    compress_dynamic_range,
+    dbfs,
+    decode_audio,
+    highpass,
+    iter_audio_blocks,
+    normalize,
+    preprocess_audio_pipeline,
+)
+
+SR = 16000
+
+
+def _speech_like(seconds: float = 3.0, sr: int = SR) -> np.ndarray:
+    """Amplitude-modulated tone over light noise, with silent padding."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    voice = 0.5 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 2 * t))
+    noise = 0.01 * rng.standard_normal(len(t))
+    pad = np.zeros(sr // 2)
+    return np.concatenate([pad, voice + noise, pad]).astype(np.float32)
+
+
+class TestBufferStages:
+    def test_normalize_peaks_at_headroom(self):
+        y = np.array([0.0, 0.25, -0.5], dtype=np.float32)
+        out = normalize(y, headroom=0.1)
+        assert np.isclose(np.max(np.abs(out)), 10 ** (-0.1 / 20), atol=1e-6)
+
+    def test_normalize_silence_is_noop(self):
+        y = np.zeros(100, dtype=np.float32)
+        assert np.array_equal(normalize(y), y)
+
+    def test_dbfs_matches_rms_definition(self):
+        y = np.full(1000, 0.5, dtype=np.float32)
+        assert np.isclose(dbfs(y), 20 * np.log10(0.5))
+        assert dbfs(np.zeros(10, dtype=np.float32)) == float("-inf")
+
+    def test_compression_attenuates_loud_section_only(self):
+        quiet = 0.01 * np.ones(SR, dtype=np.float32)
+        loud = 0.9 * np.ones(SR, dtype=np.float32)
+        y = np.concatenate([quiet, loud])
+
+        out = compress_dynamic_range(y, SR, threshold=-24.0, ratio=4.0)
+
+        assert out.dtype == np.float32
+        assert len(out) == len(y)
+        assert np.allclose(out[: SR // 2], quiet[: SR // 2])
+        assert np.max(np.abs(out[-SR // 2 :])) < 0.9
+
+
+class TestPreprocessPipeline:
+    @pytest.fixture(autouse=True)
+    def passthrough_denoiser(self, monkeypatch):
+        # noisereduce pulls in torch, which the suite mocks out globally
+        nr = MagicMock()
+        nr.reduce_noise.side_effect = lambda y, **kwargs: y
+        monkeypatch.setitem(sys.modules, "noisereduce", nr)
+        yield nr
+
+    def test_decode_wav_returns_float32_mono(self, tmp_path):
+        path = tmp_path / "stereo.wav"
+        stereo = np.stack([_speech_like(1.0, 44100)] * 2, axis=1)
+        sf.write(path, stereo, 44100)
+
+        y, sr = decode_audio(str(path))
+
+        assert sr == SR
+        assert y.dtype == np.float32
+        assert y.ndim == 1
+
+    def test_pipeline_writes_single_output(self, tmp_path):
+        path = tmp_path / "note.wav"
+        sf.write(path, _speech_like(), SR)
+
+        output = preprocess_audio_pipeline(str(path))
+
+        assert output == str(tmp_path / "note_refined.wav")
+        assert sorted(os.listdir(tmp_path)) == ["note.wav", "note_refined.wav"]
+
+        y, sr = sf.read(output)
+        assert sr == SR
+        assert len(y) > 0
+        assert np.max(np.abs(y)) <= 1.0
+
+    def test_pipeline_scores_buffer_without_reloading(self, tmp_path, monkeypatch):
+        path = tmp_path / "note.wav"
+        sf.write(path, _speech_like(), SR)
+
+        from app.utils.audio_quality_analyzer import AudioQualityAnalyzer
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("refined file should not be re-read for scoring")
+
+        monkeypatch.setattr(AudioQualityAnalyzer, "analyze_audio_quality", _fail)
+        preprocess_audio_pipeline(str(path))
+
+
+class TestStreamingPreprocess:
+    @pytest.fixture(autouse=True)
+    def passthrough_denoiser(self, monkeypatch):
+        nr = MagicMock()
+        nr.reduce_noise.side_effect = lambda y, **kwargs: y
+        monkeypatch.setitem(sys.modules, "noisereduce", nr)
+        yield nr
+
+    def test_streaming_highpass_matches_batch(self):
+        y = _speech_like(2.0)
+        hpf = StreamingHighpass(SR)
+        streamed = np.concatenate([hpf.process(b) for b in np.array_split(y, 7)])
+        assert np.allclose(streamed, highpass(y, SR), atol=1e-5)
+
+    def test_streaming_compressor_matches_batch(self):
+        y = _speech_like(2.0)
+        compressor = DynamicRangeCompressor(SR, threshold=-24.0)
+        parts = [compressor.process(b) for b in np.array_split(y, 5)]
+        parts.append(compressor.process(np.zeros(0, dtype=np.float32), final=True))
+        streamed = np.concatenate(parts)
+
+        assert len(streamed) == len(y)
+        assert np.allclose(streamed, compress_dynamic_range(y, SR, threshold=-24.0), atol=1e-5)
+
+    def test_streaming_pipeline_writes_single_output(self, tmp_path, passthrough_denoiser):
+        path = tmp_path / "long.wav"
+        sf.write(path, _speech_like(6.0, 22050), 22050)
+
+        output = preprocess_audio_pipeline(str(path), streaming=True)
+
+        assert sorted(os.listdir(tmp_path)) == ["long.wav", "long_refined.wav"]
+        y, sr = sf.read(output)
+        assert sr == SR
+        # Leading/trailing silence trimmed, speech kept
+        assert 5.5 * SR <= len(y) <= 6.5 * SR
+        assert np.isclose(np.max(np.abs(y)), 10 ** (-0.1 / 20), atol=1e-3)
+        # Noise profile is estimated once and reused for every block
+        noise_clips = {id(c.kwargs["y_noise"]) for c in passthrough_denoiser.reduce_noise.call_args_list}
+        assert len(noise_clips) == 1
+
+    def test_stream_blocks_are_bounded(self, tmp_path):
+        path = tmp_path / "long.wav"
+        sf.write(path, _speech_like(10.0), SR)
+
+        blocks = list(iter_audio_blocks(str(path), SR, block_seconds=2))
+
+        assert max(len(b) for b in blocks) <= 2 * SR
+        assert sum(len(b) for b in blocks) == 11 * SR
@@ -0,0 +1,195 @@
+"""
+Tests for silence-aware chunking and parallel chunked STT.
+"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.services.ai_service import AIService
+from app.services.audio_service import AudioService
+from app.utils.ai_service_utils import AIServiceError, LatencyTracker, SilentAudioError
+
+SR = 8000
+
+
+def _write_speech_with_pauses(path, segments=6, speech_sec=4.0, pause_sec=1.0):
+    """Tone bursts separated by silent pauses; returns pause centres in seconds."""
+    t = np.arange(int(speech_sec * SR)) / SR
+    speech = 0.5 * np.sin(2 * np.pi * 200 * t)
+    pause = np.zeros(int(pause_sec * SR))
+    parts, centres, cursor = [], [], 0.0
+    for _ in range(segments):
+        parts += [speech, pause]
+        cursor += speech_sec
+        centres.append(cursor + pause_sec / 2)
+        cursor += pause_sec
+    sf.write(path, np.concatenate(parts).astype(np.float32), SR)
+    return centres
+
+
+class TestSilenceChunking:
+    def test_split_points_land_in_silence(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+
+        points = AudioService.find_silence_split_points(
+            path, chunk_duration_sec=9.0, search_window_sec=3.0
+        )
+
+        assert points == sorted(points)
+        y, _ = sf.read(path)
+        for p in points:
+            assert abs(y[p]) < 1e-3
+
+    def test_short_audio_is_not_split(self, tmp_path):
+        path = str(tmp_path / "short.wav")
+        _write_speech_with_pauses(path, segments=1)
+
+        assert AudioService.find_silence_split_points(path, chunk_duration_sec=60) == []
+
+    def test_chunks_cover_whole_file_in_order(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+
+        chunks = AudioService.chunk_audio_on_silence(
+            path, str(tmp_path / "chunks"), chunk_duration_sec=9.0, search_window_sec=3.0
+        )
+
+        offsets = [offset for _, offset in chunks]
+        assert offsets[0] == 0.0
+        assert offsets == sorted(offsets)
+        total = sum(sf.info(p).frames for p, _ in chunks)
+        assert total == sf.info(path).frames
+
+    def test_failure_mid_way_returns_no_chunks(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+        out = tmp_path / "chunks"
+        real_write, calls = sf.write, []
+
+        def failing_write(*args, **kwargs):
+            calls.append(args[0])
+            if len(calls) == 3:
+                raise OSError("disk full")
+            return real_write(*args, **kwargs)
+
+        with patch("app.services.audio_service.sf.write", failing_write):
+            chunks = AudioService.chunk_audio_on_silence(
+                path, str(out), chunk_duration_sec=9.0, search_window_sec=3.0
+            )
+
+        assert chunks == []
+        assert list(out.iterdir()) == []
+
+    def test_merge_with_offsets_prefixes_timestamps(self):
+        merged = AudioService.merge_transcripts(
+            ["Speaker 0: hello", "", "Speaker 1: bye"], [0.0, 300.0, 3725.0]
+        )
+        assert merged == "[00:00:00] Speaker 0: hello\n\n[01:02:05] Speaker 1: bye"
+
+
+class TestChunkedTranscription:
+    def test_chunks_transcribed_concurrently_and_stitched_in_order(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def fake_stt(self, chunk_path, languages=None, stt_model="nova", diarize=True):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            # Later chunks finish first to prove ordering is restored
+            index = int(os.path.basename(chunk_path).split("_")[1].split(".")[0])
+            time.sleep(0.05 * (4 - index))
+            with lock:
+                active[0] -= 1
+            text = f"Speaker 0: part {index}"
+            return text, "deepgram", ["en"], {"deepgram": text}
+
+        with patch.object(AIService, "transcribe_with_failover_sync", fake_stt), \
+             patch.object(AIService, "_get_dynamic_settings", return_value={}):
+            transcript, engine, langs, all_t = AIService().transcribe_chunked_sync(
+                path, chunk_seconds=9.0, max_workers=4
+            )
+
+        assert peak[0] > 1
+        assert engine == "deepgram"
+        lines = transcript.split("\n\n")
+        assert [line.split("part ")[1] for line in lines] == [str(i) for i in range(len(lines))]
+        assert lines[0].startswith("[00:00:00] Speaker 0:")
+        assert all_t["deepgram"] == transcript
+
+    def test_silent_chunks_are_skipped(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+
+        def fake_stt(self, chunk_path, **kwargs):
+            if chunk_path.endswith("chunk_1.wav"):
+                raise SilentAudioError("STT silent: The audio contains no detectable speech.")
+            return "words", "groq", ["en"], {"groq": "words"}
+
+        with patch.object(AIService, "transcribe_with_failover_sync", fake_stt), \
+             patch.object(AIService, "_get_dynamic_settings", return_value={}):
+            transcript, engine, _, _ = AIService().transcribe_chunked_sync(path, chunk_seconds=9.0)
+
+        assert engine == "groq"
+        assert "words" in transcript
+
+    def test_chunk_with_empty_engine_output_is_skipped(self, tmp_path):
+        """Through the real failover: both engines answer "" for one chunk."""
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+        silent = {"chunk_1.wav"}
+
+        alt = SimpleNamespace(transcript="", words=[])
+        dg = MagicMock()
+        dg.listen.v1.media.transcribe_file.return_value = SimpleNamespace(
+            results=SimpleNamespace(channels=[SimpleNamespace(alternatives=[alt])])
+        )
+        groq = MagicMock()
+        groq.audio.transcriptions.create.side_effect = (
+            lambda file, **kwargs: "" if file[0] in silent else f"text of {file[0]}"
+        )
+        settings = {"deepgram_model": "nova-3", "groq_whisper_model": "whisper-large-v3-turbo"}
+        with patch.object(AIService, "_dg_client", dg), patch.object(AIService, "_groq_client", groq), \
+             patch("app.services.ai_service.get_stt_latency_tracker", return_value=LatencyTracker()), \
+             patch.object(AIService, "_get_dynamic_settings", return_value=settings):
+            transcript, engine, _, _ = AIService().transcribe_chunked_sync(path, chunk_seconds=9.0)
+
+        assert engine == "groq"
+        assert "text of chunk_0.wav" in transcript and "text of chunk_2.wav" in transcript
+        assert "chunk_1" not in transcript
+
+    def test_all_chunks_silent_raises(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+
+        def fake_stt(self, chunk_path, **kwargs):
+            raise SilentAudioError("STT silent")
+
+        with patch.object(AIService, "transcribe_with_failover_sync", fake_stt), \
+             patch.object(AIService, "_get_dynamic_settings", return_value={}):
+            with pytest.raises(AIServiceError, match="silent"):
+                AIService().transcribe_chunked_sync(path, chunk_seconds=9.0)
+
+    def test_failed_chunk_fails_the_note(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        _write_speech_with_pauses(path)
+
+        def fake_stt(self, chunk_path, **kwargs):
+            if chunk_path.endswith("chunk_1.wav"):
+                raise AIServiceError("All STT engines failed. Details: Unknown error (check logs)")
+            return "words", "groq", ["en"], {"groq": "words"}
+
+        with patch.object(AIService, "transcribe_with_failover_sync", fake_stt), \
+             patch.object(AIService, "_get_dynamic_settings", return_value={}):
+            with pytest.raises(AIServiceError, match="All STT engines failed"):
+                AIService().transcribe_chunked_sync(path, chunk_seconds=9.0)
@@ -0,0 +1,119 @@
+"""
+Tests for the shared, batched and cached local embedding engine.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.embedding_service import EMBEDDING_DIM, EmbeddingCache, EmbeddingService
+
+
+class FakeModel:
+    """Deterministic stand-in for SentenceTransformer.encode."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        with self._lock:
+            self.calls.append(list(texts))
+        time.sleep(self.delay)
+        return np.array(
+            [np.full(EMBEDDING_DIM, float(len(t)), dtype=np.float64) for t in texts]
+        )
+
+
+@pytest.fixture
+def service():
+    service = EmbeddingService(model_name="test-model", cache_bytes=1_000_000, batch_size=8, batch_wait_ms=20)
+    service._model = FakeModel()
+    return service
+
+
+class TestEmbeddingCache:
+    def test_evicts_least_recently_used_by_bytes(self):
+        vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+        entry_bytes = vector.nbytes + 1
+        cache = EmbeddingCache(max_bytes=2 * entry_bytes)
+
+        cache.put(b"a", vector)
+        cache.put(b"b", vector)
+        cache.get(b"a")
+        cache.put(b"c", vector)
+
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") is not None
+        assert cache.size_bytes <= cache.max_bytes
+
+    def test_oversized_entry_is_not_cached(self):
+        cache = EmbeddingCache(max_bytes=100)
+        cache.put(b"k", np.zeros(EMBEDDING_DIM, dtype=np.float32))
+        assert len(cache) == 0
+
+
+    def test_cached_rows_do_not_pin_the_batch_buffer(self):
+        batch = np.zeros((8, EMBEDDING_DIM), dtype=np.float32)
+        cache = EmbeddingCache(max_bytes=1_000_000)
+
+        stored = cache.put(b"k", batch[0])
+
+        assert stored.base is None
+        assert not stored.flags.writeable
+        assert cache.get(b"k") is stored
+
+
+class TestEmbeddingService:
+    def test_returns_readonly_float32(self, service):
+        vector = service.embed("hello")
+        assert vector.dtype == np.float32
+        assert vector.shape == (EMBEDDING_DIM,)
+        assert not vector.flags.writeable
+
+    def test_blank_text_is_zero_vector(self, service):
+        assert not service.embed("   ").any()
+        assert service._model.calls == []
+
+    def test_repeat_text_hits_cache(self, service):
+        first = service.embed("same transcript")
+        second = service.embed("same transcript")
+        assert first is second
+        assert len(service._model.calls) == 1
+
+    def test_concurrent_calls_are_coalesced(self, service):
+        service._model.delay = 0.01
+        texts = [f"text {i}" * (i + 1) for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            vectors = list(pool.map(service.embed, texts))
+
+        for text, vector in zip(texts, vectors):
+            assert vector[0] == len(text)
+        assert len(service._model.calls) < len(texts)
+        assert max(len(c) for c in service._model.calls) <= service.batch_size
+
+    def test_embed_many_batches_and_dedupes(self, service):
+        service.embed("cached")
+        texts = ["cached", "", "a", "bb", "a"] + [f"t{i}" for i in range(10)]
+
+        out = service.embed_many(texts)
+
+        assert out.shape == (len(texts), EMBEDDING_DIM)
+        assert out.dtype == np.float32
+        assert not out[1].any()
+        assert out[2][0] == 1 and out[4][0] == 1
+        encoded = [t for call in service._model.calls[1:] for t in call]
+        assert sorted(encoded) == sorted({"a", "bb"} | {f"t{i}" for i in range(10)})
+        assert all(len(call) <= service.batch_size for call in service._model.calls)
+
+    def test_model_unavailable_returns_zeros(self, monkeypatch):
+        service = EmbeddingService(model_name="missing", batch_wait_ms=0)
+        monkeypatch.setattr(service, "get_model", lambda: None)
+
+        assert not service.embed("text").any()
+        assert len(service.cache) == 0
@@ -0,0 +1,88 @@
+"""
+Tests for the single-statement hybrid (vector + keyword) note search.
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.db import models
+from app.services.search_service import SearchService
+
+
+@pytest.fixture
+def users(db_session):
+    me = models.User(id=f"hs_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@hs.test", name="Me")
+    other = models.User(id=f"hs_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@hs.test", name="Other")
+    db_session.add_all([me, other])
+    team = models.Team(id=str(uuid.uuid4()), name="Search Team", owner_id=other.id)
+    team.members.append(me)
+    db_session.add(team)
+    db_session.add_all(
+        [
+            models.Note(id="mine_old", user_id=me.id, title="Budget review", summary="q1", timestamp=1),
+            models.Note(id="mine_new", user_id=me.id, title="Notes", summary="budget for q2", timestamp=3),
+            models.Note(id="team", user_id=other.id, team_id=team.id, title="Team budget", summary="s", timestamp=2),
+            models.Note(id="private", user_id=other.id, title="Other budget", summary="s", timestamp=4),
+            models.Note(id="deleted", user_id=me.id, title="Budget", summary="s", timestamp=5, is_deleted=True),
+        ]
+    )
+    db_session.commit()
+    return me, other
+
+
+def _service(embeddings):
+    ai_service = MagicMock()
+    ai_service.generate_embeddings = AsyncMock(return_value=embeddings)
+    service = SearchService(ai_service)
+    service._generate_query_variations = AsyncMock(return_value=["budget", "spending plan"])
+    return service
+
+
+@pytest.mark.asyncio
+async def test_search_is_one_statement_over_visible_notes(db_session, users):
+    user_id = users[0].id
+    service = _service(np.ones((2, 384), dtype=np.float32))
+    statements = []
+    engine = db_session.get_bind()
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        results = await service.search_notes(db_session, user_id, "budget", limit=5)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert [r["id"] for r in results] == ["mine_new", "team", "mine_old"]
+    assert len(statements) == 1
+    assert "UNION ALL" in statements[0]
+    service.ai_service.generate_embeddings.assert_awaited_once_with(["budget", "spending plan"])
+
+
+@pytest.mark.asyncio
+async def test_embedding_failure_falls_back_to_keyword_ranking(db_session, users):
+    me, _ = users
+    service = _service(None)
+    service.ai_service.generate_embeddings.side_effect = RuntimeError("model down")
+
+    results = await service.search_notes(db_session, me.id, "budget", limit=2, offset=1)
+
+    assert [r["id"] for r in results] == ["team", "mine_old"]
+    assert results[0]["similarity_score"] == round(10 / (60 + 2), 3)
+
+
+@pytest.mark.asyncio
+async def test_no_vectors_and_no_words_returns_nothing(db_session, users):
+    me, _ = users
+    service = _service(None)
+    service.ai_service.generate_embeddings.side_effect = RuntimeError("model down")
+    service._generate_query_variations = AsyncMock(return_value=["?"])
+
+    with patch("app.services.search_service.uses_postgres", return_value=True):
+        assert await service.search_notes(db_session, me.id, "?") == []
+
@@ -0,0 +1,138 @@
+"""
+Tests for the two-level LLM response cache.
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.llm_cache import LLMResponseCache, get_llm_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.counters = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+        self.ttls[key] = ex
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+    set = incr = get
+
+
+def _completion(payload):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = json.dumps(payload)
+    return response
+
+
+@pytest.fixture
+def groq():
+    client = MagicMock()
+    client.chat.completions.create.return_value = _completion(
+        {"title": "Cached", "summary": "S", "priority": "LOW", "tasks": []}
+    )
+    AIService._groq_client = client
+    yield client
+    AIService._groq_client = None
+
+
+class TestLLMResponseCache:
+    def test_key_ignores_whitespace_but_not_content(self):
+        a = LLMResponseCache.make_key("m", 0.3, "You are  a\nhelper", "hello world")
+        b = LLMResponseCache.make_key("m", 0.3, "You are a helper", " hello   world ")
+        assert a == b
+        assert a != LLMResponseCache.make_key("m", 0.5, "You are a helper", "hello world")
+        assert a != LLMResponseCache.make_key("other", 0.3, "You are a helper", "hello world")
+
+    def test_redis_hit_populates_memory_layer(self):
+        redis = FakeRedis()
+        LLMResponseCache(ttl_sec=60, redis_client=redis).set("k", "value")
+        assert redis.ttls["k"] == 60
+
+        cache = LLMResponseCache(ttl_sec=60, redis_client=redis)
+        assert cache.get("k") == "value"
+        redis.data.clear()
+        assert cache.get("k") == "value"
+        assert cache.counters["llm"] == {"memory_hits": 1, "redis_hits": 1, "misses": 0}
+        assert redis.counters["metrics:llm_cache:hits"] == 2
+
+    def test_memory_layer_is_bounded_lru(self):
+        cache = LLMResponseCache(ttl_sec=60, max_entries=2, redis_client=FakeRedis())
+        cache._redis.set = lambda *a, **k: None
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+    def test_redis_failure_degrades_to_memory(self):
+        cache = LLMResponseCache(ttl_sec=60, redis_client=BrokenRedis())
+        cache.set("k", "value")
+        assert cache.get("k") == "value"
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+
+
+class TestCachedLLMCalls:
+    def test_identical_extraction_is_served_from_cache(self, groq):
+        service = AIService()
+        first = service.llm_brain_sync("Call the bank tomorrow", "DEVELOPER", note_created_at=1_700_000_000_000)
+        second = service.llm_brain_sync("Call the bank tomorrow", "DEVELOPER", note_created_at=1_700_000_000_000)
+
+        assert first.title == second.title == "Cached"
+        assert groq.chat.completions.create.call_count == 1
+        assert get_llm_cache().stats()["by_caller"]["llm_brain"]["memory_hits"] == 1
+
+    def test_bypass_flag_forces_fresh_completion(self, groq):
+        service = AIService()
+        service.semantic_analysis_sync("Feeling great about the launch")
+        service.semantic_analysis_sync("Feeling great about the launch", bypass_cache=True)
+        assert groq.chat.completions.create.call_count == 2
+
+        service.semantic_analysis_sync("Feeling great about the launch")
+        assert groq.chat.completions.create.call_count == 2
+
+    def test_invalid_json_is_not_cached(self, groq):
+        bad = MagicMock()
+        bad.choices = [MagicMock()]
+        bad.choices[0].message.content = "not json"
+        groq.chat.completions.create.return_value = bad
+        service = AIService()
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                service.semantic_analysis_sync("Same transcript")
+        assert groq.chat.completions.create.call_count == 2
+
+    def test_repeated_question_makes_one_llm_call(self, groq, monkeypatch):
+        answer = MagicMock()
+        answer.choices = [MagicMock()]
+        answer.choices[0].message.content = "You have two meetings tomorrow."
+        groq.chat.completions.create.return_value = answer
+        service = AIService()
+        monkeypatch.setattr(service, "_answer_context", lambda *args: "Meeting notes")
+
+        first = service.answer_question(None, "u1", "What is on  tomorrow?")
+        second = service.answer_question(None, "u1", "What is on tomorrow?")
+
+        assert first == second == "You have two meetings tomorrow."
+        assert groq.chat.completions.create.call_count == 1
+        assert get_llm_cache().stats()["by_caller"]["answer_question"]["memory_hits"] == 1
@@ -11,6 +11,7 @@ import pytest
 
 from app.utils.ai_service_utils import (
     AIServiceError,
+    InvalidInputError,
     RateLimiter,
     RequestTracker,
     RetryExhaustedError,
@@ -213,6 +214,24 @@ class TestRetryDecorator:
         with pytest.raises(TypeError):
             selective_retry()
 
+    @pytest.mark.asyncio
+    async def test_invalid_input_is_not_retried(self):
+        """✅ Validation errors fail fast instead of backing off."""
+        call_count = 0
+
+        @retry_with_backoff(max_attempts=3, initial_backoff=1.0)
+        async def analyze(transcript):
+            nonlocal call_count
+            call_count += 1
+            return validate_transcript(transcript)
+
+        start = time.time()
+        with pytest.raises(InvalidInputError, match="cannot be empty"):
+            await analyze("   ")
+
+        assert call_count == 1
+        assert time.time() - start < 0.5
+
 
 class TestRateLimiter:
     """Test rate limiting functionality."""
@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import patch, MagicMock, PropertyMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch, MagicMock, PropertyMock
 from app.services.rag_service import RAGService
 from app.db import models
 from app.services.ai_service import AIService
@@ -28,8 +29,9 @@ async def test_rag_find_similar_notes(db_session):
     db_session.add_all([note1, note2])
     db_session.commit()
     
-    # 2. Test find_similar_notes
-    with patch("sqlalchemy.orm.query.Query.all", return_value=[note1]):
+    # 2. Test find_similar_notes (rows carry the ANN distance)
+    rows = [SimpleNamespace(Note=note1, distance=0.01), SimpleNamespace(Note=note2, distance=0.6)]
+    with patch("sqlalchemy.orm.query.Query.all", return_value=rows):
         results = RAGService.find_similar_notes(db_session, "user_rag", [0.11, 0.21, 0.31])
         assert len(results) == 1
         assert results[0].title == "Project Apollo"
@@ -59,7 +61,7 @@ async def test_semantic_search_endpoint(client, db_session):
     app.dependency_overrides[get_current_user] = lambda: user
     
     try:
-        with patch("app.services.ai_service.AIService.generate_embedding_sync", return_value=[0.1]*384), \
+        with patch("app.services.ai_service.AIService.generate_embedding", new_callable=AsyncMock, return_value=[0.1]*384), \
              patch("app.services.rag_service.RAGService.find_similar_notes", return_value=[]):
             
             response = client.post(
@@ -88,11 +90,11 @@ async def test_ai_ask_endpoint(client, db_session):
         mock_response.choices[0].message.content = "This is a RAG-based answer."
         
         with patch("app.services.rag_service.RAGService.get_context_for_transcript", return_value="Some context"), \
-             patch("app.services.ai_service.AIService.groq_client", new_callable=PropertyMock) as mock_groq_p:
+             patch("app.services.ai_service.AIService.async_groq_client", new_callable=PropertyMock) as mock_groq_p:
             
             mock_client = MagicMock()
             mock_groq_p.return_value = mock_client
-            mock_client.chat.completions.create.return_value = mock_response
+            mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
             
             response = client.post(
                 "/api/v1/ai/ask",
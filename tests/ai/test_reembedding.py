@@ -0,0 +1,144 @@
+"""
+Tests for the resumable bulk re-embedding job.
+"""
+
+import pytest
+
+from app.db import models
+from app.services.embedding_service import EmbeddingService
+from app.services.reembedding_service import ReembeddingService
+from app.utils.ai_service_utils import AIServiceError
+
+
+class FakeStore:
+    """Minimal Redis stand-in for checkpoints."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeEngine:
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.fail_after = fail_after
+
+    def embed_many(self, texts):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise RuntimeError("worker killed")
+        self.batches.append(list(texts))
+        # MockVector is a String column under SQLite
+        return [f"vec:{t.splitlines()[0]}" for t in texts]
+
+
+@pytest.fixture
+def notes(db_session):
+    user = models.User(id="user_reembed", email="reembed@example.com", name="Re-embed User")
+    db_session.add(user)
+    for i in range(25):
+        db_session.add(
+            models.Note(
+                id=f"note_{i:03d}",
+                user_id=user.id,
+                title=f"Note {i}",
+                summary="summary",
+                embedding="old",
+                embedding_version=1,
+            )
+        )
+    db_session.add(
+        models.Note(id="note_current", user_id=user.id, title="Current", embedding="old", embedding_version=2)
+    )
+    db_session.commit()
+    return db_session
+
+
+def _service(store, engine, **kwargs):
+    service = ReembeddingService(
+        target_version=2, batch_size=4, window_size=10, checkpoint_store=store, **kwargs
+    )
+    service.engine = engine
+    return service
+
+
+class TestReembedding:
+    def test_reembeds_only_stale_notes_in_batches(self, notes):
+        engine = FakeEngine()
+        report = _service(FakeStore(), engine).run()
+
+        assert report["complete"] is True
+        assert report["processed"] == 25
+        assert report["remaining"] == 0
+        assert max(len(b) for b in engine.batches) <= 4
+
+        notes.expire_all()
+        rows = notes.query(models.Note).all()
+        assert all(n.embedding_version == 2 for n in rows)
+        assert notes.get(models.Note, "note_current").embedding == "old"
+        assert notes.get(models.Note, "note_007").embedding == "vec:Note 7"
+
+    def test_interrupted_run_resumes_from_checkpoint(self, notes):
+        store = FakeStore()
+        with pytest.raises(RuntimeError):
+            _service(store, FakeEngine(fail_after=4)).run()
+
+        # The first window (10 notes) was committed and checkpointed
+        assert '"last_id": "note_009"' in next(iter(store.data.values()))
+
+        engine = FakeEngine()
+        report = _service(store, engine).run()
+
+        assert report["complete"] is True
+        embedded = [t for batch in engine.batches for t in batch]
+        assert len(embedded) == 15
+        assert "Note 3\nsummary" not in embedded
+
+    def test_model_failure_keeps_old_vectors_and_version(self, notes, monkeypatch):
+        engine = EmbeddingService(model_name="missing")
+        monkeypatch.setattr(engine, "get_model", lambda: None)
+        store = FakeStore()
+
+        with pytest.raises(AIServiceError):
+            _service(store, engine).run()
+
+        notes.expire_all()
+        note = notes.get(models.Note, "note_001")
+        assert note.embedding == "old"
+        assert note.embedding_version == 1
+        assert store.data == {}
+
+    def test_time_budget_stops_between_windows(self, notes):
+        report = _service(FakeStore(), FakeEngine()).run(max_seconds=0)
+
+        assert report["complete"] is False
+        assert report["processed_this_run"] == 10
+        assert report["remaining"] == 15
+        assert report["eta_sec"] is not None
+
+    def test_new_model_writes_shadow_column_until_finalized(self, notes):
+        service = _service(FakeStore(), FakeEngine(), model_name="next-model")
+        service.run()
+
+        notes.expire_all()
+        note = notes.get(models.Note, "note_001")
+        assert note.embedding == "old"
+        assert note.embedding_next == "vec:Note 1"
+
+        assert service.finalize(batch_size=7) == 25
+        notes.expire_all()
+        note = notes.get(models.Note, "note_001")
+        assert note.embedding == "vec:Note 1"
+        assert note.embedding_next is None
+
+    def test_finalize_refuses_while_notes_pending(self, notes):
+        service = _service(FakeStore(), FakeEngine(), model_name="next-model")
+        with pytest.raises(RuntimeError, match="still below version"):
+            service.finalize()
@@ -0,0 +1,145 @@
+"""
+Tests for concurrent and hedged STT execution in transcribe_with_failover_sync.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.utils.ai_service_utils import AIServiceError, LatencyTracker
+
+SETTINGS = {"deepgram_model": "nova-3", "groq_whisper_model": "whisper-large-v3-turbo"}
+
+
+def _dg_client(text, delay=0.0, error=None):
+    def transcribe_file(payload, options):
+        time.sleep(delay)
+        if error:
+            raise error
+        alt = SimpleNamespace(transcript=text, words=[])
+        return SimpleNamespace(results=SimpleNamespace(channels=[SimpleNamespace(alternatives=[alt])]))
+
+    client = MagicMock()
+    client.listen.v1.media.transcribe_file.side_effect = transcribe_file
+    return client
+
+
+def _groq_client(text, delay=0.0):
+    def create(file, **kwargs):
+        time.sleep(delay)
+        return text
+
+    client = MagicMock()
+    client.audio.transcriptions.create.side_effect = create
+    return client
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "note.wav"
+    path.write_bytes(b"\0" * 100_000)
+    return str(path)
+
+
+@pytest.fixture
+def tracker():
+    tracker = LatencyTracker()
+    with patch("app.services.ai_service.get_stt_latency_tracker", return_value=tracker), \
+         patch.object(AIService, "_get_dynamic_settings", return_value=SETTINGS):
+        yield tracker
+
+
+def _transcribe(audio_file, dg, groq, stt_model):
+    with patch.object(AIService, "_dg_client", dg), patch.object(AIService, "_groq_client", groq):
+        return AIService().transcribe_with_failover_sync(audio_file, stt_model=stt_model, diarize=False)
+
+
+class TestLatencyTracker:
+    def test_no_hedge_until_enough_samples(self):
+        tracker = LatencyTracker()
+        for _ in range(5):
+            tracker.record("deepgram", 1.0, 1_000_000)
+        assert tracker.hedge_delay("deepgram", 1_000_000, min_samples=10) is None
+
+    def test_hedge_delay_scales_with_payload(self):
+        tracker = LatencyTracker()
+        for latency in range(1, 101):
+            tracker.record("deepgram", float(latency), 1_000_000)
+
+        delay = tracker.hedge_delay("deepgram", 1_000_000, percentile=95)
+        assert 94 <= delay <= 96
+        assert tracker.hedge_delay("deepgram", 2_000_000, percentile=95) == pytest.approx(2 * delay)
+
+
+class TestConcurrentSTT:
+    def test_both_engines_run_concurrently(self, audio_file, tracker):
+        dg, groq = _dg_client("dg text", delay=0.3), _groq_client("groq text", delay=0.3)
+
+        started = time.time()
+        transcript, engine, _, results = _transcribe(audio_file, dg, groq, "both")
+
+        assert time.time() - started < 0.55
+        assert engine == "both"
+        assert transcript == "dg text"
+        assert results == {"deepgram": "dg text", "groq": "groq text"}
+
+    def test_file_read_once_and_shared(self, audio_file, tracker):
+        dg, groq = _dg_client("dg text"), _groq_client("groq text")
+
+        _transcribe(audio_file, dg, groq, "both")
+
+        dg_payload = dg.listen.v1.media.transcribe_file.call_args.args[0]["buffer"]
+        groq_payload = groq.audio.transcriptions.create.call_args.kwargs["file"][1]
+        assert dg_payload is groq_payload
+
+    def test_fallback_on_primary_failure(self, audio_file, tracker):
+        dg, groq = _dg_client(None, error=RuntimeError("down")), _groq_client("groq text")
+
+        transcript, engine, _, results = _transcribe(audio_file, dg, groq, "nova")
+
+        assert (transcript, engine) == ("groq text", "groq")
+        assert results == {"groq": "groq text"}
+
+    def test_all_engines_failing_raises(self, audio_file, tracker):
+        dg, groq = _dg_client(None, error=RuntimeError("down")), _groq_client(None)
+
+        with pytest.raises(AIServiceError, match="All STT engines failed"):
+            _transcribe(audio_file, dg, groq, "whisper")
+
+
+class TestHedgedSTT:
+    def test_slow_primary_is_hedged(self, audio_file, tracker):
+        # Deepgram normally answers in ~10ms for this payload
+        for _ in range(20):
+            tracker.record("deepgram", 0.01, 100_000)
+        dg, groq = _dg_client("dg text", delay=1.0), _groq_client("groq text")
+
+        started = time.time()
+        transcript, engine, _, _ = _transcribe(audio_file, dg, groq, "nova")
+
+        assert time.time() - started < 0.5
+        assert (transcript, engine) == ("groq text", "groq")
+
+    def test_fast_primary_is_not_hedged(self, audio_file, tracker):
+        for _ in range(20):
+            tracker.record("groq", 1.0, 100_000)
+        dg, groq = _dg_client("dg text"), _groq_client("groq text")
+
+        transcript, engine, _, _ = _transcribe(audio_file, dg, groq, "whisper")
+
+        assert (transcript, engine) == ("groq text", "groq")
+        dg.listen.v1.media.transcribe_file.assert_not_called()
+
+    def test_hedge_disabled(self, audio_file, tracker):
+        for _ in range(20):
+            tracker.record("deepgram", 0.01, 100_000)
+        dg, groq = _dg_client("dg text", delay=0.2), _groq_client("groq text")
+
+        with patch("app.services.ai_service.ai_config.STT_HEDGE_ENABLED", False):
+            transcript, engine, _, _ = _transcribe(audio_file, dg, groq, "nova")
+
+        assert (transcript, engine) == ("dg text", "deepgram")
+        groq.audio.transcriptions.create.assert_not_called()
@@ -178,6 +178,9 @@ def setup_test_env():
 
     Base.metadata.create_all(bind=engine)
     yield
+    # Write buffered usage events while the test DB still exists
+    from app.services.usage_recorder import get_usage_recorder
+    get_usage_recorder().close()
     # Cleanup
     if os.path.exists("./test.db"):
         os.remove("./test.db")
@@ -283,6 +286,16 @@ def mock_ai_services():
     from app.services.ai_service import AIService
     AIService._groq_client = None
     AIService._dg_client = None
+
+    # Tests swap the mocked completion per case; don't serve a previous test's answer
+    from app.services.llm_cache import get_llm_cache
+    get_llm_cache().clear()
+
+    # Users are recreated with the same ids across tests
+    from app.services.auth_cache import get_auth_cache
+    get_auth_cache().clear()
+    from app.services.stats_cache import get_stats_cache
+    get_stats_cache().clear()
     
     yield
 
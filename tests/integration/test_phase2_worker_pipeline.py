@@ -63,6 +63,9 @@ async def test_worker_pipeline_persists_entities_and_actions(db_session):
         # 4. Verify Database state
         db_session.refresh(note)
         assert note.title == "Processed Title"
+        assert note.processing_time_ms is not None
+        timings = note.semantic_analysis["pipeline_timings_ms"]
+        assert {"preprocess", "transcribe", "analysis", "embedding", "dedupe_tasks", "conflicts"} <= set(timings)
         
         tasks = db_session.query(models.Task).filter(models.Task.note_id == "note_123").all()
         assert len(tasks) == 1
@@ -79,3 +82,51 @@ async def test_worker_pipeline_persists_entities_and_actions(db_session):
         assert len(task.assigned_entities) == 1
         assert task.assigned_entities[0]["name"] == "John"
         assert task.assigned_entities[0]["phone"] == "1234567890"
+
+
+def test_worker_pipeline_batches_task_persistence(db_session):
+    """Tasks are deduped in bulk and saved with billing in a single transaction."""
+    user = models.User(id="user_batch", email="batch@example.com", name="Batch User", password_hash="...")
+    note = models.Note(id="note_batch", user_id="user_batch", title="Original")
+    existing = models.Task(id="task_existing", user_id="user_batch", note_id="note_batch", title="Call John")
+    db_session.add_all([user, note, existing])
+    db_session.commit()
+
+    mock_ai_output = NoteAIOutput(
+        title="Batched",
+        summary="Batched Summary",
+        priority="MEDIUM",
+        transcript="...",
+        tasks=[
+            {"title": "Call John", "description": "Already exists", "priority": "HIGH"},
+            {"title": "Email Ann", "description": "Send the deck", "priority": "LOW"},
+            {"title": "Email Ann", "description": "Duplicate in the same batch", "priority": "LOW"},
+        ],
+        tags=[],
+    )
+
+    with patch("app.services.ai_service.AIService.llm_brain_sync", return_value=mock_ai_output), \
+         patch("app.services.ai_service.AIService.generate_embedding_sync", return_value="[0.1, 0.2]"), \
+         patch("app.services.ai_service.AIService.detect_conflicts_sync", return_value=[]), \
+         patch("app.worker.task.broadcast_user_update"), \
+         patch("app.worker.task.broadcast_team_update"), \
+         patch("app.worker.task.preprocess_audio_pipeline", return_value="uploads/batch_refined.wav"), \
+         patch("app.worker.task.probe_duration", return_value=120.0), \
+         patch("app.services.ai_service.AIService.transcribe_with_failover_sync", return_value=("Transcript", "nova", ["en"], {"deepgram": "Transcript"})), \
+         patch("os.path.exists", return_value=True), \
+         patch("os.path.getsize", return_value=1024), \
+         patch("os.remove", return_value=None):
+        note_process_pipeline("note_batch", local_file_path="uploads/batch.wav", user_role="GENERIC")
+
+    db_session.expire_all()
+    titles = sorted(t.title for t in db_session.query(models.Task).filter(models.Task.note_id == "note_batch"))
+    assert titles == ["Call John", "Email Ann"]
+
+    note = db_session.get(models.Note, "note_batch")
+    assert note.title == "Batched"
+    assert note.status == models.NoteStatus.DONE
+
+    user = db_session.get(models.User, "user_batch")
+    assert user.usage_stats["total_notes"] == 1
+    assert user.usage_stats["total_audio_minutes"] == 2.0
+    assert db_session.query(models.Transaction).filter(models.Transaction.reference_id == "note_batch").count() == 1
@@ -4,8 +4,8 @@ Billing concurrency tests.
 Verifies that wallet deductions are atomic and overdraft prevention works
 under concurrent load.
 
-IMPORTANT: These tests require PostgreSQL because SQLite silently ignores
-SELECT … FOR UPDATE, making the lock tests meaningless. They are automatically
+IMPORTANT: These tests require PostgreSQL because SQLite serializes every
+writer, making the concurrency tests meaningless. They are automatically
 skipped when PostgreSQL is not reachable.
 
 Run with: pytest tests/performance/ -v -m load
@@ -185,3 +185,59 @@ class TestBillingConcurrency:
         assert success_count == 5, f"Expected 5 successful charges, got {success_count}"
         assert final_wallet.balance == 0, "Balance should be exhausted exactly to 0"
         check_session.close()
+
+    @pytest.mark.load
+    def test_reservation_throughput_without_negative_balance(self, custom_db):
+        """
+        100 concurrent reserve -> commit debits of 10 credits against a
+        wallet holding 500. Exactly 50 succeed, the balance and reserved
+        counter end at 0, and no snapshot ever sees a negative balance.
+        """
+        import time
+        import uuid
+
+        db_session = custom_db()
+        try:
+            user_id = f"reserve_user_{uuid.uuid4().hex[:8]}"
+            db_session.add(models.User(id=user_id, email=f"{user_id}@test.com", name="Reserve User"))
+            db_session.add(models.Wallet(user_id=user_id, balance=500))
+            db_session.commit()
+        finally:
+            db_session.close()
+
+        def reserve_and_commit():
+            session = custom_db()
+            try:
+                billing = BillingService(session)
+                reservation = billing.reserve_credits(user_id, 10, user_id=user_id)
+                if reservation is None:
+                    return False
+                return billing.commit_reservation(reservation.id, description="Concurrent Reservation")
+            finally:
+                session.close()
+
+        workers = 100
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(reserve_and_commit) for _ in range(workers)]
+            results = [f.result() for f in concurrent.futures.as_completed(futures)]
+        elapsed = time.perf_counter() - started
+
+        check_session = custom_db()
+        try:
+            final_wallet = check_session.query(models.Wallet).filter_by(user_id=user_id).first()
+            balances = [
+                tx.balance_after
+                for tx in check_session.query(models.Transaction).filter_by(wallet_id=user_id)
+            ]
+            print(f"\n⚡ Reservation Throughput:")
+            print(f"   Debits: {workers} in {elapsed:.2f}s ({workers / elapsed:.0f}/s)")
+            print(f"   Successes: {sum(results)} (Expected 50)")
+            print(f"   Final Balance: {final_wallet.balance}, Reserved: {final_wallet.reserved}")
+
+            assert sum(results) == 50
+            assert final_wallet.balance == 0
+            assert final_wallet.reserved == 0
+            assert min(balances) >= 0, "A debit took the wallet below zero"
+        finally:
+            check_session.close()
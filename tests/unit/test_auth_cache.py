@@ -0,0 +1,170 @@
+"""
+Tests for the authenticated user cache and the once-per-request token decode.
+"""
+
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from app.db import models
+from app.services.auth_cache import AuthUserCache
+from app.services.auth_service import create_access_token, decode_principal, resolve_principal
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.published = []
+
+    def hget(self, key, field):
+        value = self.hashes.get(key, {}).get(field)
+        return value.encode("utf-8") if value is not None else None
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class BrokenRedis:
+    def hget(self, *args):
+        raise ConnectionError("redis down")
+
+    hset = expire = delete = publish = hget
+
+
+def _user(user_id="u1", **fields):
+    return models.User(
+        id=user_id,
+        email=f"{user_id}@example.com",
+        tier=models.SubscriptionTier.PREMIUM,
+        primary_role=models.UserRole.DEVELOPER,
+        is_admin=False,
+        **fields,
+    )
+
+
+def _local_cache(**kwargs):
+    cache = AuthUserCache(use_redis=False, **kwargs)
+    cache.clear()
+    return cache
+
+
+def test_roundtrip_restores_enums():
+    cache = _local_cache()
+    cache.set("u1", 100, _user(authorized_devices=[{"device_id": "d1"}]))
+
+    snapshot = cache.get("u1", 100)
+
+    assert snapshot["tier"] is models.SubscriptionTier.PREMIUM
+    assert snapshot["primary_role"] is models.UserRole.DEVELOPER
+    assert snapshot["authorized_devices"] == [{"device_id": "d1"}]
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_entries_are_keyed_by_token_issue_time():
+    cache = _local_cache()
+    cache.set("u1", 100, _user())
+
+    assert cache.get("u1", 100) is not None
+    assert cache.get("u1", 200) is None
+
+
+def test_expired_entries_are_misses():
+    cache = _local_cache(ttl_sec=1)
+    cache.set("u1", 100, _user())
+    cache._entries[("u1", 100)] = (time.time() - 1, cache._entries[("u1", 100)][1])
+
+    assert cache.get("u1", 100) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = _local_cache(max_entries=2)
+    cache.set("u1", 1, _user("u1"))
+    cache.set("u2", 1, _user("u2"))
+    cache.get("u1", 1)
+    cache.set("u3", 1, _user("u3"))
+
+    assert cache.get("u2", 1) is None
+    assert cache.get("u1", 1) is not None
+
+
+def test_invalidate_drops_every_token_for_the_user():
+    cache = _local_cache()
+    cache.set("u1", 100, _user())
+    cache.set("u1", 200, _user())
+    cache.set("u2", 100, _user("u2"))
+
+    cache.invalidate_local(["u1"])
+
+    assert cache.get("u1", 100) is None
+    assert cache.get("u1", 200) is None
+    assert cache.get("u2", 100) is not None
+
+
+def test_redis_layer_is_shared_and_invalidation_is_published():
+    redis_client = FakeRedis()
+    writer = AuthUserCache(redis_client=redis_client, use_redis=True)
+    reader = AuthUserCache(redis_client=redis_client, use_redis=True)
+    writer._listener_pid = reader._listener_pid = -1
+    writer._ensure_listener = reader._ensure_listener = lambda: None
+
+    writer.set("u1", 100, _user())
+    assert reader.get("u1", 100)["id"] == "u1"
+    assert reader.stats()["redis_hits"] == 1
+
+    writer.invalidate(["u1"])
+    assert redis_client.hashes == {}
+    assert redis_client.published == [(AuthUserCache.INVALIDATION_CHANNEL, "u1")]
+
+
+def test_redis_errors_fall_back_to_memory():
+    cache = AuthUserCache(redis_client=BrokenRedis(), use_redis=True)
+    cache._ensure_listener = lambda: None
+
+    cache.set("u1", 100, _user())
+
+    assert cache.get("u1", 100)["id"] == "u1"
+    assert cache._redis_down_until > time.time()
+
+
+def test_decode_principal_reads_sub_and_iat():
+    token = create_access_token({"sub": "u1"})
+
+    principal = decode_principal(token)
+
+    assert principal.error is None
+    assert principal.user_id == "u1"
+    assert principal.issued_at is not None
+
+
+def test_decode_principal_reports_expiry():
+    token = create_access_token({"sub": "u1"}, expires_delta=timedelta(seconds=-1))
+
+    assert decode_principal(token).error == "expired"
+    assert decode_principal("not-a-token").error == "invalid"
+    assert decode_principal(None).error == "missing"
+
+
+def test_resolve_principal_decodes_once_per_request():
+    token = create_access_token({"sub": "u1"})
+    request = SimpleNamespace(
+        state=SimpleNamespace(),
+        headers={"Authorization": f"Bearer {token}"},
+        cookies={},
+    )
+
+    first = resolve_principal(request)
+    request.headers = {}
+
+    assert resolve_principal(request) is first
+    assert first.user_id == "u1"
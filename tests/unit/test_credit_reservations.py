@@ -0,0 +1,114 @@
+"""
+Tests for the wallet credit reservation ledger.
+"""
+
+import time
+import uuid
+
+import pytest
+
+from app.db import models
+from app.services.auth_service import create_access_token
+from app.services.billing_service import BillingService
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(
+        id=f"resv_{uuid.uuid4().hex[:8]}",
+        email=f"{uuid.uuid4().hex[:8]}@resv.test",
+        name="Resv",
+        tier=models.SubscriptionTier.FREE,
+    )
+    db_session.add(user)
+    db_session.add(models.Wallet(user_id=user.id, balance=30))
+    db_session.commit()
+    return user
+
+
+def _wallet(db_session, wallet_id):
+    db_session.expire_all()
+    return db_session.get(models.Wallet, wallet_id)
+
+
+def test_reservations_hold_spendable_credits(db_session, user):
+    billing = BillingService(db_session)
+
+    first = billing.reserve_credits(user.id, 20, user_id=user.id)
+    assert first is not None
+    assert billing.reserve_credits(user.id, 20, user_id=user.id) is None
+    assert not billing.check_balance(user.id, 11)
+
+    wallet = _wallet(db_session, user.id)
+    assert (wallet.balance, wallet.reserved) == (30, 20)
+
+
+def test_release_is_idempotent(db_session, user):
+    billing = BillingService(db_session)
+    reservation = billing.reserve_credits(user.id, 20, user_id=user.id)
+
+    assert billing.release_reservation(reservation.id)
+    assert not billing.release_reservation(reservation.id)
+
+    wallet = _wallet(db_session, user.id)
+    assert (wallet.balance, wallet.reserved) == (30, 0)
+
+
+def test_commit_charges_and_clears_the_hold(db_session, user):
+    billing = BillingService(db_session)
+    reservation = billing.reserve_credits(user.id, 20, user_id=user.id, ref_id="note-1")
+
+    assert billing.commit_reservation(reservation.id, cost=15, description="test:commit")
+    assert not billing.commit_reservation(reservation.id)
+
+    wallet = _wallet(db_session, user.id)
+    assert (wallet.balance, wallet.reserved) == (15, 0)
+    tx = db_session.query(models.Transaction).filter_by(wallet_id=user.id).one()
+    assert (tx.amount, tx.balance_after, tx.reference_id) == (-15, 15, "note-1")
+
+
+def test_frozen_wallet_cannot_reserve(db_session, user):
+    _wallet(db_session, user.id).is_frozen = True
+    db_session.commit()
+
+    assert BillingService(db_session).reserve_credits(user.id, 1) is None
+
+
+def test_reconciler_expires_stale_holds_and_repairs_drift(db_session, user):
+    billing = BillingService(db_session)
+    stale = billing.reserve_credits(user.id, 10, user_id=user.id)
+    live = billing.reserve_credits(user.id, 5, user_id=user.id)
+    db_session.get(models.CreditReservation, stale.id).expires_at = int(time.time() * 1000) - 1
+    db_session.commit()
+
+    assert billing.reconcile_reservations() == {"expired": 1, "repaired": 0}
+    assert _wallet(db_session, user.id).reserved == 5
+    assert db_session.get(models.CreditReservation, live.id).status == "HELD"
+
+    _wallet(db_session, user.id).reserved = 12  # e.g. a crashed release
+    db_session.commit()
+    assert billing.reconcile_reservations() == {"expired": 0, "repaired": 1}
+    assert _wallet(db_session, user.id).reserved == 5
+
+
+def test_charge_usage_debits_without_a_row_lock(db_session, user):
+    billing = BillingService(db_session)
+
+    assert billing.charge_usage(user.id, cost=30, description="test:all")
+    assert not billing.charge_usage(user.id, cost=1, description="test:none")
+    assert _wallet(db_session, user.id).balance == 0
+
+
+def test_endpoint_hold_is_released_after_the_request(client, db_session, user):
+    token = create_access_token({"sub": user.id})
+
+    response = client.post(
+        "/api/v1/notes/create",
+        json={"title": "Reserved", "summary": "s", "transcript": "t"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code in (200, 201), response.text
+    holds = db_session.query(models.CreditReservation).filter_by(wallet_id=user.id).all()
+    assert [h.status for h in holds] == ["RELEASED"]
+    assert _wallet(db_session, user.id).reserved == 0
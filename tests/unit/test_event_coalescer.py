@@ -0,0 +1,93 @@
+"""
+Tests for coalesced real-time event publishing and the event wire format.
+"""
+
+import json
+import threading
+import time
+
+from app.utils import event_codec
+from app.worker.events import EventCoalescer
+
+
+def _event(event_type, note_id="n1", **data):
+    return {"type": event_type, "data": {"note_id": note_id, **data}, "timestamp": 0}
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+        self.published = threading.Event()
+
+    def __call__(self, channel, message):
+        self.messages.append((channel, message))
+        self.published.set()
+
+
+def test_burst_collapses_to_latest_event():
+    sent = Recorder()
+    coalescer = EventCoalescer(sent, window_ms=50)
+
+    for step in ["PREPROCESSING", "TRANSCRIBING", "ANALYZING"]:
+        coalescer.add("user:u1", _event("PIPELINE_STEP", step=step))
+    assert sent.messages == []
+
+    assert sent.published.wait(1)
+    time.sleep(0.05)
+    assert len(sent.messages) == 1
+    channel, message = sent.messages[0]
+    assert channel == "user:u1"
+    assert message["data"]["step"] == "ANALYZING"
+
+
+def test_distinct_events_share_one_batch_in_order():
+    sent = Recorder()
+    coalescer = EventCoalescer(sent, window_ms=1000)
+
+    coalescer.add("team:t1", _event("NOTE_STATUS", status="PROCESSING"))
+    coalescer.add("team:t1", _event("TASK_CREATED", task_id="a"))
+    coalescer.add("team:t1", _event("TASK_CREATED", task_id="b"))
+    coalescer.add("team:t2", _event("NOTE_STATUS", note_id="other", status="PROCESSING"))
+    coalescer.flush("team:t1")
+
+    assert len(sent.messages) == 1
+    channel, message = sent.messages[0]
+    assert message["type"] == "EVENT_BATCH"
+    assert [(e["type"], e["data"].get("task_id")) for e in message["events"]] == [
+        ("NOTE_STATUS", None),
+        ("TASK_CREATED", "a"),
+        ("TASK_CREATED", "b"),
+    ]
+
+
+def test_terminal_and_uncoalesced_events_flush_immediately():
+    sent = Recorder()
+    coalescer = EventCoalescer(sent, window_ms=10_000)
+
+    coalescer.add("user:u1", _event("PIPELINE_STEP", step="SAVING_NOTE"))
+    coalescer.add("user:u1", _event("NOTE_STATUS", status="DONE"))
+    assert len(sent.messages) == 1
+    assert [e["type"] for e in sent.messages[0][1]["events"]] == ["PIPELINE_STEP", "NOTE_STATUS"]
+
+    coalescer.add("user:u1", {"type": "AI_RESPONSE", "data": {"answer": "42"}})
+    assert sent.messages[-1][1]["type"] == "AI_RESPONSE"
+
+
+def test_zero_window_disables_coalescing():
+    sent = Recorder()
+    coalescer = EventCoalescer(sent, window_ms=0)
+    coalescer.add("user:u1", _event("PIPELINE_STEP", step="A"))
+    coalescer.add("user:u1", _event("PIPELINE_STEP", step="B"))
+    assert [m["data"]["step"] for _, m in sent.messages] == ["A", "B"]
+
+
+def test_codec_accepts_json_and_msgpack(monkeypatch):
+    payload = {"type": "NOTE_STATUS", "data": {"note_id": "n1", "status": "DONE"}}
+
+    assert json.loads(event_codec.decode_event(event_codec.encode_event(payload))) == payload
+
+    monkeypatch.setattr(event_codec.ai_config, "EVENT_ENCODING", "msgpack")
+    packed = event_codec.encode_event(payload)
+    assert isinstance(packed, bytes)
+    assert json.loads(event_codec.decode_event(packed)) == payload
+    assert json.loads(event_codec.decode_event(json.dumps(payload).encode())) == payload
@@ -0,0 +1,76 @@
+"""
+Tests for compiled, cached organization geofences.
+"""
+
+import math
+import random
+import uuid
+
+import pytest
+
+from app.db import models
+from app.services.geofence_service import GeofenceCache, OrgGeofence
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin(math.radians(lat2 - lat1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371000 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def test_grid_lookup_matches_brute_force():
+    rng = random.Random(7)
+    locations = [
+        (51.5 + rng.uniform(-0.2, 0.2), -0.1 + rng.uniform(-0.3, 0.3), rng.choice([100, 250, 2000]))
+        for _ in range(200)
+    ]
+    geofence = OrgGeofence("wallet", locations)
+
+    for _ in range(2000):
+        lat, lon = 51.5 + rng.uniform(-0.25, 0.25), -0.1 + rng.uniform(-0.35, 0.35)
+        expected = any(_haversine(lat, lon, la, lo) <= r for la, lo, r in locations)
+        assert geofence.contains(lat, lon) is expected
+
+
+def test_high_latitude_and_empty_geofences():
+    assert OrgGeofence("w", [(78.22, 15.65, 500)]).contains(78.223, 15.66)
+    assert not OrgGeofence("w", [(78.22, 15.65, 500)]).contains(78.3, 15.65)
+    assert not OrgGeofence("w", []).contains(0.0, 0.0)
+
+
+@pytest.fixture
+def org(db_session):
+    org = models.Organization(id=str(uuid.uuid4()), name="Geo Corp", corporate_wallet_id="corp_wallet")
+    db_session.add(org)
+    db_session.add(
+        models.WorkLocation(id=str(uuid.uuid4()), org_id=org.id, name="HQ", latitude=51.5048, longitude=-0.0786, radius=100)
+    )
+    db_session.commit()
+    return org
+
+
+def test_cache_serves_repeat_lookups_and_drops_changed_orgs(db_session, org):
+    cache = GeofenceCache(use_redis=False)
+    from app.services import geofence_service
+
+    geofence_service._geofence_cache, previous = cache, geofence_service._geofence_cache
+    try:
+        first = cache.get(db_session, org.id)
+        assert cache.get(db_session, org.id) is first
+        assert first.corporate_wallet_id == "corp_wallet"
+        assert not first.contains(40.7128, -74.0060)
+
+        db_session.add(
+            models.WorkLocation(id=str(uuid.uuid4()), org_id=org.id, name="NYC", latitude=40.7128, longitude=-74.0060, radius=100)
+        )
+        db_session.commit()
+
+        refreshed = cache.get(db_session, org.id)
+        assert refreshed is not first
+        assert refreshed.contains(40.7128, -74.0060)
+        assert cache.counters["invalidations"] == 1
+    finally:
+        geofence_service._geofence_cache = previous
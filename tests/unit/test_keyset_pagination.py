@@ -0,0 +1,81 @@
+"""
+Tests for cursor (keyset) pagination of note and task listings.
+"""
+
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import models
+from app.services.auth_service import create_access_token
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(id=f"page_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@page.test", name="Pager")
+    db_session.add(user)
+    db_session.add(models.Wallet(user_id=user.id, balance=10))
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+
+def _walk(client, url, headers, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        ids += [item["id"] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_roundtrip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(1700000000000, "n1"), 2) == [1700000000000, "n1"]
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor("not-a-cursor", 2)
+    assert excinfo.value.status_code == 400
+
+
+def test_notes_cursor_walks_every_note_once(client, db_session, user, headers):
+    # Shared timestamps: the id tiebreaker must keep pages disjoint
+    for i in range(23):
+        db_session.add(
+            models.Note(id=f"note_{i:02d}", user_id=user.id, title=f"N{i}", summary="s", timestamp=1_000 + i // 3)
+        )
+    db_session.add(models.Note(id="note_deleted", user_id=user.id, title="Gone", summary="s", timestamp=5_000, is_deleted=True))
+    db_session.commit()
+
+    ids, pages = _walk(client, "/api/v1/notes", headers, limit=5)
+
+    expected = sorted((f"note_{i:02d}" for i in range(23)), key=lambda n: (1_000 + int(n[5:]) // 3, n), reverse=True)
+    assert ids == expected
+    assert pages == 5
+
+    offset_page = client.get("/api/v1/notes", params={"skip": 5, "limit": 5}, headers=headers).json()
+    assert [n["id"] for n in offset_page] == expected[5:10]
+
+
+def test_tasks_cursor_orders_by_deadline_with_undated_last(client, db_session, user, headers):
+    for i in range(7):
+        db_session.add(models.Task(id=f"task_{i}", user_id=user.id, description="t", deadline=2_000 + i % 2))
+    for i in range(4):
+        db_session.add(models.Task(id=f"undated_{i}", user_id=user.id, description="t"))
+    db_session.commit()
+
+    ids, _ = _walk(client, "/api/v1/tasks", headers, limit=3)
+
+    assert ids == [
+        "task_0", "task_2", "task_4", "task_6",
+        "task_1", "task_3", "task_5",
+        "undated_0", "undated_1", "undated_2", "undated_3",
+    ]
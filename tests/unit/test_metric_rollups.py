@@ -0,0 +1,98 @@
+"""
+Tests for incremental dashboard rollups, the live tail merge and backfill.
+"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.db import models
+from app.services.admin_analytics_service import AdminAnalyticsService
+from app.services.metrics_service import MetricsService
+from app.services.rollup_service import DAY_MS, HOUR_MS, RollupService
+
+D = 1_600_041_600_000  # 2020-09-14 00:00 UTC
+MIN_MS = 60 * 1000
+
+
+@pytest.fixture
+def activity(db_session):
+    user = models.User(id=f"ru_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@ru.test", name="RU")
+    db_session.add(user)
+    db_session.add(models.Wallet(user_id=user.id, balance=70))
+    for i, ts in enumerate((D + HOUR_MS, D + 5 * HOUR_MS + 30 * MIN_MS, D + DAY_MS + 2 * HOUR_MS)):
+        db_session.add(models.Note(id=f"{user.id}_n{i}", user_id=user.id, title="n", summary="s", timestamp=ts))
+    db_session.add(models.Task(id=f"{user.id}_t", user_id=user.id, description="t", created_at=D + 3 * HOUR_MS))
+    for ts, seconds in ((D + 2 * HOUR_MS, 120), (D + DAY_MS + 4 * HOUR_MS, 60), (D + 2 * DAY_MS + 2 * HOUR_MS + 30 * MIN_MS, 30)):
+        db_session.add(models.UsageLog(user_id=user.id, endpoint="/transcribe", duration_seconds=seconds, timestamp=ts))
+    for amount, kind in ((50, "DEPOSIT"), (-5, "USAGE")):
+        db_session.add(
+            models.Transaction(
+                wallet_id=user.id, amount=amount, balance_after=0, type=kind, created_at=D + DAY_MS + HOUR_MS
+            )
+        )
+    db_session.commit()
+    return user
+
+
+def test_backfill_then_run_advances_the_watermarks(db_session, activity):
+    result = RollupService.backfill(db_session, D + HOUR_MS, now=D + 2 * DAY_MS + 3 * HOUR_MS)
+
+    # The last hour closes METRIC_ROLLUP_LAG_SEC after it ends
+    assert result == {"hours": 50, "days": 2}
+    assert RollupService.coverage(db_session) == {
+        "hour": (D, D + 2 * DAY_MS + 2 * HOUR_MS),
+        "day": (D, D + 2 * DAY_MS),
+    }
+    day = db_session.get(models.MetricRollup, ("day", D + DAY_MS))
+    assert (day.notes_created, day.api_calls, day.audio_seconds, day.deposits) == (1, 1, 60, 50)
+
+    assert RollupService.run(db_session, now=D + 2 * DAY_MS + 5 * HOUR_MS) == {"hours": 2, "days": 0}
+    assert RollupService.backfill(db_session, D, now=D + 2 * DAY_MS + 5 * HOUR_MS) == {"hours": 0, "days": 0}
+
+
+def test_aggregate_merges_rollups_with_live_tail(db_session, activity):
+    RollupService.backfill(db_session, D, now=D + 2 * DAY_MS + 2 * HOUR_MS)
+    start, end = D + 90 * MIN_MS, D + 2 * DAY_MS + 3 * HOUR_MS
+
+    merged = RollupService.aggregate(db_session, start, end, bucket_ms=DAY_MS)
+
+    assert dict(merged) == dict(RollupService._live(db_session, start, end, DAY_MS))
+    # The note at D + 1h is before `start`; the usage at D + 2d 2h30m is only in the live tail
+    assert RollupService.aggregate(db_session, start, end)[None] == {
+        "notes_created": 2,
+        "tasks_created": 1,
+        "api_calls": 3,
+        "audio_seconds": 210,
+        "deposits": 50,
+    }
+
+
+def test_usage_analytics_groups_rolled_days(db_session, activity):
+    RollupService.backfill(db_session, D, now=D + 3 * DAY_MS)
+
+    with patch.object(RollupService, "_live", wraps=RollupService._live) as live:
+        data = AdminAnalyticsService.get_usage_analytics(db_session, D, D + 2 * DAY_MS - 1, "week")
+
+    live.assert_not_called()
+    assert data["total_api_calls"] == 2
+    assert data["total_audio_minutes"] == 3.0
+    assert data["usage_by_period"] == {"2020-W38": {"audio_minutes": 3.0, "api_calls": 2}}
+
+
+def test_dashboard_reads_gauges(db_session, activity):
+    db_session.add(models.Note(id=f"{activity.id}_now", user_id=activity.id, title="n", summary="s"))
+    db_session.commit()
+
+    overview = MetricsService.get_dashboard_overview(db_session)
+
+    assert overview["content"]["total_notes"] == 4
+    assert overview["activity"]["notes_today"] == 1
+    assert overview["revenue"]["total_balance"] == 70
+    # Gauges are snapshots until the next job run
+    db_session.add(models.Task(id=f"{activity.id}_t2", user_id=activity.id, description="t"))
+    db_session.commit()
+    overview = MetricsService.get_dashboard_overview(db_session)
+    assert overview["content"]["total_tasks"] == 1
+    assert overview["activity"]["tasks_today"] == 1
@@ -0,0 +1,117 @@
+"""
+Tests for aggregate task statistics, the productivity pulse heatmap and the
+per-user stats cache.
+"""
+
+import time
+import uuid
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.db import models
+from app.services.analytics_service import WEEKDAYS, AnalyticsService
+from app.services.stats_cache import get_stats_cache
+from app.services.task_service import TaskService
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@pytest.fixture
+def user(db_session):
+    # No DST, so the SQLite fallback's fixed offset is exact
+    user = models.User(
+        id=f"ps_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@ps.test", name="PS", timezone="Asia/Karachi"
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def _task(db, user, suffix, **fields):
+    db.add(models.Task(id=f"{user.id}_{suffix}", user_id=user.id, description=suffix, **fields))
+
+
+def test_task_statistics_counts_in_one_query(db_session, user):
+    now = int(time.time() * 1000)
+    _task(db_session, user, "done", is_done=True, priority=models.Priority.HIGH)
+    _task(db_session, user, "late", priority=models.Priority.HIGH, deadline=now - DAY_MS)
+    _task(db_session, user, "late_done", is_done=True, priority=models.Priority.LOW, deadline=now - DAY_MS)
+    _task(db_session, user, "open", priority=models.Priority.LOW)
+    _task(db_session, user, "deleted", is_deleted=True, priority=models.Priority.HIGH)
+    db_session.commit()
+
+    stats = TaskService(db_session).get_task_statistics(user.id, force_refresh=True)
+
+    assert stats["total_tasks"] == 4
+    assert (stats["completed_tasks"], stats["pending_tasks"]) == (2, 2)
+    assert stats["by_priority"] == {"high": 2, "medium": 0, "low": 2}
+    assert stats["by_status"]["overdue"] == 1
+    assert stats["completion_rate"] == 50.0
+
+
+def test_stats_are_cached_until_a_task_changes(db_session, user):
+    service = TaskService(db_session)
+    assert service.get_task_statistics(user.id)["total_tasks"] == 0
+
+    # Outside the ORM: served from the cache until the TTL expires
+    db_session.execute(
+        models.Task.__table__.insert().values(id=f"{user.id}_core", user_id=user.id, description="c", is_deleted=False)
+    )
+    db_session.commit()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 0
+
+    # Through the ORM: kept until the transaction commits
+    _task(db_session, user, "orm")
+    db_session.flush()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 0
+    db_session.commit()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 2
+    assert get_stats_cache().counters["invalidations"] >= 1
+
+
+def test_bulk_update_drops_cached_stats_on_commit(db_session, user):
+    service = TaskService(db_session)
+    _task(db_session, user, "a")
+    _task(db_session, user, "b")
+    db_session.commit()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 2
+
+    db_session.query(models.Task).filter(models.Task.id == f"{user.id}_a").update(
+        {"is_deleted": True}, synchronize_session=False
+    )
+    db_session.rollback()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 2
+
+    db_session.query(models.Task).filter(models.Task.id == f"{user.id}_a").update(
+        {"is_deleted": True}, synchronize_session=False
+    )
+    db_session.commit()
+    assert service.get_task_statistics(user.id)["total_tasks"] == 1
+
+
+def test_pulse_heatmap_counts_notes_per_local_weekday(db_session, user):
+    zone = ZoneInfo("Asia/Karachi")
+    now = int(time.time() * 1000)
+    stamps = [now - 2 * DAY_MS, now - 9 * DAY_MS, now - 3 * DAY_MS]
+    for i, ts in enumerate(stamps):
+        db_session.add(models.Note(id=f"{user.id}_n{i}", user_id=user.id, title="n", summary="s", timestamp=ts))
+    # Outside the 12-week window
+    db_session.add(models.Note(id=f"{user.id}_old", user_id=user.id, title="n", summary="s", timestamp=now - 100 * DAY_MS))
+    db_session.add(
+        models.Note(
+            id=f"{user.id}_done", user_id=user.id, title="n", summary="s", timestamp=now, status=models.NoteStatus.DONE
+        )
+    )
+    db_session.commit()
+
+    pulse = AnalyticsService.get_productivity_pulse(db_session, user.id, force_refresh=True)
+
+    heatmap = {entry["day"]: entry["intensity"] for entry in pulse["stats"]["decision_heatmap"]}
+    expected = dict.fromkeys(WEEKDAYS, 0.0)
+    expected[WEEKDAYS[datetime.fromtimestamp(now / 1000, zone).weekday()]] += 0.5
+    for ts in stamps:
+        expected[WEEKDAYS[datetime.fromtimestamp(ts / 1000, zone).weekday()]] += 0.5
+    assert heatmap == expected
+    assert (pulse["stats"]["total_notes"], pulse["stats"]["processed_notes"]) == (5, 1)
@@ -0,0 +1,135 @@
+"""
+Tests for the multiplexed Redis pub/sub hub behind the SSE endpoint.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.broadcaster import Broadcaster, PubSubHub
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels = set()
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self):
+        self.connections = []
+
+    def pubsub(self):
+        self.connections.append(FakePubSub())
+        return self.connections[-1]
+
+    async def publish(self, channel, data):
+        pubsub = self.connections[-1]
+        if channel in pubsub.channels:
+            await pubsub.inbox.put({"type": "message", "channel": channel, "data": data})
+
+
+async def test_clients_share_one_connection_with_refcounted_channels():
+    redis = FakeRedis()
+    hub = PubSubHub(redis, queue_size=10, max_drops=5)
+
+    a = await hub.register(["team:1", "user:a"])
+    b = await hub.register(["team:1", "user:b"])
+    assert len(redis.connections) == 1
+    pubsub = redis.connections[0]
+    assert pubsub.channels == {"team:1", "user:a", "user:b"}
+
+    await hub.unregister(a)
+    assert pubsub.channels == {"team:1", "user:b"}
+
+    await hub.unregister(b)
+    assert pubsub.closed
+    assert hub.stats()["channels"] == 0
+
+
+async def test_messages_are_demultiplexed_per_channel():
+    redis = FakeRedis()
+    hub = PubSubHub(redis, queue_size=10, max_drops=5)
+    a = await hub.register(["team:1", "user:a"])
+    b = await hub.register(["team:1"])
+
+    await redis.publish("team:1", "team-event")
+    await redis.publish("user:a", "private-event")
+
+    got_a = [(await asyncio.wait_for(a.queue.get(), 1))[0] for _ in range(2)]
+    got_b = (await asyncio.wait_for(b.queue.get(), 1))[0]
+    assert got_a == ["team-event", "private-event"]
+    assert got_b == "team-event"
+    assert b.queue.empty()
+
+    await hub.unregister(a)
+    await hub.unregister(b)
+
+
+async def test_slow_consumer_drops_oldest_then_is_evicted():
+    hub = PubSubHub(FakeRedis(), queue_size=2, max_drops=3)
+    slow = await hub.register(["team:1"])
+
+    for i in range(4):
+        hub.dispatch("team:1", f"e{i}")
+    assert slow.dropped == 2
+    assert [slow.queue.get_nowait()[0] for _ in range(2)] == ["e2", "e3"]
+
+    for i in range(4, 8):
+        hub.dispatch("team:1", f"e{i}")
+    assert slow.closed
+    assert slow.queue.get_nowait() is None
+    assert hub.stats()["evicted"] == 1
+
+    await hub.unregister(slow)
+
+
+async def test_subscribe_stream_yields_events_and_records_lag():
+    broadcaster = Broadcaster.__new__(Broadcaster)
+    redis = FakeRedis()
+    broadcaster.redis = redis
+    broadcaster.hub = PubSubHub(redis, queue_size=10, max_drops=5)
+
+    stream = broadcaster.subscribe(["t1"], user_id="u1")
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.05)
+    await redis.publish("user:u1", json.dumps({"type": "TASK_CREATED"}))
+
+    assert json.loads(await asyncio.wait_for(first, 1))["type"] == "TASK_CREATED"
+    stats = broadcaster.hub.stats()
+    assert stats["clients"] == 1
+    assert stats["delivered"] == 1
+
+    await stream.aclose()
+    assert broadcaster.hub.stats()["clients"] == 0
+
+
+async def test_msgpack_events_reach_clients_as_json():
+    import msgpack
+
+    redis = FakeRedis()
+    hub = PubSubHub(redis, queue_size=10, max_drops=5)
+    client = await hub.register(["user:a"])
+
+    await redis.publish("user:a", msgpack.packb({"type": "NOTE_STATUS", "data": {"status": "DONE"}}))
+
+    data, _ = await asyncio.wait_for(client.queue.get(), 1)
+    assert json.loads(data) == {"type": "NOTE_STATUS", "data": {"status": "DONE"}}
+    await hub.unregister(client)
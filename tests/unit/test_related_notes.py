@@ -0,0 +1,74 @@
+"""
+Tests for precomputed related notes on the note detail view.
+"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.db import models
+from app.services.auth_service import create_access_token
+from app.services.related_notes_service import RelatedNotesService
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(id=f"rel_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@rel.test", name="Rel")
+    db_session.add(user)
+    db_session.add(models.Wallet(user_id=user.id, balance=10))
+    db_session.commit()
+    return user
+
+
+def _note(db_session, user, note_id, related=None, **fields):
+    note = models.Note(
+        id=note_id, user_id=user.id, title=note_id, summary="s", related_note_ids=related, **fields
+    )
+    db_session.add(note)
+    return note
+
+
+def test_new_note_is_merged_into_neighbour_lists(db_session, user):
+    near = _note(db_session, user, "near", related=[["a", 0.1], ["b", 0.4]])
+    cold = _note(db_session, user, "cold")
+    new = _note(db_session, user, "new")
+    db_session.commit()
+
+    with patch("app.services.related_notes_service.ai_config.RELATED_NOTES_CANDIDATES", 2):
+        RelatedNotesService.store(db_session, new, [["near", 0.2], ["cold", 0.3]])
+    db_session.commit()
+
+    assert new.related_note_ids == [["near", 0.2], ["cold", 0.3]]
+    assert near.related_note_ids == [["a", 0.1], ["new", 0.2]]
+    # Never-computed lists stay lazy
+    assert cold.related_note_ids is None
+
+
+def test_note_view_reads_cached_neighbours_without_ann(client, db_session, user):
+    for note_id in ("r1", "r2", "r3", "r4"):
+        _note(db_session, user, note_id)
+    _note(db_session, user, "gone", is_deleted=True)
+    _note(db_session, user, "main", related=[["gone", 0.05], ["r2", 0.1], ["r4", 0.2], ["r1", 0.3], ["r3", 0.4]])
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+    with patch("app.services.note_service.refresh_related_notes_task") as refresh:
+        response = client.get("/api/v1/notes/main", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert [n["id"] for n in response.json()["related_notes"]] == ["r2", "r4", "r1"]
+    refresh.delay.assert_not_called()
+
+
+def test_short_list_after_deletions_queues_a_refresh(db_session, user):
+    _note(db_session, user, "r1")
+    _note(db_session, user, "gone", is_deleted=True)
+    main = _note(db_session, user, "main", related=[["gone", 0.1], ["r1", 0.2]])
+    db_session.commit()
+
+    with patch("app.services.related_notes_service.ai_config.RELATED_NOTES_CANDIDATES", 2):
+        related, fresh = RelatedNotesService.cached(db_session, main, user.id, [])
+
+    assert [n.id for n in related] == ["r1"]
+    assert fresh is False
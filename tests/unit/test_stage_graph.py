@@ -0,0 +1,69 @@
+"""
+Tests for the worker stage DAG executor.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.worker.pipeline import StageGraph
+
+
+def test_passes_dependency_results_by_name():
+    graph = StageGraph()
+    graph.add("a", lambda: 2)
+    graph.add("b", lambda: 3)
+    graph.add("c", lambda a, b: a * b, deps=["a", "b"])
+
+    assert graph.run()["c"] == 6
+
+
+def test_independent_stages_overlap():
+    both_running = threading.Barrier(2, timeout=2)
+
+    def stage():
+        # Deadlocks (and times out) unless both stages run at once
+        both_running.wait()
+        return True
+
+    graph = StageGraph()
+    graph.add("left", stage)
+    graph.add("right", stage)
+    graph.add("join", lambda left, right: left and right, deps=["left", "right"])
+
+    assert graph.run()["join"] is True
+
+
+def test_records_timings_for_every_stage():
+    graph = StageGraph()
+    graph.add("slow", lambda: time.sleep(0.05))
+    graph.add("after", lambda slow: None, deps=["slow"])
+    graph.run()
+    with graph.timed("inline"):
+        pass
+
+    assert set(graph.timings) == {"slow", "after", "inline"}
+    assert graph.timings["slow"] >= 50
+
+
+def test_failure_skips_dependents_and_reraises():
+    ran = []
+
+    def boom():
+        raise ValueError("stt failed")
+
+    graph = StageGraph()
+    graph.add("fail", boom)
+    graph.add("other", lambda: ran.append("other"))
+    graph.add("dependent", lambda fail: ran.append("dependent"), deps=["fail"])
+
+    with pytest.raises(ValueError, match="stt failed"):
+        graph.run()
+    assert "dependent" not in ran
+
+
+def test_unknown_dependency_rejected():
+    graph = StageGraph()
+    with pytest.raises(ValueError, match="unknown stages"):
+        graph.add("b", lambda a: a, deps=["a"])
@@ -0,0 +1,74 @@
+"""
+Tests for per-tenant partial HNSW index planning and sync.
+"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.db import models
+from app.services import tenant_vector_index_service
+from app.services.tenant_vector_index_service import TenantVectorIndexService
+
+
+@pytest.fixture
+def tenants(db_session):
+    prefix = f"tvi_{uuid.uuid4().hex[:6]}"
+    big, shrunk, steady = (f"{prefix}_{name}" for name in ("big", "shrunk", "steady"))
+    for user_id, notes in ((big, 4), (shrunk, 1), (steady, 2)):
+        db_session.add(models.User(id=user_id, email=f"{user_id}@tvi.test", name=user_id))
+        for i in range(notes):
+            db_session.add(models.Note(id=f"{user_id}_{i}", user_id=user_id, title="n", summary="s", embedding="[1, 0]"))
+    # Deleted and unembedded notes do not count
+    db_session.add(models.Note(id=f"{shrunk}_del", user_id=shrunk, title="n", summary="s", embedding="[1, 0]", is_deleted=True))
+    db_session.add(models.Note(id=f"{shrunk}_raw", user_id=shrunk, title="n", summary="s"))
+    for user_id in (shrunk, steady):
+        db_session.add(
+            models.TenantVectorIndex(
+                user_id=user_id, index_name=TenantVectorIndexService.index_name(user_id), note_count=4
+            )
+        )
+    db_session.commit()
+    return big, shrunk, steady
+
+
+def test_plan_builds_for_large_tenants_and_drops_below_half(db_session, tenants):
+    big, shrunk, steady = tenants
+
+    plan = TenantVectorIndexService(db_session, min_notes=4).plan()
+
+    assert plan["create"] == [(big, 4)]
+    # `steady` is under the threshold but above half of it: kept
+    assert [row.user_id for row in plan["drop"]] == [shrunk]
+
+
+def test_sync_runs_concurrent_ddl_and_tracks_indexes(db_session, tenants):
+    big, shrunk, steady = tenants
+    statements = []
+    service = TenantVectorIndexService(db_session, min_notes=4)
+
+    with patch.object(tenant_vector_index_service, "uses_postgres", return_value=True), patch.object(
+        service, "_execute_ddl", side_effect=statements.append
+    ):
+        result = service.sync()
+
+    name = TenantVectorIndexService.index_name(big)
+    assert result == {"create": [big], "drop": [shrunk], "failed": []}
+    assert statements[1].startswith(f"CREATE INDEX CONCURRENTLY {name} ON notes USING hnsw")
+    assert statements[1].endswith(f"WHERE user_id = '{big}'")
+    assert statements[2].startswith("DROP INDEX CONCURRENTLY IF EXISTS idx_notes_embedding_u_")
+    tracked = {row.user_id for row in db_session.query(models.TenantVectorIndex)}
+    assert {big, steady} <= tracked and shrunk not in tracked
+    assert len(name) <= 63
+
+
+def test_dry_run_changes_nothing(db_session, tenants):
+    big, shrunk, _ = tenants
+
+    with patch.object(TenantVectorIndexService, "_execute_ddl") as ddl:
+        result = TenantVectorIndexService(db_session, min_notes=4).sync(dry_run=True)
+
+    assert result["create"] == [big]
+    ddl.assert_not_called()
+    assert db_session.get(models.TenantVectorIndex, shrunk) is not None
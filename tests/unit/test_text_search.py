@@ -0,0 +1,64 @@
+"""
+Tests for indexed autocomplete / keyword search helpers and their SQLite fallback.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import models
+from app.services.auth_service import create_access_token
+from app.services.note_service import NoteService
+from app.services.text_search import like_pattern, prefix_tsquery, task_search_vector, tsquery
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(id=f"fts_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@fts.test", name="FTS")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def test_prefix_tsquery_and_like_escaping():
+    assert prefix_tsquery("Proj  upd!") == "proj:* & upd:*"
+    assert prefix_tsquery("  ?! ") is None
+    assert like_pattern("50%_off") == "%50\\%\\_off%"
+    assert like_pattern("50%", prefix_only=True) == "50\\%%"
+
+
+def test_task_fts_condition_compiles_for_postgres():
+    ts = tsquery(prefix_tsquery("proj upd"))
+    compiled = task_search_vector.op("@@")(ts).compile(dialect=postgresql.dialect())
+
+    assert str(compiled).startswith("tasks.search_vector @@ to_tsquery(")
+    assert sorted(compiled.params.values()) == ["proj:* & upd:*", "simple"]
+
+
+def test_autocomplete_ranks_prefix_matches_first(db_session, user):
+    for title in ("Weekly project sync", "Project kickoff", "Projects", "Budget 100% done", "Unrelated"):
+        db_session.add(models.Note(id=str(uuid.uuid4()), user_id=user.id, title=title, summary="s"))
+    db_session.commit()
+
+    assert NoteService.search_autocomplete(db_session, user, " project ") == [
+        "Projects",
+        "Project kickoff",
+        "Weekly project sync",
+    ]
+    # Wildcards in the query are literal
+    assert NoteService.search_autocomplete(db_session, user, "100%") == ["Budget 100% done"]
+    assert NoteService.search_autocomplete(db_session, user, "_") == []
+
+
+def test_task_search_falls_back_to_substring_match(client, db_session, user):
+    db_session.add(models.Task(id="t_b", user_id=user.id, description="Update the project plan"))
+    db_session.add(models.Task(id="t_a", user_id=user.id, description="Call the projector vendor"))
+    db_session.add(models.Task(id="t_c", user_id=user.id, description="Something else"))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+    response = client.get("/api/v1/tasks/search", params={"query_text": "project"}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert [t["id"] for t in response.json()] == ["t_a", "t_b"]
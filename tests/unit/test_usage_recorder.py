@@ -0,0 +1,127 @@
+"""
+Tests for buffered usage metering (ring buffer + batched writer).
+"""
+
+import uuid
+
+import pytest
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.auth_service import create_access_token
+from app.services.usage_recorder import UsageEvent, UsageRecorder, get_usage_recorder
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(id=f"usage_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@usage.test", name="Usage")
+    db_session.add(user)
+    db_session.add(models.Wallet(user_id=user.id, balance=10))
+    db_session.commit()
+    return user
+
+
+def _recorder(**kwargs):
+    # Long interval: tests flush explicitly
+    return UsageRecorder(flush_interval_ms=60_000, flush_max_events=10_000, **kwargs)
+
+
+def _event(user_id, cost=1, status=200, **kwargs):
+    return UsageEvent(user_id=user_id, endpoint="/api/v1/notes", status=status, cost=cost, **kwargs)
+
+
+def test_batch_is_one_debit_and_one_transaction_per_wallet(db_session, user):
+    recorder = _recorder()
+    for _ in range(4):
+        recorder.record(_event(user.id, cost=2))
+    recorder.record(_event(user.id, cost=5, status=500))
+
+    assert recorder.flush() == 5
+
+    db_session.expire_all()
+    assert db_session.get(models.Wallet, user.id).balance == 2
+    transactions = db_session.query(models.Transaction).filter_by(wallet_id=user.id).all()
+    assert [t.amount for t in transactions] == [-8]
+    logs = db_session.query(models.UsageLog).filter_by(user_id=user.id).all()
+    assert len(logs) == 5
+    assert sorted(log.cost_estimated for log in logs) == [0, 2, 2, 2, 2]
+    assert db_session.get(models.User, user.id).usage_stats["last_usage_at"]
+
+
+def test_charges_never_take_a_wallet_below_zero(db_session, user):
+    recorder = _recorder()
+    for cost in (6, 6, 4):
+        recorder.record(_event(user.id, cost=cost))
+
+    recorder.flush()
+
+    db_session.expire_all()
+    assert db_session.get(models.Wallet, user.id).balance == 0
+    logs = db_session.query(models.UsageLog).filter_by(user_id=user.id).all()
+    assert sorted(log.cost_estimated for log in logs) == [0, 4, 6]
+
+
+def test_corporate_wallet_is_charged(db_session, user):
+    db_session.add(models.Wallet(user_id="corp_wallet", balance=100))
+    db_session.commit()
+    recorder = _recorder()
+    recorder.record(_event(user.id, cost=3, corporate_wallet_id="corp_wallet"))
+
+    recorder.flush()
+
+    db_session.expire_all()
+    assert db_session.get(models.Wallet, "corp_wallet").balance == 97
+    assert db_session.get(models.Wallet, user.id).balance == 10
+
+
+def test_failed_flush_requeues_then_succeeds(db_session, user):
+    calls = {"n": 0}
+
+    def flaky_session():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise ConnectionError("db down")
+        return SessionLocal()
+
+    recorder = _recorder(session_factory=flaky_session)
+    recorder.record(_event(user.id))
+
+    assert recorder.flush() == 0
+    assert len(recorder) == 1
+    assert recorder.flush() == 1
+    assert recorder.stats()["failed_flushes"] == 1
+
+
+def test_ring_buffer_drops_oldest_when_full(user):
+    recorder = _recorder(capacity=2)
+    for cost in (1, 2, 3):
+        recorder.record(_event(user.id, cost=cost))
+
+    assert [e.cost for e in recorder._buffer] == [2, 3]
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_close_flushes_and_later_events_write_inline(db_session, user):
+    recorder = _recorder()
+    recorder.record(_event(user.id))
+
+    recorder.close()
+    recorder.record(_event(user.id))
+
+    assert len(recorder) == 0
+    assert db_session.query(models.UsageLog).filter_by(user_id=user.id).count() == 2
+
+
+def test_middleware_records_api_calls(client, user):
+    token = create_access_token({"sub": user.id})
+    recorder = get_usage_recorder()
+    recorder.flush()
+
+    response = client.get("/api/v1/notes", headers={"Authorization": f"Bearer {token}"})
+    recorder.flush()
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        log = db.query(models.UsageLog).filter_by(user_id=user.id).one()
+    assert log.endpoint == "/api/v1/notes"
+    assert log.status == 200
@@ -0,0 +1,95 @@
+"""
+Tests for search profiles, filtered-ANN over-fetch and per-profile recall.
+"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import Query
+
+from app.db import models
+from app.services import vector_search
+from app.services.auth_service import create_access_token
+
+
+@pytest.fixture
+def user(db_session):
+    user = models.User(id=f"vs_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@vs.test", name="VS")
+    db_session.add(user)
+    for i in range(3):
+        db_session.add(models.Note(id=f"{user.id}_{i}", user_id=user.id, title=f"n{i}", summary="s", embedding="[1, 0]"))
+    db_session.add(models.Note(id=f"{user.id}_raw", user_id=user.id, title="raw", summary="s"))
+    db_session.add(models.Note(id=f"{user.id}_del", user_id=user.id, title="del", summary="s", embedding="[1, 0]", is_deleted=True))
+    db_session.commit()
+    return user
+
+
+def _scoped(db_session, user):
+    return db_session.query(models.Note.id).filter(
+        models.Note.user_id == user.id, models.Note.is_deleted == False
+    )
+
+
+def _nearest_on_postgres(db_session, user, limit, profile, candidates_per_ef=None):
+    """`candidates_per_ef` simulates an ANN scan whose filters keep ef_search // it rows."""
+    applied = []
+    real_all = Query.all
+
+    def scan(query):
+        rows = real_all(query)
+        return rows[: applied[-1] // candidates_per_ef] if candidates_per_ef else rows
+
+    with patch.object(vector_search, "uses_postgres", return_value=True), patch.object(
+        vector_search, "set_ef_search", side_effect=lambda db, ef: applied.append(ef)
+    ), patch.object(Query, "all", scan):
+        rows = vector_search.nearest(_scoped(db_session, user), [1, 0], limit, profile=profile)
+    return rows, applied
+
+
+def test_short_filtered_result_widens_ef_search(db_session, user):
+    rows, applied = _nearest_on_postgres(db_session, user, 5, "balanced", candidates_per_ef=100)
+
+    # Notes without a vector never count as candidates: 3 available, found at 300+
+    assert sorted(row.id for row in rows) == [f"{user.id}_{i}" for i in range(3)]
+    assert applied == [100, 200, 400]
+
+
+def test_small_tenant_is_not_rescanned(db_session, user):
+    rows, applied = _nearest_on_postgres(db_session, user, 10, "accurate")
+
+    # Fewer embedded notes than `limit` is not a sign of filtered-out candidates
+    assert len(rows) == 3
+    assert applied == [200]
+
+
+def test_full_result_needs_one_scan(db_session, user):
+    rows, applied = _nearest_on_postgres(db_session, user, 2, "fast")
+
+    assert len(rows) == 2
+    assert applied == [40]
+
+
+def test_max_distance_is_applied_after_the_scan(db_session, user):
+    rows = vector_search.nearest(_scoped(db_session, user), [1, 0], 5, max_distance=0.0)
+
+    assert rows == []
+    with pytest.raises(ValueError):
+        vector_search.get_profile("exhaustive")
+
+
+def test_measure_recall_scores_every_profile_against_exact(db_session, user):
+    results = vector_search.measure_recall(db_session, [(user.id, [1, 0])], k=3)
+
+    assert set(results) == set(vector_search.PROFILES)
+    assert all(result.recall_at_k[3] == 1.0 for result in results.values())
+
+
+def test_search_endpoint_rejects_unknown_profile(client, user):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+    response = client.post(
+        "/api/v1/ai/search", json={"query": "budget", "profile": "exhaustive"}, headers=headers
+    )
+
+    assert response.status_code == 422
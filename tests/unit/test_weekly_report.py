@@ -0,0 +1,186 @@
+"""
+Tests for the chunked weekly report fan-out.
+"""
+
+import time
+import uuid
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from app.db import models
+from app.services.weekly_report_service import WeeklyReportService
+from app.worker import task as worker_task
+
+
+class FakeStore(dict):
+    """The subset of the Redis client the service uses."""
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self:
+            return None
+        self[key] = value
+        return True
+
+    def delete(self, key):
+        self.pop(key, None)
+
+    def exists(self, key):
+        return int(key in self)
+
+    def multi(self):
+        pass
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        # Single-threaded, so the watched keys never change under the callable
+        value = func(self)
+        return value if value_from_callable else [True]
+
+
+@pytest.fixture
+def users(db_session):
+    prefix = f"wr_{uuid.uuid4().hex[:6]}"
+    now = int(time.time() * 1000)
+    ids = [f"{prefix}_{i}" for i in range(5)]
+    for i, user_id in enumerate(ids):
+        db_session.add(
+            models.User(
+                id=user_id,
+                email=f"{user_id}@wr.test",
+                name=f"U{i}",
+                # u1 has no device to notify; u4 is deleted
+                authorized_devices=[] if i == 1 else [{"biometric_token": f"tok_{i}"}],
+                is_deleted=i == 4,
+            )
+        )
+    db_session.add(models.Note(id=f"{prefix}_n0", user_id=ids[0], title="n", summary="s", timestamp=now))
+    db_session.add(models.Note(id=f"{prefix}_n1", user_id=ids[0], title="n", summary="s", timestamp=now - 30 * 86400000))
+    db_session.add(models.Task(id=f"{prefix}_t0", user_id=ids[0], description="t", is_done=True, updated_at=now))
+    db_session.add(
+        models.Task(id=f"{prefix}_t1", user_id=ids[2], description="t", priority=models.Priority.HIGH, updated_at=now)
+    )
+    db_session.commit()
+    return ids
+
+
+def test_next_wave_walks_active_users_by_keyset(db_session, users):
+    service = WeeklyReportService(week="2026-W42", chunk_size=2, wave_chunks=1, checkpoint_store=FakeStore())
+
+    assert service.next_wave(db_session, None) == [(None, users[1])]
+    service.wave_chunks = 5
+    assert service.next_wave(db_session, users[1]) == [(users[1], users[3])]
+    assert service.next_wave(db_session, users[3]) == []
+
+
+def test_build_reports_counts_a_chunk_with_grouped_queries(db_session, users):
+    since = int(time.time() * 1000) - 7 * 86400000
+
+    count, messages = WeeklyReportService.build_reports(db_session, None, users[4], since)
+
+    assert count == 4
+    by_token = {m["token"]: m for m in messages}
+    assert set(by_token) == {"tok_0", "tok_2", "tok_3"}
+    assert by_token["tok_0"]["data"] == {
+        "type": "WEEKLY_REPORT",
+        "notes": "1",
+        "tasks_completed": "1",
+        "high_priority_open": "0",
+    }
+    assert "1 high priority tasks are still open" in by_token["tok_2"]["body"]
+
+
+def test_report_task_fans_out_in_waves_and_resumes(db_session, users):
+    store = FakeStore()
+    service = partial(WeeklyReportService, chunk_size=1, wave_chunks=2, checkpoint_store=store)
+    report_task = worker_task.generate_productivity_report_task
+
+    with patch.object(worker_task, "WeeklyReportService", service), patch.object(
+        worker_task.send_push_batch, "delay"
+    ) as push, patch.object(report_task, "delay") as next_wave:
+        # Two waves of two chunks, then the run that finds no users left
+        for _ in range(3):
+            report_task.run(week="2026-W42")
+        state = service(week="2026-W42").load_checkpoint()
+
+        # Re-running a finished week sends nothing
+        report_task.run(week="2026-W42")
+
+    assert next_wave.call_count == 2
+    assert state["complete"] and state["last_id"] == users[3]
+    assert (state["users"], state["notified"], state["failed_chunks"]) == (4, 3, [])
+    assert sorted(m["token"] for call in push.call_args_list for m in call.args[0]) == ["tok_0", "tok_2", "tok_3"]
+
+
+def test_redelivered_chunk_is_not_sent_twice(db_session, users):
+    store = FakeStore()
+    service = partial(WeeklyReportService, checkpoint_store=store)
+
+    with patch.object(worker_task, "WeeklyReportService", service), patch.object(
+        worker_task.send_push_batch, "delay"
+    ) as push:
+        first = worker_task.weekly_report_chunk_task.run("2026-W42", None, users[4], 0)
+        again = worker_task.weekly_report_chunk_task.run("2026-W42", None, users[4], 0)
+
+    assert (first["users"], first["notified"]) == (4, 3)
+    assert again == {"users": 0, "notified": 0}
+    push.assert_called_once()
+
+
+def test_failed_chunk_is_retried_after_the_last_wave(db_session, users):
+    store = FakeStore()
+    service = partial(WeeklyReportService, chunk_size=2, wave_chunks=2, checkpoint_store=store)
+    report_task = worker_task.generate_productivity_report_task
+    build_reports = WeeklyReportService.build_reports
+    calls = []
+
+    def flaky_build(db, after_id, last_id, since):
+        calls.append(after_id)
+        if calls.count(after_id) == 1 and after_id is None:
+            raise RuntimeError("db went away")
+        return build_reports(db, after_id, last_id, since)
+
+    with patch.object(worker_task, "WeeklyReportService", service), patch.object(
+        WeeklyReportService, "build_reports", staticmethod(flaky_build)
+    ), patch.object(worker_task.send_push_batch, "delay") as push, patch.object(report_task, "delay"):
+        # The wave, the retry pass of the first chunk, then completion
+        for _ in range(3):
+            report_task.run(week="2026-W42")
+        state = service(week="2026-W42").load_checkpoint()
+
+    assert calls == [None, users[1], None]
+    assert state["complete"] and state["last_id"] == users[3]
+    assert (state["users"], state["notified"], state["failed_chunks"], state["retry_passes"]) == (4, 3, [], 1)
+    assert sorted(m["token"] for call in push.call_args_list for m in call.args[0]) == ["tok_0", "tok_2", "tok_3"]
+
+
+def test_chunk_of_a_dead_worker_is_sent_once_its_lease_expires(db_session, users):
+    store = FakeStore()
+    service = partial(WeeklyReportService, checkpoint_store=store)
+    # A worker claimed the chunk and died before queueing anything
+    service(week="2026-W42").claim_chunk(None)
+
+    with patch.object(worker_task, "WeeklyReportService", service), patch.object(
+        worker_task.send_push_batch, "delay"
+    ) as push:
+        held = worker_task.weekly_report_chunk_task.run("2026-W42", None, users[4], 0)
+        service(week="2026-W42").release_chunk(None)  # The lease expires
+        retried = worker_task.weekly_report_chunk_task.run("2026-W42", None, users[4], 0)
+
+    assert held == {"failed": True, "bounds": [None, users[4]]}
+    assert (retried["users"], retried["notified"]) == (4, 3)
+    push.assert_called_once()
+
+
+def test_chunk_is_not_marked_sent_when_queueing_fails(db_session, users):
+    store = FakeStore()
+    service = partial(WeeklyReportService, checkpoint_store=store)
+
+    with patch.object(worker_task, "WeeklyReportService", service), patch.object(
+        worker_task.send_push_batch, "delay", side_effect=ConnectionError("broker down")
+    ):
+        result = worker_task.weekly_report_chunk_task.run("2026-W42", None, users[4], 0)
+
+    assert result == {"failed": True, "bounds": [None, users[4]]}
+    assert not service(week="2026-W42").chunk_sent(None)
+    assert service(week="2026-W42").claim_chunk(None)